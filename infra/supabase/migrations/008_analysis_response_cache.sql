@@ -0,0 +1,54 @@
+-- Migration: Cache partagé des réponses composites (combined analysis)
+-- Une ligne par (endpoint, version, ticker), partagée entre utilisateurs et instances Lambda.
+-- Stale-while-revalidate : servie telle quelle jusqu'à fresh_until, servie "stale" avec
+-- rafraîchissement en arrière-plan jusqu'à expires_at, recalculée au-delà.
+
+CREATE TABLE IF NOT EXISTS analysis_cache (
+  cache_key TEXT PRIMARY KEY, -- '<endpoint>:<version>:<ticker>'
+  endpoint TEXT NOT NULL,
+  version TEXT NOT NULL,
+  ticker TEXT NOT NULL,
+  data JSONB NOT NULL,
+  computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  fresh_until TIMESTAMPTZ NOT NULL,
+  expires_at TIMESTAMPTZ NOT NULL,
+  refreshing_until TIMESTAMPTZ -- bail de rafraîchissement (une seule instance recalcule)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_ticker ON analysis_cache(ticker);
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_expires ON analysis_cache(expires_at);
+
+COMMENT ON TABLE analysis_cache IS 'Cache stale-while-revalidate des réponses combined-analysis (complete, divergence, valuation)';
+
+ALTER TABLE analysis_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage analysis_cache" ON analysis_cache;
+CREATE POLICY "Service role can manage analysis_cache" ON analysis_cache
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+-- Acquérir le bail de rafraîchissement de manière atomique
+-- Retourne TRUE si l'appelant doit recalculer l'entrée
+CREATE OR REPLACE FUNCTION claim_analysis_cache_refresh(p_cache_key TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+  claimed BOOLEAN;
+BEGIN
+  UPDATE analysis_cache
+     SET refreshing_until = NOW() + make_interval(secs => p_lease_seconds)
+   WHERE cache_key = p_cache_key
+     AND (refreshing_until IS NULL OR refreshing_until < NOW())
+  RETURNING TRUE INTO claimed;
+
+  RETURN COALESCE(claimed, FALSE);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Nettoyage des entrées expirées (peut être appelé par un cron job)
+CREATE OR REPLACE FUNCTION cleanup_expired_analysis_cache()
+RETURNS void AS $$
+BEGIN
+  DELETE FROM analysis_cache WHERE expires_at < NOW();
+END;
+$$ LANGUAGE plpgsql;
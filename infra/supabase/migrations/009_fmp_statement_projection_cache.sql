@@ -0,0 +1,33 @@
+-- Migration: Cache des états financiers FMP projetés
+-- Seuls les champs déclarés par le service appelant sont stockés, au format colonnes
+-- ({ fields, length, columns: { champ: [valeurs...] } }) au lieu du payload FMP complet.
+
+CREATE TABLE IF NOT EXISTS fmp_statement_cache (
+  cache_key TEXT PRIMARY KEY, -- '<symbol>:<endpoint>:<period>:<limit>:<champs triés>'
+  symbol TEXT NOT NULL,
+  endpoint TEXT NOT NULL,
+  data JSONB NOT NULL,
+  cached_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_fmp_statement_cache_symbol ON fmp_statement_cache(symbol);
+CREATE INDEX IF NOT EXISTS idx_fmp_statement_cache_expires ON fmp_statement_cache(expires_at);
+
+COMMENT ON TABLE fmp_statement_cache IS 'Cache des états financiers FMP réduits aux champs utilisés (format colonnes)';
+
+ALTER TABLE fmp_statement_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage fmp_statement_cache" ON fmp_statement_cache;
+CREATE POLICY "Service role can manage fmp_statement_cache" ON fmp_statement_cache
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+-- Nettoyage des entrées expirées (peut être appelé par un cron job)
+CREATE OR REPLACE FUNCTION cleanup_expired_fmp_statement_cache()
+RETURNS void AS $$
+BEGIN
+  DELETE FROM fmp_statement_cache WHERE expires_at < NOW();
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,64 @@
+-- Migration: Bundles de données préchauffés par ticker + popularité des tickers
+-- Le job planifié ticker-warmup récupère une fois par cycle les données partagées
+-- (quote, flows, dark pool, short interest, insiders, greeks, max pain) des tickers
+-- surveillés, alertés et populaires ; surveillance, alertes et scoring les lisent ici.
+
+CREATE TABLE IF NOT EXISTS ticker_data_bundles (
+  ticker TEXT PRIMARY KEY,
+  data JSONB NOT NULL DEFAULT '{}'::jsonb, -- { source: payload }
+  errors TEXT[] NOT NULL DEFAULT '{}', -- sources en échec au dernier préchauffage
+  priority INTEGER NOT NULL DEFAULT 0,
+  fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ticker_data_bundles_expires ON ticker_data_bundles(expires_at);
+
+COMMENT ON TABLE ticker_data_bundles IS 'Données amont partagées par ticker, préchauffées par le job ticker-warmup';
+
+-- Trafic interactif par ticker (priorité du préchauffage)
+CREATE TABLE IF NOT EXISTS ticker_traffic (
+  ticker TEXT PRIMARY KEY,
+  hits INTEGER NOT NULL DEFAULT 0,
+  last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ticker_traffic_last_seen ON ticker_traffic(last_seen_at DESC);
+
+ALTER TABLE ticker_data_bundles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ticker_traffic ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage ticker_data_bundles" ON ticker_data_bundles;
+CREATE POLICY "Service role can manage ticker_data_bundles" ON ticker_data_bundles
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage ticker_traffic" ON ticker_traffic;
+CREATE POLICY "Service role can manage ticker_traffic" ON ticker_traffic
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+-- Incrément atomique du compteur ; le compteur repart de 1 après 24h sans requête
+CREATE OR REPLACE FUNCTION record_ticker_hit(p_ticker TEXT)
+RETURNS void AS $$
+BEGIN
+  INSERT INTO ticker_traffic (ticker, hits, last_seen_at)
+  VALUES (UPPER(p_ticker), 1, NOW())
+  ON CONFLICT (ticker) DO UPDATE
+    SET hits = CASE
+                 WHEN ticker_traffic.last_seen_at < NOW() - INTERVAL '24 hours' THEN 1
+                 ELSE ticker_traffic.hits + 1
+               END,
+        last_seen_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Nettoyage des bundles expirés (peut être appelé par un cron job)
+CREATE OR REPLACE FUNCTION cleanup_expired_ticker_bundles()
+RETURNS void AS $$
+BEGIN
+  DELETE FROM ticker_data_bundles WHERE expires_at < NOW() - INTERVAL '1 day';
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,23 @@
+-- Migration: Cache des agrégats fondamentaux par secteur
+-- PE et croissance du CA par ticker, moyennes et médianes du secteur.
+-- Recalculé par le job planifié sector-metrics ; les pages secteur ne font plus
+-- que l'appel de sentiment et un /batch-quote pour les prix.
+
+CREATE TABLE IF NOT EXISTS sector_metrics_cache (
+  sector TEXT PRIMARY KEY, -- nom du secteur en majuscules
+  data JSONB NOT NULL, -- SectorMetrics
+  cached_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sector_metrics_cache_expires ON sector_metrics_cache(expires_at);
+
+COMMENT ON TABLE sector_metrics_cache IS 'Agrégats fondamentaux par secteur (médianes PE / croissance), rafraîchis par le job sector-metrics';
+
+ALTER TABLE sector_metrics_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage sector_metrics_cache" ON sector_metrics_cache;
+CREATE POLICY "Service role can manage sector_metrics_cache" ON sector_metrics_cache
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
@@ -0,0 +1,94 @@
+-- Migration: Stockage durable des alertes multi-signaux et des surveillances
+-- Remplace les Maps en mémoire de AlertService / SurveillanceService : l'état survit aux
+-- cold starts et est partagé entre instances Lambda. Index partiels sur les lignes
+-- actives par ticker pour l'évaluation groupée (un bundle de données par ticker).
+
+-- ============================================
+-- Alertes multi-signaux
+-- ============================================
+CREATE TABLE IF NOT EXISTS user_alerts (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id TEXT NOT NULL,
+  ticker TEXT, -- NULL = alerte globale
+  name TEXT NOT NULL,
+  description TEXT,
+  conditions JSONB NOT NULL DEFAULT '[]'::jsonb,
+  logic TEXT NOT NULL DEFAULT 'AND' CHECK (logic IN ('AND', 'OR')),
+  notification_channels TEXT[] NOT NULL DEFAULT ARRAY['webhook'],
+  active BOOLEAN NOT NULL DEFAULT TRUE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_checked TIMESTAMPTZ,
+  last_triggered TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_alerts_user ON user_alerts(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_user_alerts_active_ticker ON user_alerts(ticker)
+  WHERE active = TRUE AND ticker IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS alert_triggers (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  alert_id UUID NOT NULL REFERENCES user_alerts(id) ON DELETE CASCADE,
+  ticker TEXT,
+  triggered_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  data JSONB NOT NULL DEFAULT '{}'::jsonb,
+  triggered_conditions JSONB NOT NULL DEFAULT '[]'::jsonb,
+  read BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_triggers_alert ON alert_triggers(alert_id, triggered_at DESC);
+
+-- ============================================
+-- Surveillances
+-- ============================================
+CREATE TABLE IF NOT EXISTS surveillance_watches (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id TEXT NOT NULL,
+  ticker TEXT NOT NULL,
+  config JSONB NOT NULL,
+  active BOOLEAN NOT NULL DEFAULT TRUE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_checked TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_surveillance_watches_user ON surveillance_watches(user_id)
+  WHERE active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_surveillance_watches_active_ticker ON surveillance_watches(ticker)
+  WHERE active = TRUE;
+
+CREATE TABLE IF NOT EXISTS surveillance_alerts (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  watch_id UUID NOT NULL REFERENCES surveillance_watches(id) ON DELETE CASCADE,
+  ticker TEXT NOT NULL,
+  type TEXT NOT NULL,
+  message TEXT NOT NULL,
+  data JSONB NOT NULL DEFAULT '{}'::jsonb,
+  triggered_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  read BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_surveillance_alerts_watch ON surveillance_alerts(watch_id, triggered_at DESC);
+
+-- ============================================
+-- RLS (accès via la service key de l'API)
+-- ============================================
+ALTER TABLE user_alerts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE alert_triggers ENABLE ROW LEVEL SECURITY;
+ALTER TABLE surveillance_watches ENABLE ROW LEVEL SECURITY;
+ALTER TABLE surveillance_alerts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage user_alerts" ON user_alerts;
+CREATE POLICY "Service role can manage user_alerts" ON user_alerts
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage alert_triggers" ON alert_triggers;
+CREATE POLICY "Service role can manage alert_triggers" ON alert_triggers
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage surveillance_watches" ON surveillance_watches;
+CREATE POLICY "Service role can manage surveillance_watches" ON surveillance_watches
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage surveillance_alerts" ON surveillance_alerts;
+CREATE POLICY "Service role can manage surveillance_alerts" ON surveillance_alerts
+    FOR ALL USING (true) WITH CHECK (true);
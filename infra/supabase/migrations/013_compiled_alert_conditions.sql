@@ -0,0 +1,8 @@
+-- Migration: Conditions d'alerte compilées
+-- Les conditions sont compilées à la création / mise à jour (index de feature, opcode,
+-- seuil) ; le job alerts-check évalue toutes les alertes actives en un seul lot.
+-- Les lignes existantes (compiled NULL) sont compilées à la volée lors de l'évaluation.
+
+ALTER TABLE user_alerts ADD COLUMN IF NOT EXISTS compiled JSONB;
+
+COMMENT ON COLUMN user_alerts.compiled IS 'Programme compilé des conditions (CompiledAlertProgram), NULL = à compiler à la volée';
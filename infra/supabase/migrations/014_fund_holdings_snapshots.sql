@@ -0,0 +1,26 @@
+-- Migration: Snapshots des positions des hedge funds
+-- Les positions 13F ne changent qu'à chaque nouveau dépôt : performance et top positions
+-- sont calculées une fois par (institution, date de rapport) et relues par le classement
+-- /smart-money/top-hedge-funds. Rafraîchi par le job planifié smart-money-snapshots.
+
+CREATE TABLE IF NOT EXISTS fund_holdings_snapshots (
+  institution TEXT NOT NULL, -- nom UW de l'institution
+  report_date DATE NOT NULL, -- fin de période du 13F
+  total_value NUMERIC NOT NULL DEFAULT 0,
+  holdings_count INTEGER NOT NULL DEFAULT 0,
+  performance NUMERIC NOT NULL DEFAULT 0,
+  top_positions JSONB NOT NULL DEFAULT '[]'::jsonb, -- TopPosition[]
+  computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (institution, report_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fund_holdings_snapshots_latest
+  ON fund_holdings_snapshots(institution, report_date DESC);
+
+COMMENT ON TABLE fund_holdings_snapshots IS 'Performance et top positions par fonds et date de rapport 13F (classement smart money)';
+
+ALTER TABLE fund_holdings_snapshots ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage fund_holdings_snapshots" ON fund_holdings_snapshots;
+CREATE POLICY "Service role can manage fund_holdings_snapshots" ON fund_holdings_snapshots
+    FOR ALL USING (true) WITH CHECK (true);
@@ -0,0 +1,167 @@
+-- Migration: Séries temporelles des flows d'options, prints dark pool et expositions grecques
+-- Tables append-only partitionnées par mois (trade_date), colonnes typées compactes.
+-- Alimentées par le job planifié timeseries-collect ; les services lisent des fenêtres
+-- (ticker, intervalle de temps) au lieu de re-télécharger et re-parser le JSON UW.
+
+-- ============================================
+-- Flow alerts (une ligne par alerte UW)
+-- ============================================
+CREATE TABLE IF NOT EXISTS ts_flow_alerts (
+  ticker TEXT NOT NULL,
+  trade_date DATE NOT NULL,
+  executed_at TIMESTAMPTZ NOT NULL,
+  option_chain TEXT NOT NULL, -- ex: MSFT231222C00375000
+  is_call BOOLEAN NOT NULL,
+  strike REAL NOT NULL,
+  expiry DATE,
+  premium DOUBLE PRECISION NOT NULL DEFAULT 0,
+  ask_side_premium DOUBLE PRECISION NOT NULL DEFAULT 0,
+  size INTEGER NOT NULL DEFAULT 0,
+  volume INTEGER NOT NULL DEFAULT 0,
+  open_interest INTEGER NOT NULL DEFAULT 0,
+  underlying_price REAL,
+  is_sweep BOOLEAN NOT NULL DEFAULT FALSE,
+  alert_rule TEXT,
+  PRIMARY KEY (ticker, trade_date, executed_at, option_chain)
+) PARTITION BY RANGE (trade_date);
+
+CREATE INDEX IF NOT EXISTS idx_ts_flow_alerts_ticker_time ON ts_flow_alerts(ticker, executed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_ts_flow_alerts_time_brin ON ts_flow_alerts USING BRIN (executed_at);
+
+COMMENT ON TABLE ts_flow_alerts IS 'Historique append-only des flow alerts UW, partitionné par mois (trade_date)';
+
+-- ============================================
+-- Prints dark pool
+-- ============================================
+CREATE TABLE IF NOT EXISTS ts_dark_pool_prints (
+  ticker TEXT NOT NULL,
+  trade_date DATE NOT NULL,
+  executed_at TIMESTAMPTZ NOT NULL,
+  tracking_id BIGINT NOT NULL,
+  price REAL NOT NULL,
+  size INTEGER NOT NULL,
+  premium DOUBLE PRECISION NOT NULL DEFAULT 0,
+  canceled BOOLEAN NOT NULL DEFAULT FALSE,
+  PRIMARY KEY (ticker, trade_date, tracking_id)
+) PARTITION BY RANGE (trade_date);
+
+CREATE INDEX IF NOT EXISTS idx_ts_dark_pool_prints_ticker_time ON ts_dark_pool_prints(ticker, executed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_ts_dark_pool_prints_time_brin ON ts_dark_pool_prints USING BRIN (executed_at);
+
+COMMENT ON TABLE ts_dark_pool_prints IS 'Historique append-only des prints dark pool UW, partitionné par mois (trade_date)';
+
+-- ============================================
+-- Expositions grecques journalières
+-- ============================================
+CREATE TABLE IF NOT EXISTS ts_greek_exposures (
+  ticker TEXT NOT NULL,
+  trade_date DATE NOT NULL,
+  call_gamma DOUBLE PRECISION NOT NULL DEFAULT 0,
+  put_gamma DOUBLE PRECISION NOT NULL DEFAULT 0,
+  call_delta DOUBLE PRECISION NOT NULL DEFAULT 0,
+  put_delta DOUBLE PRECISION NOT NULL DEFAULT 0,
+  call_vanna DOUBLE PRECISION NOT NULL DEFAULT 0,
+  put_vanna DOUBLE PRECISION NOT NULL DEFAULT 0,
+  call_charm DOUBLE PRECISION NOT NULL DEFAULT 0,
+  put_charm DOUBLE PRECISION NOT NULL DEFAULT 0,
+  PRIMARY KEY (ticker, trade_date)
+) PARTITION BY RANGE (trade_date);
+
+COMMENT ON TABLE ts_greek_exposures IS 'Expositions grecques journalières UW par ticker, partitionné par mois (trade_date)';
+
+-- ============================================
+-- État du collecteur (fraîcheur par ticker et source)
+-- ============================================
+CREATE TABLE IF NOT EXISTS ts_collector_state (
+  ticker TEXT NOT NULL,
+  source TEXT NOT NULL CHECK (source IN ('flow_alerts', 'dark_pool', 'greek_exposure')),
+  last_collected_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  rows_appended INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (ticker, source)
+);
+
+COMMENT ON TABLE ts_collector_state IS 'Dernière collecte par ticker et source : une fenêtre n''est lue depuis le store que si la collecte est récente';
+
+-- ============================================
+-- Partitions mensuelles
+-- ============================================
+-- Partitions par défaut : lignes antérieures à la première partition mensuelle
+CREATE TABLE IF NOT EXISTS ts_flow_alerts_default PARTITION OF ts_flow_alerts DEFAULT;
+CREATE TABLE IF NOT EXISTS ts_dark_pool_prints_default PARTITION OF ts_dark_pool_prints DEFAULT;
+CREATE TABLE IF NOT EXISTS ts_greek_exposures_default PARTITION OF ts_greek_exposures DEFAULT;
+
+-- Créer les partitions du mois courant et des p_months_ahead mois suivants
+CREATE OR REPLACE FUNCTION ensure_ts_partitions(p_months_ahead INTEGER DEFAULT 1)
+RETURNS INTEGER AS $$
+DECLARE
+  v_table TEXT;
+  v_month DATE;
+  v_name TEXT;
+  v_created INTEGER := 0;
+BEGIN
+  FOREACH v_table IN ARRAY ARRAY['ts_flow_alerts', 'ts_dark_pool_prints', 'ts_greek_exposures'] LOOP
+    FOR i IN 0..p_months_ahead LOOP
+      v_month := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+      v_name := v_table || '_' || to_char(v_month, 'YYYYMM');
+      IF to_regclass(v_name) IS NULL THEN
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_table, v_month, (v_month + INTERVAL '1 month')::DATE
+        );
+        v_created := v_created + 1;
+      END IF;
+    END LOOP;
+  END LOOP;
+  RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rétention : supprimer les partitions mensuelles entièrement antérieures à p_before
+CREATE OR REPLACE FUNCTION drop_ts_partitions_before(p_before DATE)
+RETURNS INTEGER AS $$
+DECLARE
+  v_partition RECORD;
+  v_dropped INTEGER := 0;
+BEGIN
+  FOR v_partition IN
+    SELECT child.relname AS name
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname IN ('ts_flow_alerts', 'ts_dark_pool_prints', 'ts_greek_exposures')
+      AND child.relname ~ '_[0-9]{6}$'
+  LOOP
+    IF (to_date(right(v_partition.name, 6), 'YYYYMM') + INTERVAL '1 month')::DATE <= p_before THEN
+      EXECUTE format('DROP TABLE IF EXISTS %I', v_partition.name);
+      v_dropped := v_dropped + 1;
+    END IF;
+  END LOOP;
+  RETURN v_dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_ts_partitions(1);
+
+-- ============================================
+-- RLS
+-- ============================================
+ALTER TABLE ts_flow_alerts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ts_dark_pool_prints ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ts_greek_exposures ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ts_collector_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage ts_flow_alerts" ON ts_flow_alerts;
+CREATE POLICY "Service role can manage ts_flow_alerts" ON ts_flow_alerts
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage ts_dark_pool_prints" ON ts_dark_pool_prints;
+CREATE POLICY "Service role can manage ts_dark_pool_prints" ON ts_dark_pool_prints
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage ts_greek_exposures" ON ts_greek_exposures;
+CREATE POLICY "Service role can manage ts_greek_exposures" ON ts_greek_exposures
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage ts_collector_state" ON ts_collector_state;
+CREATE POLICY "Service role can manage ts_collector_state" ON ts_collector_state
+    FOR ALL USING (true) WITH CHECK (true);
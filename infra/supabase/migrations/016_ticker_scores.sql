@@ -0,0 +1,22 @@
+-- Migration: Scores composites précalculés par ticker
+-- Calculés par le job ticker-warmup à partir des bundles qu'il vient de rafraîchir
+-- (tickers les plus demandés), relus par GET /ticker-analysis/scores : une page de
+-- watchlist fait un seul appel au lieu d'un calcul par ticker.
+
+CREATE TABLE IF NOT EXISTS ticker_scores (
+  ticker TEXT PRIMARY KEY,
+  overall SMALLINT NOT NULL,
+  score JSONB NOT NULL, -- TickerScore complet (breakdown, signaux)
+  computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  fresh_until TIMESTAMPTZ NOT NULL -- expiration du bundle dont le score est issu
+);
+
+CREATE INDEX IF NOT EXISTS idx_ticker_scores_fresh_until ON ticker_scores(fresh_until);
+
+COMMENT ON TABLE ticker_scores IS 'Scores composites précalculés (scoring batch / watchlists), valides jusqu''à fresh_until';
+
+ALTER TABLE ticker_scores ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage ticker_scores" ON ticker_scores;
+CREATE POLICY "Service role can manage ticker_scores" ON ticker_scores
+    FOR ALL USING (true) WITH CHECK (true);
@@ -0,0 +1,46 @@
+-- Migration: Pagination par curseur et recherche plein texte des signaux
+-- GET /signals pagine sur (timestamp, id) au lieu d'un offset, et POST /search passe
+-- par search_signals qui utilise l'index GIN idx_signals_summary_fts avec classement.
+
+-- Ordre stable de la liste : (timestamp DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_signals_timestamp_id ON signals(timestamp DESC, id DESC);
+
+-- Recherche plein texte classée (même expression que idx_signals_summary_fts)
+-- raw_data n'est pas retourné : les résultats sont des aperçus, le détail passe par GET /signals/{id}
+CREATE OR REPLACE FUNCTION search_signals(p_query TEXT, p_limit INTEGER DEFAULT 20)
+RETURNS TABLE (
+  id UUID,
+  source TEXT,
+  type TEXT,
+  "timestamp" TIMESTAMPTZ,
+  summary TEXT,
+  importance_score INTEGER,
+  tags TEXT[],
+  impact TEXT,
+  priority TEXT,
+  processed_at TIMESTAMPTZ,
+  processing_status TEXT,
+  created_at TIMESTAMPTZ,
+  rank REAL
+) AS $$
+  SELECT
+    s.id,
+    s.source,
+    s.type,
+    s.timestamp,
+    s.summary,
+    s.importance_score,
+    s.tags,
+    s.impact,
+    s.priority,
+    s.processed_at,
+    s.processing_status,
+    s.created_at,
+    ts_rank(to_tsvector('english', COALESCE(s.summary, '')), q) AS rank
+  FROM signals s, websearch_to_tsquery('english', p_query) q
+  WHERE to_tsvector('english', COALESCE(s.summary, '')) @@ q
+  ORDER BY rank DESC, s.importance_score DESC NULLS LAST, s.timestamp DESC
+  LIMIT LEAST(GREATEST(p_limit, 1), 100);
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION search_signals IS 'Recherche plein texte classée dans signals.summary (index GIN idx_signals_summary_fts)';
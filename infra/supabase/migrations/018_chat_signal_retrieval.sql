@@ -0,0 +1,49 @@
+-- Migration: Récupération des signaux pour POST /chat
+-- Classement plein texte sur l'index GIN idx_signals_summary_fts, pondéré par la
+-- fraîcheur (demi-vie) et l'importance, borné à une fenêtre récente : le coût ne
+-- dépend pas de la taille totale de signals.
+
+CREATE OR REPLACE FUNCTION retrieve_signals(
+  p_query TEXT,
+  p_limit INTEGER DEFAULT 10,
+  p_half_life_hours DOUBLE PRECISION DEFAULT 72,
+  p_max_age_days INTEGER DEFAULT 90
+)
+RETURNS TABLE (
+  id UUID,
+  source TEXT,
+  type TEXT,
+  "timestamp" TIMESTAMPTZ,
+  summary TEXT,
+  importance_score INTEGER,
+  tags TEXT[],
+  impact TEXT,
+  priority TEXT,
+  score DOUBLE PRECISION
+) AS $$
+  -- Question en langage naturel : un mot suffit (OU), ts_rank_cd favorise les signaux qui en couvrent plusieurs
+  WITH q AS (
+    SELECT NULLIF(replace(plainto_tsquery('english', p_query)::TEXT, '&', '|'), '')::tsquery AS query
+  )
+  SELECT
+    s.id,
+    s.source,
+    s.type,
+    s.timestamp,
+    s.summary,
+    s.importance_score,
+    s.tags,
+    s.impact,
+    s.priority,
+    ts_rank_cd(to_tsvector('english', COALESCE(s.summary, '')), q.query)
+      * exp(-ln(2) * EXTRACT(EPOCH FROM (NOW() - s.timestamp)) / 3600 / GREATEST(p_half_life_hours, 1))
+      * (1 + COALESCE(s.importance_score, 5) / 10.0) AS score
+  FROM signals s, q
+  WHERE q.query IS NOT NULL
+    AND to_tsvector('english', COALESCE(s.summary, '')) @@ q.query
+    AND s.timestamp > NOW() - make_interval(days => p_max_age_days)
+  ORDER BY score DESC
+  LIMIT LEAST(GREATEST(p_limit, 1), 50);
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION retrieve_signals IS 'Signaux pertinents pour le chat : rang plein texte x décroissance temporelle x importance';
@@ -0,0 +1,23 @@
+-- Migration: Clé de dé-duplication des signaux par URL
+-- url_hash = md5(raw_data->>'url'), renseigné par les collecteurs. L'index unique
+-- (source, url_hash) permet de dé-dupliquer un lot entier en une requête in() et
+-- d'insérer avec ON CONFLICT DO NOTHING (upsert ignoreDuplicates).
+-- Les signaux sans URL gardent url_hash NULL (jamais en conflit).
+
+ALTER TABLE signals ADD COLUMN IF NOT EXISTS url_hash TEXT;
+
+-- Historique : seul le premier signal de chaque (source, url) reçoit le hash,
+-- les doublons déjà présents restent à NULL pour que l'index unique puisse être créé
+UPDATE signals s
+SET url_hash = md5(s.raw_data->>'url')
+FROM (
+  SELECT DISTINCT ON (source, raw_data->>'url') id
+  FROM signals
+  WHERE raw_data->>'url' IS NOT NULL AND url_hash IS NULL
+  ORDER BY source, raw_data->>'url', created_at, id
+) first_seen
+WHERE s.id = first_seen.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_signals_source_url_hash ON signals(source, url_hash);
+
+COMMENT ON COLUMN signals.url_hash IS 'md5(raw_data->>''url''), clé de dé-duplication des collecteurs (unique par source)';
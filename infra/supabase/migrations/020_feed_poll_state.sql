@@ -0,0 +1,21 @@
+-- Migration: État de polling des flux RSS / Atom EDGAR
+-- Une ligne par URL de flux : validateurs HTTP (ETag / Last-Modified) renvoyés en
+-- requête conditionnelle (304 = rien à parser) et identifiant de la dernière entrée
+-- vue (le parsing s'arrête dessus). Écrit par collector-rss, collector-sec-watcher
+-- et collector-sec-company-filings.
+
+CREATE TABLE IF NOT EXISTS feed_poll_state (
+  feed_url TEXT PRIMARY KEY,
+  etag TEXT,
+  last_modified TEXT, -- valeur brute de l'en-tête HTTP, renvoyée telle quelle
+  last_entry_id TEXT, -- entrée la plus récente traitée (lien RSS, accession number EDGAR)
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE feed_poll_state IS 'Validateurs HTTP et watermark de la dernière entrée traitée, par flux collecté';
+
+ALTER TABLE feed_poll_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage feed_poll_state" ON feed_poll_state;
+CREATE POLICY "Service role can manage feed_poll_state" ON feed_poll_state
+    FOR ALL USING (true) WITH CHECK (true);
@@ -0,0 +1,16 @@
+-- Migration: État de polling des flux par collecteur
+-- Les flux "latest filings" et index quotidiens EDGAR sont lus par plusieurs collecteurs
+-- (collector-sec-watcher, collector-sec-company-filings) : chacun garde ses propres
+-- validateurs et watermark, sinon le 304 obtenu par l'un masquerait les entrées à l'autre.
+
+ALTER TABLE feed_poll_state ADD COLUMN IF NOT EXISTS collector TEXT;
+
+-- Les flux Atom par CIK ne sont plus interrogés (découverte par flux globaux)
+DELETE FROM feed_poll_state WHERE feed_url LIKE '%action=getcompany%';
+UPDATE feed_poll_state SET collector = 'collector-rss' WHERE collector IS NULL;
+
+ALTER TABLE feed_poll_state ALTER COLUMN collector SET NOT NULL;
+ALTER TABLE feed_poll_state DROP CONSTRAINT IF EXISTS feed_poll_state_pkey;
+ALTER TABLE feed_poll_state ADD PRIMARY KEY (collector, feed_url);
+
+COMMENT ON COLUMN feed_poll_state.collector IS 'Worker propriétaire de l''état (un même flux peut être lu par plusieurs collecteurs)';
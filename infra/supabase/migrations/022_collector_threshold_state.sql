@@ -0,0 +1,22 @@
+-- Migration: État des seuils d'alerte des collecteurs
+-- Une ligne par (source, clé) — ex. coinglass / "funding:BTC:Binance". Un signal n'est
+-- émis qu'au franchissement du seuil (ou changement de sens) ; la clé est réarmée quand
+-- la valeur repasse sous le seuil. Évite de réémettre le même spike à chaque cycle.
+
+CREATE TABLE IF NOT EXISTS collector_threshold_state (
+  source TEXT NOT NULL,
+  key TEXT NOT NULL,
+  active BOOLEAN NOT NULL DEFAULT false, -- seuil franchi, signal déjà émis
+  direction SMALLINT NOT NULL DEFAULT 0, -- sens du dernier dépassement (1 / -1)
+  last_value DOUBLE PRECISION,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (source, key)
+);
+
+COMMENT ON TABLE collector_threshold_state IS 'Seuils franchis par clé (symbole, exchange) pour émettre un signal par dépassement et non par cycle';
+
+ALTER TABLE collector_threshold_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage collector_threshold_state" ON collector_threshold_state;
+CREATE POLICY "Service role can manage collector_threshold_state" ON collector_threshold_state
+    FOR ALL USING (true) WITH CHECK (true);
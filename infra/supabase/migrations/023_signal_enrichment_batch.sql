@@ -0,0 +1,59 @@
+-- Migration: Enrichissement IA des signaux par lots
+-- processor-ia (mode batch) réserve les signaux en attente par lots via l'index partiel
+-- idx_signals_processing_status, puis écrit tous les résultats d'un lot en un appel.
+
+-- Réserver jusqu'à p_limit signaux 'pending' (les plus anciens d'abord) en les passant à
+-- 'processing' ; SKIP LOCKED évite qu'une invocation concurrente prenne les mêmes
+CREATE OR REPLACE FUNCTION claim_pending_signals(p_limit INTEGER DEFAULT 50)
+RETURNS TABLE (
+  id UUID,
+  source TEXT,
+  type TEXT,
+  raw_data JSONB
+) AS $$
+  UPDATE signals s
+  SET processing_status = 'processing'
+  WHERE s.id IN (
+    SELECT p.id
+    FROM signals p
+    WHERE p.processing_status = 'pending'
+    ORDER BY p.created_at
+    LIMIT LEAST(GREATEST(p_limit, 1), 500)
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING s.id, s.source, s.type, s.raw_data;
+$$ LANGUAGE sql VOLATILE;
+
+COMMENT ON FUNCTION claim_pending_signals IS 'Réserve un lot de signaux en attente pour processor-ia (pending -> processing)';
+
+-- Écrire les enrichissements d'un lot : [{id, summary, importance_score, tags, impact, priority}]
+CREATE OR REPLACE FUNCTION complete_signal_enrichments(p_results JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE signals s
+  SET
+    summary = r.summary,
+    importance_score = r.importance_score,
+    tags = r.tags,
+    impact = r.impact,
+    priority = r.priority,
+    processed_at = NOW(),
+    processing_status = 'completed'
+  FROM jsonb_to_recordset(p_results) AS r(
+    id UUID,
+    summary TEXT,
+    importance_score INTEGER,
+    tags TEXT[],
+    impact TEXT,
+    priority TEXT
+  )
+  WHERE s.id = r.id;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION complete_signal_enrichments IS 'Mise à jour groupée des résultats d''enrichissement IA (processing -> completed)';
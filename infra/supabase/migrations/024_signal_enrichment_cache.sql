@@ -0,0 +1,56 @@
+-- Migration: Cache des enrichissements IA par empreinte de contenu
+-- processor-ia réutilise l'enrichissement d'un signal identique (fingerprint = md5 du
+-- contenu normalisé) ou quasi identique (signature MinHash, bandes LSH indexées en GIN)
+-- au lieu de rappeler le modèle. hits / tokens_saved mesurent les appels évités.
+
+CREATE TABLE IF NOT EXISTS signal_enrichment_cache (
+  fingerprint TEXT PRIMARY KEY,
+  minhash INTEGER[] NOT NULL, -- signature MinHash (64 valeurs)
+  bands TEXT[] NOT NULL, -- bandes LSH préfixées par source:type
+  enrichment JSONB NOT NULL, -- summary, importance_score, tags, impact, priority
+  cost_tokens INTEGER NOT NULL DEFAULT 0, -- tokens de l'appel modèle d'origine (par signal)
+  hits INTEGER NOT NULL DEFAULT 0,
+  tokens_saved BIGINT NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_hit_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_signal_enrichment_cache_bands ON signal_enrichment_cache USING gin(bands);
+CREATE INDEX IF NOT EXISTS idx_signal_enrichment_cache_created_at ON signal_enrichment_cache(created_at);
+
+COMMENT ON TABLE signal_enrichment_cache IS 'Enrichissements IA réutilisables par empreinte exacte ou quasi-doublon (MinHash/LSH)';
+
+ALTER TABLE signal_enrichment_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage signal_enrichment_cache" ON signal_enrichment_cache;
+CREATE POLICY "Service role can manage signal_enrichment_cache" ON signal_enrichment_cache
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- Candidats d'un lot : empreinte exacte ou au moins une bande LSH commune, encore frais
+CREATE OR REPLACE FUNCTION match_enrichment_cache(
+  p_fingerprints TEXT[],
+  p_bands TEXT[],
+  p_max_age_hours INTEGER DEFAULT 24
+)
+RETURNS SETOF signal_enrichment_cache AS $$
+  SELECT *
+  FROM signal_enrichment_cache c
+  WHERE c.created_at > NOW() - make_interval(hours => p_max_age_hours)
+    AND (c.fingerprint = ANY(p_fingerprints) OR c.bands && p_bands);
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION match_enrichment_cache IS 'Entrées de cache candidates pour un lot de signaux (exactes ou quasi-doublons)';
+
+-- Compteurs d'utilisation : [{fingerprint, hits}]
+CREATE OR REPLACE FUNCTION record_enrichment_cache_hits(p_hits JSONB)
+RETURNS VOID AS $$
+  UPDATE signal_enrichment_cache c
+  SET
+    hits = c.hits + r.hits,
+    tokens_saved = c.tokens_saved + r.hits::BIGINT * c.cost_tokens,
+    last_hit_at = NOW()
+  FROM jsonb_to_recordset(p_hits) AS r(fingerprint TEXT, hits INTEGER)
+  WHERE c.fingerprint = r.fingerprint;
+$$ LANGUAGE sql VOLATILE;
+
+COMMENT ON FUNCTION record_enrichment_cache_hits IS 'Incrémente hits et tokens_saved des entrées réutilisées';
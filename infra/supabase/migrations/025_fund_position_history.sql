@@ -0,0 +1,56 @@
+-- Migration: Historique agrégé des positions d'un fond
+-- Une ligne par filing PARSED du fond avec actions / PUT / CALL (shares et valeur) pour un
+-- ensemble de tickers ou CUSIPs, en une requête au lieu d'une requête fund_holdings par
+-- filing et par ticker (scripts d'analyse, GET /funds/{id}/holdings?tickers=...).
+
+CREATE INDEX IF NOT EXISTS idx_fund_holdings_fund_id_cusip ON fund_holdings(fund_id, cusip);
+
+-- p_tickers : correspondance partielle insensible à la casse (le parser stocke le nom de
+-- l'émetteur tronqué dans ticker) ; p_cusips : correspondance exacte.
+-- Les filings sans position correspondante sont renvoyés à zéro (entrée / sortie visible).
+CREATE OR REPLACE FUNCTION get_fund_position_history(
+  p_fund_id INTEGER,
+  p_tickers TEXT[] DEFAULT '{}',
+  p_cusips TEXT[] DEFAULT '{}'
+)
+RETURNS TABLE (
+  filing_id INTEGER,
+  filing_date DATE,
+  period_of_report DATE,
+  accession_number TEXT,
+  stock_shares BIGINT,
+  stock_value BIGINT,
+  put_shares BIGINT,
+  put_value BIGINT,
+  call_shares BIGINT,
+  call_value BIGINT
+) AS $$
+  WITH matched AS (
+    SELECT h.filing_id, h.type, h.shares, h.market_value
+    FROM fund_holdings h
+    WHERE h.fund_id = p_fund_id
+      AND (
+        h.cusip = ANY(COALESCE(p_cusips, '{}'))
+        OR h.ticker ILIKE ANY(ARRAY(SELECT '%' || t || '%' FROM unnest(COALESCE(p_tickers, '{}')) AS t))
+      )
+  )
+  SELECT
+    f.id,
+    f.filing_date,
+    f.period_of_report,
+    f.accession_number,
+    COALESCE(SUM(m.shares) FILTER (WHERE m.type = 'stock'), 0)::BIGINT,
+    COALESCE(SUM(m.market_value) FILTER (WHERE m.type = 'stock'), 0)::BIGINT,
+    COALESCE(SUM(m.shares) FILTER (WHERE m.type = 'put'), 0)::BIGINT,
+    COALESCE(SUM(m.market_value) FILTER (WHERE m.type = 'put'), 0)::BIGINT,
+    COALESCE(SUM(m.shares) FILTER (WHERE m.type = 'call'), 0)::BIGINT,
+    COALESCE(SUM(m.market_value) FILTER (WHERE m.type = 'call'), 0)::BIGINT
+  FROM fund_filings f
+  LEFT JOIN matched m ON m.filing_id = f.id
+  WHERE f.fund_id = p_fund_id
+    AND f.status = 'PARSED'
+  GROUP BY f.id, f.filing_date, f.period_of_report, f.accession_number
+  ORDER BY f.filing_date, f.id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_fund_position_history IS 'Positions d''un fond par filing (actions / PUT / CALL) pour des tickers ou CUSIPs donnés';
@@ -0,0 +1,96 @@
+-- Migration: Portefeuille courant des fonds
+-- fund_latest_holdings contient les positions du dernier filing PARSED de chaque fond,
+-- avec poids et rang précalculés. Rafraîchi par trigger quand un filing passe PARSED ;
+-- GET /funds/{id}/holdings lit cette table (coût indépendant de l'historique du fond).
+
+CREATE TABLE IF NOT EXISTS fund_latest_holdings (
+  holding_id INTEGER PRIMARY KEY, -- fund_holdings.id
+  fund_id INTEGER NOT NULL REFERENCES funds(id) ON DELETE CASCADE,
+  filing_id INTEGER NOT NULL REFERENCES fund_filings(id) ON DELETE CASCADE,
+  cik TEXT,
+  ticker TEXT,
+  cusip TEXT,
+  shares BIGINT,
+  market_value BIGINT,
+  type TEXT,
+  weight NUMERIC NOT NULL DEFAULT 0, -- part de market_value dans le filing (0-1)
+  rank INTEGER NOT NULL, -- 1 = plus grosse position
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_fund_latest_holdings_fund_value
+  ON fund_latest_holdings(fund_id, market_value DESC);
+
+COMMENT ON TABLE fund_latest_holdings IS 'Positions du dernier filing PARSED par fond (poids et rang précalculés)';
+
+ALTER TABLE fund_latest_holdings ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage fund_latest_holdings" ON fund_latest_holdings;
+CREATE POLICY "Service role can manage fund_latest_holdings" ON fund_latest_holdings
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- Remplacer le portefeuille courant d'un fond par les positions de son dernier filing PARSED
+CREATE OR REPLACE FUNCTION refresh_fund_latest_holdings(p_fund_id INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+  v_filing_id INTEGER;
+  v_count INTEGER;
+BEGIN
+  SELECT f.id INTO v_filing_id
+  FROM fund_filings f
+  WHERE f.fund_id = p_fund_id
+    AND f.status = 'PARSED'
+  ORDER BY f.filing_date DESC NULLS LAST, f.id DESC
+  LIMIT 1;
+
+  DELETE FROM fund_latest_holdings WHERE fund_id = p_fund_id;
+
+  IF v_filing_id IS NULL THEN
+    RETURN 0;
+  END IF;
+
+  INSERT INTO fund_latest_holdings (
+    holding_id, fund_id, filing_id, cik, ticker, cusip, shares, market_value, type, weight, rank
+  )
+  SELECT
+    h.id,
+    p_fund_id,
+    h.filing_id,
+    h.cik,
+    h.ticker,
+    h.cusip,
+    h.shares,
+    h.market_value,
+    h.type,
+    COALESCE(h.market_value::NUMERIC / NULLIF(SUM(h.market_value) OVER (), 0), 0),
+    ROW_NUMBER() OVER (ORDER BY h.market_value DESC NULLS LAST, h.id)
+  FROM fund_holdings h
+  WHERE h.filing_id = v_filing_id;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION refresh_fund_latest_holdings IS 'Recalcule fund_latest_holdings pour un fond (dernier filing PARSED)';
+
+-- Les parsers passent le filing à PARSED après avoir écrit ses holdings
+CREATE OR REPLACE FUNCTION fund_filings_refresh_latest_holdings()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.fund_id IS NOT NULL THEN
+    PERFORM refresh_fund_latest_holdings(NEW.fund_id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fund_filings_latest_holdings ON fund_filings;
+CREATE TRIGGER trg_fund_filings_latest_holdings
+  AFTER INSERT OR UPDATE OF status ON fund_filings
+  FOR EACH ROW
+  WHEN (NEW.status = 'PARSED')
+  EXECUTE FUNCTION fund_filings_refresh_latest_holdings();
+
+-- Initialisation pour les fonds existants
+SELECT refresh_fund_latest_holdings(id) FROM funds;
@@ -0,0 +1,260 @@
+-- Migration: Index inversé CUSIP -> fonds suivis
+-- fund_ownership_index : une ligne par (CUSIP, fond) avec la position du dernier filing
+-- PARSED du fond, la variation par rapport au trimestre précédent et le poids dans le
+-- portefeuille ; fund_ownership_consensus : agrégats par CUSIP (détenteurs, acheteurs nets).
+-- Mis à jour par fond quand un filing passe PARSED (seuls les CUSIPs du fond sont
+-- recalculés) ; GET /ticker-activity/{ticker}/hedge-funds lit l'index avant Unusual Whales.
+
+CREATE TABLE IF NOT EXISTS fund_ownership_consensus (
+  cusip TEXT PRIMARY KEY,
+  issuer TEXT, -- fund_holdings.ticker (nom de l'émetteur tronqué par le parser)
+  holder_count INTEGER NOT NULL DEFAULT 0, -- fonds détenant des actions
+  buyers INTEGER NOT NULL DEFAULT 0, -- actions en hausse sur le trimestre (dont nouvelles positions)
+  sellers INTEGER NOT NULL DEFAULT 0, -- actions en baisse (dont positions soldées)
+  new_positions INTEGER NOT NULL DEFAULT 0,
+  closed_positions INTEGER NOT NULL DEFAULT 0,
+  net_buyers INTEGER NOT NULL DEFAULT 0, -- buyers - sellers
+  total_shares BIGINT NOT NULL DEFAULT 0,
+  total_value BIGINT NOT NULL DEFAULT 0,
+  put_value BIGINT NOT NULL DEFAULT 0,
+  call_value BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS fund_ownership_index (
+  cusip TEXT NOT NULL REFERENCES fund_ownership_consensus(cusip) ON DELETE CASCADE,
+  fund_id INTEGER NOT NULL REFERENCES funds(id) ON DELETE CASCADE,
+  filing_id INTEGER NOT NULL REFERENCES fund_filings(id) ON DELETE CASCADE,
+  issuer TEXT,
+  filing_date DATE,
+  period_of_report DATE,
+  shares BIGINT NOT NULL DEFAULT 0, -- actions (0 = position soldée ou options seules)
+  market_value BIGINT NOT NULL DEFAULT 0, -- valeur des actions
+  put_value BIGINT NOT NULL DEFAULT 0,
+  call_value BIGINT NOT NULL DEFAULT 0,
+  prev_shares BIGINT, -- NULL si le fond n'a pas de filing précédent
+  shares_change BIGINT,
+  change_pct NUMERIC, -- NULL pour une nouvelle position
+  weight NUMERIC NOT NULL DEFAULT 0, -- valeur du CUSIP (actions + options) / valeur du filing
+  action TEXT CHECK (action IN ('new', 'increased', 'decreased', 'unchanged', 'closed')),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (cusip, fund_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fund_ownership_index_cusip_value
+  ON fund_ownership_index(cusip, market_value DESC);
+CREATE INDEX IF NOT EXISTS idx_fund_ownership_index_fund_id ON fund_ownership_index(fund_id);
+
+-- Résolution ticker -> CUSIPs (les holdings 13F n'ont pas de ticker fiable)
+CREATE TABLE IF NOT EXISTS ticker_cusips (
+  ticker TEXT PRIMARY KEY,
+  cusips TEXT[] NOT NULL DEFAULT '{}',
+  resolved_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE fund_ownership_consensus IS 'Consensus des fonds suivis par CUSIP (détenteurs, acheteurs / vendeurs nets)';
+COMMENT ON TABLE fund_ownership_index IS 'Index inversé CUSIP -> fonds : dernière position, variation trimestrielle et poids';
+COMMENT ON TABLE ticker_cusips IS 'CUSIPs d''un ticker (FMP search-exchange-variants)';
+
+ALTER TABLE fund_ownership_consensus ENABLE ROW LEVEL SECURITY;
+ALTER TABLE fund_ownership_index ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ticker_cusips ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage fund_ownership_consensus" ON fund_ownership_consensus;
+CREATE POLICY "Service role can manage fund_ownership_consensus" ON fund_ownership_consensus
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage fund_ownership_index" ON fund_ownership_index;
+CREATE POLICY "Service role can manage fund_ownership_index" ON fund_ownership_index
+    FOR ALL USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role can manage ticker_cusips" ON ticker_cusips;
+CREATE POLICY "Service role can manage ticker_cusips" ON ticker_cusips
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- Recalculer les lignes d'un fond (dernier filing PARSED comparé au trimestre précédent)
+-- puis le consensus des CUSIPs qu'il détient ou détenait
+CREATE OR REPLACE FUNCTION refresh_fund_ownership_index(p_fund_id INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+  v_latest fund_filings%ROWTYPE;
+  v_previous_id INTEGER;
+  v_cusips TEXT[];
+  v_count INTEGER := 0;
+BEGIN
+  SELECT * INTO v_latest
+  FROM fund_filings f
+  WHERE f.fund_id = p_fund_id
+    AND f.status = 'PARSED'
+  ORDER BY f.filing_date DESC NULLS LAST, f.id DESC
+  LIMIT 1;
+
+  -- Trimestre précédent : un amendement de la même période n'est pas une variation
+  IF v_latest.id IS NOT NULL THEN
+    SELECT f.id INTO v_previous_id
+    FROM fund_filings f
+    WHERE f.fund_id = p_fund_id
+      AND f.status = 'PARSED'
+      AND f.id <> v_latest.id
+      AND (
+        v_latest.period_of_report IS NULL
+        OR f.period_of_report IS NULL
+        OR f.period_of_report < v_latest.period_of_report
+      )
+    ORDER BY f.filing_date DESC NULLS LAST, f.id DESC
+    LIMIT 1;
+  END IF;
+
+  WITH deleted AS (
+    DELETE FROM fund_ownership_index WHERE fund_id = p_fund_id RETURNING cusip
+  )
+  SELECT array_agg(cusip) INTO v_cusips FROM deleted;
+
+  IF v_latest.id IS NOT NULL THEN
+    INSERT INTO fund_ownership_consensus (cusip)
+    SELECT DISTINCT h.cusip
+    FROM fund_holdings h
+    WHERE h.filing_id IN (v_latest.id, v_previous_id)
+      AND COALESCE(h.cusip, '') <> ''
+    ON CONFLICT (cusip) DO NOTHING;
+
+    WITH positions AS (
+      SELECT
+        h.filing_id,
+        h.cusip,
+        MAX(h.ticker) AS issuer,
+        COALESCE(SUM(h.shares) FILTER (WHERE h.type = 'stock'), 0) AS shares,
+        COALESCE(SUM(h.market_value) FILTER (WHERE h.type = 'stock'), 0) AS stock_value,
+        COALESCE(SUM(h.market_value) FILTER (WHERE h.type = 'put'), 0) AS put_value,
+        COALESCE(SUM(h.market_value) FILTER (WHERE h.type = 'call'), 0) AS call_value,
+        COALESCE(SUM(h.market_value), 0) AS total_value
+      FROM fund_holdings h
+      WHERE h.filing_id IN (v_latest.id, v_previous_id)
+        AND COALESCE(h.cusip, '') <> ''
+      GROUP BY h.filing_id, h.cusip
+    ),
+    current_positions AS (
+      SELECT * FROM positions WHERE filing_id = v_latest.id
+    ),
+    previous_positions AS (
+      SELECT * FROM positions WHERE filing_id = v_previous_id
+    ),
+    portfolio AS (
+      SELECT NULLIF(SUM(total_value), 0) AS value FROM current_positions
+    ),
+    merged AS (
+      SELECT
+        COALESCE(c.cusip, p.cusip) AS cusip,
+        COALESCE(c.issuer, p.issuer) AS issuer,
+        COALESCE(c.shares, 0) AS shares,
+        COALESCE(c.stock_value, 0) AS market_value,
+        COALESCE(c.put_value, 0) AS put_value,
+        COALESCE(c.call_value, 0) AS call_value,
+        COALESCE(c.total_value, 0) AS total_value,
+        CASE WHEN v_previous_id IS NULL THEN NULL ELSE COALESCE(p.shares, 0) END AS prev_shares
+      FROM current_positions c
+      FULL OUTER JOIN previous_positions p ON p.cusip = c.cusip
+      -- Positions soldées : seulement les actions (options expirées ignorées)
+      WHERE c.cusip IS NOT NULL OR p.shares > 0
+    )
+    INSERT INTO fund_ownership_index (
+      cusip, fund_id, filing_id, issuer, filing_date, period_of_report,
+      shares, market_value, put_value, call_value,
+      prev_shares, shares_change, change_pct, weight, action
+    )
+    SELECT
+      m.cusip,
+      p_fund_id,
+      v_latest.id,
+      m.issuer,
+      v_latest.filing_date,
+      v_latest.period_of_report,
+      m.shares,
+      m.market_value,
+      m.put_value,
+      m.call_value,
+      m.prev_shares,
+      m.shares - m.prev_shares,
+      (m.shares - m.prev_shares)::NUMERIC / NULLIF(m.prev_shares, 0),
+      COALESCE(m.total_value::NUMERIC / (SELECT value FROM portfolio), 0),
+      CASE
+        WHEN m.prev_shares IS NULL THEN NULL
+        WHEN m.prev_shares = 0 AND m.shares > 0 THEN 'new'
+        WHEN m.prev_shares > 0 AND m.shares = 0 THEN 'closed'
+        WHEN m.shares > m.prev_shares THEN 'increased'
+        WHEN m.shares < m.prev_shares THEN 'decreased'
+        ELSE 'unchanged'
+      END
+    FROM merged m;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+  END IF;
+
+  v_cusips := ARRAY(
+    SELECT DISTINCT c
+    FROM unnest(v_cusips || ARRAY(SELECT cusip FROM fund_ownership_index WHERE fund_id = p_fund_id)) AS c
+  );
+
+  UPDATE fund_ownership_consensus c
+  SET
+    issuer = a.issuer,
+    holder_count = a.holder_count,
+    buyers = a.buyers,
+    sellers = a.sellers,
+    new_positions = a.new_positions,
+    closed_positions = a.closed_positions,
+    net_buyers = a.buyers - a.sellers,
+    total_shares = a.total_shares,
+    total_value = a.total_value,
+    put_value = a.put_value,
+    call_value = a.call_value,
+    updated_at = NOW()
+  FROM (
+    SELECT
+      i.cusip,
+      MAX(i.issuer) AS issuer,
+      COUNT(*) FILTER (WHERE i.shares > 0)::INTEGER AS holder_count,
+      COUNT(*) FILTER (WHERE i.shares_change > 0)::INTEGER AS buyers,
+      COUNT(*) FILTER (WHERE i.shares_change < 0)::INTEGER AS sellers,
+      COUNT(*) FILTER (WHERE i.action = 'new')::INTEGER AS new_positions,
+      COUNT(*) FILTER (WHERE i.action = 'closed')::INTEGER AS closed_positions,
+      SUM(i.shares)::BIGINT AS total_shares,
+      SUM(i.market_value)::BIGINT AS total_value,
+      SUM(i.put_value)::BIGINT AS put_value,
+      SUM(i.call_value)::BIGINT AS call_value
+    FROM fund_ownership_index i
+    WHERE i.cusip = ANY(v_cusips)
+    GROUP BY i.cusip
+  ) a
+  WHERE c.cusip = a.cusip;
+
+  -- Plus aucun fond suivi sur ces CUSIPs
+  DELETE FROM fund_ownership_consensus c
+  WHERE c.cusip = ANY(v_cusips)
+    AND NOT EXISTS (SELECT 1 FROM fund_ownership_index i WHERE i.cusip = c.cusip);
+
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION refresh_fund_ownership_index IS 'Recalcule l''index CUSIP -> fonds et le consensus pour un fond (dernier filing PARSED vs précédent)';
+
+CREATE OR REPLACE FUNCTION fund_filings_refresh_ownership_index()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.fund_id IS NOT NULL THEN
+    PERFORM refresh_fund_ownership_index(NEW.fund_id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fund_filings_ownership_index ON fund_filings;
+CREATE TRIGGER trg_fund_filings_ownership_index
+  AFTER INSERT OR UPDATE OF status ON fund_filings
+  FOR EACH ROW
+  WHEN (NEW.status = 'PARSED')
+  EXECUTE FUNCTION fund_filings_refresh_ownership_index();
+
+-- Initialisation pour les fonds existants
+SELECT refresh_fund_ownership_index(id) FROM funds;
@@ -0,0 +1,45 @@
+-- Migration: Bail de réservation des signaux (processor-ia, mode batch)
+-- Un lot réservé par une invocation interrompue (timeout, crash) restait 'processing'
+-- indéfiniment. claimed_at date la réservation ; claim_pending_signals reprend les
+-- signaux 'processing' dont le bail a expiré. Le bail doit dépasser le timeout Lambda
+-- (300 s) pour ne jamais reprendre un lot encore en cours.
+
+ALTER TABLE signals ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN signals.claimed_at IS 'Dernière réservation pour enrichissement (pending -> processing)';
+
+-- Signaux réservés, pour la reprise des baux expirés (idx_signals_processing_status ne couvre que 'pending')
+CREATE INDEX IF NOT EXISTS idx_signals_processing_claimed ON signals(claimed_at)
+  WHERE processing_status = 'processing';
+
+DROP FUNCTION IF EXISTS claim_pending_signals(INTEGER);
+
+-- Réserver jusqu'à p_limit signaux 'pending', ou 'processing' depuis plus de p_lease_seconds
+-- (les plus anciens d'abord) ; SKIP LOCKED évite qu'une invocation concurrente prenne les mêmes.
+-- Sans claimed_at (réservés avant cette migration), la date de création fait foi.
+CREATE OR REPLACE FUNCTION claim_pending_signals(p_limit INTEGER DEFAULT 50, p_lease_seconds INTEGER DEFAULT 900)
+RETURNS TABLE (
+  id UUID,
+  source TEXT,
+  type TEXT,
+  raw_data JSONB
+) AS $$
+  UPDATE signals s
+  SET processing_status = 'processing',
+      claimed_at = NOW()
+  WHERE s.id IN (
+    SELECT p.id
+    FROM signals p
+    WHERE p.processing_status = 'pending'
+       OR (
+         p.processing_status = 'processing'
+         AND COALESCE(p.claimed_at, p.created_at) < NOW() - make_interval(secs => GREATEST(p_lease_seconds, 60))
+       )
+    ORDER BY p.created_at
+    LIMIT LEAST(GREATEST(p_limit, 1), 500)
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING s.id, s.source, s.type, s.raw_data;
+$$ LANGUAGE sql VOLATILE;
+
+COMMENT ON FUNCTION claim_pending_signals IS 'Réserve un lot de signaux en attente ou au bail expiré pour processor-ia (-> processing)';
@@ -0,0 +1,25 @@
+-- Migration: Clés et purge du cache des enrichissements IA
+-- L'empreinte inclut désormais source, type, ticker, exchange et sens du signal, et la
+-- normalisation conserve le signe des nombres ; les bandes LSH (texte libre uniquement)
+-- sont limitées à (source, type, ticker, sens). Les entrées existantes, calculées sans
+-- signe ni sens, pouvaient servir l'enrichissement d'un signal de sens opposé.
+
+DELETE FROM signal_enrichment_cache;
+
+COMMENT ON COLUMN signal_enrichment_cache.bands IS 'Bandes LSH préfixées par source:type:ticker:sens (vide hors texte libre)';
+
+-- Supprimer les entrées plus anciennes que le TTL (jamais plus réutilisées par match_enrichment_cache)
+CREATE OR REPLACE FUNCTION purge_enrichment_cache(p_max_age_hours INTEGER DEFAULT 24)
+RETURNS INTEGER AS $$
+DECLARE
+  v_deleted INTEGER;
+BEGIN
+  DELETE FROM signal_enrichment_cache
+  WHERE created_at <= NOW() - make_interval(hours => GREATEST(p_max_age_hours, 1));
+
+  GET DIAGNOSTICS v_deleted = ROW_COUNT;
+  RETURN v_deleted;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION purge_enrichment_cache IS 'Purge les entrées de cache expirées (index idx_signal_enrichment_cache_created_at)';
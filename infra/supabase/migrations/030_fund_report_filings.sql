@@ -0,0 +1,108 @@
+-- Migration: Filings d'un rapport 13F par période déclarée (amendements compris)
+-- Le portefeuille courant d'un fond était celui du dernier filing PARSED par date de dépôt :
+-- un 13F-HR/A "NEW HOLDINGS" (quelques positions ajoutées) déposé après l'original le
+-- remplaçait entièrement, et un original déposé en retard pour une période plus ancienne
+-- passait devant le trimestre courant.
+-- parser-13f renseigne désormais period_of_report et amendment_type (page de garde) ;
+-- fund_report_filings choisit la période la plus récente puis ses filings :
+-- - le dernier original ou amendement RESTATEMENT de la période (rapport complet)
+-- - plus les amendements NEW HOLDINGS de la période déposés après lui (positions ajoutées)
+-- Un amendement de type inconnu (parsé avant cette migration) est ignoré.
+
+ALTER TABLE fund_filings ADD COLUMN IF NOT EXISTS amendment_type TEXT;
+
+COMMENT ON COLUMN fund_filings.amendment_type IS 'Type d''un 13F-HR/A (page de garde) : RESTATEMENT ou NEW HOLDINGS';
+
+-- p_offset : 0 = période la plus récente, 1 = période précédente...
+-- Sans period_of_report (filings parsés avant cette migration), la date de dépôt fait office de période.
+CREATE OR REPLACE FUNCTION fund_report_filings(p_fund_id INTEGER, p_offset INTEGER DEFAULT 0)
+RETURNS TABLE (
+  filing_id INTEGER,
+  base_filing_id INTEGER, -- original ou RESTATEMENT retenu pour la période
+  report_period DATE,
+  period_of_report DATE,
+  filing_date DATE
+) AS $$
+  WITH filings AS (
+    SELECT
+      f.id,
+      f.filing_date,
+      f.period_of_report,
+      COALESCE(f.period_of_report, f.filing_date) AS report_period,
+      CASE
+        WHEN f.form_type = '13F-HR/A' THEN UPPER(f.amendment_type)
+        ELSE 'ORIGINAL'
+      END AS kind
+    FROM fund_filings f
+    WHERE f.fund_id = p_fund_id
+      AND f.status = 'PARSED'
+  ),
+  bases AS (
+    SELECT DISTINCT ON (b.report_period) b.*
+    FROM filings b
+    WHERE b.kind IN ('ORIGINAL', 'RESTATEMENT')
+    ORDER BY b.report_period, b.filing_date DESC NULLS LAST, b.id DESC
+  ),
+  latest_period AS (
+    SELECT *
+    FROM bases
+    ORDER BY report_period DESC NULLS LAST
+    LIMIT 1 OFFSET GREATEST(p_offset, 0)
+  )
+  SELECT f.id, p.id, p.report_period, p.period_of_report, f.filing_date
+  FROM latest_period p
+  JOIN filings f ON f.report_period = p.report_period
+  WHERE f.id = p.id
+     OR (
+       f.kind = 'NEW HOLDINGS'
+       AND (COALESCE(f.filing_date, DATE '-infinity'), f.id) > (COALESCE(p.filing_date, DATE '-infinity'), p.id)
+     );
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION fund_report_filings IS 'Filings PARSED composant le rapport 13F d''un fond pour une période (original ou restatement + new holdings)';
+
+-- Remplacer le portefeuille courant d'un fond par les positions de sa dernière période déclarée
+CREATE OR REPLACE FUNCTION refresh_fund_latest_holdings(p_fund_id INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+  v_filing_ids INTEGER[];
+  v_count INTEGER;
+BEGIN
+  SELECT array_agg(r.filing_id) INTO v_filing_ids
+  FROM fund_report_filings(p_fund_id, 0) r;
+
+  DELETE FROM fund_latest_holdings WHERE fund_id = p_fund_id;
+
+  IF v_filing_ids IS NULL THEN
+    RETURN 0;
+  END IF;
+
+  INSERT INTO fund_latest_holdings (
+    holding_id, fund_id, filing_id, cik, ticker, cusip, shares, market_value, type, weight, rank
+  )
+  SELECT
+    h.id,
+    p_fund_id,
+    h.filing_id,
+    h.cik,
+    h.ticker,
+    h.cusip,
+    h.shares,
+    h.market_value,
+    h.type,
+    COALESCE(h.market_value::NUMERIC / NULLIF(SUM(h.market_value) OVER (), 0), 0),
+    ROW_NUMBER() OVER (ORDER BY h.market_value DESC NULLS LAST, h.id)
+  FROM fund_holdings h
+  WHERE h.filing_id = ANY(v_filing_ids);
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION refresh_fund_latest_holdings IS 'Recalcule fund_latest_holdings pour un fond (dernière période déclarée, amendements compris)';
+
+COMMENT ON TABLE fund_latest_holdings IS 'Positions de la dernière période déclarée par fond (original ou restatement + new holdings ; poids et rang précalculés)';
+
+-- Reconstruction pour les fonds existants
+SELECT refresh_fund_latest_holdings(id) FROM funds;
@@ -0,0 +1,173 @@
+-- Migration: Index CUSIP -> fonds par période déclarée, verrous ordonnés
+-- refresh_fund_ownership_index comparait les deux derniers filings PARSED par date de dépôt :
+-- un amendement NEW HOLDINGS devenait le portefeuille courant (et le reste apparaissait
+-- soldé), un original en retard pour une période ancienne devenait le trimestre courant.
+-- Le rapport courant et le précédent sont désormais ceux de fund_report_filings (période la
+-- plus récente et la précédente, original ou RESTATEMENT + NEW HOLDINGS).
+-- Concurrence : deux triggers (fonds différents) mettaient à jour les mêmes lignes de
+-- fund_ownership_consensus dans un ordre arbitraire (interblocages possibles). Les lignes
+-- sont maintenant créées puis verrouillées dans l'ordre des CUSIPs avant toute écriture, et
+-- les recalculs d'un même fond sont sérialisés (verrou consultatif de transaction).
+
+CREATE OR REPLACE FUNCTION refresh_fund_ownership_index(p_fund_id INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+  v_base fund_filings%ROWTYPE;
+  v_latest_ids INTEGER[];
+  v_previous_ids INTEGER[];
+  v_cusips TEXT[];
+  v_count INTEGER := 0;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('refresh_fund_ownership_index'), p_fund_id);
+
+  SELECT array_agg(r.filing_id), MAX(r.base_filing_id) INTO v_latest_ids, v_base.id
+  FROM fund_report_filings(p_fund_id, 0) r;
+
+  -- Période précédente : un amendement de la même période n'est pas une variation
+  IF v_latest_ids IS NOT NULL THEN
+    SELECT * INTO v_base FROM fund_filings WHERE id = v_base.id;
+    SELECT array_agg(r.filing_id) INTO v_previous_ids
+    FROM fund_report_filings(p_fund_id, 1) r;
+  END IF;
+
+  -- CUSIPs touchés : positions courantes et précédentes, lignes d'index existantes du fond
+  v_cusips := ARRAY(
+    SELECT h.cusip
+    FROM fund_holdings h
+    WHERE h.filing_id = ANY(COALESCE(v_latest_ids, '{}') || COALESCE(v_previous_ids, '{}'))
+      AND COALESCE(h.cusip, '') <> ''
+    UNION
+    SELECT i.cusip
+    FROM fund_ownership_index i
+    WHERE i.fund_id = p_fund_id
+    ORDER BY 1
+  );
+
+  -- Lignes de consensus créées ou verrouillées dans l'ordre des CUSIPs (DO UPDATE verrouille
+  -- la ligne existante et recrée celle qu'un recalcul concurrent vient de supprimer)
+  INSERT INTO fund_ownership_consensus (cusip)
+  SELECT c FROM unnest(v_cusips) AS c ORDER BY c
+  ON CONFLICT (cusip) DO UPDATE SET updated_at = fund_ownership_consensus.updated_at;
+
+  DELETE FROM fund_ownership_index WHERE fund_id = p_fund_id;
+
+  IF v_latest_ids IS NOT NULL THEN
+    WITH positions AS (
+      SELECT
+        h.filing_id = ANY(v_latest_ids) AS is_current,
+        h.cusip,
+        MAX(h.ticker) AS issuer,
+        COALESCE(SUM(h.shares) FILTER (WHERE h.type = 'stock'), 0) AS shares,
+        COALESCE(SUM(h.market_value) FILTER (WHERE h.type = 'stock'), 0) AS stock_value,
+        COALESCE(SUM(h.market_value) FILTER (WHERE h.type = 'put'), 0) AS put_value,
+        COALESCE(SUM(h.market_value) FILTER (WHERE h.type = 'call'), 0) AS call_value,
+        COALESCE(SUM(h.market_value), 0) AS total_value
+      FROM fund_holdings h
+      WHERE h.filing_id = ANY(v_latest_ids || COALESCE(v_previous_ids, '{}'))
+        AND COALESCE(h.cusip, '') <> ''
+      GROUP BY 1, h.cusip
+    ),
+    current_positions AS (
+      SELECT * FROM positions WHERE is_current
+    ),
+    previous_positions AS (
+      SELECT * FROM positions WHERE NOT is_current
+    ),
+    portfolio AS (
+      SELECT NULLIF(SUM(total_value), 0) AS value FROM current_positions
+    ),
+    merged AS (
+      SELECT
+        COALESCE(c.cusip, p.cusip) AS cusip,
+        COALESCE(c.issuer, p.issuer) AS issuer,
+        COALESCE(c.shares, 0) AS shares,
+        COALESCE(c.stock_value, 0) AS market_value,
+        COALESCE(c.put_value, 0) AS put_value,
+        COALESCE(c.call_value, 0) AS call_value,
+        COALESCE(c.total_value, 0) AS total_value,
+        CASE WHEN v_previous_ids IS NULL THEN NULL ELSE COALESCE(p.shares, 0) END AS prev_shares
+      FROM current_positions c
+      FULL OUTER JOIN previous_positions p ON p.cusip = c.cusip
+      -- Positions soldées : seulement les actions (options expirées ignorées)
+      WHERE c.cusip IS NOT NULL OR p.shares > 0
+    )
+    INSERT INTO fund_ownership_index (
+      cusip, fund_id, filing_id, issuer, filing_date, period_of_report,
+      shares, market_value, put_value, call_value,
+      prev_shares, shares_change, change_pct, weight, action
+    )
+    SELECT
+      m.cusip,
+      p_fund_id,
+      v_base.id,
+      m.issuer,
+      v_base.filing_date,
+      v_base.period_of_report,
+      m.shares,
+      m.market_value,
+      m.put_value,
+      m.call_value,
+      m.prev_shares,
+      m.shares - m.prev_shares,
+      (m.shares - m.prev_shares)::NUMERIC / NULLIF(m.prev_shares, 0),
+      COALESCE(m.total_value::NUMERIC / (SELECT value FROM portfolio), 0),
+      CASE
+        WHEN m.prev_shares IS NULL THEN NULL
+        WHEN m.prev_shares = 0 AND m.shares > 0 THEN 'new'
+        WHEN m.prev_shares > 0 AND m.shares = 0 THEN 'closed'
+        WHEN m.shares > m.prev_shares THEN 'increased'
+        WHEN m.shares < m.prev_shares THEN 'decreased'
+        ELSE 'unchanged'
+      END
+    FROM merged m
+    ORDER BY m.cusip;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+  END IF;
+
+  UPDATE fund_ownership_consensus c
+  SET
+    issuer = a.issuer,
+    holder_count = a.holder_count,
+    buyers = a.buyers,
+    sellers = a.sellers,
+    new_positions = a.new_positions,
+    closed_positions = a.closed_positions,
+    net_buyers = a.buyers - a.sellers,
+    total_shares = a.total_shares,
+    total_value = a.total_value,
+    put_value = a.put_value,
+    call_value = a.call_value,
+    updated_at = NOW()
+  FROM (
+    SELECT
+      i.cusip,
+      MAX(i.issuer) AS issuer,
+      COUNT(*) FILTER (WHERE i.shares > 0)::INTEGER AS holder_count,
+      COUNT(*) FILTER (WHERE i.shares_change > 0)::INTEGER AS buyers,
+      COUNT(*) FILTER (WHERE i.shares_change < 0)::INTEGER AS sellers,
+      COUNT(*) FILTER (WHERE i.action = 'new')::INTEGER AS new_positions,
+      COUNT(*) FILTER (WHERE i.action = 'closed')::INTEGER AS closed_positions,
+      SUM(i.shares)::BIGINT AS total_shares,
+      SUM(i.market_value)::BIGINT AS total_value,
+      SUM(i.put_value)::BIGINT AS put_value,
+      SUM(i.call_value)::BIGINT AS call_value
+    FROM fund_ownership_index i
+    WHERE i.cusip = ANY(v_cusips)
+    GROUP BY i.cusip
+  ) a
+  WHERE c.cusip = a.cusip;
+
+  -- Plus aucun fond suivi sur ces CUSIPs (lignes déjà verrouillées)
+  DELETE FROM fund_ownership_consensus c
+  WHERE c.cusip = ANY(v_cusips)
+    AND NOT EXISTS (SELECT 1 FROM fund_ownership_index i WHERE i.cusip = c.cusip);
+
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION refresh_fund_ownership_index IS 'Recalcule l''index CUSIP -> fonds et le consensus pour un fond (dernière période déclarée vs précédente)';
+
+-- Reconstruction pour les fonds existants
+SELECT refresh_fund_ownership_index(id) FROM funds;
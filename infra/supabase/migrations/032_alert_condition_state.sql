@@ -0,0 +1,15 @@
+-- Migration: État des conditions des alertes multi-signaux
+-- Le job alerts-check (toutes les 5 minutes) insérait un déclenchement à chaque cycle tant
+-- que les conditions restaient vraies. condition_met mémorise le résultat de la dernière
+-- évaluation : une alerte ne se déclenche qu'au passage de faux à vrai.
+
+ALTER TABLE user_alerts ADD COLUMN IF NOT EXISTS condition_met BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Alertes déjà déclenchées depuis leur dernière vérification : conditions supposées vraies
+UPDATE user_alerts
+SET condition_met = TRUE
+WHERE last_triggered IS NOT NULL
+  AND last_checked IS NOT NULL
+  AND last_triggered >= last_checked;
+
+COMMENT ON COLUMN user_alerts.condition_met IS 'Conditions vraies à la dernière vérification (déclenchement sur front montant)';
@@ -0,0 +1,18 @@
+-- Migration: Déduplication des alertes de surveillance
+-- Le job surveillance-check (toutes les 5 minutes) réinsérait à chaque cycle les mêmes
+-- alertes (mêmes achats d'insiders, même short interest). source_key identifie la donnée
+-- à l'origine de l'alerte (dernier achat d'insider, date du short interest, jour de séance
+-- pour les volumes) ; l'index unique (watch_id, type, source_key) et
+-- ON CONFLICT DO NOTHING n'en gardent qu'une.
+
+ALTER TABLE surveillance_alerts ADD COLUMN IF NOT EXISTS source_key TEXT;
+
+-- Lignes existantes : clé unique par ligne (aucune fusion rétroactive)
+UPDATE surveillance_alerts SET source_key = id::TEXT WHERE source_key IS NULL;
+
+ALTER TABLE surveillance_alerts ALTER COLUMN source_key SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_surveillance_alerts_source
+  ON surveillance_alerts(watch_id, type, source_key);
+
+COMMENT ON COLUMN surveillance_alerts.source_key IS 'Donnée à l''origine de l''alerte (déduplication par surveillance et type)';
@@ -0,0 +1,24 @@
+-- Migration: Rafraîchir les tables dérivées des holdings quand un filing PARSED échoue
+-- Une nouvelle livraison d'un filing déjà PARSED supprime ses holdings avant de les réécrire ;
+-- si le parsing échoue ensuite, le filing passe FAILED sans repasser PARSED, et
+-- fund_latest_holdings / fund_ownership_index gardaient les positions supprimées.
+-- Le passage PARSED -> FAILED recalcule donc aussi les deux tables (le filing en échec
+-- n'en fait plus partie, le rapport retombe sur les filings PARSED restants).
+
+DROP TRIGGER IF EXISTS trg_fund_filings_latest_holdings_failed ON fund_filings;
+CREATE TRIGGER trg_fund_filings_latest_holdings_failed
+  AFTER UPDATE OF status ON fund_filings
+  FOR EACH ROW
+  WHEN (OLD.status = 'PARSED' AND NEW.status = 'FAILED')
+  EXECUTE FUNCTION fund_filings_refresh_latest_holdings();
+
+DROP TRIGGER IF EXISTS trg_fund_filings_ownership_index_failed ON fund_filings;
+CREATE TRIGGER trg_fund_filings_ownership_index_failed
+  AFTER UPDATE OF status ON fund_filings
+  FOR EACH ROW
+  WHEN (OLD.status = 'PARSED' AND NEW.status = 'FAILED')
+  EXECUTE FUNCTION fund_filings_refresh_ownership_index();
+
+-- Fonds ayant déjà un filing en échec : positions possiblement périmées
+SELECT refresh_fund_latest_holdings(f.fund_id), refresh_fund_ownership_index(f.fund_id)
+FROM (SELECT DISTINCT fund_id FROM fund_filings WHERE status = 'FAILED' AND fund_id IS NOT NULL) f;
@@ -0,0 +1,96 @@
+-- Tests pgTAP : portefeuille courant d'un fond et amendements 13F (supabase test db)
+-- Les filings passent PARSED comme le fait parser-13f : holdings écrits, puis statut mis à jour.
+
+BEGIN;
+SELECT plan(7);
+
+INSERT INTO funds (id, name, cik) VALUES (900001, 'Test Fund', '0000900001');
+
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, period_of_report, status)
+VALUES (900011, 900001, '0000900001', '0000900001-24-000001', '13F-HR', '2024-02-14', '2023-12-31', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900001, 900011, '0000900001', 'APPLE INC', '037833100', 100, 3000, 'stock'),
+  (900001, 900011, '0000900001', 'NVIDIA COR', '67066G104', 50, 1000, 'stock');
+UPDATE fund_filings SET status = 'PARSED' WHERE id = 900011;
+
+SELECT is(
+  (SELECT COUNT(*)::INTEGER FROM fund_latest_holdings WHERE fund_id = 900001),
+  2,
+  'original : portefeuille du filing'
+);
+
+-- Amendement NEW HOLDINGS déposé après l'original : positions ajoutées au même rapport
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, status)
+VALUES (900012, 900001, '0000900001', '0000900001-24-000002', '13F-HR/A', '2024-03-01', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900001, 900012, '0000900001', 'MICROSOFT ', '594918104', 10, 1000, 'stock');
+UPDATE fund_filings
+SET status = 'PARSED', period_of_report = '2023-12-31', amendment_type = 'NEW HOLDINGS'
+WHERE id = 900012;
+
+SELECT results_eq(
+  'SELECT cusip, rank, weight FROM fund_latest_holdings WHERE fund_id = 900001 ORDER BY rank',
+  $$VALUES ('037833100'::TEXT, 1, 0.6::NUMERIC), ('67066G104', 2, 0.2), ('594918104', 3, 0.2)$$,
+  'new holdings : original et amendement fusionnés, poids sur le rapport complet'
+);
+
+-- Original en retard pour une période plus ancienne : ne remplace pas le trimestre courant
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, period_of_report, status)
+VALUES (900013, 900001, '0000900001', '0000900001-24-000003', '13F-HR', '2024-03-15', '2023-09-30', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900001, 900013, '0000900001', 'TESLA INC', '88160R101', 5, 500, 'stock');
+UPDATE fund_filings SET status = 'PARSED' WHERE id = 900013;
+
+SELECT is(
+  (SELECT array_agg(DISTINCT filing_id ORDER BY filing_id) FROM fund_latest_holdings WHERE fund_id = 900001),
+  ARRAY[900011, 900012],
+  'période la plus récente retenue malgré un dépôt plus récent'
+);
+
+-- Amendement de type inconnu : ignoré
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, period_of_report, status)
+VALUES (900014, 900001, '0000900001', '0000900001-24-000004', '13F-HR/A', '2024-03-20', '2023-12-31', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900001, 900014, '0000900001', 'AMAZON COM', '023135106', 1, 100, 'stock');
+UPDATE fund_filings SET status = 'PARSED' WHERE id = 900014;
+
+SELECT is(
+  (SELECT COUNT(*)::INTEGER FROM fund_latest_holdings WHERE fund_id = 900001),
+  3,
+  'amendement sans type : ignoré'
+);
+
+-- Amendement RESTATEMENT déposé après : remplace l'original et les new holdings antérieurs
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, status)
+VALUES (900015, 900001, '0000900001', '0000900001-24-000005', '13F-HR/A', '2024-04-02', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900001, 900015, '0000900001', 'APPLE INC', '037833100', 120, 3600, 'stock'),
+  (900001, 900015, '0000900001', 'NVIDIA COR', '67066G104', 40, 800, 'stock');
+UPDATE fund_filings
+SET status = 'PARSED', period_of_report = '2023-12-31', amendment_type = 'RESTATEMENT'
+WHERE id = 900015;
+
+SELECT results_eq(
+  'SELECT filing_id, cusip, shares FROM fund_latest_holdings WHERE fund_id = 900001 ORDER BY rank',
+  $$VALUES (900015, '037833100'::TEXT, 120::BIGINT), (900015, '67066G104', 40)$$,
+  'restatement : rapport complet remplacé'
+);
+
+SELECT is(
+  (SELECT array_agg(filing_id ORDER BY filing_id) FROM fund_report_filings(900001, 1)),
+  ARRAY[900013],
+  'période précédente : original du trimestre antérieur'
+);
+
+-- Nouvelle livraison du restatement en échec : holdings supprimés puis filing FAILED
+DELETE FROM fund_holdings WHERE filing_id = 900015;
+UPDATE fund_filings SET status = 'FAILED' WHERE id = 900015;
+
+SELECT is(
+  (SELECT array_agg(DISTINCT filing_id ORDER BY filing_id) FROM fund_latest_holdings WHERE fund_id = 900001),
+  ARRAY[900011, 900012],
+  'restatement en échec : retour à l''original et aux new holdings'
+);
+
+SELECT * FROM finish();
+ROLLBACK;
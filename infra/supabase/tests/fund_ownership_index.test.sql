@@ -0,0 +1,82 @@
+-- Tests pgTAP : index CUSIP -> fonds par période déclarée (supabase test db)
+-- Les filings passent PARSED comme le fait parser-13f : holdings écrits, puis statut mis à jour.
+
+BEGIN;
+SELECT plan(5);
+
+INSERT INTO funds (id, name, cik) VALUES (900002, 'Test Fund Ownership', '0000900002');
+
+-- T3 2023 : premier rapport, pas de variation
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, period_of_report, status)
+VALUES (900021, 900002, '0000900002', '0000900002-23-000001', '13F-HR', '2023-11-14', '2023-09-30', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900002, 900021, '0000900002', 'APPLE INC', '90000A101', 100, 3000, 'stock'),
+  (900002, 900021, '0000900002', 'TESLA INC', '90000D104', 5, 500, 'stock');
+UPDATE fund_filings SET status = 'PARSED' WHERE id = 900021;
+
+SELECT results_eq(
+  'SELECT cusip, action, prev_shares FROM fund_ownership_index WHERE fund_id = 900002 ORDER BY cusip',
+  $$VALUES ('90000A101'::TEXT, NULL::TEXT, NULL::BIGINT), ('90000D104', NULL, NULL)$$,
+  'premier rapport : positions sans variation'
+);
+
+-- T4 2023 : original puis amendement NEW HOLDINGS de la même période
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, period_of_report, status)
+VALUES (900022, 900002, '0000900002', '0000900002-24-000001', '13F-HR', '2024-02-14', '2023-12-31', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900002, 900022, '0000900002', 'APPLE INC', '90000A101', 120, 3600, 'stock'),
+  (900002, 900022, '0000900002', 'NVIDIA COR', '90000C103', 50, 1000, 'stock');
+UPDATE fund_filings SET status = 'PARSED' WHERE id = 900022;
+
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, status)
+VALUES (900023, 900002, '0000900002', '0000900002-24-000002', '13F-HR/A', '2024-03-01', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900002, 900023, '0000900002', 'MICROSOFT ', '90000B102', 10, 400, 'stock');
+UPDATE fund_filings
+SET status = 'PARSED', period_of_report = '2023-12-31', amendment_type = 'NEW HOLDINGS'
+WHERE id = 900023;
+
+SELECT results_eq(
+  'SELECT cusip, action, prev_shares FROM fund_ownership_index WHERE fund_id = 900002 ORDER BY cusip',
+  $$VALUES
+    ('90000A101'::TEXT, 'increased'::TEXT, 100::BIGINT),
+    ('90000B102', 'new', 0),
+    ('90000C103', 'new', 0),
+    ('90000D104', 'closed', 5)$$,
+  'new holdings : fusionné au rapport courant, comparé au trimestre précédent'
+);
+
+SELECT results_eq(
+  'SELECT DISTINCT filing_id, period_of_report FROM fund_ownership_index WHERE fund_id = 900002',
+  $$VALUES (900022, '2023-12-31'::DATE)$$,
+  'filing et période du rapport de base'
+);
+
+-- Original en retard pour une période plus ancienne : ni courant ni précédent
+INSERT INTO fund_filings (id, fund_id, cik, accession_number, form_type, filing_date, period_of_report, status)
+VALUES (900024, 900002, '0000900002', '0000900002-24-000003', '13F-HR', '2024-03-15', '2023-06-30', 'DISCOVERED');
+INSERT INTO fund_holdings (fund_id, filing_id, cik, ticker, cusip, shares, market_value, type) VALUES
+  (900002, 900024, '0000900002', 'AMAZON COM', '90000E105', 1, 100, 'stock');
+UPDATE fund_filings SET status = 'PARSED' WHERE id = 900024;
+
+SELECT results_eq(
+  'SELECT cusip, action FROM fund_ownership_index WHERE fund_id = 900002 ORDER BY cusip',
+  $$VALUES
+    ('90000A101'::TEXT, 'increased'::TEXT),
+    ('90000B102', 'new'),
+    ('90000C103', 'new'),
+    ('90000D104', 'closed')$$,
+  'dépôt tardif d''une période ancienne : index inchangé'
+);
+
+SELECT results_eq(
+  $$SELECT cusip, holder_count, buyers, sellers, closed_positions
+    FROM fund_ownership_consensus
+    WHERE cusip IN ('90000A101', '90000D104', '90000E105')
+    ORDER BY cusip$$,
+  $$VALUES ('90000A101'::TEXT, 1, 1, 0, 0), ('90000D104', 0, 0, 1, 1)$$,
+  'consensus des CUSIPs du fond'
+);
+
+SELECT * FROM finish();
+ROLLBACK;
@@ -114,6 +114,15 @@ resource "aws_apigatewayv2_route" "get_ticker_analysis_breakdown" {
   authorizer_id      = aws_apigatewayv2_authorizer.jwt.id
 }
 
+# Ticker Scores (batch, watchlists)
+resource "aws_apigatewayv2_route" "get_ticker_analysis_scores" {
+  api_id             = aws_apigatewayv2_api.http.id
+  route_key          = "GET /ticker-analysis/scores"
+  target             = "integrations/${aws_apigatewayv2_integration.api_lambda.id}"
+  authorization_type = "JWT"
+  authorizer_id      = aws_apigatewayv2_authorizer.jwt.id
+}
+
 # ========== Phase 1.2: Gamma Squeeze Service ==========
 
 # Gamma Squeeze Analysis
@@ -0,0 +1,197 @@
+# Jobs planifiés de l'API (même zip que la Lambda API, handler jobs.handler)
+
+resource "aws_cloudwatch_log_group" "api_jobs" {
+  name              = "/aws/lambda/${var.project}-${var.stage}-api-jobs"
+  retention_in_days = 14
+}
+
+resource "aws_lambda_function" "api_jobs" {
+  function_name    = "${var.project}-${var.stage}-api-jobs"
+  role             = aws_iam_role.api_lambda_role.arn
+  runtime          = "nodejs20.x"
+  handler          = "jobs.handler"
+  filename         = "${path.module}/../../services/api/api.zip"
+  source_code_hash = filebase64sha256("${path.module}/../../services/api/api.zip")
+  timeout          = 900
+  memory_size      = 2048
+
+  depends_on = [aws_cloudwatch_log_group.api_jobs]
+
+  environment {
+    variables = {
+      SUPABASE_URL           = var.supabase_url
+      SUPABASE_SERVICE_KEY   = var.supabase_service_key
+      UNUSUAL_WHALES_API_KEY = var.unusual_whales_api_key
+      FMP_API_KEY            = var.fmp_api_key
+      NEO4J_URI              = var.neo4j_uri
+      NEO4J_USERNAME         = var.neo4j_username
+      NEO4J_PASSWORD         = var.neo4j_password
+      NEO4J_DATABASE         = var.neo4j_database
+    }
+  }
+}
+
+# ============================================
+# Centralité du graphe (Neo4j) - toutes les 6 heures
+# ============================================
+resource "aws_cloudwatch_event_rule" "api_job_graph_centrality" {
+  name                = "${var.project}-${var.stage}-job-graph-centrality"
+  description         = "Recalcule les centralités Institution/Insider/Ticker dans Neo4j"
+  schedule_expression = "rate(6 hours)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_graph_centrality" {
+  rule      = aws_cloudwatch_event_rule.api_job_graph_centrality.name
+  target_id = "ApiJobGraphCentrality"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "graph-centrality" })
+}
+
+resource "aws_lambda_permission" "api_job_graph_centrality" {
+  statement_id  = "AllowExecutionFromCloudWatchGraphCentrality"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_graph_centrality.arn
+}
+
+# ============================================
+# Préchauffage des bundles de données par ticker - toutes les 5 minutes
+# ============================================
+resource "aws_cloudwatch_event_rule" "api_job_ticker_warmup" {
+  name                = "${var.project}-${var.stage}-job-ticker-warmup"
+  description         = "Précharge les données partagées des tickers surveillés, alertés et populaires"
+  schedule_expression = "rate(5 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_ticker_warmup" {
+  rule      = aws_cloudwatch_event_rule.api_job_ticker_warmup.name
+  target_id = "ApiJobTickerWarmup"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "ticker-warmup" })
+}
+
+resource "aws_lambda_permission" "api_job_ticker_warmup" {
+  statement_id  = "AllowExecutionFromCloudWatchTickerWarmup"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_ticker_warmup.arn
+}
+
+# ============================================
+# Agrégats fondamentaux par secteur - toutes les 12 heures
+# ============================================
+resource "aws_cloudwatch_event_rule" "api_job_sector_metrics" {
+  name                = "${var.project}-${var.stage}-job-sector-metrics"
+  description         = "Recalcule les médianes PE / croissance par secteur"
+  schedule_expression = "rate(12 hours)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_sector_metrics" {
+  rule      = aws_cloudwatch_event_rule.api_job_sector_metrics.name
+  target_id = "ApiJobSectorMetrics"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "sector-metrics" })
+}
+
+resource "aws_lambda_permission" "api_job_sector_metrics" {
+  statement_id  = "AllowExecutionFromCloudWatchSectorMetrics"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_sector_metrics.arn
+}
+
+# ============================================
+# Vérification des surveillances et des alertes - toutes les 5 minutes
+# ============================================
+resource "aws_cloudwatch_event_rule" "api_job_surveillance_check" {
+  name                = "${var.project}-${var.stage}-job-surveillance-check"
+  description         = "Évalue les surveillances actives (groupées par ticker)"
+  schedule_expression = "rate(5 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_surveillance_check" {
+  rule      = aws_cloudwatch_event_rule.api_job_surveillance_check.name
+  target_id = "ApiJobSurveillanceCheck"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "surveillance-check" })
+}
+
+resource "aws_lambda_permission" "api_job_surveillance_check" {
+  statement_id  = "AllowExecutionFromCloudWatchSurveillanceCheck"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_surveillance_check.arn
+}
+
+resource "aws_cloudwatch_event_rule" "api_job_alerts_check" {
+  name                = "${var.project}-${var.stage}-job-alerts-check"
+  description         = "Évalue les alertes multi-signaux actives (groupées par ticker)"
+  schedule_expression = "rate(5 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_alerts_check" {
+  rule      = aws_cloudwatch_event_rule.api_job_alerts_check.name
+  target_id = "ApiJobAlertsCheck"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "alerts-check" })
+}
+
+resource "aws_lambda_permission" "api_job_alerts_check" {
+  statement_id  = "AllowExecutionFromCloudWatchAlertsCheck"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_alerts_check.arn
+}
+
+# ============================================
+# Snapshots des positions des hedge funds - tous les jours
+# ============================================
+resource "aws_cloudwatch_event_rule" "api_job_smart_money_snapshots" {
+  name                = "${var.project}-${var.stage}-job-smart-money-snapshots"
+  description         = "Recalcule les snapshots des fonds ayant publié un nouveau 13F"
+  schedule_expression = "rate(1 day)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_smart_money_snapshots" {
+  rule      = aws_cloudwatch_event_rule.api_job_smart_money_snapshots.name
+  target_id = "ApiJobSmartMoneySnapshots"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "smart-money-snapshots" })
+}
+
+resource "aws_lambda_permission" "api_job_smart_money_snapshots" {
+  statement_id  = "AllowExecutionFromCloudWatchSmartMoneySnapshots"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_smart_money_snapshots.arn
+}
+
+# ============================================
+# Collecte des séries temporelles (flows, dark pool, greeks) - toutes les 15 minutes
+# ============================================
+resource "aws_cloudwatch_event_rule" "api_job_timeseries_collect" {
+  name                = "${var.project}-${var.stage}-job-timeseries-collect"
+  description         = "Ajoute les flow alerts, prints dark pool et expositions grecques des tickers chauds au store"
+  schedule_expression = "rate(15 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "api_job_timeseries_collect" {
+  rule      = aws_cloudwatch_event_rule.api_job_timeseries_collect.name
+  target_id = "ApiJobTimeseriesCollect"
+  arn       = aws_lambda_function.api_jobs.arn
+  input     = jsonencode({ job = "timeseries-collect" })
+}
+
+resource "aws_lambda_permission" "api_job_timeseries_collect" {
+  statement_id  = "AllowExecutionFromCloudWatchTimeseriesCollect"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_jobs.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.api_job_timeseries_collect.arn
+}
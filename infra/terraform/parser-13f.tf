@@ -1,4 +1,10 @@
 # Lambda Python pour parser les fichiers 13F EDGAR
+# EventBridge (13F Discovered) -> SQS -> Lambda par lots, concurrence bornée
+
+# Débit sec.gov par instance : budget SEC réparti entre toutes les instances des parsers
+locals {
+  parser_sec_requests_per_second = var.sec_requests_per_second / (var.parser_13f_max_concurrency + var.parser_company_filing_max_concurrency)
+}
 
 # CloudWatch logs
 resource "aws_cloudwatch_log_group" "parser_13f" {
@@ -15,6 +21,8 @@ resource "aws_lambda_function" "parser_13f" {
   filename      = "${path.module}/../../workers/parser-13f.zip"
   timeout       = 900  # 15 minutes pour parsing (fichiers volumineux comme BlackRock)
   memory_size   = 512
+  # Concurrence réservée : borne les appels SEC et les connexions Supabase lors des pics de filings
+  reserved_concurrent_executions = var.parser_13f_max_concurrency
 
   depends_on = [aws_cloudwatch_log_group.parser_13f]
 
@@ -22,6 +30,8 @@ resource "aws_lambda_function" "parser_13f" {
     variables = {
       SUPABASE_URL        = var.supabase_url
       SUPABASE_SERVICE_KEY = var.supabase_service_key
+      SEC_REQUESTS_PER_SECOND = local.parser_sec_requests_per_second
+      MAX_RECEIVE_COUNT       = var.parser_max_receive_count
     }
   }
 }
@@ -45,20 +55,91 @@ resource "aws_iam_role_policy_attachment" "parser_13f_logs" {
   policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
 }
 
-# Permission EventBridge
-resource "aws_lambda_permission" "parser_13f_eventbridge" {
-  statement_id  = "AllowEventBridgeInvoke"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.parser_13f.function_name
-  principal     = "events.amazonaws.com"
-  source_arn    = aws_cloudwatch_event_rule.parser_13f_trigger.arn
+# File SQS entre EventBridge et le parser (absorbe les pics de filings)
+resource "aws_sqs_queue" "parser_13f_dlq" {
+  name                      = "${var.project}-${var.stage}-parser-13f-dlq"
+  message_retention_seconds = 1209600 # 14 jours
+}
+
+resource "aws_sqs_queue" "parser_13f" {
+  name                       = "${var.project}-${var.stage}-parser-13f"
+  # >= timeout Lambda ; le parser prolonge la visibilité des messages en cours
+  visibility_timeout_seconds = aws_lambda_function.parser_13f.timeout + 60
+  message_retention_seconds  = 345600 # 4 jours
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.parser_13f_dlq.arn
+    maxReceiveCount     = var.parser_max_receive_count
+  })
 }
 
-# EventBridge Rule pour déclencher le parser
+# Messages épuisés (rejoués par scripts/reparse-failed-filings.sh --dlq parser-13f)
+resource "aws_sqs_queue_redrive_allow_policy" "parser_13f_dlq" {
+  queue_url = aws_sqs_queue.parser_13f_dlq.id
+
+  redrive_allow_policy = jsonencode({
+    redrivePermission = "byQueue"
+    sourceQueueArns   = [aws_sqs_queue.parser_13f.arn]
+  })
+}
+
+# EventBridge peut publier dans la file
+resource "aws_sqs_queue_policy" "parser_13f" {
+  queue_url = aws_sqs_queue.parser_13f.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "events.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.parser_13f.arn
+      Condition = {
+        ArnEquals = { "aws:SourceArn" = aws_cloudwatch_event_rule.parser_13f_trigger.arn }
+      }
+    }]
+  })
+}
+
+# Lecture de la file par le parser (prolongation de visibilité et renvoi des messages non tentés)
+resource "aws_iam_role_policy" "parser_13f_sqs" {
+  name = "${var.project}-${var.stage}-parser-13f-sqs"
+  role = aws_iam_role.parser_13f_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect = "Allow"
+      Action = [
+        "sqs:ReceiveMessage",
+        "sqs:DeleteMessage",
+        "sqs:ChangeMessageVisibility",
+        "sqs:SendMessage",
+        "sqs:GetQueueAttributes",
+      ]
+      Resource = aws_sqs_queue.parser_13f.arn
+    }]
+  })
+}
+
+# Lots SQS -> Lambda ; seuls les messages en échec retournent dans la file
+resource "aws_lambda_event_source_mapping" "parser_13f" {
+  event_source_arn                   = aws_sqs_queue.parser_13f.arn
+  function_name                      = aws_lambda_function.parser_13f.arn
+  batch_size                         = 5
+  maximum_batching_window_in_seconds = 30
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = var.parser_13f_max_concurrency
+  }
+
+  depends_on = [aws_iam_role_policy.parser_13f_sqs]
+}
+
+# EventBridge Rule pour alimenter la file du parser
 resource "aws_cloudwatch_event_rule" "parser_13f_trigger" {
   name           = "${var.project}-${var.stage}-parser-13f-trigger"
   event_bus_name = aws_cloudwatch_event_bus.signals.name
-  description    = "Déclenche le parser 13F quand un nouveau filing est découvert"
+  description    = "Envoie les 13F découverts dans la file du parser"
 
   event_pattern = jsonencode({
     source      = ["adel.signals"]
@@ -66,16 +147,12 @@ resource "aws_cloudwatch_event_rule" "parser_13f_trigger" {
   })
 }
 
-# Target: Lambda parser
+# Target: file SQS du parser
 resource "aws_cloudwatch_event_target" "parser_13f" {
   rule           = aws_cloudwatch_event_rule.parser_13f_trigger.name
   event_bus_name = aws_cloudwatch_event_bus.signals.name
-  target_id      = "Parser13F"
-  arn            = aws_lambda_function.parser_13f.arn
+  target_id      = "Parser13FQueue"
+  arn            = aws_sqs_queue.parser_13f.arn
 
-  depends_on = [
-    aws_lambda_function.parser_13f,
-    aws_lambda_permission.parser_13f_eventbridge,
-  ]
+  depends_on = [aws_sqs_queue_policy.parser_13f]
 }
-
@@ -1,4 +1,5 @@
 # Lambda Python pour parser les filings SEC des entreprises (8-K, Form 4, etc.)
+# EventBridge (Company Filing Discovered) -> SQS -> Lambda par lots, concurrence bornée
 
 # CloudWatch logs
 resource "aws_cloudwatch_log_group" "parser_company_filing" {
@@ -15,6 +16,8 @@ resource "aws_lambda_function" "parser_company_filing" {
   filename      = "${path.module}/../../workers/parser-company-filing.zip"
   timeout       = 300  # 5 minutes pour parsing
   memory_size   = 512
+  # Concurrence réservée : borne les appels SEC et les connexions Supabase lors des pics de filings
+  reserved_concurrent_executions = var.parser_company_filing_max_concurrency
 
   depends_on = [aws_cloudwatch_log_group.parser_company_filing]
 
@@ -22,6 +25,8 @@ resource "aws_lambda_function" "parser_company_filing" {
     variables = {
       SUPABASE_URL        = var.supabase_url
       SUPABASE_SERVICE_KEY = var.supabase_service_key
+      SEC_REQUESTS_PER_SECOND = local.parser_sec_requests_per_second
+      MAX_RECEIVE_COUNT       = var.parser_max_receive_count
     }
   }
 }
@@ -45,20 +50,91 @@ resource "aws_iam_role_policy_attachment" "parser_company_filing_logs" {
   policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
 }
 
-# Permission EventBridge
-resource "aws_lambda_permission" "parser_company_filing_eventbridge" {
-  statement_id  = "AllowEventBridgeInvoke"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.parser_company_filing.function_name
-  principal     = "events.amazonaws.com"
-  source_arn    = aws_cloudwatch_event_rule.parser_company_filing_trigger.arn
+# File SQS entre EventBridge et le parser (absorbe les pics de filings)
+resource "aws_sqs_queue" "parser_company_filing_dlq" {
+  name                      = "${var.project}-${var.stage}-parser-company-filing-dlq"
+  message_retention_seconds = 1209600 # 14 jours
 }
 
-# EventBridge Rule pour déclencher le parser
+resource "aws_sqs_queue" "parser_company_filing" {
+  name                       = "${var.project}-${var.stage}-parser-company-filing"
+  # >= timeout Lambda ; le parser prolonge la visibilité des messages en cours
+  visibility_timeout_seconds = aws_lambda_function.parser_company_filing.timeout + 60
+  message_retention_seconds  = 345600 # 4 jours
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.parser_company_filing_dlq.arn
+    maxReceiveCount     = var.parser_max_receive_count
+  })
+}
+
+# Messages épuisés (rejoués par scripts/reparse-failed-filings.sh --dlq parser-company-filing)
+resource "aws_sqs_queue_redrive_allow_policy" "parser_company_filing_dlq" {
+  queue_url = aws_sqs_queue.parser_company_filing_dlq.id
+
+  redrive_allow_policy = jsonencode({
+    redrivePermission = "byQueue"
+    sourceQueueArns   = [aws_sqs_queue.parser_company_filing.arn]
+  })
+}
+
+# EventBridge peut publier dans la file
+resource "aws_sqs_queue_policy" "parser_company_filing" {
+  queue_url = aws_sqs_queue.parser_company_filing.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "events.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.parser_company_filing.arn
+      Condition = {
+        ArnEquals = { "aws:SourceArn" = aws_cloudwatch_event_rule.parser_company_filing_trigger.arn }
+      }
+    }]
+  })
+}
+
+# Lecture de la file par le parser (prolongation de visibilité et renvoi des messages non tentés)
+resource "aws_iam_role_policy" "parser_company_filing_sqs" {
+  name = "${var.project}-${var.stage}-parser-company-filing-sqs"
+  role = aws_iam_role.parser_company_filing_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect = "Allow"
+      Action = [
+        "sqs:ReceiveMessage",
+        "sqs:DeleteMessage",
+        "sqs:ChangeMessageVisibility",
+        "sqs:SendMessage",
+        "sqs:GetQueueAttributes",
+      ]
+      Resource = aws_sqs_queue.parser_company_filing.arn
+    }]
+  })
+}
+
+# Lots SQS -> Lambda ; seuls les messages en échec retournent dans la file
+resource "aws_lambda_event_source_mapping" "parser_company_filing" {
+  event_source_arn                   = aws_sqs_queue.parser_company_filing.arn
+  function_name                      = aws_lambda_function.parser_company_filing.arn
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = var.parser_company_filing_max_concurrency
+  }
+
+  depends_on = [aws_iam_role_policy.parser_company_filing_sqs]
+}
+
+# EventBridge Rule pour alimenter la file du parser
 resource "aws_cloudwatch_event_rule" "parser_company_filing_trigger" {
   name           = "${var.project}-${var.stage}-parser-company-filing-trigger"
   event_bus_name = aws_cloudwatch_event_bus.signals.name
-  description    = "Déclenche le parser company filing quand un nouveau filing est découvert"
+  description    = "Envoie les filings company découverts dans la file du parser"
 
   event_pattern = jsonencode({
     source      = ["adel.signals"]
@@ -66,19 +142,12 @@ resource "aws_cloudwatch_event_rule" "parser_company_filing_trigger" {
   })
 }
 
-# Target: Lambda parser
+# Target: file SQS du parser
 resource "aws_cloudwatch_event_target" "parser_company_filing" {
   rule           = aws_cloudwatch_event_rule.parser_company_filing_trigger.name
   event_bus_name = aws_cloudwatch_event_bus.signals.name
-  target_id      = "ParserCompanyFiling"
-  arn            = aws_lambda_function.parser_company_filing.arn
+  target_id      = "ParserCompanyFilingQueue"
+  arn            = aws_sqs_queue.parser_company_filing.arn
 
-  depends_on = [
-    aws_lambda_function.parser_company_filing,
-    aws_lambda_permission.parser_company_filing_eventbridge,
-  ]
+  depends_on = [aws_sqs_queue_policy.parser_company_filing]
 }
-
-
-
-
@@ -11,8 +11,10 @@ resource "aws_lambda_function" "processor_ia" {
   runtime       = "nodejs20.x"
   handler       = "index.handler"
   filename      = "${path.module}/../../workers/processor-ia/processor-ia.zip"
-  timeout       = 60
+  timeout       = 300 # mode batch : drainage jusqu'au budget tokens
   memory_size   = 512
+  # Mode batch : une seule invocation à la fois (le cron de 2 minutes est plus court que le timeout)
+  reserved_concurrent_executions = var.processor_ia_mode == "batch" ? 1 : -1
 
   depends_on = [aws_cloudwatch_log_group.processor_ia]
 
@@ -21,6 +23,7 @@ resource "aws_lambda_function" "processor_ia" {
       SUPABASE_URL        = var.supabase_url
       SUPABASE_SERVICE_KEY = var.supabase_service_key
       OPENAI_API_KEY      = var.openai_api_key
+      ENRICHMENT_MODE     = var.processor_ia_mode
     }
   }
 }
@@ -62,3 +65,33 @@ resource "aws_cloudwatch_event_target" "processor_ia" {
   ]
 }
 
+
+# Mode batch : drainage des signaux 'pending' toutes les 2 minutes
+# (un déclenchement pendant un drainage en cours est limité par reserved_concurrent_executions)
+resource "aws_cloudwatch_event_rule" "processor_ia_batch_cron" {
+  name                = "${var.project}-${var.stage}-processor-ia-batch-cron"
+  description         = "Draine les signaux en attente d'enrichissement IA par lots"
+  schedule_expression = "rate(2 minutes)"
+  state               = var.processor_ia_mode == "batch" ? "ENABLED" : "DISABLED"
+}
+
+# Un déclenchement limité n'est pas mis en file : le cron suivant prend le relais
+resource "aws_lambda_function_event_invoke_config" "processor_ia" {
+  function_name                = aws_lambda_function.processor_ia.function_name
+  maximum_event_age_in_seconds = var.processor_ia_mode == "batch" ? 60 : 21600
+  maximum_retry_attempts       = var.processor_ia_mode == "batch" ? 0 : 2
+}
+
+resource "aws_cloudwatch_event_target" "processor_ia_batch" {
+  rule      = aws_cloudwatch_event_rule.processor_ia_batch_cron.name
+  target_id = "ProcessorIABatch"
+  arn       = aws_lambda_function.processor_ia.arn
+}
+
+resource "aws_lambda_permission" "processor_ia_batch_events" {
+  statement_id  = "AllowExecutionFromCloudWatchBatch"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.processor_ia.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.processor_ia_batch_cron.arn
+}
@@ -9,6 +9,8 @@ resource "aws_cloudwatch_event_rule" "processor_ia_trigger" {
   name           = "${var.project}-${var.stage}-processor-ia-trigger"
   event_bus_name = aws_cloudwatch_event_bus.signals.name
   description    = "Déclenche le processor IA pour nouveaux signaux"
+  # En mode batch, les signaux sont drainés par processor_ia_batch_cron
+  state          = var.processor_ia_mode == "event" ? "ENABLED" : "DISABLED"
 
   event_pattern = jsonencode({
     source      = ["adel.signals"]
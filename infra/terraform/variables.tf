@@ -89,3 +89,38 @@ variable "neo4j_database" {
   sensitive   = false
   default     = "neo4j"
 }
+
+variable "processor_ia_mode" {
+  type        = string
+  description = "Mode du processor IA : batch (drainage par cron) ou event (un signal par événement New Signal)"
+  default     = "batch"
+
+  validation {
+    condition     = contains(["batch", "event"], var.processor_ia_mode)
+    error_message = "processor_ia_mode doit valoir batch ou event."
+  }
+}
+
+variable "sec_requests_per_second" {
+  type        = number
+  description = "Budget de requêtes sec.gov partagé par les parsers (limite SEC : 10 req/s par IP)"
+  default     = 8
+}
+
+variable "parser_13f_max_concurrency" {
+  type        = number
+  description = "Instances parallèles max du parser 13F (concurrence réservée, minimum 2 pour SQS)"
+  default     = 2
+}
+
+variable "parser_company_filing_max_concurrency" {
+  type        = number
+  description = "Instances parallèles max du parser company filing (concurrence réservée, minimum 2 pour SQS)"
+  default     = 2
+}
+
+variable "parser_max_receive_count" {
+  type        = number
+  description = "Tentatives d'un message de parsing avant la DLQ"
+  default     = 5
+}
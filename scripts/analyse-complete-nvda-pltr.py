@@ -40,71 +40,38 @@ def format_currency(value):
     else:
         return f"${value_millions:.2f}M"  # Millions
 
-def analyze_ticker(supabase, fund_id, ticker_name, cusip, ticker_code):
-    """Analyser un ticker spécifique (NVDA ou PLTR)"""
+def analyze_ticker(supabase, fund_id, ticker_name, cusip, ticker_code, aliases=()):
+    """Analyser un ticker spécifique (NVDA ou PLTR) ; retourne l'historique par filing"""
     print("="*80)
     print(f"📊 ANALYSE: {ticker_name} ({ticker_code})\n")
     
-    # Récupérer tous les filings parsés
-    filings_result = supabase.table("fund_filings")\
-        .select("id, filing_date, accession_number")\
-        .eq("fund_id", fund_id)\
-        .eq("status", "PARSED")\
-        .order("filing_date", desc=False)\
-        .execute()
+    # Actions / PUT / CALL agrégés par filing parsé en une requête
+    # (les filings sans position sont renvoyés à zéro)
+    history_result = supabase.rpc("get_fund_position_history", {
+        "p_fund_id": fund_id,
+        "p_tickers": [ticker_code, *aliases],
+        "p_cusips": [cusip],
+    }).execute()
     
-    filings = filings_result.data
+    history = [
+        {
+            "date": row["filing_date"],
+            "accession": row["accession_number"],
+            "stock_shares": row["stock_shares"],
+            "stock_value": row["stock_value"],
+            "put_shares": row["put_shares"],
+            "put_value": row["put_value"],
+            "call_shares": row["call_shares"],
+            "call_value": row["call_value"]
+        }
+        for row in history_result.data or []
+    ]
     
-    print(f"📅 Analyse sur {len(filings)} filings parsés\n")
+    print(f"📅 Analyse sur {len(history)} filings parsés\n")
     
-    # Analyser chaque filing
-    history = []
-    
-    for filing in filings:
-        filing_id = filing["id"]
-        filing_date = filing["filing_date"]
-        accession = filing["accession_number"]
-        
-        # Récupérer TOUS les holdings (actions + options)
-        holdings_result = supabase.table("fund_holdings")\
-            .select("ticker, shares, market_value, type, cusip")\
-            .eq("filing_id", filing_id)\
-            .or_(f"ticker.ilike.%{ticker_code}%,cusip.eq.{cusip}")\
-            .execute()
-        
-        if not holdings_result.data:
-            history.append({
-                "date": filing_date,
-                "accession": accession,
-                "stock_shares": 0,
-                "stock_value": 0,
-                "put_shares": 0,
-                "put_value": 0,
-                "call_shares": 0,
-                "call_value": 0
-            })
-            continue
-        
-        # Séparer par type
-        stock_shares = sum(h.get("shares", 0) for h in holdings_result.data if h.get("type") == "stock")
-        stock_value = sum(h.get("market_value", 0) for h in holdings_result.data if h.get("type") == "stock")
-        
-        put_shares = sum(h.get("shares", 0) for h in holdings_result.data if h.get("type") == "put")
-        put_value = sum(h.get("market_value", 0) for h in holdings_result.data if h.get("type") == "put")
-        
-        call_shares = sum(h.get("shares", 0) for h in holdings_result.data if h.get("type") == "call")
-        call_value = sum(h.get("market_value", 0) for h in holdings_result.data if h.get("type") == "call")
-        
-        history.append({
-            "date": filing_date,
-            "accession": accession,
-            "stock_shares": stock_shares,
-            "stock_value": stock_value,
-            "put_shares": put_shares,
-            "put_value": put_value,
-            "call_shares": call_shares,
-            "call_value": call_value
-        })
+    if not history:
+        print("❌ Aucun filing parsé")
+        return history
     
     # Afficher l'historique
     print("📈 Évolution trimestre par trimestre:\n")
@@ -218,6 +185,7 @@ def analyze_ticker(supabase, fund_id, ticker_name, cusip, ticker_code):
             print(f"   {'⚠️' if change > 0 else '✅'} PUTs: {change:+,} ({change_pct:+.1f}%)")
     
     print("\n" + "="*80 + "\n")
+    return history
 
 def main():
     print("\n" + "="*80)
@@ -240,7 +208,7 @@ def main():
     fund_id = funds_result.data[0]["id"]
     
     # Analyser NVDA
-    analyze_ticker(
+    nvda_history = analyze_ticker(
         supabase, 
         fund_id, 
         "NVIDIA Corporation", 
@@ -249,52 +217,29 @@ def main():
     )
     
     # Analyser PLTR
-    analyze_ticker(
+    pltr_history = analyze_ticker(
         supabase, 
         fund_id, 
         "Palantir Technologies", 
         "69608A108", 
-        "PLTR"
+        "PLTR",
+        aliases=("PALANTIR",)
     )
     
     # Résumé comparatif
     print("="*80)
     print("📋 RÉSUMÉ COMPARATIF\n")
     
-    # Récupérer le dernier filing
-    filing_result = supabase.table("fund_filings")\
-        .select("id, filing_date")\
-        .eq("fund_id", fund_id)\
-        .eq("status", "PARSED")\
-        .order("filing_date", desc=True)\
-        .limit(1)\
-        .execute()
-    
-    if filing_result.data:
-        filing_id = filing_result.data[0]["id"]
-        filing_date = filing_result.data[0]["filing_date"]
+    # Dernier filing parsé : dernière ligne des historiques
+    if nvda_history and pltr_history:
+        filing_date = nvda_history[-1]["date"]
         
         print(f"📅 Dernier filing analysé: {filing_date}\n")
         
-        # NVDA
-        nvda_result = supabase.table("fund_holdings")\
-            .select("type, shares, market_value")\
-            .eq("filing_id", filing_id)\
-            .or_("ticker.ilike.%NVDA%,cusip.eq.67066G104")\
-            .execute()
-        
-        nvda_stock = sum(h.get("shares", 0) for h in nvda_result.data if h.get("type") == "stock")
-        nvda_put = sum(h.get("shares", 0) for h in nvda_result.data if h.get("type") == "put")
-        
-        # PLTR
-        pltr_result = supabase.table("fund_holdings")\
-            .select("type, shares, market_value")\
-            .eq("filing_id", filing_id)\
-            .or_("ticker.ilike.%PLTR%,ticker.ilike.%PALANTIR%,cusip.eq.69608A108")\
-            .execute()
-        
-        pltr_stock = sum(h.get("shares", 0) for h in pltr_result.data if h.get("type") == "stock")
-        pltr_put = sum(h.get("shares", 0) for h in pltr_result.data if h.get("type") == "put")
+        nvda_stock = nvda_history[-1]["stock_shares"]
+        nvda_put = nvda_history[-1]["put_shares"]
+        pltr_stock = pltr_history[-1]["stock_shares"]
+        pltr_put = pltr_history[-1]["put_shares"]
         
         print("NVDA:")
         print(f"   Actions: {nvda_stock:,} | PUTs: {nvda_put:,}")
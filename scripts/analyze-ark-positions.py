@@ -5,7 +5,6 @@ Analyser l'évolution des positions ARK sur Tesla, Palantir et Coinbase
 
 import os
 from supabase import create_client, Client
-from collections import defaultdict
 
 # Charger .env depuis la racine du projet si disponible
 try:
@@ -44,49 +43,42 @@ def main():
     # Tickers à analyser
     tickers = ["TESLA", "PALANTIR", "COINBASE"]
     
-    # Récupérer tous les filings ARK par date
-    filings = supabase.table("fund_filings")\
-        .select("id, filing_date")\
+    # Fund ARK (CIK 0001697748)
+    fund = supabase.table("funds")\
+        .select("id")\
         .eq("cik", "0001697748")\
-        .order("filing_date", desc=False)\
         .execute()
     
-    if not filings.data:
-        print("❌ Aucun filing ARK trouvé")
+    if not fund.data:
+        print("❌ Fund ARK non trouvé")
         return
     
-    print(f"📅 {len(filings.data)} filings analysés\n")
+    fund_id = fund.data[0]["id"]
     
     # Pour chaque ticker, analyser l'évolution
     for ticker in tickers:
         print(f"\n{'='*80}")
         print(f"📊 {ticker}\n")
         
-        positions = []
+        # Une requête par ticker : actions agrégées par filing côté base
+        history = supabase.rpc("get_fund_position_history", {
+            "p_fund_id": fund_id,
+            "p_tickers": [ticker],
+        }).execute()
         
-        for filing in filings.data:
-            filing_id = filing["id"]
-            filing_date = filing["filing_date"]
-            
-            # Chercher les holdings pour ce ticker dans ce filing
-            holdings = supabase.table("fund_holdings")\
-                .select("ticker, shares, market_value, type")\
-                .eq("filing_id", filing_id)\
-                .eq("type", "stock")\
-                .or_(f"ticker.ilike.%{ticker}%,cusip.ilike.%{ticker}%")\
-                .execute()
-            
-            if holdings.data:
-                # Somme des positions (peut y avoir plusieurs lignes)
-                total_shares = sum(h.get("shares", 0) for h in holdings.data)
-                total_value = sum(h.get("market_value", 0) for h in holdings.data)
-                
-                positions.append({
-                    "date": filing_date,
-                    "shares": total_shares,
-                    "value": total_value,
-                    "value_formatted": format_currency(total_value)
-                })
+        positions = [
+            {
+                "date": row["filing_date"],
+                "shares": row["stock_shares"],
+                "value": row["stock_value"],
+                "value_formatted": format_currency(row["stock_value"])
+            }
+            for row in history.data or []
+            if row["stock_shares"] or row["stock_value"]
+        ]
+        
+        if history.data:
+            print(f"📅 {len(history.data)} filings analysés\n")
         
         if not positions:
             print(f"   ❌ Aucune position trouvée pour {ticker}")
@@ -2,17 +2,42 @@
 
 # Script simple pour re-déclencher le parsing des filings FAILED
 # Usage: ./scripts/reparse-failed-filings.sh <fund_id>
+#        ./scripts/reparse-failed-filings.sh --dlq [parser-13f|parser-company-filing]
+# --dlq : renvoie les messages de la DLQ du parser dans sa file (après épuisement des tentatives)
+
+EVENT_BUS_NAME="adel-ai-dev-signals"
+QUEUE_PREFIX="adel-ai-dev"
+REGION="eu-west-3"
+
+if [ "$1" = "--dlq" ]; then
+  PARSER="${2:-parser-13f}"
+  DLQ_URL=$(aws sqs get-queue-url --region "$REGION" --queue-name "${QUEUE_PREFIX}-${PARSER}-dlq" --query QueueUrl --output text) || exit 1
+  DLQ_ATTRIBUTES=$(aws sqs get-queue-attributes --region "$REGION" --queue-url "$DLQ_URL" \
+    --attribute-names QueueArn ApproximateNumberOfMessages --output json) || exit 1
+  DLQ_ARN=$(echo "$DLQ_ATTRIBUTES" | jq -r '.Attributes.QueueArn')
+  DLQ_COUNT=$(echo "$DLQ_ATTRIBUTES" | jq -r '.Attributes.ApproximateNumberOfMessages')
+
+  if [ "$DLQ_COUNT" -eq 0 ]; then
+    echo "No messages in ${PARSER} DLQ"
+    exit 0
+  fi
+
+  # Sans destination, SQS renvoie chaque message dans sa file d'origine
+  echo "Redriving $DLQ_COUNT messages from ${PARSER} DLQ..."
+  aws sqs start-message-move-task --region "$REGION" --source-arn "$DLQ_ARN" --output json > /dev/null || exit 1
+  echo "Done! Filings will be re-parsed through the queue"
+  exit 0
+fi
 
 FUND_ID=$1
 if [ -z "$FUND_ID" ]; then
   echo "Usage: $0 <fund_id>"
+  echo "       $0 --dlq [parser-13f|parser-company-filing]"
   exit 1
 fi
 
 SUPABASE_URL="${SUPABASE_URL:-https://nmynjtrppwhiwlxfdzdh.supabase.co}"
 SUPABASE_KEY="${SUPABASE_SERVICE_KEY:-sb_secret_025ZPExdwYIENsABogIRsw_jDhFPTo6}"
-EVENT_BUS_NAME="adel-ai-dev-signals"
-REGION="eu-west-3"
 
 echo "Re-parsing failed filings for fund $FUND_ID..."
 
@@ -0,0 +1,118 @@
+/**
+ * Benchmark de l'évaluateur compilé d'alertes
+ * Compare l'évaluation en lot (AlertBatch) à une interprétation condition par condition.
+ *
+ * Usage : npm run bench:alerts -- [alertes=10000] [tickers=500] [itérations=50]
+ */
+
+import {
+  AlertBatch,
+  FEATURE_COUNT,
+  compileAlert,
+} from '../src/services/alert-evaluator.service';
+import type { AlertCondition, ComparisonOperator, SignalType } from '../src/types/alerts';
+
+const [alertCount = 10000, tickerCount = 500, iterations = 50] = process.argv
+  .slice(2)
+  .map((arg) => parseInt(arg, 10));
+
+const SIGNALS: SignalType[] = [
+  'options_flow',
+  'flow_premium',
+  'insider_activity',
+  'dark_pool',
+  'short_interest',
+  'iv_rank',
+  'price',
+  'volume',
+];
+const OPERATORS: ComparisonOperator[] = ['gt', 'gte', 'lt', 'lte', 'eq', 'neq'];
+
+// Générateur déterministe (résultats comparables d'une exécution à l'autre)
+let seed = 42;
+function random(): number {
+  seed = (seed * 1664525 + 1013904223) % 4294967296;
+  return seed / 4294967296;
+}
+function pick<T>(items: T[]): T {
+  return items[Math.floor(random() * items.length)];
+}
+
+function randomCondition(): AlertCondition {
+  return {
+    signal: pick(SIGNALS),
+    operator: pick(OPERATORS),
+    value: Math.round(random() * 100),
+    params: random() < 0.3 ? { type: 'put' } : undefined,
+  };
+}
+
+const alerts = Array.from({ length: alertCount }, () => ({
+  ticker: Math.floor(random() * tickerCount),
+  logic: random() < 0.5 ? ('AND' as const) : ('OR' as const),
+  conditions: Array.from({ length: 1 + Math.floor(random() * 4) }, randomCondition),
+}));
+
+const features = new Float64Array(tickerCount * FEATURE_COUNT);
+for (let i = 0; i < features.length; i++) {
+  features[i] = Math.round(random() * 100);
+}
+
+function time(label: string, fn: () => number): void {
+  fn();
+  const start = process.hrtime.bigint();
+  let checksum = 0;
+  for (let i = 0; i < iterations; i++) {
+    checksum += fn();
+  }
+  const perRunMs = Number(process.hrtime.bigint() - start) / 1e6 / iterations;
+  console.log(
+    `${label.padEnd(28)} ${perRunMs.toFixed(3).padStart(9)} ms/run  ` +
+      `${Math.round(alertCount / perRunMs).toLocaleString('en-US').padStart(12)} alerts/ms  (checksum ${checksum})`
+  );
+}
+
+const compileStart = process.hrtime.bigint();
+const programs = alerts.map((a) => compileAlert(a.conditions, a.logic));
+const compileMs = Number(process.hrtime.bigint() - compileStart) / 1e6;
+
+const buildStart = process.hrtime.bigint();
+const batch = new AlertBatch(programs, alerts.map((a) => a.ticker));
+const buildMs = Number(process.hrtime.bigint() - buildStart) / 1e6;
+
+console.log(`${alertCount} alerts, ${tickerCount} tickers, ${iterations} iterations`);
+console.log(`compile: ${compileMs.toFixed(2)} ms, batch build: ${buildMs.toFixed(2)} ms`);
+
+// Référence : interprétation des programmes alerte par alerte, avec tableaux intermédiaires
+time('interpreted (per alert)', () => {
+  let count = 0;
+  for (let a = 0; a < programs.length; a++) {
+    const program = programs[a];
+    const base = alerts[a].ticker * FEATURE_COUNT;
+    const results = program.features.map((feature, i) => {
+      const value = features[base + feature];
+      const threshold = program.thresholds[i] ?? NaN;
+      switch (program.ops[i]) {
+        case 0: return value > threshold;
+        case 1: return value >= threshold;
+        case 2: return value < threshold;
+        case 3: return value <= threshold;
+        case 4: return value === threshold;
+        default: return value !== threshold;
+      }
+    });
+    if (program.logic === 'AND' ? results.every(Boolean) : results.some(Boolean)) {
+      count++;
+    }
+  }
+  return count;
+});
+
+time('compiled batch', () => {
+  const triggered = batch.evaluate(features);
+  let count = 0;
+  for (let i = 0; i < triggered.length; i++) {
+    count += triggered[i];
+  }
+  return count;
+});
@@ -9,3 +9,14 @@ await build({
   format: "cjs",
   sourcemap: false
 });
+
+// Jobs planifiés (même zip, handler "jobs.handler")
+await build({
+  entryPoints: ["src/jobs.ts"],
+  outfile: "dist/jobs.cjs",
+  bundle: true,
+  platform: "node",
+  target: "node20",
+  format: "cjs",
+  sourcemap: false
+});
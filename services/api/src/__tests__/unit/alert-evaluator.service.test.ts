@@ -0,0 +1,86 @@
+/**
+ * Tests unitaires pour l'évaluateur compilé des alertes
+ */
+
+import { describe, it, expect } from '@jest/globals';
+import {
+  AlertBatch,
+  FEATURE_COUNT,
+  compileAlert,
+  extractFeatures,
+} from '../../services/alert-evaluator.service';
+import type { AlertCondition } from '../../types/alerts';
+import type { TickerBundle } from '../../types/ticker-bundle';
+
+function bundle(data: TickerBundle['data']): TickerBundle {
+  return { ticker: 'TEST', data, errors: [], fetchedAt: '', expiresAt: '' };
+}
+
+describe('AlertEvaluator', () => {
+  it('devrait extraire les features d\'un bundle', () => {
+    const features = extractFeatures(
+      bundle({
+        optionsFlow: [
+          { call_volume: 10, put_volume: 4, call_premium: '1000', put_premium: '500' },
+          { call_volume: 5, put_volume: 1, call_premium: '200', put_premium: '0' },
+        ],
+        shortInterest: [{ percent_returned: '12.5' }],
+        ivRank: [{ iv_rank_1y: '0.2' }, { iv_rank_1y: '0.65' }],
+        quote: [{ price: 180, volume: 1000 }],
+      })
+    );
+    const batch = new AlertBatch(
+      [
+        compileAlert(
+          [
+            { signal: 'options_flow', operator: 'eq', value: 15 },
+            { signal: 'options_flow', operator: 'eq', value: 5, params: { type: 'put' } },
+            { signal: 'flow_premium', operator: 'eq', value: 1700 },
+            { signal: 'short_interest', operator: 'eq', value: 12.5 },
+            { signal: 'iv_rank', operator: 'eq', value: 0.65 },
+            { signal: 'price', operator: 'eq', value: 180 },
+          ],
+          'AND'
+        ),
+      ],
+      [0]
+    );
+
+    expect(features).toHaveLength(FEATURE_COUNT);
+    expect(batch.evaluate(features)[0]).toBe(1);
+  });
+
+  it('devrait conserver la sémantique AND / OR et des seuils non numériques', () => {
+    const conditions: AlertCondition[] = [
+      { signal: 'dark_pool', operator: 'gt', value: 100 },
+      { signal: 'greeks', operator: 'neq', value: 'high' },
+    ];
+    const programs = [
+      compileAlert(conditions, 'AND'),
+      compileAlert(conditions, 'OR'),
+      compileAlert([], 'AND'),
+      compileAlert([], 'OR'),
+      compileAlert([{ signal: 'dark_pool', operator: 'eq', value: '50' }], 'AND'),
+    ];
+    const features = new Float64Array(FEATURE_COUNT * 2);
+    extractFeatures(bundle({ darkPool: [{ volume: 50 }] }), features, 0);
+    extractFeatures(bundle({ darkPool: [{ volume: 150 }] }), features, FEATURE_COUNT);
+
+    const low = new AlertBatch(programs, [0, 0, 0, 0, 0]).evaluate(features);
+    const high = new AlertBatch(programs, [1, 1, 1, 1, 1]).evaluate(features);
+
+    expect(Array.from(low)).toEqual([0, 1, 1, 0, 0]);
+    expect(Array.from(high)).toEqual([1, 1, 1, 0, 0]);
+  });
+
+  it('devrait détailler valeurs et résultats des conditions', () => {
+    const conditions: AlertCondition[] = [{ signal: 'dark_pool', operator: 'gte', value: 150 }];
+    const features = extractFeatures(bundle({ darkPool: [{ volume: 100 }, { volume: 50 }] }));
+    const batch = new AlertBatch([compileAlert(conditions, 'AND')], [0]);
+    batch.evaluate(features);
+
+    expect(batch.outcomes(0, conditions, features)).toEqual([
+      { condition: conditions[0], met: true, value: 150 },
+    ]);
+  });
+});
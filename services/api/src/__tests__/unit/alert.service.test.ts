@@ -0,0 +1,113 @@
+/**
+ * Tests unitaires pour la vérification groupée des alertes (checkAllAlerts)
+ */
+
+import { describe, it, expect, beforeEach, jest } from '@jest/globals';
+import { AlertService } from '../../services/alert.service';
+
+// max_rows PostgREST : une requête ne renvoie jamais plus de 1000 lignes
+const MAX_ROWS = 1000;
+const ALERT_COUNT = 2500;
+
+const db: { alerts: any[]; updates: Array<{ payload: any; ids: string[] }>; triggers: any[] } = {
+  alerts: [],
+  updates: [],
+  triggers: [],
+};
+
+jest.mock('../../supabase', () => {
+  const from = (table: string) => {
+    const query: any = {
+      select: () => query,
+      eq: () => query,
+      not: () => query,
+      order: () => query,
+      range: async (start: number, end: number) => ({
+        data: db.alerts.slice(start, Math.min(end + 1, start + MAX_ROWS)),
+        error: null,
+      }),
+      update: (payload: any) => ({
+        in: async (_column: string, ids: string[]) => {
+          db.updates.push({ payload, ids });
+          return { error: null };
+        },
+      }),
+      insert: async (rows: any[]) => {
+        if (table === 'alert_triggers') db.triggers.push(...rows);
+        return { error: null };
+      },
+    };
+    return query;
+  };
+  return { supabase: { from } };
+});
+
+jest.mock('../../services/ticker-bundle.service', () => ({
+  TickerBundleService: jest.fn().mockImplementation(() => ({
+    getBundle: async (ticker: string) => ({
+      ticker,
+      data: { shortInterest: [{ percent_returned: ticker === 'T0' ? '25' : '5' }] },
+      errors: [],
+      fetchedAt: '',
+      expiresAt: '',
+    }),
+  })),
+}));
+
+function alertRow(i: number) {
+  return {
+    id: `alert-${String(i).padStart(5, '0')}`,
+    user_id: 'user-1',
+    ticker: `T${i % 10}`,
+    name: `Alert ${i}`,
+    description: null,
+    conditions: [{ signal: 'short_interest', operator: 'gt', value: 20 }],
+    logic: 'AND',
+    notification_channels: ['webhook'],
+    active: true,
+    created_at: new Date().toISOString(),
+    last_checked: null,
+    last_triggered: null,
+    compiled: null,
+    condition_met: false,
+  };
+}
+
+describe('AlertService.checkAllAlerts', () => {
+  beforeEach(() => {
+    db.alerts = Array.from({ length: ALERT_COUNT }, (_, i) => alertRow(i));
+    db.updates = [];
+    db.triggers = [];
+  });
+
+  it('devrait vérifier toutes les alertes actives au-delà d\'une page PostgREST', async () => {
+    const result = await new AlertService().checkAllAlerts();
+
+    expect(result).toEqual({ tickers: 10, alerts: ALERT_COUNT, triggered: ALERT_COUNT / 10 });
+
+    const checked = db.updates.filter((update) => 'last_checked' in update.payload);
+    expect(new Set(checked.flatMap((update) => update.ids)).size).toBe(ALERT_COUNT);
+    expect(Math.max(...checked.map((update) => update.ids.length))).toBeLessThanOrEqual(500);
+
+    const lastTriggered = db.updates.filter((update) => 'last_triggered' in update.payload);
+    expect(lastTriggered.flatMap((update) => update.ids)).toHaveLength(ALERT_COUNT / 10);
+    expect(db.triggers.every((trigger) => trigger.ticker === 'T0')).toBe(true);
+
+    const met = db.updates.filter((update) => update.payload.condition_met === true);
+    expect(met.flatMap((update) => update.ids)).toHaveLength(ALERT_COUNT / 10);
+  });
+
+  it('ne devrait déclencher qu\'au passage des conditions de faux à vrai', async () => {
+    db.alerts = db.alerts.map((row) => ({ ...row, condition_met: true }));
+
+    const result = await new AlertService().checkAllAlerts();
+
+    expect(result.triggered).toBe(0);
+    expect(db.triggers).toHaveLength(0);
+    expect(db.updates.filter((update) => 'last_triggered' in update.payload)).toHaveLength(0);
+
+    // Conditions redevenues fausses (T1..T9) : prêtes pour le prochain déclenchement
+    const cleared = db.updates.filter((update) => update.payload.condition_met === false);
+    expect(cleared.flatMap((update) => update.ids)).toHaveLength(ALERT_COUNT - ALERT_COUNT / 10);
+  });
+});
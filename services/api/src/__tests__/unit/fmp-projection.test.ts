@@ -0,0 +1,31 @@
+/**
+ * Tests unitaires pour la projection des états financiers FMP (format colonnes)
+ */
+
+import { describe, it, expect } from '@jest/globals';
+import { projectColumns, columnarRow } from '../../repositories/fmp.repository';
+
+describe('FMPRepository - projection des champs', () => {
+  const rows = [
+    { date: '2025-09-27', revenue: 120, netIncome: 10, eps: 1.2, link: 'https://...' },
+    { date: '2024-09-28', revenue: 100, netIncome: undefined as number | undefined, eps: 1.0, link: 'https://...' },
+  ];
+
+  it('devrait ne conserver que les champs déclarés, par colonne', () => {
+    const records = projectColumns(rows, ['date', 'revenue', 'netIncome'] as const);
+
+    expect(records.length).toBe(2);
+    expect(records.fields).toEqual(['date', 'revenue', 'netIncome']);
+    expect(records.columns.revenue).toEqual([120, 100]);
+    expect(records.columns.netIncome).toEqual([10, null]);
+    expect(Object.keys(records.columns)).not.toContain('link');
+  });
+
+  it('devrait reconstituer une ligne et retourner undefined hors bornes', () => {
+    const records = projectColumns(rows, ['date', 'revenue'] as const);
+
+    expect(columnarRow(records, 1)).toEqual({ date: '2024-09-28', revenue: 100 });
+    expect(columnarRow(records, 2)).toBeUndefined();
+    expect(projectColumns([], ['date'] as const).length).toBe(0);
+  });
+});
@@ -0,0 +1,79 @@
+/**
+ * Tests unitaires pour le calcul batch des centralités (en process)
+ */
+
+import { describe, it, expect, jest } from '@jest/globals';
+import {
+  computeRawCentrality,
+  normalizeCentrality,
+} from '../../services/graph-centrality.service';
+
+jest.mock('../../repositories/neo4j.repository', () => ({
+  Neo4jRepository: jest.fn(),
+}));
+
+describe('GraphCentralityService (calcul en process)', () => {
+  // Chemin a - b - c - d : b et c sont les seuls intermédiaires
+  const path = {
+    nodes: ['a', 'b', 'c', 'd'],
+    edges: [['a', 'b'], ['b', 'c'], ['c', 'd']] as Array<[string, string]>,
+  };
+
+  it('devrait calculer la betweenness exacte sur un chemin', () => {
+    const raw = computeRawCentrality(path);
+
+    expect(raw.get('a')!.betweenness).toBeCloseTo(0);
+    expect(raw.get('b')!.betweenness).toBeCloseTo(2); // (a,c) et (a,d)
+    expect(raw.get('c')!.betweenness).toBeCloseTo(2); // (b,d) et (a,d)
+    expect(raw.get('d')!.betweenness).toBeCloseTo(0);
+  });
+
+  it('devrait calculer le degré et la closeness harmonique', () => {
+    const raw = computeRawCentrality(path);
+
+    expect(raw.get('a')!.degree).toBe(1);
+    expect(raw.get('b')!.degree).toBe(2);
+    // a : (1 + 1/2 + 1/3) / 3
+    expect(raw.get('a')!.closeness).toBeCloseTo((1 + 1 / 2 + 1 / 3) / 3);
+    expect(raw.get('b')!.closeness).toBeGreaterThan(raw.get('a')!.closeness);
+  });
+
+  it('devrait donner le PageRank le plus élevé au ticker détenu par tous', () => {
+    const star = {
+      nodes: ['inst1', 'inst2', 'inst3', 'NVDA'],
+      edges: [['inst1', 'NVDA'], ['inst2', 'NVDA'], ['inst3', 'NVDA']] as Array<[string, string]>,
+    };
+    const raw = computeRawCentrality(star);
+    const sum = Array.from(raw.values()).reduce((acc, s) => acc + s.pagerank, 0);
+
+    expect(sum).toBeCloseTo(1);
+    expect(raw.get('NVDA')!.pagerank).toBeGreaterThan(raw.get('inst1')!.pagerank);
+  });
+
+  it('devrait extrapoler la betweenness quand les sources sont échantillonnées', () => {
+    const exact = computeRawCentrality(path);
+    const sampled = computeRawCentrality(path, { maxExactSources: 2 });
+
+    expect(sampled.get('a')!.betweenness).toBeCloseTo(0);
+    expect(sampled.get('b')!.betweenness).toBeGreaterThan(0);
+    expect(exact.size).toBe(sampled.size);
+  });
+
+  it('devrait normaliser entre 0 et 1 et calculer le score global', () => {
+    const scores = normalizeCentrality(computeRawCentrality(path));
+
+    for (const s of scores.values()) {
+      expect(s.overall).toBeGreaterThanOrEqual(0);
+      expect(s.overall).toBeLessThanOrEqual(1);
+    }
+    expect(scores.get('b')!.betweenness).toBe(1);
+    expect(scores.get('b')!.overall).toBeGreaterThan(scores.get('a')!.overall);
+  });
+
+  it('devrait ignorer les arêtes vers des nœuds inconnus et gérer un graphe vide', () => {
+    expect(computeRawCentrality({ nodes: [], edges: [] }).size).toBe(0);
+
+    const raw = computeRawCentrality({ nodes: ['a'], edges: [['a', 'z']] });
+    expect(raw.get('a')!.degree).toBe(0);
+  });
+});
@@ -0,0 +1,60 @@
+/**
+ * Tests unitaires pour le noyau de calcul sur colonnes typées
+ */
+
+import { describe, it, expect } from '@jest/globals';
+import {
+  CALL,
+  PUT,
+  countUnusual,
+  gammaExposure,
+  meanAbsNonZero,
+  optionColumns,
+  sideTotals,
+  sum,
+} from '../../services/options-kernel.service';
+
+describe('OptionsKernel', () => {
+  it('devrait convertir une réponse en colonnes typées', () => {
+    const rows = [
+      { is_call: true, premium: '150000', volume: '0', size: '1200', is_sweep: true },
+      { type: 'PUT', premium: 0, contracts: 30 },
+      { gamma_exposure: '0.02', oi: 1000, spot_price: '100' },
+    ];
+    const columns = optionColumns(rows);
+
+    expect(Array.from(columns.side)).toEqual([CALL, PUT, 0]);
+    expect(Array.from(columns.volume)).toEqual([0, 30, 0]);
+    expect(columns.premium[0]).toBe(150000);
+    expect(columns.gamma[2]).toBe(0.02);
+  });
+
+  it('devrait agréger par sens et compter l\'activité inhabituelle', () => {
+    const columns = optionColumns([
+      { is_call: true, premium: 200000, volume: 50 },
+      { is_call: true, premium: 0, volume: 0 },
+      { is_put: true, premium: 1000, size: 2000 },
+      { is_put: true, premium: 500, volume: 10, is_block: true },
+    ]);
+
+    expect(sideTotals(columns)).toEqual({
+      calls: 1,
+      puts: 2,
+      callVolume: 50,
+      putVolume: 2010,
+      callPremium: 200000,
+      putPremium: 1500,
+    });
+    expect(countUnusual(columns, 100000, 1000)).toBe(3);
+    expect(sum(columns.volume)).toBe(2060);
+  });
+
+  it('devrait calculer le GEX et le gamma moyen', () => {
+    const columns = optionColumns({ gamma: '0.01', open_interest: '2000', price: 50 });
+
+    expect(gammaExposure(columns)).toBeCloseTo(5, 10);
+    expect(gammaExposure(optionColumns([{ gamma: 0.01, open_interest: 0, price: 50 }]))).toBe(0);
+    expect(meanAbsNonZero(new Float64Array([0.02, 0, -0.04]))).toBeCloseTo(0.03, 10);
+    expect(optionColumns(null).length).toBe(0);
+  });
+});
@@ -0,0 +1,117 @@
+/**
+ * Tests unitaires pour le cache des réponses composites
+ */
+
+import { describe, it, expect, beforeEach, jest } from '@jest/globals';
+import { ResponseCacheService, failedSources, type ResponseCachePolicy } from '../../services/response-cache.service';
+
+// Ligne analysis_cache courante et écritures observées
+const state: { row: any; upserts: any[]; claimed: boolean } = { row: null, upserts: [], claimed: true };
+
+jest.mock('../../supabase', () => {
+  const query: any = {
+    select: () => query,
+    eq: () => query,
+    delete: () => query,
+    maybeSingle: async () => ({ data: state.row, error: null }),
+    upsert: async (row: any) => {
+      state.upserts.push(row);
+      return { error: null };
+    },
+  };
+  return { supabase: { from: () => query, rpc: async () => ({ data: state.claimed, error: null }) } };
+});
+
+const POLICY: ResponseCachePolicy = { endpoint: 'test', version: 'v1', inputs: ['statements'] };
+
+function cachedRow(freshOffsetMs: number, data: any) {
+  return {
+    cache_key: 'test:v1:AAPL',
+    data,
+    computed_at: new Date(Date.now() - 60_000).toISOString(),
+    fresh_until: new Date(Date.now() + freshOffsetMs).toISOString(),
+    expires_at: new Date(Date.now() + 3_600_000).toISOString(),
+  };
+}
+
+describe('ResponseCacheService', () => {
+  let service: ResponseCacheService;
+
+  beforeEach(() => {
+    service = new ResponseCacheService();
+    state.row = null;
+    state.upserts = [];
+    state.claimed = true;
+  });
+
+  it('devrait lister les sources rejetées ou en échec', () => {
+    expect(
+      failedSources({
+        quote: { status: 'fulfilled', value: { success: true } },
+        flow: { status: 'rejected', reason: new Error('timeout') },
+        ratios: { status: 'fulfilled', value: { success: false } },
+      })
+    ).toEqual(['flow', 'ratios']);
+  });
+
+  it('ne devrait pas mettre en cache une réponse dégradée', async () => {
+    const result = await service.getOrCompute(POLICY, 'aapl', async (context) => {
+      context.degrade('uwDarkPool');
+      return { score: 1 };
+    });
+
+    expect(result.degraded).toEqual(['uwDarkPool']);
+    expect(state.upserts).toHaveLength(0);
+  });
+
+  it('devrait mettre en cache une réponse complète', async () => {
+    const result = await service.getOrCompute(POLICY, 'aapl', async () => ({ score: 2 }));
+
+    expect(result).toMatchObject({ data: { score: 2 }, cached: false });
+    expect(state.upserts).toHaveLength(1);
+  });
+
+  it('devrait recalculer une réponse périmée avant de répondre', async () => {
+    state.row = cachedRow(-1000, { score: 1 });
+    const result = await service.getOrCompute(POLICY, 'aapl', async () => ({ score: 3 }));
+
+    expect(result).toMatchObject({ data: { score: 3 }, stale: false });
+    expect(state.upserts).toHaveLength(1);
+  });
+
+  it('devrait servir la version périmée si le recalcul est dégradé ou déjà en cours', async () => {
+    state.row = cachedRow(-1000, { score: 1 });
+    const degraded = await service.getOrCompute(POLICY, 'aapl', async (context) => {
+      context.degrade('fmpQuote');
+      return { score: 0 };
+    });
+    expect(degraded).toMatchObject({ data: { score: 1 }, stale: true });
+
+    state.claimed = false;
+    const compute = jest.fn(async () => ({ score: 4 }));
+    const elsewhere = await service.getOrCompute(POLICY, 'aapl', compute);
+    expect(elsewhere).toMatchObject({ data: { score: 1 }, stale: true });
+    expect(compute).not.toHaveBeenCalled();
+    expect(state.upserts).toHaveLength(0);
+  });
+
+  it('devrait servir la version périmée sans attendre un recalcul en cours dans l\'instance', async () => {
+    state.row = cachedRow(-1000, { score: 1 });
+    let finish: (value: { score: number }) => void = () => undefined;
+    const refreshing = service.getOrCompute(
+      POLICY,
+      'aapl',
+      () => new Promise<{ score: number }>((resolve) => (finish = resolve))
+    );
+    await new Promise((resolve) => setImmediate(resolve));
+
+    const compute = jest.fn(async () => ({ score: 6 }));
+    const concurrent = await service.getOrCompute(POLICY, 'aapl', compute);
+    expect(concurrent).toMatchObject({ data: { score: 1 }, stale: true });
+    expect(compute).not.toHaveBeenCalled();
+
+    finish({ score: 5 });
+    expect(await refreshing).toMatchObject({ data: { score: 5 }, stale: false });
+    expect(state.upserts).toHaveLength(1);
+  });
+});
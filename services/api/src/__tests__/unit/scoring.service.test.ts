@@ -14,6 +14,24 @@ jest.mock('../../unusual-whales', () => ({
   getUWShortInterestAndFloat: jest.fn(),
   getUWGreeks: jest.fn(),
   getUWMaxPain: jest.fn(),
+  getUWIVRank: jest.fn(async () => ({ success: false, data: null })),
+}));
+
+// Pas de bundle préchauffé : le scoring récupère les données à la demande
+jest.mock('../../supabase', () => {
+  const query: any = {
+    select: () => query,
+    eq: () => query,
+    in: () => query,
+    gt: () => query,
+    maybeSingle: async () => ({ data: null, error: null }),
+    upsert: async () => ({ error: null }),
+  };
+  return { supabase: { from: () => query, rpc: async () => ({ data: null, error: null }) } };
+});
+
+jest.mock('../../fmp', () => ({
+  getFMPStockQuote: jest.fn(async () => ({ success: false, data: null })),
 }));
 
 describe('ScoringService', () => {
@@ -244,5 +262,31 @@ describe('ScoringService', () => {
       expect(result.data.overall).toBeLessThanOrEqual(100);
     });
   });
+
+  describe('calculateTickerScores', () => {
+    it('devrait scorer plusieurs tickers dans l\'ordre demandé, sans doublons', async () => {
+      const empty = { success: true, data: [], cached: false, timestamp: new Date().toISOString() };
+      jest.mocked(uw.getUWRecentFlows).mockResolvedValue(empty);
+      jest.mocked(uw.getUWStockInsiderBuySells).mockResolvedValue(empty);
+      jest.mocked(uw.getUWDarkPoolTrades).mockResolvedValue(empty);
+      jest.mocked(uw.getUWShortInterestAndFloat).mockResolvedValue(empty);
+      jest.mocked(uw.getUWGreeks).mockResolvedValue(empty);
+      jest.mocked(uw.getUWMaxPain).mockResolvedValue(empty);
+
+      const result = await service.calculateTickerScores(['msft', ' AAPL', 'MSFT']);
+
+      expect(result.data.map((score) => score.ticker)).toEqual(['MSFT', 'AAPL']);
+      expect(result.computed).toBe(2);
+      expect(result.precomputed).toBe(0);
+      expect(result.data[0].freshUntil > result.data[0].computedAt).toBe(true);
+      expect(uw.getUWRecentFlows).toHaveBeenCalledTimes(2);
+    });
+
+    it('devrait refuser une liste vide ou trop longue', async () => {
+      await expect(service.calculateTickerScores([' '])).rejects.toThrow('At least one ticker');
+      const tickers = Array.from({ length: 51 }, (_, i) => `T${i}`);
+      await expect(service.calculateTickerScores(tickers)).rejects.toThrow('At most 50 tickers');
+    });
+  });
 });
 
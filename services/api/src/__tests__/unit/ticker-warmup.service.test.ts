@@ -0,0 +1,41 @@
+/**
+ * Tests unitaires pour le préchauffage des bundles par ticker
+ */
+
+import { describe, it, expect, jest } from '@jest/globals';
+import { rankWarmupCandidates } from '../../services/ticker-warmup.service';
+import { mapWithConcurrency } from '../../utils/concurrency';
+
+jest.mock('../../services/ticker-bundle.service', () => ({
+  TickerBundleService: jest.fn(),
+}));
+
+describe('TickerWarmupService', () => {
+  it('devrait fusionner surveillances, alertes et trafic et trier par priorité', () => {
+    const candidates = rankWarmupCandidates(
+      new Map([['AAPL', 1]]),
+      new Map([['AAPL', 1], ['TSLA', 1]]),
+      new Map([['NVDA', 5], ['TSLA', 2]])
+    );
+
+    expect(candidates.map((c) => c.ticker)).toEqual(['AAPL', 'TSLA', 'NVDA']);
+    expect(candidates[1]).toMatchObject({ ticker: 'TSLA', watches: 0, alerts: 1, hits: 2 });
+  });
+
+  it('devrait borner le nombre de tâches simultanées et conserver l\'ordre', async () => {
+    let running = 0;
+    let maxRunning = 0;
+    const results = await mapWithConcurrency([1, 2, 3, 4, 5], 2, async (n) => {
+      running++;
+      maxRunning = Math.max(maxRunning, running);
+      await new Promise((resolve) => setTimeout(resolve, 5));
+      running--;
+      if (n === 3) throw new Error('boom');
+      return n * 10;
+    });
+
+    expect(maxRunning).toBe(2);
+    expect(results.map((r) => r.status)).toEqual(['fulfilled', 'fulfilled', 'rejected', 'fulfilled', 'fulfilled']);
+    expect(results[4]).toEqual({ status: 'fulfilled', value: 50 });
+  });
+});
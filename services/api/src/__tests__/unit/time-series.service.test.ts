@@ -0,0 +1,114 @@
+/**
+ * Tests unitaires pour la conversion des réponses UW en points de séries temporelles
+ */
+
+import { describe, it, expect, jest } from '@jest/globals';
+import {
+  darkPoolPointFrom,
+  flowAlertPointFrom,
+  greekExposurePointFrom,
+  lastSessions,
+  TimeSeriesService,
+} from '../../services/time-series.service';
+
+const repository = {
+  getCollectedAt: jest.fn<() => Promise<Date | null>>(),
+  findFlowAlerts: jest.fn<() => Promise<any[]>>(),
+};
+
+jest.mock('../../repositories/time-series.repository', () => ({
+  TimeSeriesRepository: jest.fn(() => repository),
+}));
+
+jest.mock('../../unusual-whales', () => ({
+  getUWFlowAlerts: jest.fn(async () => {
+    throw new Error('UW 503');
+  }),
+}));
+
+describe('TimeSeriesService', () => {
+  it('devrait convertir une flow alert UW en point typé', () => {
+    const point = flowAlertPointFrom(
+      {
+        created_at: '2026-03-02T15:30:00Z',
+        option_chain: 'AAPL260320C00200000',
+        type: 'call',
+        strike: '200',
+        expiry: '2026-03-20',
+        total_premium: '250000.5',
+        total_ask_side_prem: '200000',
+        total_size: 500,
+        volume: '812',
+        open_interest: 'n/a',
+        has_sweep: true,
+      },
+      'aapl'
+    );
+
+    expect(point).toMatchObject({
+      ticker: 'AAPL',
+      tradeDate: '2026-03-02',
+      isCall: true,
+      strike: 200,
+      premium: 250000.5,
+      volume: 812,
+      openInterest: 0,
+      underlyingPrice: null,
+      isSweep: true,
+    });
+  });
+
+  it('devrait ignorer les enregistrements sans horodatage ou identifiant', () => {
+    expect(flowAlertPointFrom({ option_chain: 'X' }, 'AAPL')).toBeNull();
+    expect(darkPoolPointFrom({ executed_at: '2026-03-02T15:30:00Z' }, 'AAPL')).toBeNull();
+    expect(greekExposurePointFrom({ call_gamma: '1' }, 'AAPL')).toBeNull();
+  });
+
+  it('devrait convertir un print dark pool et une exposition grecque', () => {
+    expect(
+      darkPoolPointFrom(
+        { executed_at: '2026-03-02T15:30:00Z', tracking_id: '42', price: '201.5', size: 1000, canceled: false },
+        'MSFT'
+      )
+    ).toMatchObject({ ticker: 'MSFT', tradeDate: '2026-03-02', trackingId: 42, price: 201.5, size: 1000 });
+    expect(greekExposurePointFrom({ date: '2026-03-02', call_gamma: '10', put_gamma: '-5' }, 'msft')).toMatchObject({
+      ticker: 'MSFT',
+      tradeDate: '2026-03-02',
+      callGamma: 10,
+      putGamma: -5,
+      callDelta: 0,
+    });
+  });
+
+  it('devrait garder les dernières séances ayant des données (week-end, jour férié)', () => {
+    // Lundi férié : la dernière séance avec des flows est le vendredi précédent
+    const points = [
+      { tradeDate: '2026-02-13', id: 'fri-2' },
+      { tradeDate: '2026-02-13', id: 'fri-1' },
+      { tradeDate: '2026-02-12', id: 'thu' },
+      { tradeDate: '2026-02-11', id: 'wed' },
+    ];
+
+    expect(lastSessions(points, 1).map((p) => p.id)).toEqual(['fri-2', 'fri-1']);
+    expect(lastSessions(points, 2).map((p) => p.id)).toEqual(['fri-2', 'fri-1', 'thu']);
+    expect(lastSessions([], 1)).toEqual([]);
+  });
+
+  it('devrait servir le store en retard quand la collecte à la demande échoue', async () => {
+    const stored = [{ id: 'stored', executedAt: '2026-03-02T15:30:00Z' }];
+    repository.getCollectedAt.mockResolvedValue(new Date(Date.now() - 24 * 3600 * 1000));
+    repository.findFlowAlerts.mockResolvedValue(stored);
+
+    const points = await new TimeSeriesService().getFlowAlerts('aapl', { from: '2026-03-01T00:00:00Z' });
+
+    expect(points).toEqual(stored);
+  });
+
+  it('devrait propager l\'erreur amont quand rien n\'a jamais été collecté', async () => {
+    repository.getCollectedAt.mockResolvedValue(null);
+
+    await expect(new TimeSeriesService().getFlowAlerts('aapl', { from: '2026-03-01T00:00:00Z' })).rejects.toThrow(
+      'UW 503'
+    );
+  });
+});
@@ -2,29 +2,80 @@ import { supabase } from "./supabase";
 
 const OPENAI_API_KEY = process.env.OPENAI_API_KEY;
 
-export async function chatWithData(userQuery: string) {
-  if (!OPENAI_API_KEY) {
-    throw new Error("OPENAI_API_KEY not configured");
+// Récupération : nombre de signaux, demi-vie de la pertinence et fenêtre de recherche
+const RETRIEVAL_LIMIT = 10;
+const RETRIEVAL_HALF_LIFE_HOURS = 72;
+const RETRIEVAL_MAX_AGE_DAYS = 90;
+// Sans correspondance plein texte : signaux récents d'importance au moins égale (échelle 1-10)
+const FALLBACK_MIN_IMPORTANCE = 7;
+
+// Taille maximale du contexte envoyé au modèle
+const MAX_CONTEXT_CHARS = 6000;
+const MAX_SUMMARY_CHARS = 600;
+
+const CONTEXT_COLUMNS = "id, source, type, timestamp, summary, importance_score, tags, impact, priority";
+
+/**
+ * Signaux pertinents pour une question : classement plein texte (index GIN) pondéré par
+ * fraîcheur et importance. Sans correspondance, les signaux importants les plus récents.
+ */
+async function retrieveSignals(userQuery: string): Promise<any[]> {
+  const { data, error } = await supabase.rpc("retrieve_signals", {
+    p_query: userQuery,
+    p_limit: RETRIEVAL_LIMIT,
+    p_half_life_hours: RETRIEVAL_HALF_LIFE_HOURS,
+    p_max_age_days: RETRIEVAL_MAX_AGE_DAYS,
+  });
+  if (error) throw error;
+  if (data && data.length > 0) {
+    return data;
   }
 
-  // 1. Recherche dans Supabase (recherche textuelle)
-  const { data: signals, error: searchError } = await supabase
+  const { data: recent, error: recentError } = await supabase
     .from("signals")
-    .select("*")
-    .or(`summary.ilike.%${userQuery}%,raw_data.ilike.%${userQuery}%`)
-    .order("importance_score", { ascending: false, nullsFirst: false })
+    .select(CONTEXT_COLUMNS)
+    .eq("processing_status", "completed")
+    .gte("importance_score", FALLBACK_MIN_IMPORTANCE)
     .order("timestamp", { ascending: false })
-    .limit(10);
+    .order("id", { ascending: false })
+    .limit(RETRIEVAL_LIMIT);
+  if (recentError) throw recentError;
+  return recent || [];
+}
+
+/**
+ * Contexte du modèle, borné à MAX_CONTEXT_CHARS (signaux par ordre de pertinence)
+ */
+function buildContext(signals: any[]): { context: string; used: any[] } {
+  const lines: string[] = [];
+  const used: any[] = [];
+  let length = 0;
+
+  for (const s of signals) {
+    const date = new Date(s.timestamp).toLocaleDateString();
+    const summary = (s.summary || "No summary").slice(0, MAX_SUMMARY_CHARS);
+    const line = `[${date}] ${s.source}/${s.type}: ${summary} (Importance: ${s.importance_score || "N/A"})`;
+    if (used.length > 0 && length + line.length + 1 > MAX_CONTEXT_CHARS) {
+      break;
+    }
+    lines.push(line);
+    used.push(s);
+    length += line.length + 1;
+  }
+
+  return { context: lines.join("\n") || "No relevant signals found.", used };
+}
+
+export async function chatWithData(userQuery: string) {
+  if (!OPENAI_API_KEY) {
+    throw new Error("OPENAI_API_KEY not configured");
+  }
 
-  if (searchError) throw searchError;
+  // 1. Récupération des signaux pertinents (plein texte classé)
+  const retrieved = await retrieveSignals(userQuery);
 
   // 2. Construire le contexte pour GPT
-  const context = signals
-    ?.map((s) => {
-      const date = new Date(s.timestamp).toLocaleDateString();
-      return `[${date}] ${s.source}/${s.type}: ${s.summary || "No summary"} (Importance: ${s.importance_score || "N/A"})`;
-    })
-    .join("\n") || "No relevant signals found.";
+  const { context, used: signals } = buildContext(retrieved);
 
   // 3. Appeler OpenAI
   const response = await fetch("https://api.openai.com/v1/chat/completions", {
@@ -63,8 +114,8 @@ Answer the user's question based ONLY on these signals. If the information is no
   const result = await response.json();
   return {
     answer: result.choices[0]?.message?.content || "No response",
-    signals_used: signals?.length || 0,
-    signals: signals?.slice(0, 5), // Top 5 signals utilisés
+    signals_used: signals.length,
+    signals: signals.slice(0, 5), // Top 5 signals utilisés
   };
 }
 
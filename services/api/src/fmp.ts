@@ -6,6 +6,11 @@
 
 import { FMPService } from './services/fmp.service';
 import { logger } from './utils/logger';
+import type {
+  StatementProjectionEndpoint,
+  StatementProjectionQueryParams,
+  StatementProjectionTypes,
+} from './types/fmp/financial-statements';
 
 // Instance singleton du service
 const fmpService = new FMPService();
@@ -43,6 +48,16 @@ export async function getFMPIncomeStatement(params: {
   return await fmpService.getIncomeStatement(params);
 }
 
+/**
+ * État financier réduit aux champs déclarés (format colonnes, mis en cache)
+ */
+export async function getFMPStatementProjection<
+  E extends StatementProjectionEndpoint,
+  F extends keyof StatementProjectionTypes[E],
+>(endpoint: E, params: StatementProjectionQueryParams, fields: readonly F[]) {
+  return await fmpService.getStatementProjection(endpoint, params, fields);
+}
+
 export async function getFMPIncomeStatementTTM(params: {
   symbol: string;
   limit?: number;
@@ -1001,6 +1016,10 @@ export async function getFMPStockQuote(symbol: string) {
   return await fmpService.getStockQuote(symbol);
 }
 
+export async function getFMPBatchStockQuotes(symbols: string[]) {
+  return await fmpService.getBatchStockQuotes(symbols);
+}
+
 export async function getFMPStockQuoteShort(symbol: string) {
   return await fmpService.getStockQuoteShort(symbol);
 }
@@ -287,12 +287,13 @@ export async function getFund(id: number) {
 }
 
 /**
- * Obtenir les holdings d'un fond
+ * Obtenir les holdings courants d'un fond (dernière période déclarée, amendements
+ * compris), avec poids et rang précalculés dans fund_latest_holdings
  */
 export async function getFundHoldings(fundId: number, limit = 100) {
   const { data, error } = await supabase
-    .from("fund_holdings")
-    .select("*, fund_filings(filing_date)")
+    .from("fund_latest_holdings")
+    .select("*, fund_filings(filing_date, period_of_report)")
     .eq("fund_id", fundId)
     .order("market_value", { ascending: false })
     .limit(limit);
@@ -301,6 +302,35 @@ export async function getFundHoldings(fundId: number, limit = 100) {
   return data;
 }
 
+export interface FundPositionPeriod {
+  filing_id: number;
+  filing_date: string;
+  period_of_report: string | null;
+  accession_number: string;
+  stock_shares: number;
+  stock_value: number;
+  put_shares: number;
+  put_value: number;
+  call_shares: number;
+  call_value: number;
+}
+
+/**
+ * Historique des positions d'un fond pour des tickers (correspondance partielle) ou
+ * CUSIPs : une ligne par filing parsé, actions / PUT / CALL agrégés côté base
+ * (RPC get_fund_position_history)
+ */
+export async function getFundPositionHistory(fundId: number, tickers: string[] = [], cusips: string[] = []) {
+  const { data, error } = await supabase.rpc("get_fund_position_history", {
+    p_fund_id: fundId,
+    p_tickers: tickers,
+    p_cusips: cusips,
+  });
+
+  if (error) throw error;
+  return (data || []) as FundPositionPeriod[];
+}
+
 /**
  * Obtenir les filings d'un fond
  */
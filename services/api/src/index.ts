@@ -1,5 +1,6 @@
 import { APIGatewayProxyHandlerV2 } from "aws-lambda";
 import { findRoute } from "./router";
+import { recordTickerHit } from "./services/ticker-bundle.service";
 
 export const handler: APIGatewayProxyHandlerV2 = async (event) => {
   // Log initial
@@ -45,6 +46,12 @@ export const handler: APIGatewayProxyHandlerV2 = async (event) => {
       return { statusCode: 404, body: JSON.stringify({ error: "not_found" }) };
     }
 
+    // Popularité des tickers (priorité du préchauffage planifié), sans bloquer la requête
+    const pathTicker = event.pathParameters?.ticker;
+    if (pathTicker) {
+      void recordTickerHit(pathTicker);
+    }
+
     // Exécuter le handler de la route
     console.log("[HANDLER] Executing route handler...");
     console.log("[HANDLER] Route handler type:", typeof routeHandler);
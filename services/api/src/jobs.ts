@@ -0,0 +1,59 @@
+/**
+ * Point d'entrée Lambda des jobs planifiés de l'API (EventBridge schedule)
+ * L'événement porte le nom du job : { "job": "graph-centrality" }
+ */
+
+import { logger } from "./utils/logger";
+
+type JobHandler = (payload: Record<string, any>) => Promise<any>;
+
+const jobs: Record<string, JobHandler> = {
+  "graph-centrality": async () => {
+    const { GraphCentralityService } = await import("./services/graph-centrality.service");
+    return new GraphCentralityService().recomputeAll();
+  },
+  "ticker-warmup": async (payload) => {
+    const { TickerWarmupService } = await import("./services/ticker-warmup.service");
+    return new TickerWarmupService().run(payload);
+  },
+  "sector-metrics": async () => {
+    const { SectorAnalysisService } = await import("./services/sector-analysis.service");
+    return new SectorAnalysisService().refreshAllSectorMetrics();
+  },
+  "surveillance-check": async () => {
+    const { SurveillanceService } = await import("./services/surveillance.service");
+    return new SurveillanceService().checkAllWatches();
+  },
+  "alerts-check": async () => {
+    const { AlertService } = await import("./services/alert.service");
+    return new AlertService().checkAllAlerts();
+  },
+  "smart-money-snapshots": async () => {
+    const { SmartMoneyService } = await import("./services/smart-money.service");
+    return new SmartMoneyService().refreshHedgeFundSnapshots();
+  },
+  "timeseries-collect": async (payload) => {
+    const { TimeSeriesCollectorService } = await import("./services/time-series-collector.service");
+    return new TimeSeriesCollectorService().run(payload);
+  },
+};
+
+export const handler = async (event: { job?: string; payload?: Record<string, any> }) => {
+  const jobName = event?.job;
+  if (!jobName || !jobs[jobName]) {
+    throw new Error(`Unknown job: ${jobName || "MISSING"}. Available: ${Object.keys(jobs).join(", ")}`);
+  }
+
+  const log = logger.child({ job: jobName });
+  const startedAt = Date.now();
+  log.info("Job started");
+
+  try {
+    const result = await jobs[jobName](event.payload || {});
+    log.info("Job completed", { durationMs: Date.now() - startedAt });
+    return { job: jobName, success: true, result };
+  } catch (error) {
+    log.error("Job failed", error, { durationMs: Date.now() - startedAt });
+    throw error;
+  }
+};
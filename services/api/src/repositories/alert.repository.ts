@@ -0,0 +1,226 @@
+/**
+ * Repository pour les alertes multi-signaux (Supabase)
+ * Tables user_alerts et alert_triggers
+ */
+
+import { supabase } from '../supabase';
+import { AppError } from '../utils/errors';
+import { chunk, fetchAllPages } from '../utils/paging';
+import type { Alert, AlertTrigger, CompiledAlertProgram } from '../types/alerts';
+
+interface AlertRow {
+  id: string;
+  user_id: string;
+  ticker: string | null;
+  name: string;
+  description: string | null;
+  conditions: Alert['conditions'];
+  logic: Alert['logic'];
+  notification_channels: Alert['notificationChannels'];
+  active: boolean;
+  created_at: string;
+  last_checked: string | null;
+  last_triggered: string | null;
+  compiled?: CompiledAlertProgram | null;
+  condition_met?: boolean;
+}
+
+/**
+ * Alerte active, son programme compilé (null pour les lignes antérieures à la compilation)
+ * et le résultat de sa dernière vérification
+ */
+export interface ActiveAlert {
+  alert: Alert;
+  compiled: CompiledAlertProgram | null;
+  conditionMet: boolean;
+}
+
+const ALERT_COLUMNS =
+  'id, user_id, ticker, name, description, conditions, logic, notification_channels, active, created_at, last_checked, last_triggered';
+
+function toAlert(row: AlertRow): Alert {
+  return {
+    id: row.id,
+    userId: row.user_id,
+    ticker: row.ticker || undefined,
+    name: row.name,
+    description: row.description || undefined,
+    conditions: row.conditions || [],
+    logic: row.logic,
+    notificationChannels: row.notification_channels || [],
+    active: row.active,
+    createdAt: new Date(row.created_at),
+    lastChecked: row.last_checked ? new Date(row.last_checked) : undefined,
+    lastTriggered: row.last_triggered ? new Date(row.last_triggered) : undefined,
+  };
+}
+
+function toRow(alert: Alert, compiled?: CompiledAlertProgram) {
+  return {
+    id: alert.id,
+    user_id: alert.userId,
+    ticker: alert.ticker || null,
+    name: alert.name,
+    description: alert.description ?? null,
+    conditions: alert.conditions,
+    logic: alert.logic,
+    notification_channels: alert.notificationChannels,
+    active: alert.active,
+    created_at: alert.createdAt.toISOString(),
+    updated_at: new Date().toISOString(),
+    last_checked: alert.lastChecked?.toISOString() ?? null,
+    last_triggered: alert.lastTriggered?.toISOString() ?? null,
+    // Absent : le programme déjà stocké (et l'état de ses conditions) est conservé par l'upsert
+    ...(compiled && { compiled, condition_met: false }),
+  };
+}
+
+// Déclenchements insérés par requête (taille du corps JSON)
+const INSERT_CHUNK_SIZE = 500;
+
+function dbError(context: string, error: { message: string }): AppError {
+  return new AppError(`${context}: ${error.message}`, 'DATABASE_ERROR', 500);
+}
+
+export class AlertRepository {
+  /**
+   * Enregistrer une alerte ; `compiled` est fourni quand les conditions ont changé
+   */
+  async save(alert: Alert, compiled?: CompiledAlertProgram): Promise<Alert> {
+    const { data, error } = await supabase
+      .from('user_alerts')
+      .upsert(toRow(alert, compiled), { onConflict: 'id' })
+      .select(ALERT_COLUMNS)
+      .single();
+
+    if (error) {
+      throw dbError('Failed to save alert', error);
+    }
+    return toAlert(data as AlertRow);
+  }
+
+  async findById(alertId: string): Promise<Alert | null> {
+    const { data, error } = await supabase
+      .from('user_alerts')
+      .select(ALERT_COLUMNS)
+      .eq('id', alertId)
+      .maybeSingle();
+
+    if (error) {
+      throw dbError('Failed to get alert', error);
+    }
+    return data ? toAlert(data as AlertRow) : null;
+  }
+
+  async findByUser(userId: string): Promise<Alert[]> {
+    const { data, error } = await supabase
+      .from('user_alerts')
+      .select(ALERT_COLUMNS)
+      .eq('user_id', userId)
+      .order('created_at', { ascending: false });
+
+    if (error) {
+      throw dbError('Failed to list alerts', error);
+    }
+    return (data || []).map((row) => toAlert(row as AlertRow));
+  }
+
+  /**
+   * Alertes actives avec ticker, groupées par ticker (index partiel idx_user_alerts_active_ticker)
+   */
+  async findActiveByTicker(): Promise<Map<string, ActiveAlert[]>> {
+    const { data, error } = await fetchAllPages<AlertRow>((from, to) =>
+      supabase
+        .from('user_alerts')
+        .select(`${ALERT_COLUMNS}, compiled, condition_met`)
+        .eq('active', true)
+        .not('ticker', 'is', null)
+        .order('ticker', { ascending: true })
+        .order('id', { ascending: true })
+        .range(from, to)
+    );
+
+    if (error) {
+      throw dbError('Failed to list active alerts', error);
+    }
+
+    const byTicker = new Map<string, ActiveAlert[]>();
+    for (const row of data) {
+      const entry = { alert: toAlert(row), compiled: row.compiled ?? null, conditionMet: row.condition_met ?? false };
+      const group = byTicker.get(entry.alert.ticker!);
+      if (group) {
+        group.push(entry);
+      } else {
+        byTicker.set(entry.alert.ticker!, [entry]);
+      }
+    }
+    return byTicker;
+  }
+
+  /**
+   * Marquer un lot d'alertes comme vérifiées (un UPDATE par tranche d'IDs)
+   */
+  async markChecked(alertIds: string[], checkedAt: Date): Promise<void> {
+    for (const ids of chunk(alertIds)) {
+      const { error } = await supabase
+        .from('user_alerts')
+        .update({ last_checked: checkedAt.toISOString() })
+        .in('id', ids);
+
+      if (error) {
+        throw dbError('Failed to mark alerts as checked', error);
+      }
+    }
+  }
+
+  /**
+   * Enregistrer le résultat de la dernière évaluation (déclenchement sur front montant)
+   */
+  async setConditionMet(alertIds: string[], met: boolean): Promise<void> {
+    for (const ids of chunk(alertIds)) {
+      const { error } = await supabase
+        .from('user_alerts')
+        .update({ condition_met: met })
+        .in('id', ids);
+
+      if (error) {
+        throw dbError('Failed to update alert condition state', error);
+      }
+    }
+  }
+
+  async insertTriggers(triggers: AlertTrigger[]): Promise<void> {
+    if (triggers.length === 0) {
+      return;
+    }
+    for (const batch of chunk(triggers, INSERT_CHUNK_SIZE)) {
+      const { error } = await supabase.from('alert_triggers').insert(
+        batch.map((trigger) => ({
+          id: trigger.id,
+          alert_id: trigger.alertId,
+          ticker: trigger.ticker ?? null,
+          triggered_at: trigger.triggeredAt.toISOString(),
+          data: trigger.data,
+          triggered_conditions: trigger.triggeredConditions,
+          read: trigger.read,
+        }))
+      );
+
+      if (error) {
+        throw dbError('Failed to insert alert triggers', error);
+      }
+    }
+
+    const alertIds = Array.from(new Set(triggers.map((t) => t.alertId)));
+    for (const ids of chunk(alertIds)) {
+      const { error: updateError } = await supabase
+        .from('user_alerts')
+        .update({ last_triggered: triggers[0].triggeredAt.toISOString() })
+        .in('id', ids);
+
+      if (updateError) {
+        throw dbError('Failed to update last_triggered', updateError);
+      }
+    }
+  }
+}
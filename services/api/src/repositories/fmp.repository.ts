@@ -22,6 +22,44 @@ import type {
   ExchangeVariantsResponse,
   ExchangeVariantsQueryParams,
 } from '../types/fmp/company-search';
+import type {
+  ColumnarRecords,
+  StatementProjectionEndpoint,
+  StatementProjectionQueryParams,
+  StatementProjectionTypes,
+} from '../types/fmp/financial-statements';
+
+/**
+ * Réduire une réponse FMP aux champs demandés, au format colonnes
+ * (appelé juste après le parsing : le payload complet n'est pas conservé)
+ */
+export function projectColumns<T, F extends keyof T>(rows: T[], fields: readonly F[]): ColumnarRecords<T, F> {
+  const columns = {} as ColumnarRecords<T, F>['columns'];
+  for (const field of fields) {
+    columns[field] = rows.map((row) => (row?.[field] ?? null) as T[F] | null);
+  }
+  return { fields: [...fields], length: rows.length, columns };
+}
+
+/**
+ * Reconstituer une ligne (objet) depuis des enregistrements en colonnes
+ */
+export function columnarRow<T, F extends keyof T>(
+  records: ColumnarRecords<T, F>,
+  index: number
+): { [K in F]: T[K] | null } | undefined {
+  if (index < 0 || index >= records.length) {
+    return undefined;
+  }
+  const row = {} as { [K in F]: T[K] | null };
+  for (const field of records.fields) {
+    row[field] = records.columns[field][index];
+  }
+  return row;
+}
+
+// Symboles par appel /batch-quote (limite de longueur d'URL)
+const BATCH_QUOTE_SIZE = 100;
 
 export class FMPRepository {
   private client: ApiClientService;
@@ -162,6 +200,26 @@ export class FMPRepository {
     }, `Get latest financial statements`);
   }
 
+  /**
+   * Récupérer un état financier réduit aux champs déclarés par le service appelant
+   */
+  async getStatementProjection<E extends StatementProjectionEndpoint, F extends keyof StatementProjectionTypes[E]>(
+    endpoint: E,
+    params: StatementProjectionQueryParams,
+    fields: readonly F[]
+  ): Promise<ColumnarRecords<StatementProjectionTypes[E], F>> {
+    return handleError(async () => {
+      const queryParams: Record<string, string> = {
+        symbol: params.symbol.toUpperCase(),
+      };
+      if (params.limit !== undefined) queryParams.limit = String(params.limit);
+      if (params.period) queryParams.period = params.period;
+
+      const response = await this.client.get<StatementProjectionTypes[E][]>(`/${endpoint}`, queryParams);
+      return projectColumns(Array.isArray(response) ? response : [], fields);
+    }, `Get ${endpoint} projection for ${params.symbol}`);
+  }
+
   async getKeyMetrics(params: {
     symbol: string;
     limit?: number;
@@ -2100,6 +2158,25 @@ export class FMPRepository {
     }, `Get Stock Quote for ${symbol}`);
   }
 
+  /**
+   * Quotes de plusieurs symboles en un appel (/batch-quote, 100 symboles par requête)
+   */
+  async getBatchStockQuotes(symbols: string[]): Promise<any[]> {
+    return handleError(async () => {
+      const unique = Array.from(new Set(symbols.map((s) => s.toUpperCase()).filter(Boolean)));
+      const quotes: any[] = [];
+      for (let i = 0; i < unique.length; i += BATCH_QUOTE_SIZE) {
+        const response = await this.client.get<any[]>(`/batch-quote`, {
+          symbols: unique.slice(i, i + BATCH_QUOTE_SIZE).join(','),
+        });
+        if (Array.isArray(response)) {
+          quotes.push(...response);
+        }
+      }
+      return quotes;
+    }, `Get batch stock quotes for ${symbols.length} symbols`);
+  }
+
   async getStockQuoteShort(symbol: string): Promise<any[]> {
     return handleError(async () => {
       const response = await this.client.get<any[]>(`/quote-short`, {
@@ -0,0 +1,89 @@
+/**
+ * Repository pour les snapshots de positions des fonds (Supabase)
+ * Table fund_holdings_snapshots, une ligne par (institution, date de rapport 13F)
+ */
+
+import { supabase } from '../supabase';
+import { AppError } from '../utils/errors';
+import type { FundHoldingsSnapshot } from '../types/smart-money';
+
+interface FundSnapshotRow {
+  institution: string;
+  report_date: string;
+  total_value: number;
+  holdings_count: number;
+  performance: number;
+  top_positions: FundHoldingsSnapshot['topPositions'];
+  computed_at: string;
+}
+
+const SNAPSHOT_COLUMNS =
+  'institution, report_date, total_value, holdings_count, performance, top_positions, computed_at';
+
+function toSnapshot(row: FundSnapshotRow): FundHoldingsSnapshot {
+  return {
+    institution: row.institution,
+    reportDate: row.report_date,
+    totalValue: Number(row.total_value) || 0,
+    holdingsCount: row.holdings_count,
+    performance: Number(row.performance) || 0,
+    topPositions: row.top_positions || [],
+    computedAt: row.computed_at,
+  };
+}
+
+function dbError(context: string, error: { message: string }): AppError {
+  return new AppError(`${context}: ${error.message}`, 'DATABASE_ERROR', 500);
+}
+
+export class FundSnapshotRepository {
+  /**
+   * Snapshot le plus récent de chaque institution (une seule requête)
+   */
+  async findLatest(institutions: string[]): Promise<Map<string, FundHoldingsSnapshot>> {
+    const latest = new Map<string, FundHoldingsSnapshot>();
+    if (institutions.length === 0) {
+      return latest;
+    }
+
+    const { data, error } = await supabase
+      .from('fund_holdings_snapshots')
+      .select(SNAPSHOT_COLUMNS)
+      .in('institution', institutions)
+      .order('report_date', { ascending: false });
+
+    if (error) {
+      throw dbError('Failed to read fund snapshots', error);
+    }
+
+    for (const row of data || []) {
+      const snapshot = toSnapshot(row as FundSnapshotRow);
+      if (!latest.has(snapshot.institution)) {
+        latest.set(snapshot.institution, snapshot);
+      }
+    }
+    return latest;
+  }
+
+  async saveMany(snapshots: FundHoldingsSnapshot[]): Promise<void> {
+    if (snapshots.length === 0) {
+      return;
+    }
+    const { error } = await supabase.from('fund_holdings_snapshots').upsert(
+      snapshots.map((snapshot) => ({
+        institution: snapshot.institution,
+        report_date: snapshot.reportDate,
+        total_value: snapshot.totalValue,
+        holdings_count: snapshot.holdingsCount,
+        performance: snapshot.performance,
+        top_positions: snapshot.topPositions,
+        computed_at: snapshot.computedAt,
+      })),
+      { onConflict: 'institution,report_date' }
+    );
+
+    if (error) {
+      throw dbError('Failed to save fund snapshots', error);
+    }
+  }
+}
@@ -1,14 +1,59 @@
 /**
  * Repository pour Neo4j
  * Gère les connexions et requêtes Cypher
+ *
+ * Toutes les requêtes passent par une couche d'exécution commune :
+ * - transactions gérées par le driver (executeRead / executeWrite) avec retries automatiques
+ *   et routage lecteur/écrivain en cluster
+ * - plusieurs statements possibles dans la même session (readTransaction / writeTransaction)
+ * - Cypher à labels dynamiques construit une seule fois puis mis en cache
+ * - métriques par requête (latence, lignes, db hits si NEO4J_PROFILE_QUERIES=true)
  */
 
-import neo4j, { Driver, Session } from 'neo4j-driver';
+import neo4j, { Driver, ManagedTransaction, QueryResult, Session } from 'neo4j-driver';
 import { logger } from '../utils/logger';
-import { handleError } from '../utils/errors';
+import { handleError, ValidationError } from '../utils/errors';
+
+export type GraphAccessMode = 'READ' | 'WRITE';
+
+/**
+ * Exécuteur instrumenté passé aux fonctions de transaction
+ */
+export interface GraphQueryRunner {
+  run(name: string, cypher: string, params?: Record<string, any>): Promise<QueryResult>;
+}
+
+export interface GraphQueryMetrics {
+  name: string;
+  mode: GraphAccessMode | 'AUTO';
+  latencyMs: number;
+  rows: number;
+  dbHits?: number;
+  updates?: number;
+}
+
+export interface GraphQueryStats {
+  count: number;
+  totalMs: number;
+  maxMs: number;
+  rows: number;
+  dbHits: number;
+}
+
+const SLOW_QUERY_MS = parseInt(process.env.NEO4J_SLOW_QUERY_MS || '500', 10);
+const PROFILE_QUERIES = process.env.NEO4J_PROFILE_QUERIES === 'true';
+const LABEL_PATTERN = /^[A-Za-z_][A-Za-z0-9_]*$/;
+
+// Driver partagé par toutes les instances du repository (un pool par conteneur Lambda)
+let sharedDriver: Driver | null = null;
+
+// Cypher à labels dynamiques, construits une fois par combinaison de labels
+const cypherCache = new Map<string, string>();
+
+// Statistiques agrégées par nom de requête (durée de vie du conteneur)
+const queryStats = new Map<string, GraphQueryStats>();
 
 export class Neo4jRepository {
-  private driver: Driver | null = null;
   private uri: string;
   private username: string;
   private password: string;
@@ -33,15 +78,16 @@ export class Neo4jRepository {
       return null;
     }
 
-    if (!this.driver) {
+    if (!sharedDriver) {
       try {
-        this.driver = neo4j.driver(
+        sharedDriver = neo4j.driver(
           this.uri,
           neo4j.auth.basic(this.username, this.password),
           {
             maxConnectionLifetime: 3 * 60 * 60 * 1000, // 3 hours
             maxConnectionPoolSize: 50,
             connectionAcquisitionTimeout: 2 * 60 * 1000, // 2 minutes
+            maxTransactionRetryTime: 15 * 1000, // retries gérés par executeRead/executeWrite
           }
         );
         logger.info('Neo4j driver created');
@@ -51,52 +97,201 @@ export class Neo4jRepository {
       }
     }
 
-    return this.driver;
+    return sharedDriver;
   }
 
   /**
    * Obtenir une session Neo4j
    */
-  private async getSession(): Promise<Session | null> {
+  private async getSession(mode: GraphAccessMode = 'WRITE'): Promise<Session | null> {
     const driver = this.getDriver();
     if (!driver) {
       return null;
     }
 
     try {
-      return driver.session({ database: this.database });
+      return driver.session({
+        database: this.database,
+        defaultAccessMode: mode === 'READ' ? neo4j.session.READ : neo4j.session.WRITE,
+      });
     } catch (error) {
       logger.error('Failed to create Neo4j session', error);
       return null;
     }
   }
 
+  /**
+   * Exécuter une fonction de lecture (plusieurs statements, une session, retries du driver)
+   * Retourne null si Neo4j n'est pas configuré.
+   * La fonction peut être rejouée par le driver : elle doit rester idempotente.
+   */
+  async readTransaction<T>(work: (runner: GraphQueryRunner) => Promise<T>): Promise<T | null> {
+    return this.runInSession('READ', work);
+  }
+
+  /**
+   * Exécuter une fonction d'écriture (plusieurs statements, une session, retries du driver)
+   */
+  async writeTransaction<T>(work: (runner: GraphQueryRunner) => Promise<T>): Promise<T | null> {
+    return this.runInSession('WRITE', work);
+  }
+
+  private async runInSession<T>(
+    mode: GraphAccessMode,
+    work: (runner: GraphQueryRunner) => Promise<T>
+  ): Promise<T | null> {
+    const session = await this.getSession(mode);
+    if (!session) {
+      return null;
+    }
+
+    try {
+      const txWork = (tx: ManagedTransaction) => work(this.instrument(tx, mode));
+      return mode === 'READ'
+        ? await session.executeRead(txWork)
+        : await session.executeWrite(txWork);
+    } finally {
+      await session.close();
+    }
+  }
+
+  /**
+   * Session en auto-commit (procédures GDS qui gèrent leurs propres transactions)
+   */
+  private async autoCommit<T>(work: (runner: GraphQueryRunner) => Promise<T>): Promise<T | null> {
+    const session = await this.getSession('WRITE');
+    if (!session) {
+      return null;
+    }
+
+    try {
+      return await work(this.instrument(session, 'AUTO'));
+    } finally {
+      await session.close();
+    }
+  }
+
+  /**
+   * Envelopper tx.run pour mesurer chaque requête
+   */
+  private instrument(
+    target: { run: (cypher: string, params?: Record<string, any>) => Promise<QueryResult> },
+    mode: GraphAccessMode | 'AUTO'
+  ): GraphQueryRunner {
+    return {
+      run: async (name, cypher, params) => {
+        const startedAt = Date.now();
+        const profiled = PROFILE_QUERIES && mode === 'READ';
+        const result = await target.run(profiled ? `PROFILE ${cypher}` : cypher, params);
+
+        const metrics: GraphQueryMetrics = {
+          name,
+          mode,
+          latencyMs: Date.now() - startedAt,
+          rows: result.records.length,
+        };
+        const profile = result.summary.profile;
+        if (profile) {
+          metrics.dbHits = this.sumDbHits(profile);
+        }
+        if (mode !== 'READ') {
+          metrics.updates = this.countUpdates(result);
+        }
+
+        this.recordMetrics(metrics);
+        return result;
+      },
+    };
+  }
+
+  private sumDbHits(plan: { dbHits: number; children: any[] }): number {
+    return (plan.dbHits || 0) + (plan.children || []).reduce((sum, child) => sum + this.sumDbHits(child), 0);
+  }
+
+  private countUpdates(result: QueryResult): number {
+    const updates = result.summary.counters.updates();
+    return Object.values(updates).reduce((sum, value) => sum + value, 0);
+  }
+
+  private recordMetrics(metrics: GraphQueryMetrics): void {
+    const stats = queryStats.get(metrics.name) || { count: 0, totalMs: 0, maxMs: 0, rows: 0, dbHits: 0 };
+    stats.count++;
+    stats.totalMs += metrics.latencyMs;
+    stats.maxMs = Math.max(stats.maxMs, metrics.latencyMs);
+    stats.rows += metrics.rows;
+    stats.dbHits += metrics.dbHits || 0;
+    queryStats.set(metrics.name, stats);
+
+    if (metrics.latencyMs >= SLOW_QUERY_MS) {
+      logger.warn('Slow Neo4j query', metrics);
+    } else {
+      logger.debug('Neo4j query', metrics);
+    }
+  }
+
+  /**
+   * Statistiques agrégées par requête depuis le démarrage du conteneur
+   */
+  getQueryStats(): Record<string, GraphQueryStats & { avgMs: number }> {
+    const snapshot: Record<string, GraphQueryStats & { avgMs: number }> = {};
+    for (const [name, stats] of queryStats) {
+      snapshot[name] = { ...stats, avgMs: stats.count > 0 ? stats.totalMs / stats.count : 0 };
+    }
+    return snapshot;
+  }
+
+  /**
+   * Construire (une seule fois) un Cypher dépendant de labels/types dynamiques
+   * Les identifiants sont validés car ils ne peuvent pas être paramétrés.
+   */
+  private cypher(key: string, identifiers: string[], build: () => string): string {
+    const cacheKey = `${key}:${identifiers.join(':')}`;
+    const cached = cypherCache.get(cacheKey);
+    if (cached) {
+      return cached;
+    }
+
+    for (const identifier of identifiers) {
+      if (!LABEL_PATTERN.test(identifier)) {
+        throw new ValidationError(`Invalid Neo4j identifier: ${identifier}`, 'label');
+      }
+    }
+
+    const statement = build();
+    cypherCache.set(cacheKey, statement);
+    return statement;
+  }
+
+  /**
+   * Convertir un record en objet JavaScript
+   */
+  private recordToObject<T>(record: QueryResult['records'][number]): T {
+    const obj: any = {};
+    record.keys.forEach((key) => {
+      obj[key] = this.convertNeo4jValue(record.get(key));
+    });
+    return obj as T;
+  }
+
   /**
    * Exécuter une requête Cypher
    */
   async executeQuery<T = any>(
     cypher: string,
-    params?: Record<string, any>
+    params?: Record<string, any>,
+    options: { mode?: GraphAccessMode; name?: string } = {}
   ): Promise<T[]> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
+      const mode = options.mode || 'READ';
+      const result = await this.runInSession(mode, (runner) =>
+        runner.run(options.name || 'executeQuery', cypher, params)
+      );
+      if (!result) {
         logger.warn('Neo4j not available, returning empty result');
         return [];
       }
 
-      try {
-        const result = await session.run(cypher, params);
-        return result.records.map((record) => {
-          const obj: any = {};
-          record.keys.forEach((key) => {
-            obj[key] = this.convertNeo4jValue(record.get(key));
-          });
-          return obj as T;
-        });
-      } finally {
-        await session.close();
-      }
+      return result.records.map((record) => this.recordToObject<T>(record));
     }, 'Execute Neo4j query');
   }
 
@@ -108,37 +303,29 @@ export class Neo4jRepository {
     properties: Record<string, any>
   ): Promise<string> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
+      // Générer un ID unique si non fourni
+      const nodeId = properties.id || `${type}_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+
+      // SET n += $props : un seul Cypher par label, quelles que soient les propriétés
+      const cypher = this.cypher('createOrUpdateNode', [type], () => `
+        MERGE (n:${type} {id: $id})
+        SET n += $props
+        RETURN n.id as id
+      `);
+
+      const id = await this.writeTransaction(async (runner) => {
+        const result = await runner.run('createOrUpdateNode', cypher, {
+          id: nodeId,
+          props: { ...properties, id: nodeId },
+        });
+        return result.records.length > 0 ? (result.records[0].get('id') as string) : nodeId;
+      });
+
+      if (id === null) {
         logger.warn('Neo4j not available, skipping node creation');
         return '';
       }
-
-      try {
-        // Générer un ID unique si non fourni
-        const nodeId = properties.id || `${type}_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
-        
-        // Construire la requête MERGE
-        const propsString = Object.keys(properties)
-          .map((key) => `n.${key} = $${key}`)
-          .join(', ');
-
-        const cypher = `
-          MERGE (n:${type} {id: $id})
-          SET ${propsString}
-          RETURN n.id as id
-        `;
-
-        const result = await session.run(cypher, { id: nodeId, ...properties });
-        
-        if (result.records.length > 0) {
-          return result.records[0].get('id');
-        }
-        
-        return nodeId;
-      } finally {
-        await session.close();
-      }
+      return id;
     }, 'Create or update Neo4j node');
   }
 
@@ -154,35 +341,27 @@ export class Neo4jRepository {
     properties?: Record<string, any>
   ): Promise<void> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
-        logger.warn('Neo4j not available, skipping relationship creation');
-        return;
-      }
-
-      try {
-        const propsString = properties
-          ? Object.keys(properties)
-              .map((key) => `r.${key} = $${key}`)
-              .join(', ')
-          : '';
-
-        const setClause = propsString ? `SET ${propsString}` : '';
-
-        const cypher = `
+      const cypher = this.cypher(
+        'createOrUpdateRelationship',
+        [fromType, toType, relationshipType],
+        () => `
           MATCH (from:${fromType} {id: $fromId})
           MATCH (to:${toType} {id: $toId})
           MERGE (from)-[r:${relationshipType}]->(to)
-          ${setClause}
-        `;
+          SET r += $props
+        `
+      );
 
-        await session.run(cypher, {
+      const done = await this.writeTransaction((runner) =>
+        runner.run('createOrUpdateRelationship', cypher, {
           fromId,
           toId,
-          ...(properties || {}),
-        });
-      } finally {
-        await session.close();
+          props: properties || {},
+        })
+      );
+
+      if (done === null) {
+        logger.warn('Neo4j not available, skipping relationship creation');
       }
     }, 'Create or update Neo4j relationship');
   }
@@ -196,189 +375,283 @@ export class Neo4jRepository {
     depth: number = 2
   ): Promise<any[]> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
+      const safeDepth = Math.max(1, Math.min(5, Math.floor(depth)));
+      const statement = this.cypher('findEntityConnections', [entityType, `d${safeDepth}`], () => `
+        MATCH (start:${entityType} {id: $entityId})
+        MATCH path = (start)-[*1..${safeDepth}]-(connected)
+        RETURN path, length(path) as depth
+        ORDER BY depth
+        LIMIT 50
+      `);
+
+      const result = await this.readTransaction((runner) =>
+        runner.run('findEntityConnections', statement, { entityId })
+      );
+      if (!result) {
         return [];
       }
 
-      try {
-        const cypher = `
-          MATCH (start:${entityType} {id: $entityId})
-          MATCH path = (start)-[*1..${depth}]-(connected)
-          RETURN path, length(path) as depth
-          ORDER BY depth
-          LIMIT 50
-        `;
-
-        const result = await session.run(cypher, { entityId });
-        return result.records.map((record) => ({
-          path: record.get('path'),
-          depth: record.get('depth'),
-        }));
-      } finally {
-        await session.close();
-      }
+      return result.records.map((record) => ({
+        path: record.get('path'),
+        depth: record.get('depth'),
+      }));
     }, 'Find entity connections');
   }
 
   /**
-   * Calculer la centralité d'une entité (degré simple)
+   * Lire la centralité globale pré-calculée d'une entité (lecture de propriété)
+   * Fallback sur le degré simple si le job batch n'a pas encore tourné.
    */
   async getEntityCentrality(
     entityId: string,
     entityType: string
   ): Promise<number> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
-        return 0;
-      }
-
-      try {
-        // Centralité de degré (nombre de connexions)
-        const cypher = `
-          MATCH (n:${entityType} {id: $entityId})
-          OPTIONAL MATCH (n)-[r]-()
-          RETURN count(r) as degree
-        `;
-
-        const result = await session.run(cypher, { entityId });
-        
-        if (result.records.length > 0) {
-          const degree = result.records[0].get('degree').toNumber();
-          // Normaliser entre 0 et 1 (supposons max 100 connexions)
-          return Math.min(1, degree / 100);
+      const cypher = this.cypher('getEntityCentrality', [entityType], () => `
+        MATCH (n:${entityType} {id: $entityId})
+        RETURN n.centralityOverall as overall,
+               CASE WHEN n.centralityOverall IS NULL THEN COUNT { (n)--() } ELSE null END as degree
+      `);
+
+      const result = await this.readTransaction((runner) =>
+        runner.run('getEntityCentrality', cypher, { entityId })
+      );
+
+      if (result && result.records.length > 0) {
+        const overall = result.records[0].get('overall');
+        if (overall !== null) {
+          return Number(overall);
         }
-        
-        return 0;
-      } finally {
-        await session.close();
+        // Pas encore calculé : normaliser le degré (supposons max 100 connexions)
+        const degree = this.convertNeo4jValue(result.records[0].get('degree')) || 0;
+        return Math.min(1, degree / 100);
       }
+
+      return 0;
     }, 'Get entity centrality');
   }
 
   /**
-   * Calculer les métriques de centralité avancées (Betweenness, PageRank, etc.)
+   * Lire les métriques de centralité avancées (Betweenness, PageRank, etc.)
+   * Les scores sont pré-calculés par GraphCentralityService (job batch) :
+   * plus aucun parcours de chemins à la requête.
    */
   async getAdvancedCentralityMetrics(
     entityId: string,
     entityType: string
   ): Promise<import('../types/attribution').GraphCentralityMetrics> {
+    const emptyMetrics = {
+      degree: 0,
+      betweenness: 0,
+      pagerank: 0,
+      closeness: 0,
+      eigenvector: 0,
+      overall: 0,
+    };
+
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
-        // Retourner des valeurs par défaut si Neo4j indisponible
+      const cypher = this.cypher('getAdvancedCentralityMetrics', [entityType], () => `
+        MATCH (n:${entityType} {id: $entityId})
+        RETURN n.centralityDegree as degree,
+               n.centralityBetweenness as betweenness,
+               n.centralityPagerank as pagerank,
+               n.centralityCloseness as closeness,
+               n.centralityEigenvector as eigenvector,
+               n.centralityOverall as overall,
+               n.centralityComputedAt as computedAt,
+               CASE WHEN n.centralityOverall IS NULL THEN COUNT { (n)--() } ELSE null END as liveDegree
+      `);
+
+      const result = await this.readTransaction((runner) =>
+        runner.run('getAdvancedCentralityMetrics', cypher, { entityId })
+      );
+      // Retourner des valeurs par défaut si Neo4j indisponible ou nœud inconnu
+      if (!result || result.records.length === 0) {
+        return emptyMetrics;
+      }
+
+      const record = result.records[0];
+      if (record.get('overall') === null) {
+        // Job batch pas encore passé : seul le degré est disponible à coût constant
+        const liveDegree = this.convertNeo4jValue(record.get('liveDegree')) || 0;
+        const normalizedDegree = Math.min(1, liveDegree / 100);
         return {
-          degree: 0,
-          betweenness: 0,
-          pagerank: 0,
-          closeness: 0,
-          eigenvector: 0,
-          overall: 0,
+          ...emptyMetrics,
+          degree: normalizedDegree,
+          overall: normalizedDegree * 0.2,
         };
       }
 
-      try {
-        // 1. Degree Centrality
-        const degreeCypher = `
-          MATCH (n:${entityType} {id: $entityId})
-          OPTIONAL MATCH (n)-[r]-()
-          RETURN count(r) as degree
-        `;
-        const degreeResult = await session.run(degreeCypher, { entityId });
-        const degree = degreeResult.records.length > 0 
-          ? degreeResult.records[0].get('degree').toNumber() 
-          : 0;
-
-        // 2. Betweenness Centrality (approximation)
-        // Calcule le nombre de plus courts chemins qui passent par ce nœud
-        const betweennessCypher = `
-          MATCH (n:${entityType} {id: $entityId})
-          MATCH (a)-[*..3]-(b)
-          WHERE a <> n AND b <> n AND a <> b
-          WITH a, b, n, 
-               [path IN allShortestPaths((a)-[*..3]-(b)) WHERE n IN nodes(path)] as pathsThroughN
-          RETURN count(pathsThroughN) as betweenness
-        `;
-        const betweennessResult = await session.run(betweennessCypher, { entityId });
-        const betweennessRaw = betweennessResult.records.length > 0
-          ? betweennessResult.records[0].get('betweenness').toNumber()
-          : 0;
-        // Normaliser (approximation, max basé sur le nombre de nœuds)
-        const betweenness = Math.min(1, betweennessRaw / 1000);
-
-        // 3. PageRank (simplifié - utilise l'algorithme GDS si disponible, sinon approximation)
-        // Pour l'instant, approximation basée sur le degré et les connexions entrantes
-        const pagerankCypher = `
-          MATCH (n:${entityType} {id: $entityId})
-          OPTIONAL MATCH (other)-[r]->(n)
-          WITH n, count(r) as incoming, 
-               [(n)-[r2]->() | count(r2)] as outgoing
-          RETURN incoming, outgoing[0] as outgoing
-        `;
-        const pagerankResult = await session.run(pagerankCypher, { entityId });
-        let pagerank = 0;
-        if (pagerankResult.records.length > 0) {
-          const incoming = pagerankResult.records[0].get('incoming').toNumber() || 0;
-          const outgoing = pagerankResult.records[0].get('outgoing') || 0;
-          // Approximation simple : (incoming / (incoming + outgoing + 1))
-          pagerank = Math.min(1, incoming / (incoming + outgoing + 1));
-        }
+      return {
+        degree: Number(record.get('degree')) || 0,
+        betweenness: Number(record.get('betweenness')) || 0,
+        pagerank: Number(record.get('pagerank')) || 0,
+        closeness: Number(record.get('closeness')) || 0,
+        eigenvector: Number(record.get('eigenvector')) || 0,
+        overall: Number(record.get('overall')) || 0,
+        computedAt: record.get('computedAt') || undefined,
+      };
+    }, 'Get advanced centrality metrics');
+  }
 
-        // 4. Closeness Centrality (distance moyenne aux autres nœuds)
-        const closenessCypher = `
-          MATCH (n:${entityType} {id: $entityId})
-          MATCH (other:${entityType})
-          WHERE other <> n
-          WITH n, other,
-               shortestPath((n)-[*..5]-(other)) as path
-          WHERE path IS NOT NULL
-          WITH n, avg(length(path)) as avgDistance
-          RETURN 1.0 / (avgDistance + 1) as closeness
-        `;
-        const closenessResult = await session.run(closenessCypher, { entityId });
-        const closeness = closenessResult.records.length > 0
-          ? closenessResult.records[0].get('closeness')
-          : 0;
-
-        // 5. Eigenvector Centrality (simplifié)
-        // Approximation basée sur les connexions aux nœuds importants
-        const eigenvectorCypher = `
-          MATCH (n:${entityType} {id: $entityId})-[r]-(connected)
-          WITH n, connected, count(r) as connectionStrength
-          MATCH (connected)-[r2]-()
-          WITH n, avg(count(r2)) as avgNeighborDegree
-          RETURN avgNeighborDegree / 100.0 as eigenvector
-        `;
-        const eigenvectorResult = await session.run(eigenvectorCypher, { entityId });
-        const eigenvector = eigenvectorResult.records.length > 0
-          ? eigenvectorResult.records[0].get('eigenvector')
-          : 0;
-
-        // Normaliser degree
-        const normalizedDegree = Math.min(1, degree / 100);
-
-        // Calculer overall (moyenne pondérée)
-        const overall = (
-          normalizedDegree * 0.2 +
-          betweenness * 0.3 +
-          pagerank * 0.25 +
-          closeness * 0.15 +
-          eigenvector * 0.1
-        );
+  /**
+   * Vérifier si le plugin Graph Data Science est installé
+   */
+  async isGdsAvailable(): Promise<boolean> {
+    try {
+      const result = await this.autoCommit((runner) =>
+        runner.run('isGdsAvailable', 'RETURN gds.version() as version')
+      );
+      return result !== null;
+    } catch {
+      return false;
+    }
+  }
 
+  /**
+   * Exporter la liste d'adjacence des nœuds demandés (pour le calcul en process)
+   */
+  async exportAdjacency(labels: string[]): Promise<import('../types/attribution').CentralityGraph> {
+    return handleError(async () => {
+      const labelFilter = (alias: string) => labels.map((label) => `${alias}:${label}`).join(' OR ');
+      const nodesCypher = this.cypher('exportAdjacencyNodes', labels, () => `
+        MATCH (n)
+        WHERE ${labelFilter('n')}
+        RETURN elementId(n) as key
+      `);
+      const edgesCypher = this.cypher('exportAdjacencyEdges', labels, () => `
+        MATCH (a)-[]->(b)
+        WHERE (${labelFilter('a')}) AND (${labelFilter('b')})
+        RETURN elementId(a) as source, elementId(b) as target
+      `);
+
+      // Les deux lectures dans la même transaction : snapshot cohérent
+      const graph = await this.readTransaction(async (runner) => {
+        const nodesResult = await runner.run('exportAdjacencyNodes', nodesCypher);
+        const edgesResult = await runner.run('exportAdjacencyEdges', edgesCypher);
         return {
-          degree: normalizedDegree,
-          betweenness,
-          pagerank,
-          closeness: closeness || 0,
-          eigenvector: eigenvector || 0,
-          overall: Math.min(1, overall),
+          nodes: nodesResult.records.map((record) => record.get('key') as string),
+          edges: edgesResult.records.map(
+            (record) => [record.get('source'), record.get('target')] as [string, string]
+          ),
         };
-      } finally {
-        await session.close();
+      });
+
+      return graph || { nodes: [], edges: [] };
+    }, 'Export graph adjacency');
+  }
+
+  /**
+   * Calculer les centralités brutes avec GDS (projection temporaire, mode stream)
+   */
+  async computeCentralityWithGds(
+    labels: string[]
+  ): Promise<Map<string, import('../types/attribution').CentralityRawScores>> {
+    return handleError(async () => {
+      const raw = new Map<string, import('../types/attribution').CentralityRawScores>();
+      const graphName = `centrality_${Date.now()}`;
+      const directedName = `${graphName}_directed`;
+      const scoreOf = (key: string) => {
+        let scores = raw.get(key);
+        if (!scores) {
+          scores = { degree: 0, pagerank: 0, betweenness: 0, closeness: 0, eigenvector: 0 };
+          raw.set(key, scores);
+        }
+        return scores;
+      };
+
+      await this.autoCommit(async (runner) => {
+        try {
+          // Projection non orientée pour degree/betweenness/closeness/eigenvector, orientée pour PageRank
+          await runner.run(
+            'gdsProjectUndirected',
+            `CALL gds.graph.project($graphName, $labels, {ALL: {type: '*', orientation: 'UNDIRECTED'}})`,
+            { graphName, labels }
+          );
+          await runner.run(
+            'gdsProjectDirected',
+            `CALL gds.graph.project($graphName, $labels, {ALL: {type: '*', orientation: 'NATURAL'}})`,
+            { graphName: directedName, labels }
+          );
+
+          const streams: Array<[keyof import('../types/attribution').CentralityRawScores, string, string]> = [
+            ['degree', 'gds.degree.stream', graphName],
+            ['betweenness', 'gds.betweenness.stream', graphName],
+            ['closeness', 'gds.closeness.harmonic.stream', graphName],
+            ['eigenvector', 'gds.eigenvector.stream', graphName],
+            ['pagerank', 'gds.pageRank.stream', directedName],
+          ];
+
+          for (const [metric, procedure, projection] of streams) {
+            const result = await runner.run(
+              procedure,
+              `CALL ${procedure}($projection) YIELD nodeId, score
+               RETURN elementId(gds.util.asNode(nodeId)) as key, score`,
+              { projection }
+            );
+            for (const record of result.records) {
+              scoreOf(record.get('key'))[metric] = Number(record.get('score')) || 0;
+            }
+          }
+        } finally {
+          for (const name of [graphName, directedName]) {
+            await runner
+              .run('gdsDrop', 'CALL gds.graph.drop($graphName, false) YIELD graphName RETURN graphName', {
+                graphName: name,
+              })
+              .catch(() => undefined);
+          }
+        }
+      });
+
+      return raw;
+    }, 'Compute centrality with GDS');
+  }
+
+  /**
+   * Écrire les scores de centralité comme propriétés des nœuds (UNWIND par lots)
+   */
+  async writeCentralityScores(
+    scores: Map<string, import('../types/attribution').CentralityScores>,
+    computedAt: string,
+    batchSize: number = 1000
+  ): Promise<number> {
+    return handleError(async () => {
+      const rows = Array.from(scores.entries()).map(([key, s]) => ({ key, ...s }));
+      let written = 0;
+
+      for (let i = 0; i < rows.length; i += batchSize) {
+        const batch = rows.slice(i, i + batchSize);
+        // Une transaction par lot : un retry du driver ne rejoue que ce lot
+        const count = await this.writeTransaction(async (runner) => {
+          const result = await runner.run(
+            'writeCentralityScores',
+            `
+            UNWIND $rows as row
+            MATCH (n) WHERE elementId(n) = row.key
+            SET n.centralityDegree = row.degree,
+                n.centralityBetweenness = row.betweenness,
+                n.centralityPagerank = row.pagerank,
+                n.centralityCloseness = row.closeness,
+                n.centralityEigenvector = row.eigenvector,
+                n.centralityOverall = row.overall,
+                n.centralityComputedAt = $computedAt
+            RETURN count(n) as written
+            `,
+            { rows: batch, computedAt }
+          );
+          return this.convertNeo4jValue(result.records[0]?.get('written')) || 0;
+        });
+
+        if (count === null) {
+          logger.warn('Neo4j not available, skipping centrality write');
+          return 0;
+        }
+        written += count;
       }
-    }, 'Get advanced centrality metrics');
+
+      return written;
+    }, 'Write centrality scores');
   }
 
   /**
@@ -386,49 +659,46 @@ export class Neo4jRepository {
    */
   async detectSectorClusters(sector?: string): Promise<import('../types/attribution').SectorCluster[]> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
-        return [];
-      }
-
-      try {
-        // Community detection simplifié (basé sur les connexions communes)
-        const cypher = `
-          MATCH (i1:Institution)-[:HOLDS]->(t1:Ticker)
-          MATCH (i2:Institution)-[:HOLDS]->(t2:Ticker)
-          WHERE i1 <> i2 AND t1 = t2
-          WITH i1, i2, count(DISTINCT t1) as commonTickers
-          WHERE commonTickers >= 3
-          WITH i1, collect(DISTINCT i2.id) as cluster
-          WHERE size(cluster) >= 2
-          RETURN i1.id as leader, cluster, size(cluster) as clusterSize
-          ORDER BY clusterSize DESC
-          LIMIT 10
-        `;
-
-        const result = await session.run(cypher, {});
-        const clusters: import('../types/attribution').SectorCluster[] = [];
+      // Community detection simplifié (basé sur les connexions communes)
+      const clustersCypher = `
+        MATCH (i1:Institution)-[:HOLDS]->(t1:Ticker)
+        MATCH (i2:Institution)-[:HOLDS]->(t2:Ticker)
+        WHERE i1 <> i2 AND t1 = t2
+        WITH i1, i2, count(DISTINCT t1) as commonTickers
+        WHERE commonTickers >= 3
+        WITH i1, collect(DISTINCT i2.id) as cluster
+        WHERE size(cluster) >= 2
+        RETURN i1.id as leader, cluster, size(cluster) as clusterSize
+        ORDER BY clusterSize DESC
+        LIMIT 10
+      `;
+
+      // Récupérer les tickers communs
+      const tickersCypher = `
+        MATCH (i:Institution)-[:HOLDS]->(t:Ticker)
+        WHERE i.id IN $institutionIds
+        WITH t, count(DISTINCT i) as holderCount
+        WHERE holderCount >= 2
+        RETURN t.symbol as ticker
+        ORDER BY holderCount DESC
+        LIMIT 10
+      `;
+
+      // Toutes les lectures dans une seule session/transaction
+      const clusters = await this.readTransaction(async (runner) => {
+        const result = await runner.run('detectSectorClusters', clustersCypher);
+        const found: import('../types/attribution').SectorCluster[] = [];
 
         for (const record of result.records) {
           const leader = record.get('leader');
           const clusterMembers = record.get('cluster') as string[];
-          
-          // Récupérer les tickers communs
-          const tickersCypher = `
-            MATCH (i:Institution)-[:HOLDS]->(t:Ticker)
-            WHERE i.id IN $institutionIds
-            WITH t, count(DISTINCT i) as holderCount
-            WHERE holderCount >= 2
-            RETURN t.symbol as ticker
-            ORDER BY holderCount DESC
-            LIMIT 10
-          `;
-          const tickersResult = await session.run(tickersCypher, {
+
+          const tickersResult = await runner.run('detectSectorClustersTickers', tickersCypher, {
             institutionIds: [leader, ...clusterMembers],
           });
           const topTickers = tickersResult.records.map((r) => r.get('ticker'));
 
-          clusters.push({
+          found.push({
             sector: sector || 'Unknown',
             institutions: [leader, ...clusterMembers],
             influenceScore: Math.min(100, clusterMembers.length * 10),
@@ -437,10 +707,10 @@ export class Neo4jRepository {
           });
         }
 
-        return clusters;
-      } finally {
-        await session.close();
-      }
+        return found;
+      });
+
+      return clusters || [];
     }, 'Detect sector clusters');
   }
 
@@ -448,9 +718,9 @@ export class Neo4jRepository {
    * Fermer le driver
    */
   async close(): Promise<void> {
-    if (this.driver) {
-      await this.driver.close();
-      this.driver = null;
+    if (sharedDriver) {
+      await sharedDriver.close();
+      sharedDriver = null;
       logger.info('Neo4j driver closed');
     }
   }
@@ -491,18 +761,10 @@ export class Neo4jRepository {
    */
   async testConnection(): Promise<boolean> {
     return handleError(async () => {
-      const session = await this.getSession();
-      if (!session) {
-        return false;
-      }
-
-      try {
-        const result = await session.run('RETURN 1 as test');
-        return result.records.length > 0;
-      } finally {
-        await session.close();
-      }
+      const result = await this.readTransaction((runner) =>
+        runner.run('testConnection', 'RETURN 1 as test')
+      );
+      return !!result && result.records.length > 0;
     }, 'Test Neo4j connection');
   }
 }
-
@@ -0,0 +1,207 @@
+/**
+ * Repository pour les surveillances de tickers (Supabase)
+ * Tables surveillance_watches et surveillance_alerts
+ */
+
+import { supabase } from '../supabase';
+import { AppError } from '../utils/errors';
+import { chunk, fetchAllPages } from '../utils/paging';
+import type { SurveillanceAlert, SurveillanceWatch } from '../types/surveillance';
+
+interface WatchRow {
+  id: string;
+  user_id: string;
+  ticker: string;
+  config: SurveillanceWatch['config'];
+  active: boolean;
+  created_at: string;
+  last_checked: string | null;
+}
+
+interface SurveillanceAlertRow {
+  id: string;
+  watch_id: string;
+  ticker: string;
+  type: SurveillanceAlert['type'];
+  source_key: string;
+  message: string;
+  data: Record<string, any>;
+  triggered_at: string;
+  read: boolean;
+}
+
+const WATCH_COLUMNS = 'id, user_id, ticker, config, active, created_at, last_checked';
+
+function toWatch(row: WatchRow): SurveillanceWatch {
+  return {
+    id: row.id,
+    userId: row.user_id,
+    ticker: row.ticker,
+    config: row.config,
+    createdAt: new Date(row.created_at),
+    lastChecked: row.last_checked ? new Date(row.last_checked) : undefined,
+    active: row.active,
+  };
+}
+
+function toSurveillanceAlert(row: SurveillanceAlertRow): SurveillanceAlert {
+  return {
+    id: row.id,
+    watchId: row.watch_id,
+    ticker: row.ticker,
+    type: row.type,
+    sourceKey: row.source_key,
+    message: row.message,
+    data: row.data || {},
+    triggeredAt: new Date(row.triggered_at),
+    read: row.read,
+  };
+}
+
+function dbError(context: string, error: { message: string }): AppError {
+  return new AppError(`${context}: ${error.message}`, 'DATABASE_ERROR', 500);
+}
+
+export class SurveillanceRepository {
+  async save(watch: SurveillanceWatch): Promise<SurveillanceWatch> {
+    const { data, error } = await supabase
+      .from('surveillance_watches')
+      .upsert(
+        {
+          id: watch.id,
+          user_id: watch.userId,
+          ticker: watch.ticker,
+          config: watch.config,
+          active: watch.active,
+          created_at: watch.createdAt.toISOString(),
+          last_checked: watch.lastChecked?.toISOString() ?? null,
+        },
+        { onConflict: 'id' }
+      )
+      .select(WATCH_COLUMNS)
+      .single();
+
+    if (error) {
+      throw dbError('Failed to save watch', error);
+    }
+    return toWatch(data as WatchRow);
+  }
+
+  async findById(watchId: string): Promise<SurveillanceWatch | null> {
+    const { data, error } = await supabase
+      .from('surveillance_watches')
+      .select(WATCH_COLUMNS)
+      .eq('id', watchId)
+      .maybeSingle();
+
+    if (error) {
+      throw dbError('Failed to get watch', error);
+    }
+    return data ? toWatch(data as WatchRow) : null;
+  }
+
+  async findActiveByUser(userId: string): Promise<SurveillanceWatch[]> {
+    const { data, error } = await supabase
+      .from('surveillance_watches')
+      .select(WATCH_COLUMNS)
+      .eq('user_id', userId)
+      .eq('active', true)
+      .order('created_at', { ascending: false });
+
+    if (error) {
+      throw dbError('Failed to list watches', error);
+    }
+    return (data || []).map((row) => toWatch(row as WatchRow));
+  }
+
+  /**
+   * Surveillances actives groupées par ticker (index partiel idx_surveillance_watches_active_ticker)
+   */
+  async findActiveByTicker(): Promise<Map<string, SurveillanceWatch[]>> {
+    const { data, error } = await fetchAllPages<WatchRow>((from, to) =>
+      supabase
+        .from('surveillance_watches')
+        .select(WATCH_COLUMNS)
+        .eq('active', true)
+        .order('ticker', { ascending: true })
+        .order('id', { ascending: true })
+        .range(from, to)
+    );
+
+    if (error) {
+      throw dbError('Failed to list active watches', error);
+    }
+
+    const byTicker = new Map<string, SurveillanceWatch[]>();
+    for (const row of data) {
+      const watch = toWatch(row);
+      const group = byTicker.get(watch.ticker);
+      if (group) {
+        group.push(watch);
+      } else {
+        byTicker.set(watch.ticker, [watch]);
+      }
+    }
+    return byTicker;
+  }
+
+  async markChecked(watchIds: string[], checkedAt: Date): Promise<void> {
+    for (const ids of chunk(watchIds)) {
+      const { error } = await supabase
+        .from('surveillance_watches')
+        .update({ last_checked: checkedAt.toISOString() })
+        .in('id', ids);
+
+      if (error) {
+        throw dbError('Failed to mark watches as checked', error);
+      }
+    }
+  }
+
+  async findAlerts(watchId: string): Promise<SurveillanceAlert[]> {
+    const { data, error } = await supabase
+      .from('surveillance_alerts')
+      .select('id, watch_id, ticker, type, source_key, message, data, triggered_at, read')
+      .eq('watch_id', watchId)
+      .order('triggered_at', { ascending: true });
+
+    if (error) {
+      throw dbError('Failed to list surveillance alerts', error);
+    }
+    return (data || []).map((row) => toSurveillanceAlert(row as SurveillanceAlertRow));
+  }
+
+  /**
+   * Insérer les alertes nouvelles ; celles déjà enregistrées pour la même surveillance,
+   * le même type et la même source sont ignorées (ON CONFLICT DO NOTHING)
+   * @returns alertes effectivement insérées
+   */
+  async insertAlerts(alerts: SurveillanceAlert[]): Promise<SurveillanceAlert[]> {
+    if (alerts.length === 0) {
+      return [];
+    }
+    const { data, error } = await supabase
+      .from('surveillance_alerts')
+      .upsert(
+        alerts.map((alert) => ({
+          id: alert.id,
+          watch_id: alert.watchId,
+          ticker: alert.ticker,
+          type: alert.type,
+          source_key: alert.sourceKey,
+          message: alert.message,
+          data: alert.data,
+          triggered_at: alert.triggeredAt.toISOString(),
+          read: alert.read,
+        })),
+        { onConflict: 'watch_id,type,source_key', ignoreDuplicates: true }
+      )
+      .select('id');
+
+    if (error) {
+      throw dbError('Failed to insert surveillance alerts', error);
+    }
+    const inserted = new Set((data || []).map((row: { id: string }) => row.id));
+    return alerts.filter((alert) => inserted.has(alert.id));
+  }
+}
@@ -0,0 +1,66 @@
+/**
+ * Repository des scores composites précalculés (Supabase)
+ * Table ticker_scores, une ligne par ticker
+ */
+
+import { supabase } from '../supabase';
+import { AppError } from '../utils/errors';
+import type { TickerScore, TimestampedTickerScore } from '../types/scoring';
+
+interface TickerScoreRow {
+  ticker: string;
+  score: TickerScore;
+  computed_at: string;
+  fresh_until: string;
+}
+
+function dbError(context: string, error: { message: string }): AppError {
+  return new AppError(`${context}: ${error.message}`, 'DATABASE_ERROR', 500);
+}
+
+export class TickerScoreRepository {
+  /**
+   * Scores encore frais des tickers demandés (une seule requête)
+   */
+  async findFresh(tickers: string[]): Promise<Map<string, TimestampedTickerScore>> {
+    const scores = new Map<string, TimestampedTickerScore>();
+    if (tickers.length === 0) {
+      return scores;
+    }
+
+    const { data, error } = await supabase
+      .from('ticker_scores')
+      .select('ticker, score, computed_at, fresh_until')
+      .in('ticker', tickers)
+      .gt('fresh_until', new Date().toISOString());
+
+    if (error) {
+      throw dbError('Failed to read ticker scores', error);
+    }
+
+    for (const row of (data || []) as TickerScoreRow[]) {
+      scores.set(row.ticker, { ...row.score, computedAt: row.computed_at, freshUntil: row.fresh_until });
+    }
+    return scores;
+  }
+
+  async saveMany(scores: TimestampedTickerScore[]): Promise<void> {
+    if (scores.length === 0) {
+      return;
+    }
+    const { error } = await supabase.from('ticker_scores').upsert(
+      scores.map(({ computedAt, freshUntil, ...score }) => ({
+        ticker: score.ticker,
+        overall: score.overall,
+        score,
+        computed_at: computedAt,
+        fresh_until: freshUntil,
+      })),
+      { onConflict: 'ticker' }
+    );
+
+    if (error) {
+      throw dbError('Failed to save ticker scores', error);
+    }
+  }
+}
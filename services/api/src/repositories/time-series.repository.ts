@@ -0,0 +1,330 @@
+/**
+ * Repository du store de séries temporelles (Supabase)
+ * Tables partitionnées ts_flow_alerts, ts_dark_pool_prints, ts_greek_exposures et
+ * état du collecteur ts_collector_state.
+ * Les lectures filtrent toujours sur trade_date en plus de l'horodatage pour que
+ * Postgres n'ouvre que les partitions de la fenêtre.
+ */
+
+import { supabase } from '../supabase';
+import { AppError } from '../utils/errors';
+import type {
+  DarkPoolPoint,
+  FlowAlertPoint,
+  FlowWindow,
+  GreekExposurePoint,
+  TimeSeriesSource,
+  TimeWindow,
+} from '../types/time-series';
+
+interface FlowAlertRow {
+  ticker: string;
+  trade_date: string;
+  executed_at: string;
+  option_chain: string;
+  is_call: boolean;
+  strike: number;
+  expiry: string | null;
+  premium: number;
+  ask_side_premium: number;
+  size: number;
+  volume: number;
+  open_interest: number;
+  underlying_price: number | null;
+  is_sweep: boolean;
+  alert_rule: string | null;
+}
+
+interface DarkPoolRow {
+  ticker: string;
+  trade_date: string;
+  executed_at: string;
+  tracking_id: number;
+  price: number;
+  size: number;
+  premium: number;
+  canceled: boolean;
+}
+
+interface GreekExposureRow {
+  ticker: string;
+  trade_date: string;
+  call_gamma: number;
+  put_gamma: number;
+  call_delta: number;
+  put_delta: number;
+  call_vanna: number;
+  put_vanna: number;
+  call_charm: number;
+  put_charm: number;
+}
+
+const FLOW_COLUMNS =
+  'ticker, trade_date, executed_at, option_chain, is_call, strike, expiry, premium, ask_side_premium, size, volume, open_interest, underlying_price, is_sweep, alert_rule';
+const DARK_POOL_COLUMNS = 'ticker, trade_date, executed_at, tracking_id, price, size, premium, canceled';
+const GREEK_COLUMNS =
+  'ticker, trade_date, call_gamma, put_gamma, call_delta, put_delta, call_vanna, put_vanna, call_charm, put_charm';
+
+function dbError(context: string, error: { message: string }): AppError {
+  return new AppError(`${context}: ${error.message}`, 'DATABASE_ERROR', 500);
+}
+
+function dayOf(iso: string): string {
+  return iso.split('T')[0];
+}
+
+function toFlowAlertPoint(row: FlowAlertRow): FlowAlertPoint {
+  return {
+    ticker: row.ticker,
+    tradeDate: row.trade_date,
+    executedAt: row.executed_at,
+    optionChain: row.option_chain,
+    isCall: row.is_call,
+    strike: row.strike,
+    expiry: row.expiry,
+    premium: row.premium,
+    askSidePremium: row.ask_side_premium,
+    size: row.size,
+    volume: row.volume,
+    openInterest: row.open_interest,
+    underlyingPrice: row.underlying_price,
+    isSweep: row.is_sweep,
+    alertRule: row.alert_rule,
+  };
+}
+
+function toDarkPoolPoint(row: DarkPoolRow): DarkPoolPoint {
+  return {
+    ticker: row.ticker,
+    tradeDate: row.trade_date,
+    executedAt: row.executed_at,
+    trackingId: Number(row.tracking_id),
+    price: row.price,
+    size: row.size,
+    premium: row.premium,
+    canceled: row.canceled,
+  };
+}
+
+function toGreekExposurePoint(row: GreekExposureRow): GreekExposurePoint {
+  return {
+    ticker: row.ticker,
+    tradeDate: row.trade_date,
+    callGamma: row.call_gamma,
+    putGamma: row.put_gamma,
+    callDelta: row.call_delta,
+    putDelta: row.put_delta,
+    callVanna: row.call_vanna,
+    putVanna: row.put_vanna,
+    callCharm: row.call_charm,
+    putCharm: row.put_charm,
+  };
+}
+
+export class TimeSeriesRepository {
+  /**
+   * Ajouter des flow alerts (les doublons déjà stockés sont ignorés)
+   */
+  async appendFlowAlerts(points: FlowAlertPoint[]): Promise<void> {
+    if (points.length === 0) {
+      return;
+    }
+    const { error } = await supabase.from('ts_flow_alerts').upsert(
+      points.map((p) => ({
+        ticker: p.ticker,
+        trade_date: p.tradeDate,
+        executed_at: p.executedAt,
+        option_chain: p.optionChain,
+        is_call: p.isCall,
+        strike: p.strike,
+        expiry: p.expiry,
+        premium: p.premium,
+        ask_side_premium: p.askSidePremium,
+        size: p.size,
+        volume: p.volume,
+        open_interest: p.openInterest,
+        underlying_price: p.underlyingPrice,
+        is_sweep: p.isSweep,
+        alert_rule: p.alertRule,
+      })),
+      { onConflict: 'ticker,trade_date,executed_at,option_chain', ignoreDuplicates: true }
+    );
+
+    if (error) {
+      throw dbError('Failed to append flow alerts', error);
+    }
+  }
+
+  async appendDarkPoolPrints(points: DarkPoolPoint[]): Promise<void> {
+    if (points.length === 0) {
+      return;
+    }
+    const { error } = await supabase.from('ts_dark_pool_prints').upsert(
+      points.map((p) => ({
+        ticker: p.ticker,
+        trade_date: p.tradeDate,
+        executed_at: p.executedAt,
+        tracking_id: p.trackingId,
+        price: p.price,
+        size: p.size,
+        premium: p.premium,
+        canceled: p.canceled,
+      })),
+      { onConflict: 'ticker,trade_date,tracking_id', ignoreDuplicates: true }
+    );
+
+    if (error) {
+      throw dbError('Failed to append dark pool prints', error);
+    }
+  }
+
+  /**
+   * Expositions grecques : une ligne par jour, la journée en cours est mise à jour
+   */
+  async upsertGreekExposures(points: GreekExposurePoint[]): Promise<void> {
+    if (points.length === 0) {
+      return;
+    }
+    const { error } = await supabase.from('ts_greek_exposures').upsert(
+      points.map((p) => ({
+        ticker: p.ticker,
+        trade_date: p.tradeDate,
+        call_gamma: p.callGamma,
+        put_gamma: p.putGamma,
+        call_delta: p.callDelta,
+        put_delta: p.putDelta,
+        call_vanna: p.callVanna,
+        put_vanna: p.putVanna,
+        call_charm: p.callCharm,
+        put_charm: p.putCharm,
+      })),
+      { onConflict: 'ticker,trade_date' }
+    );
+
+    if (error) {
+      throw dbError('Failed to upsert greek exposures', error);
+    }
+  }
+
+  /**
+   * Flow alerts d'un ticker sur une fenêtre (plus récentes en premier)
+   */
+  async findFlowAlerts(ticker: string, window: FlowWindow): Promise<FlowAlertPoint[]> {
+    const to = window.to ?? new Date().toISOString();
+    let query = supabase
+      .from('ts_flow_alerts')
+      .select(FLOW_COLUMNS)
+      .eq('ticker', ticker)
+      .gte('trade_date', dayOf(window.from))
+      .lte('trade_date', dayOf(to))
+      .gte('executed_at', window.from)
+      .lt('executed_at', to);
+
+    if (window.minPremium !== undefined) {
+      query = query.gte('premium', window.minPremium);
+    }
+    if (window.isCall !== undefined) {
+      query = query.eq('is_call', window.isCall);
+    }
+
+    const { data, error } = await query
+      .order('executed_at', { ascending: false })
+      .limit(window.limit ?? 1000);
+
+    if (error) {
+      throw dbError('Failed to read flow alerts', error);
+    }
+    return (data || []).map((row) => toFlowAlertPoint(row as FlowAlertRow));
+  }
+
+  async findDarkPoolPrints(ticker: string, window: TimeWindow): Promise<DarkPoolPoint[]> {
+    const to = window.to ?? new Date().toISOString();
+    const { data, error } = await supabase
+      .from('ts_dark_pool_prints')
+      .select(DARK_POOL_COLUMNS)
+      .eq('ticker', ticker)
+      .gte('trade_date', dayOf(window.from))
+      .lte('trade_date', dayOf(to))
+      .gte('executed_at', window.from)
+      .lt('executed_at', to)
+      .eq('canceled', false)
+      .order('executed_at', { ascending: false })
+      .limit(window.limit ?? 1000);
+
+    if (error) {
+      throw dbError('Failed to read dark pool prints', error);
+    }
+    return (data || []).map((row) => toDarkPoolPoint(row as DarkPoolRow));
+  }
+
+  async findGreekExposures(ticker: string, window: TimeWindow): Promise<GreekExposurePoint[]> {
+    const to = window.to ?? new Date().toISOString();
+    const { data, error } = await supabase
+      .from('ts_greek_exposures')
+      .select(GREEK_COLUMNS)
+      .eq('ticker', ticker)
+      .gte('trade_date', dayOf(window.from))
+      .lte('trade_date', dayOf(to))
+      .order('trade_date', { ascending: false })
+      .limit(window.limit ?? 366);
+
+    if (error) {
+      throw dbError('Failed to read greek exposures', error);
+    }
+    return (data || []).map((row) => toGreekExposurePoint(row as GreekExposureRow));
+  }
+
+  /**
+   * Date de la dernière collecte d'une source pour un ticker (null si jamais collectée)
+   */
+  async getCollectedAt(ticker: string, source: TimeSeriesSource): Promise<Date | null> {
+    const { data, error } = await supabase
+      .from('ts_collector_state')
+      .select('last_collected_at')
+      .eq('ticker', ticker)
+      .eq('source', source)
+      .maybeSingle();
+
+    if (error) {
+      throw dbError('Failed to read collector state', error);
+    }
+    return data ? new Date((data as { last_collected_at: string }).last_collected_at) : null;
+  }
+
+  async markCollected(ticker: string, source: TimeSeriesSource, rowsAppended: number): Promise<void> {
+    const { error } = await supabase.from('ts_collector_state').upsert(
+      {
+        ticker,
+        source,
+        last_collected_at: new Date().toISOString(),
+        rows_appended: rowsAppended,
+      },
+      { onConflict: 'ticker,source' }
+    );
+
+    if (error) {
+      throw dbError('Failed to update collector state', error);
+    }
+  }
+
+  /**
+   * Créer les partitions mensuelles à venir (nombre de partitions créées)
+   */
+  async ensurePartitions(monthsAhead: number = 1): Promise<number> {
+    const { data, error } = await supabase.rpc('ensure_ts_partitions', { p_months_ahead: monthsAhead });
+    if (error) {
+      throw dbError('Failed to ensure time-series partitions', error);
+    }
+    return (data as number) || 0;
+  }
+
+  async dropPartitionsBefore(before: Date): Promise<number> {
+    const { data, error } = await supabase.rpc('drop_ts_partitions_before', {
+      p_before: dayOf(before.toISOString()),
+    });
+    if (error) {
+      throw dbError('Failed to drop time-series partitions', error);
+    }
+    return (data as number) || 0;
+  }
+}
@@ -1,7 +1,7 @@
 import { APIGatewayProxyEventV2 } from "aws-lambda";
 import { getSignals, createSignal, getSignal, searchSignals } from "./signals";
 import { chatWithData } from "./chat";
-import { createFund, getFunds, getFund, getFundHoldings, getFundFilings } from "./funds";
+import { createFund, getFunds, getFund, getFundHoldings, getFundPositionHistory, getFundFilings } from "./funds";
 import {
   createCompany,
   getCompanies,
@@ -149,6 +149,14 @@ function getQueryParam(event: APIGatewayProxyEventV2, key: string): string | und
   return event.queryStringParameters?.[key];
 }
 
+// Helper pour les query params en liste séparée par des virgules
+function getListQueryParam(event: APIGatewayProxyEventV2, key: string): string[] {
+  return (getQueryParam(event, key) || "")
+    .split(",")
+    .map((value) => value.trim())
+    .filter(Boolean);
+}
+
 // Helper pour extraire les path params
 function getPathParam(event: APIGatewayProxyEventV2, key: string): string | undefined {
   return event.pathParameters?.[key];
@@ -168,8 +176,12 @@ const routes: Route[] = [
       const min_importance = getQueryParam(event, "min_importance") 
         ? parseInt(getQueryParam(event, "min_importance")!) 
         : undefined;
+      // Curseur : timestamp et id du dernier signal de la page précédente
+      const before = getQueryParam(event, "before");
+      const before_id = getQueryParam(event, "before_id");
+      const include_raw = getQueryParam(event, "include_raw") === "true";
       
-      return await getSignals({ source, type, limit, offset, min_importance });
+      return await getSignals({ source, type, limit, offset, min_importance, before, before_id, include_raw });
     },
   },
   {
@@ -245,6 +257,12 @@ const routes: Route[] = [
     handler: async (event) => {
       const id = getPathParam(event, "id");
       if (!id) throw new Error("Missing id parameter");
+      // ?tickers=NVDA,PLTR et/ou ?cusips=... : historique agrégé par filing
+      const tickers = getListQueryParam(event, "tickers");
+      const cusips = getListQueryParam(event, "cusips");
+      if (tickers.length > 0 || cusips.length > 0) {
+        return await getFundPositionHistory(parseInt(id), tickers, cusips);
+      }
       const limit = getQueryParam(event, "limit") ? parseInt(getQueryParam(event, "limit")!) : 100;
       return await getFundHoldings(parseInt(id), limit);
     },
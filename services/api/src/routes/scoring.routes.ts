@@ -11,7 +11,22 @@ function getPathParam(event: APIGatewayProxyEventV2, key: string): string | unde
   return event.pathParameters?.[key];
 }
 
+function getQueryParam(event: APIGatewayProxyEventV2, key: string): string | undefined {
+  return event.queryStringParameters?.[key];
+}
+
 export const scoringRoutes: Route[] = [
+  // ========== Scores Batch (watchlists) ==========
+  {
+    method: "GET",
+    path: "/ticker-analysis/scores",
+    handler: async (event) => {
+      const tickers = getQueryParam(event, "tickers");
+      if (!tickers) throw new Error("Missing tickers parameter");
+      return await scoring.calculateTickerScores(tickers.split(","));
+    },
+  },
+
   // ========== Score Composite ==========
   {
     method: "GET",
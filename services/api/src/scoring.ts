@@ -3,7 +3,7 @@
  */
 
 import { ScoringService } from './services/scoring.service';
-import type { TickerScoreResponse } from './types/scoring';
+import type { TickerScoreResponse, TickerScoresResponse } from './types/scoring';
 
 const scoringService = new ScoringService();
 
@@ -16,3 +16,12 @@ export async function calculateTickerScore(ticker: string): Promise<TickerScoreR
   return await scoringService.calculateTickerScore(ticker);
 }
 
+
+/**
+ * Scores composites de plusieurs tickers en un appel (watchlists)
+ * @param tickers Symboles des tickers (50 maximum)
+ * @returns Scores dans l'ordre demandé, avec leur date de calcul et de fraîcheur
+ */
+export async function calculateTickerScores(tickers: string[]): Promise<TickerScoresResponse> {
+  return await scoringService.calculateTickerScores(tickers);
+}
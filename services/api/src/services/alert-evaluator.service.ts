@@ -0,0 +1,275 @@
+/**
+ * Évaluateur compilé des conditions d'alerte
+ * Les conditions sont compilées une fois (création / mise à jour) en un programme
+ * (index de feature, opcode, seuil). Chaque bundle de ticker est réduit une seule fois
+ * en un vecteur de features, puis toutes les alertes actives sont évaluées en un passage
+ * sur des tableaux typés, sans interprétation des conditions par alerte.
+ */
+
+import type {
+  AlertCondition,
+  AlertLogic,
+  CompiledAlertProgram,
+  ComparisonOperator,
+} from '../types/alerts';
+import type { TickerBundle } from '../types/ticker-bundle';
+
+/** Features extraites d'un bundle (ordre = index dans le vecteur) */
+export const FEATURES = [
+  'callVolume',
+  'putVolume',
+  'callPremium',
+  'putPremium',
+  'flowPremium',
+  'insiderBuys',
+  'darkPoolVolume',
+  'shortPercent',
+  'ivRank',
+  'price',
+  'volume',
+  'zero',
+] as const;
+
+export type FeatureName = (typeof FEATURES)[number];
+
+export const FEATURE_COUNT = FEATURES.length;
+
+const F = Object.fromEntries(FEATURES.map((name, index) => [name, index])) as Record<FeatureName, number>;
+
+const OPCODES: Record<ComparisonOperator, number> = {
+  gt: 0,
+  gte: 1,
+  lt: 2,
+  lte: 3,
+  eq: 4,
+  neq: 5,
+};
+
+// Fenêtre des achats d'initiés comptés par insider_activity
+const INSIDER_WINDOW_MS = 7 * 24 * 60 * 60 * 1000;
+
+export interface ConditionOutcome {
+  condition: AlertCondition;
+  met: boolean;
+  value: number;
+}
+
+function featureFor(condition: AlertCondition): number {
+  const side = condition.params?.type;
+  switch (condition.signal) {
+    case 'options_flow':
+      return side === 'put' ? F.putVolume : F.callVolume;
+    case 'flow_premium':
+      return side === 'put' ? F.putPremium : side === 'call' ? F.callPremium : F.flowPremium;
+    case 'insider_activity':
+      return F.insiderBuys;
+    case 'dark_pool':
+      return F.darkPoolVolume;
+    case 'short_interest':
+      return F.shortPercent;
+    case 'iv_rank':
+      return F.ivRank;
+    case 'price':
+      return F.price;
+    case 'volume':
+      return F.volume;
+    default:
+      // Signal sans feature (greeks) : valeur 0, comme l'évaluateur historique
+      return F.zero;
+  }
+}
+
+/**
+ * Compiler les conditions d'une alerte
+ */
+export function compileAlert(conditions: AlertCondition[], logic: AlertLogic): CompiledAlertProgram {
+  return {
+    version: 1,
+    logic,
+    features: conditions.map(featureFor),
+    ops: conditions.map((c) => OPCODES[c.operator] ?? OPCODES.gt),
+    thresholds: conditions.map((c) => {
+      if (typeof c.value === 'number') {
+        return c.value;
+      }
+      // Comparaisons d'ordre : un seuil non numérique vaut 0
+      return c.operator === 'eq' || c.operator === 'neq' ? null : 0;
+    }),
+  };
+}
+
+function toNumber(value: unknown): number {
+  const n = typeof value === 'number' ? value : parseFloat(value as string);
+  return Number.isFinite(n) ? n : 0;
+}
+
+/**
+ * Réduire un bundle en vecteur de features
+ * `out` et `offset` permettent d'écrire directement dans la matrice d'un lot.
+ */
+export function extractFeatures(
+  bundle: TickerBundle,
+  out: Float64Array = new Float64Array(FEATURE_COUNT),
+  offset: number = 0,
+  now: number = Date.now()
+): Float64Array {
+  const { optionsFlow, insiders, darkPool, shortInterest, ivRank, quote } = bundle.data;
+
+  let callVolume = 0;
+  let putVolume = 0;
+  let callPremium = 0;
+  let putPremium = 0;
+  if (Array.isArray(optionsFlow)) {
+    for (const flow of optionsFlow) {
+      callVolume += toNumber(flow.call_volume);
+      putVolume += toNumber(flow.put_volume);
+      callPremium += toNumber(flow.call_premium);
+      putPremium += toNumber(flow.put_premium);
+    }
+  }
+
+  let insiderBuys = 0;
+  if (Array.isArray(insiders)) {
+    const since = now - INSIDER_WINDOW_MS;
+    for (const insider of insiders) {
+      if (insider.transaction_code === 'P' && new Date(insider.filing_date).getTime() > since) {
+        insiderBuys++;
+      }
+    }
+  }
+
+  let darkPoolVolume = 0;
+  if (Array.isArray(darkPool)) {
+    for (const trade of darkPool) {
+      darkPoolVolume += toNumber(trade.volume);
+    }
+  }
+
+  const latestIV = Array.isArray(ivRank) && ivRank.length > 0 ? ivRank[ivRank.length - 1] : null;
+  const latestQuote = Array.isArray(quote) ? quote[0] : quote;
+
+  out[offset + F.callVolume] = callVolume;
+  out[offset + F.putVolume] = putVolume;
+  out[offset + F.callPremium] = callPremium;
+  out[offset + F.putPremium] = putPremium;
+  out[offset + F.flowPremium] = callPremium + putPremium;
+  out[offset + F.insiderBuys] = insiderBuys;
+  out[offset + F.darkPoolVolume] = darkPoolVolume;
+  out[offset + F.shortPercent] = Array.isArray(shortInterest) ? toNumber(shortInterest[0]?.percent_returned) : 0;
+  out[offset + F.ivRank] = toNumber(latestIV?.iv_rank_1y);
+  out[offset + F.price] = toNumber(latestQuote?.price);
+  out[offset + F.volume] = toNumber(latestQuote?.volume);
+  out[offset + F.zero] = 0;
+  return out;
+}
+
+/**
+ * Lot d'alertes compilées, aplati en structure de tableaux
+ * Construit une fois par cycle ; `evaluate` peut être rappelé avec d'autres features.
+ */
+export class AlertBatch {
+  readonly size: number;
+  /** Début des conditions de chaque alerte (taille size + 1) */
+  private starts: Int32Array;
+  private isOr: Uint8Array;
+  /** Index dans la matrice de features (ticker * FEATURE_COUNT + feature) */
+  private slots: Int32Array;
+  private ops: Uint8Array;
+  private thresholds: Float64Array;
+  private met: Uint8Array;
+
+  /**
+   * @param programs Programme compilé de chaque alerte
+   * @param tickerIndexes Ligne de la matrice de features de chaque alerte
+   */
+  constructor(programs: CompiledAlertProgram[], tickerIndexes: ArrayLike<number>) {
+    this.size = programs.length;
+    this.starts = new Int32Array(this.size + 1);
+    this.isOr = new Uint8Array(this.size);
+
+    let total = 0;
+    for (let a = 0; a < this.size; a++) {
+      this.starts[a] = total;
+      total += programs[a].features.length;
+    }
+    this.starts[this.size] = total;
+
+    this.slots = new Int32Array(total);
+    this.ops = new Uint8Array(total);
+    this.thresholds = new Float64Array(total);
+    this.met = new Uint8Array(total);
+
+    for (let a = 0; a < this.size; a++) {
+      const program = programs[a];
+      const base = tickerIndexes[a] * FEATURE_COUNT;
+      this.isOr[a] = program.logic === 'OR' ? 1 : 0;
+      for (let i = 0, c = this.starts[a]; i < program.features.length; i++, c++) {
+        this.slots[c] = base + program.features[i];
+        this.ops[c] = program.ops[i];
+        this.thresholds[c] = program.thresholds[i] ?? NaN;
+      }
+    }
+  }
+
+  /**
+   * Évaluer toutes les conditions puis la logique de chaque alerte
+   * @returns 1 si l'alerte est déclenchée, 0 sinon (même ordre que les programmes)
+   */
+  evaluate(features: Float64Array): Uint8Array {
+    const { slots, ops, thresholds, met } = this;
+    const total = slots.length;
+
+    for (let c = 0; c < total; c++) {
+      const value = features[slots[c]];
+      const threshold = thresholds[c];
+      let result: boolean;
+      switch (ops[c]) {
+        case 0:
+          result = value > threshold;
+          break;
+        case 1:
+          result = value >= threshold;
+          break;
+        case 2:
+          result = value < threshold;
+          break;
+        case 3:
+          result = value <= threshold;
+          break;
+        case 4:
+          result = value === threshold;
+          break;
+        case 5:
+          result = value !== threshold;
+          break;
+        default:
+          result = false;
+      }
+      met[c] = result ? 1 : 0;
+    }
+
+    const triggered = new Uint8Array(this.size);
+    for (let a = 0; a < this.size; a++) {
+      const start = this.starts[a];
+      const end = this.starts[a + 1];
+      let count = 0;
+      for (let c = start; c < end; c++) {
+        count += met[c];
+      }
+      triggered[a] = (this.isOr[a] ? count > 0 : count === end - start) ? 1 : 0;
+    }
+    return triggered;
+  }
+
+  /**
+   * Détail des conditions d'une alerte après `evaluate` (valeurs et résultats)
+   */
+  outcomes(alertIndex: number, conditions: AlertCondition[], features: Float64Array): ConditionOutcome[] {
+    const start = this.starts[alertIndex];
+    return conditions.map((condition, i) => ({
+      condition,
+      met: this.met[start + i] === 1,
+      value: features[this.slots[start + i]],
+    }));
+  }
+}
@@ -5,12 +5,20 @@
 
 import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
-import * as uw from '../unusual-whales';
+import { TickerBundleService } from './ticker-bundle.service';
+import { AlertRepository, type ActiveAlert } from '../repositories/alert.repository';
+import {
+  AlertBatch,
+  FEATURE_COUNT,
+  compileAlert,
+  extractFeatures,
+  type ConditionOutcome,
+} from './alert-evaluator.service';
+import { mapWithConcurrency } from '../utils/concurrency';
 import type {
   MultiSignalAlertConfig,
   Alert,
   AlertCondition,
-  AlertLogic,
   AlertResponse,
   AlertListResponse,
   AlertTestResponse,
@@ -18,11 +26,23 @@ import type {
 } from '../types/alerts';
 import { v4 as uuidv4 } from 'uuid';
 
-// Stockage en mémoire (à remplacer par DynamoDB plus tard)
-const userAlerts = new Map<string, Alert>();
-const alertTriggers = new Map<string, AlertTrigger[]>();
+// Tickers évalués simultanément par checkAllAlerts
+const TICKER_CONCURRENCY = 5;
+
+type AlertEvaluation = {
+  triggered: boolean;
+  conditions: Array<{
+    condition: AlertCondition;
+    met: boolean;
+    value: number;
+  }>;
+  message?: string;
+};
 
 export class AlertService {
+  private repository = new AlertRepository();
+  private bundles = new TickerBundleService();
+
   /**
    * Créer une alerte multi-signaux
    */
@@ -48,14 +68,13 @@ export class AlertService {
         createdAt: new Date(),
       };
 
-      userAlerts.set(alert.id, alert);
-      alertTriggers.set(alert.id, []);
+      const saved = await this.repository.save(alert, compileAlert(alert.conditions, alert.logic));
 
-      log.info('Alert created', { alertId: alert.id });
+      log.info('Alert created', { alertId: saved.id });
 
       return {
         success: true,
-        data: { alert },
+        data: { alert: saved },
       };
     });
   }
@@ -68,9 +87,7 @@ export class AlertService {
       const log = logger.child({ userId, operation: 'getAlerts' });
       log.info('Fetching alerts');
 
-      const userAlertList = Array.from(userAlerts.values()).filter(
-        (a) => a.userId === userId
-      );
+      const userAlertList = await this.repository.findByUser(userId);
 
       return {
         success: true,
@@ -90,7 +107,7 @@ export class AlertService {
       const log = logger.child({ alertId, userId, operation: 'getAlert' });
       log.info('Fetching alert');
 
-      const alert = userAlerts.get(alertId);
+      const alert = await this.repository.findById(alertId);
       if (!alert) {
         throw new Error('Alert not found');
       }
@@ -118,7 +135,7 @@ export class AlertService {
       const log = logger.child({ alertId, userId, operation: 'updateAlert' });
       log.info('Updating alert');
 
-      const alert = userAlerts.get(alertId);
+      const alert = await this.repository.findById(alertId);
       if (!alert) {
         throw new Error('Alert not found');
       }
@@ -141,13 +158,18 @@ export class AlertService {
         ...(updates.active !== undefined && { active: updates.active }),
       };
 
-      userAlerts.set(alertId, updatedAlert);
+      // Recompiler seulement si les conditions ou la logique changent
+      const compiled =
+        updates.conditions || updates.logic
+          ? compileAlert(updatedAlert.conditions, updatedAlert.logic)
+          : undefined;
+      const saved = await this.repository.save(updatedAlert, compiled);
 
       log.info('Alert updated', { alertId });
 
       return {
         success: true,
-        data: { alert: updatedAlert },
+        data: { alert: saved },
       };
     });
   }
@@ -160,7 +182,7 @@ export class AlertService {
       const log = logger.child({ alertId, userId, operation: 'deleteAlert' });
       log.info('Deleting alert');
 
-      const alert = userAlerts.get(alertId);
+      const alert = await this.repository.findById(alertId);
       if (!alert) {
         throw new Error('Alert not found');
       }
@@ -169,14 +191,13 @@ export class AlertService {
         throw new Error('Unauthorized');
       }
 
-      alert.active = false;
-      userAlerts.set(alertId, alert);
+      const saved = await this.repository.save({ ...alert, active: false });
 
       log.info('Alert deleted', { alertId });
 
       return {
         success: true,
-        data: { alert },
+        data: { alert: saved },
       };
     });
   }
@@ -189,7 +210,7 @@ export class AlertService {
       const log = logger.child({ alertId, userId, operation: 'testAlert' });
       log.info('Testing alert');
 
-      const alert = userAlerts.get(alertId);
+      const alert = await this.repository.findById(alertId);
       if (!alert) {
         throw new Error('Alert not found');
       }
@@ -212,26 +233,9 @@ export class AlertService {
   }
 
   /**
-   * Évaluer les conditions d'une alerte
+   * Évaluer les conditions d'une alerte (chemin interactif, lot d'une seule alerte)
    */
-  private async evaluateAlertConditions(
-    alert: Alert
-  ): Promise<{
-    triggered: boolean;
-    conditions: Array<{
-      condition: AlertCondition;
-      met: boolean;
-      value: any;
-    }>;
-    message?: string;
-  }> {
-    const log = logger.child({ alertId: alert.id, operation: 'evaluateConditions' });
-    log.info('Evaluating alert conditions', {
-      ticker: alert.ticker,
-      conditionCount: alert.conditions.length,
-      logic: alert.logic,
-    });
-
+  private async evaluateAlertConditions(alert: Alert): Promise<AlertEvaluation> {
     if (!alert.ticker) {
       return {
         triggered: false,
@@ -240,235 +244,118 @@ export class AlertService {
       };
     }
 
-    const ticker = alert.ticker.toUpperCase();
-    const conditionResults: Array<{
-      condition: AlertCondition;
-      met: boolean;
-      value: any;
-    }> = [];
-
-    // Récupérer les données nécessaires dans un ordre fixe
-    const dataMap: Record<string, Promise<any>> = {};
-    const dataOrder: string[] = [];
-
-    for (const condition of alert.conditions) {
-      if (condition.signal === 'options_flow' && !dataMap.optionsFlow) {
-        dataMap.optionsFlow = uw
-          .getUWRecentFlows(ticker, { min_premium: 50000 })
-          .then((r) => (r.success ? r.data : null))
-          .catch(() => null);
-        dataOrder.push('optionsFlow');
-      }
-      if (condition.signal === 'insider_activity' && !dataMap.insiders) {
-        dataMap.insiders = uw
-          .getUWStockInsiderBuySells(ticker, {})
-          .then((r) => (r.success ? r.data : null))
-          .catch(() => null);
-        dataOrder.push('insiders');
-      }
-      if (condition.signal === 'dark_pool' && !dataMap.darkPool) {
-        dataMap.darkPool = uw
-          .getUWDarkPoolTrades(ticker, { limit: 50 })
-          .then((r) => (r.success ? r.data : null))
-          .catch(() => null);
-        dataOrder.push('darkPool');
-      }
-      if (condition.signal === 'short_interest' && !dataMap.shortInterest) {
-        dataMap.shortInterest = uw
-          .getUWShortInterestAndFloat(ticker)
-          .then((r) => (r.success ? r.data : null))
-          .catch(() => null);
-        dataOrder.push('shortInterest');
-      }
-    }
-
-    // Récupérer les données dans l'ordre fixe
-    const dataArray = await Promise.all(
-      dataOrder.map((key) => dataMap[key])
-    );
-    
-    // Créer un map pour accès facile
-    const dataIndex: Record<string, any> = {};
-    dataOrder.forEach((key, index) => {
-      dataIndex[key] = dataArray[index];
-    });
-
-    // Évaluer chaque condition
-    for (const condition of alert.conditions) {
-      const met = await this.evaluateCondition(condition, ticker, dataIndex);
-      conditionResults.push({
-        condition,
-        met,
-        value: this.extractValue(condition, ticker, dataIndex),
-      });
-    }
-
-    // Appliquer la logique (AND ou OR)
-    const triggered =
-      alert.logic === 'AND'
-        ? conditionResults.every((r) => r.met)
-        : conditionResults.some((r) => r.met);
-
-    const message = triggered
-      ? `Alert triggered: ${conditionResults.filter((r) => r.met).length}/${conditionResults.length} conditions met`
-      : `Alert not triggered: ${conditionResults.filter((r) => r.met).length}/${conditionResults.length} conditions met`;
-
-    log.info('Alert evaluation complete', {
-      triggered,
-      metConditions: conditionResults.filter((r) => r.met).length,
-      totalConditions: conditionResults.length,
-    });
+    const bundle = await this.bundles.getBundle(alert.ticker);
+    const features = extractFeatures(bundle);
+    const batch = new AlertBatch([compileAlert(alert.conditions, alert.logic)], [0]);
+    const triggered = batch.evaluate(features)[0] === 1;
+    return this.toEvaluation(triggered, batch.outcomes(0, alert.conditions, features));
+  }
 
+  private toEvaluation(triggered: boolean, conditions: ConditionOutcome[]): AlertEvaluation {
+    const metCount = conditions.filter((c) => c.met).length;
     return {
       triggered,
-      conditions: conditionResults,
-      message,
+      conditions,
+      message: triggered
+        ? `Alert triggered: ${metCount}/${conditions.length} conditions met`
+        : `Alert not triggered: ${metCount}/${conditions.length} conditions met`,
     };
   }
 
   /**
-   * Évaluer une condition individuelle
+   * Nombre d'alertes actives par ticker (priorité du préchauffage)
    */
-  private async evaluateCondition(
-    condition: AlertCondition,
-    ticker: string,
-    dataIndex: Record<string, any>
-  ): Promise<boolean> {
-    const value = this.extractValue(condition, ticker, dataIndex);
-    const threshold = typeof condition.value === 'number' ? condition.value : 0;
-
-    switch (condition.operator) {
-      case 'gt':
-        return value > threshold;
-      case 'gte':
-        return value >= threshold;
-      case 'lt':
-        return value < threshold;
-      case 'lte':
-        return value <= threshold;
-      case 'eq':
-        return value === condition.value;
-      case 'neq':
-        return value !== condition.value;
-      default:
-        return false;
-    }
+  async getActiveTickerCounts(): Promise<Map<string, number>> {
+    const byTicker = await this.repository.findActiveByTicker();
+    return new Map(Array.from(byTicker, ([ticker, group]) => [ticker, group.length]));
   }
 
   /**
-   * Extraire la valeur d'un signal
+   * Vérifier toutes les alertes actives (job planifié alerts-check)
+   * Un bundle par ticker (parallèle borné) réduit en vecteur de features, puis toutes
+   * les alertes compilées sont évaluées en un seul lot. Une alerte ne se déclenche qu'au
+   * passage de ses conditions de faux à vrai (pas à chaque cycle tant qu'elles restent vraies).
    */
-  private extractValue(
-    condition: AlertCondition,
-    ticker: string,
-    dataIndex: Record<string, any>
-  ): number {
-    const log = logger.child({ signal: condition.signal, operation: 'extractValue' });
-    
-    try {
-      switch (condition.signal) {
-        case 'options_flow': {
-          const optionsFlow = dataIndex.optionsFlow || [];
-          if (Array.isArray(optionsFlow)) {
-            const callVolume = optionsFlow.reduce(
-              (sum: number, f: any) => sum + (f.call_volume || 0),
-              0
-            );
-            const putVolume = optionsFlow.reduce(
-              (sum: number, f: any) => sum + (f.put_volume || 0),
-              0
-            );
-            return condition.params?.type === 'put' ? putVolume : callVolume;
-          }
-          return 0;
-        }
-        case 'insider_activity': {
-          const insiders = dataIndex.insiders || [];
-          if (Array.isArray(insiders)) {
-            const recentBuys = insiders.filter(
-              (i: any) =>
-                i.transaction_code === 'P' &&
-                new Date(i.filing_date) >
-                  new Date(Date.now() - 7 * 24 * 60 * 60 * 1000)
-            );
-            return recentBuys.length;
-          }
-          return 0;
-        }
-        case 'dark_pool': {
-          const darkPool = dataIndex.darkPool || [];
-          if (Array.isArray(darkPool)) {
-            return darkPool.reduce(
-              (sum: number, t: any) => sum + (t.volume || 0),
-              0
-            );
-          }
-          return 0;
-        }
-        case 'short_interest': {
-          const shortInterest = dataIndex.shortInterest || [];
-          if (Array.isArray(shortInterest) && shortInterest[0]) {
-            return shortInterest[0].percent_returned || 0;
-          }
-          return 0;
-        }
-        default:
-          log.warn('Unknown signal type', { signal: condition.signal });
-          return 0;
-      }
-    } catch (error) {
-      log.error('Error extracting value', { error, signal: condition.signal });
-      return 0;
-    }
-  }
-
-  /**
-   * Vérifier toutes les alertes actives
-   * À appeler par un Lambda scheduled
-   */
-  async checkAllAlerts(): Promise<void> {
+  async checkAllAlerts(): Promise<{ tickers: number; alerts: number; triggered: number }> {
     const log = logger.child({ operation: 'checkAllAlerts' });
     log.info('Checking all active alerts');
 
-    const activeAlerts = Array.from(userAlerts.values()).filter(
-      (a) => a.active && a.ticker
-    );
-
-    log.info('Active alerts found', { count: activeAlerts.length });
+    const byTicker = await this.repository.findActiveByTicker();
+    const tickers = Array.from(byTicker.keys());
+    const entries: ActiveAlert[] = [];
+    const tickerIndexes: number[] = [];
+    tickers.forEach((ticker, index) => {
+      for (const entry of byTicker.get(ticker)!) {
+        entries.push(entry);
+        tickerIndexes.push(index);
+      }
+    });
+    log.info('Active alerts found', { count: entries.length, tickers: tickers.length });
 
-    for (const alert of activeAlerts) {
+    // Matrice tickers x features ; les tickers sans bundle sont exclus du lot
+    const features = new Float64Array(tickers.length * FEATURE_COUNT);
+    const loaded = new Uint8Array(tickers.length);
+    const now = Date.now();
+    await mapWithConcurrency(tickers, TICKER_CONCURRENCY, async (ticker, index) => {
       try {
-        const result = await this.evaluateAlertConditions(alert);
-        if (result.triggered) {
-          await this.triggerAlert(alert, result);
-        }
-        alert.lastChecked = new Date();
-        userAlerts.set(alert.id, alert);
+        const bundle = await this.bundles.getBundle(ticker);
+        extractFeatures(bundle, features, index * FEATURE_COUNT, now);
+        loaded[index] = 1;
       } catch (error) {
-        log.error('Error checking alert', { alertId: alert.id, error });
+        log.error('Error loading bundle for alerts', { ticker, error });
+      }
+    });
+
+    const evaluable: ActiveAlert[] = [];
+    const rows: number[] = [];
+    entries.forEach((entry, i) => {
+      if (loaded[tickerIndexes[i]]) {
+        evaluable.push(entry);
+        rows.push(tickerIndexes[i]);
+      }
+    });
+
+    const evalStart = Date.now();
+    const batch = new AlertBatch(
+      evaluable.map(({ alert, compiled }) =>
+        compiled?.version === 1 ? compiled : compileAlert(alert.conditions, alert.logic)
+      ),
+      rows
+    );
+    const triggered = batch.evaluate(features);
+    log.debug('Alert batch evaluated', { alerts: batch.size, durationMs: Date.now() - evalStart });
+
+    const triggers: AlertTrigger[] = [];
+    const cleared: string[] = [];
+    for (let i = 0; i < batch.size; i++) {
+      const { alert, conditionMet } = evaluable[i];
+      if (triggered[i] && !conditionMet) {
+        const outcomes = batch.outcomes(i, alert.conditions, features);
+        triggers.push(this.buildTrigger(alert, this.toEvaluation(true, outcomes)));
+      } else if (!triggered[i] && conditionMet) {
+        cleared.push(alert.id);
       }
     }
+
+    await this.repository.insertTriggers(triggers);
+    await this.repository.setConditionMet(triggers.map((t) => t.alertId), true);
+    await this.repository.setConditionMet(cleared, false);
+    await this.repository.markChecked(evaluable.map((e) => e.alert.id), new Date());
+
+    for (const trigger of triggers) {
+      // TODO: Envoyer les notifications via les canaux configurés
+      log.info('Alert triggered', { alertId: trigger.alertId, triggerId: trigger.id, ticker: trigger.ticker });
+    }
+
+    log.info('Alerts checked', { tickers: tickers.length, alerts: entries.length, triggered: triggers.length });
+    return { tickers: tickers.length, alerts: entries.length, triggered: triggers.length };
   }
 
   /**
-   * Déclencher une alerte
+   * Construire le déclenchement d'une alerte
    */
-  private async triggerAlert(
-    alert: Alert,
-    evaluation: {
-      triggered: boolean;
-      conditions: Array<{
-        condition: AlertCondition;
-        met: boolean;
-        value: any;
-      }>;
-      message?: string;
-    }
-  ): Promise<void> {
-    const log = logger.child({ alertId: alert.id, operation: 'triggerAlert' });
-    log.info('Triggering alert', { ticker: alert.ticker });
-
-    const trigger: AlertTrigger = {
+  private buildTrigger(alert: Alert, evaluation: AlertEvaluation): AlertTrigger {
+    return {
       id: uuidv4(),
       alertId: alert.id,
       ticker: alert.ticker,
@@ -482,19 +369,5 @@ export class AlertService {
         .map((c) => c.condition),
       read: false,
     };
-
-    const existingTriggers = alertTriggers.get(alert.id) || [];
-    alertTriggers.set(alert.id, [...existingTriggers, trigger]);
-
-    alert.lastTriggered = new Date();
-    userAlerts.set(alert.id, alert);
-
-    // TODO: Envoyer les notifications via les canaux configurés
-    log.info('Alert triggered', {
-      alertId: alert.id,
-      triggerId: trigger.id,
-      channels: alert.notificationChannels,
-    });
   }
 }
-
@@ -7,6 +7,15 @@ import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as fmp from '../fmp';
 import * as uw from '../unusual-whales';
+import {
+  ResponseCacheService,
+  failedSources,
+  type ComputeContext,
+  type ResponseCachePolicy,
+} from './response-cache.service';
+import { columnarRow } from '../repositories/fmp.repository';
+import type { ApiResponse } from '../types/ticker.types';
+import type { ColumnarRecords, StatementProjectionTypes } from '../types/fmp/financial-statements';
 import type {
   CompleteAnalysis,
   CompleteAnalysisResponse,
@@ -22,132 +31,55 @@ import type {
   ComprehensiveValuationResponse,
 } from '../types/combined-analysis';
 
+type ProjectionResponse<E extends keyof StatementProjectionTypes, F extends keyof StatementProjectionTypes[E]> =
+  ApiResponse<ColumnarRecords<StatementProjectionTypes[E], F>>;
+
+// Politiques de cache : incrémenter la version quand la forme ou le calcul de la réponse change
+const COMPLETE_ANALYSIS_CACHE: ResponseCachePolicy = {
+  endpoint: 'complete-analysis',
+  version: 'v2',
+  inputs: ['quote', 'statements', 'options_flow', 'dark_pool', 'short_interest', 'institutional', 'insider'],
+};
+
+// Champs FMP déclarés pour l'analyse fondamentale
+const INCOME_FIELDS = ['date', 'revenue', 'netIncome'] as const;
+const RATIO_FIELDS = ['date', 'priceToEarningsRatio', 'debtToEquityRatio', 'currentRatio'] as const;
+const KEY_METRIC_FIELDS = ['date', 'returnOnEquity'] as const;
+const CASH_FLOW_FIELDS = ['date', 'operatingCashFlow'] as const;
+
+const DIVERGENCE_ANALYSIS_CACHE: ResponseCachePolicy = {
+  ...COMPLETE_ANALYSIS_CACHE,
+  endpoint: 'divergence-analysis',
+};
+
+const COMPREHENSIVE_VALUATION_CACHE: ResponseCachePolicy = {
+  endpoint: 'comprehensive-valuation',
+  version: 'v1',
+  inputs: ['valuation', 'quote', 'options_flow', 'institutional', 'short_interest'],
+};
+
 export class CombinedAnalysisService {
+  private responseCache: ResponseCacheService;
+
+  constructor() {
+    this.responseCache = new ResponseCacheService();
+  }
+
   /**
    * Analyse complète : Combine fundamentals (FMP) + sentiment (UW)
    */
   async getCompleteAnalysis(ticker: string): Promise<CompleteAnalysisResponse> {
     return handleError(async () => {
       const upperTicker = ticker.toUpperCase();
-      const log = logger.child({ ticker: upperTicker, operation: 'getCompleteAnalysis' });
-      log.info('Getting complete analysis');
-
-      // Récupération parallèle des données FMP (fundamentals)
-      const [
-        fmpQuote,
-        fmpIncomeStatement,
-        fmpRatios,
-        fmpKeyMetrics,
-        fmpBalanceSheet,
-        fmpCashFlow,
-      ] = await Promise.allSettled([
-        fmp.getFMPStockQuote(upperTicker),
-        fmp.getFMPIncomeStatement({ symbol: upperTicker, limit: 5 }),
-        fmp.getFMPFinancialRatios({ symbol: upperTicker, limit: 5 }),
-        fmp.getFMPKeyMetrics({ symbol: upperTicker, limit: 5 }),
-        fmp.getFMPBalanceSheetStatement({ symbol: upperTicker, limit: 1 }),
-        fmp.getFMPCashFlowStatement({ symbol: upperTicker, limit: 1 }),
-      ]);
-
-      log.info('FMP fundamentals data fetched', {
-        quote: fmpQuote.status,
-        incomeStatement: fmpIncomeStatement.status,
-        ratios: fmpRatios.status,
-        keyMetrics: fmpKeyMetrics.status,
-        balanceSheet: fmpBalanceSheet.status,
-        cashFlow: fmpCashFlow.status,
-      });
-
-      // Récupération parallèle des données UW (sentiment)
-      const [
-        uwOptionsFlow,
-        uwDarkPool,
-        uwShortInterest,
-        uwInstitutionalOwnership,
-        uwInsiderTrades,
-      ] = await Promise.allSettled([
-        uw.getUWRecentFlows(upperTicker, { min_premium: 50000 }),
-        uw.getUWDarkPoolTrades(upperTicker, { limit: 50 }),
-        uw.getUWShortInterestAndFloat(upperTicker),
-        uw.getUWInstitutionOwnership(upperTicker),
-        uw.getUWStockInsiderBuySells(upperTicker, {}),
-      ]);
-
-      log.info('UW sentiment data fetched', {
-        optionsFlow: uwOptionsFlow.status,
-        darkPool: uwDarkPool.status,
-        shortInterest: uwShortInterest.status,
-        institutionalOwnership: uwInstitutionalOwnership.status,
-        insiderTrades: uwInsiderTrades.status,
-      });
-
-      // Analyser les fundamentals
-      const fundamental = this.analyzeFundamentals(
-        fmpQuote,
-        fmpIncomeStatement,
-        fmpRatios,
-        fmpKeyMetrics,
-        fmpBalanceSheet,
-        fmpCashFlow
-      );
-
-      log.info('Fundamental analysis complete', {
-        score: fundamental.score,
-        hasData: !!fundamental.details,
-      });
-
-      // Analyser le sentiment
-      const sentiment = this.analyzeSentiment(
-        uwOptionsFlow,
-        uwDarkPool,
-        uwShortInterest,
-        uwInstitutionalOwnership,
-        uwInsiderTrades
+      const result = await this.responseCache.getOrCompute(COMPLETE_ANALYSIS_CACHE, upperTicker, (context) =>
+        this.computeCompleteAnalysis(upperTicker, context)
       );
 
-      log.info('Sentiment analysis complete', {
-        score: sentiment.score,
-        bullishOptions: sentiment.bullishOptions,
-        darkPoolActivity: sentiment.darkPoolActivity,
-      });
-
-      // Analyser la convergence
-      const convergence = this.analyzeConvergence(fundamental, sentiment);
-
-      log.info('Convergence analysis complete', {
-        aligned: convergence.aligned,
-        divergence: convergence.divergence,
-        type: convergence.type,
-        opportunity: convergence.opportunity,
-      });
-
-      // Générer la recommandation
-      const recommendation = this.generateRecommendation(fundamental, sentiment, convergence);
-
-      // Calculer la confiance
-      const confidence = this.calculateConfidence(fundamental, sentiment);
-
-      log.info('Complete analysis finished', {
-        recommendation,
-        confidence,
-        fundamentalScore: fundamental.score,
-        sentimentScore: sentiment.score,
-      });
-
-      const analysis: CompleteAnalysis = {
-        ticker: upperTicker,
-        fundamental,
-        sentiment,
-        convergence,
-        recommendation,
-        confidence,
-      };
-
       return {
         success: true,
-        data: analysis,
-        cached: false,
-        timestamp: new Date().toISOString(),
+        data: result.data,
+        cached: result.cached,
+        timestamp: result.computedAt,
       };
     }, `Get complete analysis for ${ticker}`);
   }
@@ -158,45 +90,15 @@ export class CombinedAnalysisService {
   async getDivergenceAnalysis(ticker: string): Promise<DivergenceAnalysisResponse> {
     return handleError(async () => {
       const upperTicker = ticker.toUpperCase();
-      const log = logger.child({ ticker: upperTicker, operation: 'getDivergenceAnalysis' });
-      log.info('Getting divergence analysis');
-
-      // Récupérer l'analyse complète
-      const completeAnalysis = await this.getCompleteAnalysis(upperTicker);
-
-      if (!completeAnalysis.success || !completeAnalysis.data) {
-        log.error('Failed to get complete analysis for divergence');
-        throw new Error('Failed to get complete analysis');
-      }
-
-      const fundamentalScore = completeAnalysis.data.fundamental.score;
-      const sentimentScore = completeAnalysis.data.sentiment.score;
-      const divergence = fundamentalScore - sentimentScore;
-
-      // Déterminer le type de divergence
-      const type = this.determineDivergenceType(fundamentalScore, sentimentScore);
-
-      // Analyser l'opportunité
-      const opportunity = this.analyzeOpportunity(divergence, type);
-
-      const analysis: DivergenceAnalysis = {
-        ticker: upperTicker,
-        fundamentalScore,
-        sentimentScore,
-        divergence,
-        type,
-        opportunity,
-        signals: {
-          fundamental: this.extractFundamentalSignals(completeAnalysis.data.fundamental),
-          sentiment: this.extractSentimentSignals(completeAnalysis.data.sentiment),
-        },
-      };
+      const result = await this.responseCache.getOrCompute(DIVERGENCE_ANALYSIS_CACHE, upperTicker, (context) =>
+        this.computeDivergenceAnalysis(upperTicker, context)
+      );
 
       return {
         success: true,
-        data: analysis,
-        cached: false,
-        timestamp: new Date().toISOString(),
+        data: result.data,
+        cached: result.cached,
+        timestamp: result.computedAt,
       };
     }, `Get divergence analysis for ${ticker}`);
   }
@@ -207,171 +109,353 @@ export class CombinedAnalysisService {
   async getComprehensiveValuation(ticker: string): Promise<ComprehensiveValuationResponse> {
     return handleError(async () => {
       const upperTicker = ticker.toUpperCase();
-      const log = logger.child({ ticker: upperTicker, operation: 'getComprehensiveValuation' });
-      log.info('Getting comprehensive valuation');
-
-      // Récupération des valuations FMP
-      const [dcf, leveredDcf, quote] = await Promise.allSettled([
-        fmp.getFMPDCFValuation(upperTicker),
-        fmp.getFMPLeveredDCF(upperTicker),
-        fmp.getFMPStockQuote(upperTicker),
-      ]);
-
-      log.info('FMP data fetched', {
-        dcfStatus: dcf.status,
-        leveredDcfStatus: leveredDcf.status,
-        quoteStatus: quote.status,
-      });
+      const result = await this.responseCache.getOrCompute(COMPREHENSIVE_VALUATION_CACHE, upperTicker, (context) =>
+        this.computeComprehensiveValuation(upperTicker, context)
+      );
 
-      // Récupération du sentiment pour le multiplier
-      const [optionsFlow, institutionalOwnership, shortInterest] = await Promise.allSettled([
-        uw.getUWRecentFlows(upperTicker, { min_premium: 100000 }),
-        uw.getUWInstitutionOwnership(upperTicker),
-        uw.getUWShortInterestAndFloat(upperTicker),
-      ]);
-
-      log.info('UW sentiment data fetched', {
-        optionsFlowStatus: optionsFlow.status,
-        institutionalOwnershipStatus: institutionalOwnership.status,
-        shortInterestStatus: shortInterest.status,
-      });
+      return {
+        success: true,
+        data: result.data,
+        cached: result.cached,
+        timestamp: result.computedAt,
+      };
+    }, `Get comprehensive valuation for ${ticker}`);
+  }
 
-      // Extraire les valeurs DCF
-      const dcfData = dcf.status === 'fulfilled' && dcf.value?.success
-        ? (Array.isArray(dcf.value.data) ? dcf.value.data[0] : dcf.value.data)
-        : null;
-      const leveredDcfData = leveredDcf.status === 'fulfilled' && leveredDcf.value?.success
-        ? (Array.isArray(leveredDcf.value.data) ? leveredDcf.value.data[0] : leveredDcf.value.data)
-        : null;
-      
-      const dcfValue = dcfData?.dcf || dcfData?.['Stock Price'] || 0;
-      const leveredDcfValue = leveredDcfData?.dcf || leveredDcfData?.['Stock Price'] || 0;
+  // ========== Calculs (sans cache) ==========
+
+  private async computeCompleteAnalysis(upperTicker: string, context: ComputeContext): Promise<CompleteAnalysis> {
+    const log = logger.child({ ticker: upperTicker, operation: 'getCompleteAnalysis' });
+    log.info('Getting complete analysis');
+
+    // Récupération parallèle des données FMP (fundamentals)
+    // Seuls les champs utilisés par analyzeFundamentals sont conservés (format colonnes)
+    const [
+      fmpQuote,
+      fmpIncomeStatement,
+      fmpRatios,
+      fmpKeyMetrics,
+      fmpCashFlow,
+    ] = await Promise.allSettled([
+      fmp.getFMPStockQuote(upperTicker),
+      fmp.getFMPStatementProjection('income-statement', { symbol: upperTicker, limit: 2 }, INCOME_FIELDS),
+      fmp.getFMPStatementProjection('ratios', { symbol: upperTicker, limit: 1 }, RATIO_FIELDS),
+      fmp.getFMPStatementProjection('key-metrics', { symbol: upperTicker, limit: 1 }, KEY_METRIC_FIELDS),
+      fmp.getFMPStatementProjection('cash-flow-statement', { symbol: upperTicker, limit: 1 }, CASH_FLOW_FIELDS),
+    ]);
+
+    log.info('FMP fundamentals data fetched', {
+      quote: fmpQuote.status,
+      incomeStatement: fmpIncomeStatement.status,
+      ratios: fmpRatios.status,
+      keyMetrics: fmpKeyMetrics.status,
+      cashFlow: fmpCashFlow.status,
+    });
 
-      log.info('DCF values extracted', {
-        dcfValue,
-        leveredDcfValue,
-        dcfDataExists: !!dcfData,
-        leveredDcfDataExists: !!leveredDcfData,
-      });
+    // Récupération parallèle des données UW (sentiment)
+    const [
+      uwOptionsFlow,
+      uwDarkPool,
+      uwShortInterest,
+      uwInstitutionalOwnership,
+      uwInsiderTrades,
+    ] = await Promise.allSettled([
+      uw.getUWRecentFlows(upperTicker, { min_premium: 50000 }),
+      uw.getUWDarkPoolTrades(upperTicker, { limit: 50 }),
+      uw.getUWShortInterestAndFloat(upperTicker),
+      uw.getUWInstitutionOwnership(upperTicker),
+      uw.getUWStockInsiderBuySells(upperTicker, {}),
+    ]);
+
+    log.info('UW sentiment data fetched', {
+      optionsFlow: uwOptionsFlow.status,
+      darkPool: uwDarkPool.status,
+      shortInterest: uwShortInterest.status,
+      institutionalOwnership: uwInstitutionalOwnership.status,
+      insiderTrades: uwInsiderTrades.status,
+    });
 
-      // Extraire le prix actuel - getStockQuote retourne un tableau
-      let currentPrice = 0;
-      if (quote.status === 'fulfilled' && quote.value?.success && quote.value.data) {
-        const quoteData = Array.isArray(quote.value.data) ? quote.value.data[0] : quote.value.data;
-        currentPrice = quoteData?.price || 0;
-        
-        if (currentPrice === 0) {
-          log.warn('Current price is 0, trying alternative sources', {
-            quoteData,
-            hasPrice: !!quoteData?.price,
-            hasClose: !!quoteData?.close,
-            hasLastPrice: !!quoteData?.lastPrice,
-          });
-          // Essayer d'autres champs possibles
-          currentPrice = quoteData?.close || quoteData?.lastPrice || quoteData?.currentPrice || 0;
-        }
-      } else {
-        log.warn('Failed to fetch quote or quote data is missing', {
-          quoteStatus: quote.status,
-          quoteValue: quote.status === 'fulfilled' ? {
-            success: quote.value?.success,
-            hasData: !!quote.value?.data,
-          } : { reason: quote.reason },
-        });
-      }
+    context.degrade(
+      ...failedSources({
+        fmpQuote,
+        fmpIncomeStatement,
+        fmpRatios,
+        fmpKeyMetrics,
+        fmpCashFlow,
+        uwOptionsFlow,
+        uwDarkPool,
+        uwShortInterest,
+        uwInstitutionalOwnership,
+        uwInsiderTrades,
+      })
+    );
+
+    // Analyser les fundamentals
+    const fundamental = this.analyzeFundamentals(
+      fmpQuote,
+      fmpIncomeStatement,
+      fmpRatios,
+      fmpKeyMetrics,
+      fmpCashFlow
+    );
 
-      log.info('Current price extracted', { currentPrice });
+    log.info('Fundamental analysis complete', {
+      score: fundamental.score,
+      hasData: !!fundamental.details,
+    });
 
-      // Calculer le sentiment multiplier (0.8 - 1.2)
-      const sentimentMultiplier = this.calculateSentimentMultiplier(
-        optionsFlow,
-        institutionalOwnership,
-        shortInterest
-      );
+    // Analyser le sentiment
+    const sentiment = this.analyzeSentiment(
+      uwOptionsFlow,
+      uwDarkPool,
+      uwShortInterest,
+      uwInstitutionalOwnership,
+      uwInsiderTrades
+    );
 
-      log.info('Sentiment multiplier calculated', { sentimentMultiplier });
+    log.info('Sentiment analysis complete', {
+      score: sentiment.score,
+      bullishOptions: sentiment.bullishOptions,
+      darkPoolActivity: sentiment.darkPoolActivity,
+    });
 
-      // Valeur fondamentale moyenne
-      const fundamentalValue = dcfValue > 0 && leveredDcfValue > 0
-        ? (dcfValue + leveredDcfValue) / 2
-        : dcfValue || leveredDcfValue;
+    // Analyser la convergence
+    const convergence = this.analyzeConvergence(fundamental, sentiment);
 
-      if (fundamentalValue === 0) {
-        log.warn('Fundamental value is 0, cannot calculate valuation', {
-          dcfValue,
-          leveredDcfValue,
-        });
-      }
+    log.info('Convergence analysis complete', {
+      aligned: convergence.aligned,
+      divergence: convergence.divergence,
+      type: convergence.type,
+      opportunity: convergence.opportunity,
+    });
 
-      // Valeur ajustée par sentiment
-      const adjustedValue = fundamentalValue * sentimentMultiplier;
+    // Générer la recommandation
+    const recommendation = this.generateRecommendation(fundamental, sentiment, convergence);
 
-      // Calculer l'upside
-      let upside = 0;
-      if (currentPrice > 0 && adjustedValue > 0) {
-        upside = ((adjustedValue - currentPrice) / currentPrice) * 100;
-      } else {
-        log.warn('Cannot calculate upside', {
-          currentPrice,
-          adjustedValue,
-          reason: currentPrice === 0 ? 'currentPrice is 0' : 'adjustedValue is 0',
+    // Calculer la confiance
+    const confidence = this.calculateConfidence(fundamental, sentiment);
+
+    log.info('Complete analysis finished', {
+      recommendation,
+      confidence,
+      fundamentalScore: fundamental.score,
+      sentimentScore: sentiment.score,
+    });
+
+    const analysis: CompleteAnalysis = {
+      ticker: upperTicker,
+      fundamental,
+      sentiment,
+      convergence,
+      recommendation,
+      confidence,
+    };
+
+    return analysis;
+  }
+
+  private async computeDivergenceAnalysis(upperTicker: string, context: ComputeContext): Promise<DivergenceAnalysis> {
+    const log = logger.child({ ticker: upperTicker, operation: 'getDivergenceAnalysis' });
+    log.info('Getting divergence analysis');
+
+    // Récupérer l'analyse complète (servie depuis le cache si disponible)
+    const completeAnalysis = await this.responseCache.getOrCompute(COMPLETE_ANALYSIS_CACHE, upperTicker, (completeContext) =>
+      this.computeCompleteAnalysis(upperTicker, completeContext)
+    );
+    context.degrade(...(completeAnalysis.degraded || []));
+
+    if (!completeAnalysis.data) {
+      log.error('Failed to get complete analysis for divergence');
+      throw new Error('Failed to get complete analysis');
+    }
+
+    const fundamentalScore = completeAnalysis.data.fundamental.score;
+    const sentimentScore = completeAnalysis.data.sentiment.score;
+    const divergence = fundamentalScore - sentimentScore;
+
+    // Déterminer le type de divergence
+    const type = this.determineDivergenceType(fundamentalScore, sentimentScore);
+
+    // Analyser l'opportunité
+    const opportunity = this.analyzeOpportunity(divergence, type);
+
+    const analysis: DivergenceAnalysis = {
+      ticker: upperTicker,
+      fundamentalScore,
+      sentimentScore,
+      divergence,
+      type,
+      opportunity,
+      signals: {
+        fundamental: this.extractFundamentalSignals(completeAnalysis.data.fundamental),
+        sentiment: this.extractSentimentSignals(completeAnalysis.data.sentiment),
+      },
+    };
+
+    return analysis;
+  }
+
+  private async computeComprehensiveValuation(upperTicker: string, context: ComputeContext): Promise<ComprehensiveValuation> {
+    const log = logger.child({ ticker: upperTicker, operation: 'getComprehensiveValuation' });
+    log.info('Getting comprehensive valuation');
+
+    // Récupération des valuations FMP
+    const [dcf, leveredDcf, quote] = await Promise.allSettled([
+      fmp.getFMPDCFValuation(upperTicker),
+      fmp.getFMPLeveredDCF(upperTicker),
+      fmp.getFMPStockQuote(upperTicker),
+    ]);
+
+    log.info('FMP data fetched', {
+      dcfStatus: dcf.status,
+      leveredDcfStatus: leveredDcf.status,
+      quoteStatus: quote.status,
+    });
+
+    // Récupération du sentiment pour le multiplier
+    const [optionsFlow, institutionalOwnership, shortInterest] = await Promise.allSettled([
+      uw.getUWRecentFlows(upperTicker, { min_premium: 100000 }),
+      uw.getUWInstitutionOwnership(upperTicker),
+      uw.getUWShortInterestAndFloat(upperTicker),
+    ]);
+
+    log.info('UW sentiment data fetched', {
+      optionsFlowStatus: optionsFlow.status,
+      institutionalOwnershipStatus: institutionalOwnership.status,
+      shortInterestStatus: shortInterest.status,
+    });
+
+    context.degrade(...failedSources({ dcf, leveredDcf, quote, optionsFlow, institutionalOwnership, shortInterest }));
+
+    // Extraire les valeurs DCF
+    const dcfData = dcf.status === 'fulfilled' && dcf.value?.success
+      ? (Array.isArray(dcf.value.data) ? dcf.value.data[0] : dcf.value.data)
+      : null;
+    const leveredDcfData = leveredDcf.status === 'fulfilled' && leveredDcf.value?.success
+      ? (Array.isArray(leveredDcf.value.data) ? leveredDcf.value.data[0] : leveredDcf.value.data)
+      : null;
+    
+    const dcfValue = dcfData?.dcf || dcfData?.['Stock Price'] || 0;
+    const leveredDcfValue = leveredDcfData?.dcf || leveredDcfData?.['Stock Price'] || 0;
+
+    log.info('DCF values extracted', {
+      dcfValue,
+      leveredDcfValue,
+      dcfDataExists: !!dcfData,
+      leveredDcfDataExists: !!leveredDcfData,
+    });
+
+    // Extraire le prix actuel - getStockQuote retourne un tableau
+    let currentPrice = 0;
+    if (quote.status === 'fulfilled' && quote.value?.success && quote.value.data) {
+      const quoteData = Array.isArray(quote.value.data) ? quote.value.data[0] : quote.value.data;
+      currentPrice = quoteData?.price || 0;
+      
+      if (currentPrice === 0) {
+        log.warn('Current price is 0, trying alternative sources', {
+          quoteData,
+          hasPrice: !!quoteData?.price,
+          hasClose: !!quoteData?.close,
+          hasLastPrice: !!quoteData?.lastPrice,
         });
+        // Essayer d'autres champs possibles
+        currentPrice = quoteData?.close || quoteData?.lastPrice || quoteData?.currentPrice || 0;
       }
-
-      log.info('Valuation calculated', {
-        fundamentalValue,
-        adjustedValue,
-        currentPrice,
-        upside,
+    } else {
+      log.warn('Failed to fetch quote or quote data is missing', {
+        quoteStatus: quote.status,
+        quoteValue: quote.status === 'fulfilled' ? {
+          success: quote.value?.success,
+          hasData: !!quote.value?.data,
+        } : { reason: quote.reason },
       });
+    }
+
+    log.info('Current price extracted', { currentPrice });
+
+    // Calculer le sentiment multiplier (0.8 - 1.2)
+    const sentimentMultiplier = this.calculateSentimentMultiplier(
+      optionsFlow,
+      institutionalOwnership,
+      shortInterest
+    );
 
-      // Générer la recommandation
-      const recommendation = this.generateValuationRecommendation(upside, adjustedValue, currentPrice);
+    log.info('Sentiment multiplier calculated', { sentimentMultiplier });
 
-      // Calculer la confiance
-      const confidence = this.calculateValuationConfidence(dcf, leveredDcf, optionsFlow);
+    // Valeur fondamentale moyenne
+    const fundamentalValue = dcfValue > 0 && leveredDcfValue > 0
+      ? (dcfValue + leveredDcfValue) / 2
+      : dcfValue || leveredDcfValue;
 
-      log.info('Valuation complete', {
-        recommendation,
-        confidence,
-        upside,
+    if (fundamentalValue === 0) {
+      log.warn('Fundamental value is 0, cannot calculate valuation', {
+        dcfValue,
+        leveredDcfValue,
       });
+    }
+
+    // Valeur ajustée par sentiment
+    const adjustedValue = fundamentalValue * sentimentMultiplier;
 
-      const valuation: ComprehensiveValuation = {
-        ticker: upperTicker,
+    // Calculer l'upside
+    let upside = 0;
+    if (currentPrice > 0 && adjustedValue > 0) {
+      upside = ((adjustedValue - currentPrice) / currentPrice) * 100;
+    } else {
+      log.warn('Cannot calculate upside', {
         currentPrice,
-        fundamentalValue,
-        leveredValue: leveredDcfValue,
-        sentimentMultiplier,
         adjustedValue,
-        upside,
-        recommendation,
-        confidence,
-        breakdown: {
-          dcf: dcfValue,
-          leveredDcf: leveredDcfValue,
-          sentimentAdjustment: (sentimentMultiplier - 1) * 100, // En %
-        },
-      };
+        reason: currentPrice === 0 ? 'currentPrice is 0' : 'adjustedValue is 0',
+      });
+    }
 
-      return {
-        success: true,
-        data: valuation,
-        cached: false,
-        timestamp: new Date().toISOString(),
-      };
-    }, `Get comprehensive valuation for ${ticker}`);
+    log.info('Valuation calculated', {
+      fundamentalValue,
+      adjustedValue,
+      currentPrice,
+      upside,
+    });
+
+    // Générer la recommandation
+    const recommendation = this.generateValuationRecommendation(upside, adjustedValue, currentPrice);
+
+    // Calculer la confiance
+    const confidence = this.calculateValuationConfidence(dcf, leveredDcf, optionsFlow);
+
+    log.info('Valuation complete', {
+      recommendation,
+      confidence,
+      upside,
+    });
+
+    const valuation: ComprehensiveValuation = {
+      ticker: upperTicker,
+      currentPrice,
+      fundamentalValue,
+      leveredValue: leveredDcfValue,
+      sentimentMultiplier,
+      adjustedValue,
+      upside,
+      recommendation,
+      confidence,
+      breakdown: {
+        dcf: dcfValue,
+        leveredDcf: leveredDcfValue,
+        sentimentAdjustment: (sentimentMultiplier - 1) * 100, // En %
+      },
+    };
+
+    return valuation;
   }
 
   // ========== Méthodes privées d'analyse ==========
 
   private analyzeFundamentals(
     quote: PromiseSettledResult<any>,
-    incomeStatement: PromiseSettledResult<any>,
-    ratios: PromiseSettledResult<any>,
-    keyMetrics: PromiseSettledResult<any>,
-    balanceSheet: PromiseSettledResult<any>,
-    cashFlow: PromiseSettledResult<any>
+    incomeStatement: PromiseSettledResult<ProjectionResponse<'income-statement', (typeof INCOME_FIELDS)[number]>>,
+    ratios: PromiseSettledResult<ProjectionResponse<'ratios', (typeof RATIO_FIELDS)[number]>>,
+    keyMetrics: PromiseSettledResult<ProjectionResponse<'key-metrics', (typeof KEY_METRIC_FIELDS)[number]>>,
+    cashFlow: PromiseSettledResult<ProjectionResponse<'cash-flow-statement', (typeof CASH_FLOW_FIELDS)[number]>>
   ): FundamentalAnalysis {
     const log = logger.child({ operation: 'analyzeFundamentals' });
     let score = 50; // Score de base
@@ -381,17 +465,15 @@ export class CombinedAnalysisService {
     // Analyser les ratios
     if (ratios.status === 'fulfilled' && ratios.value?.success && ratios.value.data?.length > 0) {
       dataAvailable = true;
-      const ratio = ratios.value.data[0];
-      details.peRatio = ratio.priceEarningsRatio;
-      details.debtToEquity = ratio.debtEquityRatio;
-      details.currentRatio = ratio.currentRatio;
-      details.returnOnEquity = ratio.returnOnEquity;
+      const ratio = columnarRow(ratios.value.data, 0)!;
+      details.peRatio = ratio.priceToEarningsRatio ?? undefined;
+      details.debtToEquity = ratio.debtToEquityRatio ?? undefined;
+      details.currentRatio = ratio.currentRatio ?? undefined;
 
       // Score basé sur les ratios
-      if (ratio.priceEarningsRatio && ratio.priceEarningsRatio < 20) score += 10;
-      if (ratio.debtEquityRatio && ratio.debtEquityRatio < 0.5) score += 10;
+      if (ratio.priceToEarningsRatio && ratio.priceToEarningsRatio < 20) score += 10;
+      if (ratio.debtToEquityRatio && ratio.debtToEquityRatio < 0.5) score += 10;
       if (ratio.currentRatio && ratio.currentRatio > 1.5) score += 10;
-      if (ratio.returnOnEquity && ratio.returnOnEquity > 0.15) score += 10;
     } else {
       log.warn('Ratios data not available for fundamental analysis', {
         status: ratios.status,
@@ -401,13 +483,20 @@ export class CombinedAnalysisService {
       });
     }
 
+    // Le ROE est publié dans les key metrics (absent de /ratios)
+    if (keyMetrics.status === 'fulfilled' && keyMetrics.value?.success && keyMetrics.value.data?.length > 0) {
+      const metrics = columnarRow(keyMetrics.value.data, 0)!;
+      details.returnOnEquity = metrics.returnOnEquity ?? undefined;
+      if (metrics.returnOnEquity && metrics.returnOnEquity > 0.15) score += 10;
+    }
+
     // Analyser les états financiers
     if (incomeStatement.status === 'fulfilled' && incomeStatement.value?.success && incomeStatement.value.data?.length > 0) {
       dataAvailable = true;
-      const current = incomeStatement.value.data[0];
-      const previous = incomeStatement.value.data[1];
+      const current = columnarRow(incomeStatement.value.data, 0);
+      const previous = columnarRow(incomeStatement.value.data, 1);
 
-      if (current && previous) {
+      if (current && previous && current.revenue !== null && previous.revenue) {
         details.revenueGrowth = ((current.revenue - previous.revenue) / previous.revenue) * 100;
         details.earningsGrowth = current.netIncome && previous.netIncome
           ? ((current.netIncome - previous.netIncome) / Math.abs(previous.netIncome)) * 100
@@ -433,7 +522,7 @@ export class CombinedAnalysisService {
     // Analyser le cash flow
     if (cashFlow.status === 'fulfilled' && cashFlow.value?.success && cashFlow.value.data?.length > 0) {
       dataAvailable = true;
-      const cf = cashFlow.value.data[0];
+      const cf = columnarRow(cashFlow.value.data, 0)!;
       if (cf.operatingCashFlow && cf.operatingCashFlow > 0) score += 10;
     } else {
       log.warn('Cash flow data not available', {
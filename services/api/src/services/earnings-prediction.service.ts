@@ -7,6 +7,7 @@ import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as fmp from '../fmp';
 import * as uw from '../unusual-whales';
+import { TimeSeriesService, sinceDays } from './time-series.service';
 import type {
   EarningsPrediction,
   EarningsPredictionResponse,
@@ -17,8 +18,14 @@ import type {
   AnalystSignal,
   HistoricalSignal,
 } from '../types/combined-analysis';
+import type { DarkPoolPoint, FlowAlertPoint } from '../types/time-series';
+
+// Activité pré-earnings : flows et prints des 7 derniers jours (store de séries temporelles)
+const PRE_EARNINGS_DAYS = 7;
 
 export class EarningsPredictionService {
+  private timeSeries = new TimeSeriesService();
+
   /**
    * Prédit les surprises d'earnings en combinant plusieurs sources
    */
@@ -46,9 +53,9 @@ export class EarningsPredictionService {
 
       // Récupération de l'activité pré-earnings (UW)
       const [optionsFlow, insiderTrades, darkPool] = await Promise.allSettled([
-        uw.getUWRecentFlows(upperTicker, { min_premium: 50000 }),
+        this.timeSeries.getFlowAlerts(upperTicker, sinceDays(PRE_EARNINGS_DAYS, { minPremium: 50000 })),
         uw.getUWStockInsiderBuySells(upperTicker, {}),
-        uw.getUWDarkPoolTrades(upperTicker, { limit: 100 }),
+        this.timeSeries.getDarkPoolPrints(upperTicker, sinceDays(PRE_EARNINGS_DAYS, { limit: 100 })),
       ]);
 
       log.info('UW pre-earnings data fetched', {
@@ -113,8 +120,8 @@ export class EarningsPredictionService {
 
   // ========== Méthodes privées d'analyse ==========
 
-  private analyzeOptionsFlow(optionsFlow: PromiseSettledResult<any>): OptionsSignal {
-    if (optionsFlow.status !== 'fulfilled' || !optionsFlow.value?.success || !optionsFlow.value.data) {
+  private analyzeOptionsFlow(optionsFlow: PromiseSettledResult<FlowAlertPoint[]>): OptionsSignal {
+    if (optionsFlow.status !== 'fulfilled') {
       return {
         score: 50,
         callVolume: 0,
@@ -125,17 +132,13 @@ export class EarningsPredictionService {
       };
     }
 
-    const flows = Array.isArray(optionsFlow.value.data) ? optionsFlow.value.data : [];
-    const calls = flows.filter((f: any) => f.is_call && (f.premium > 0 || f.volume > 0));
-    const puts = flows.filter((f: any) => f.is_put && (f.premium > 0 || f.volume > 0));
+    const flows = optionsFlow.value;
+    const calls = flows.filter((f) => f.isCall && (f.premium > 0 || f.volume > 0));
+    const puts = flows.filter((f) => !f.isCall && (f.premium > 0 || f.volume > 0));
     
-    // Calculer le volume en utilisant plusieurs champs possibles
-    const callVolume = calls.reduce((sum: number, c: any) => 
-      sum + (c.volume || c.size || c.contracts || 0), 0
-    );
-    const putVolume = puts.reduce((sum: number, p: any) => 
-      sum + (p.volume || p.size || p.contracts || 0), 0
-    );
+    // Volume de l'alerte, sinon taille des trades
+    const callVolume = calls.reduce((sum, c) => sum + (c.volume || c.size), 0);
+    const putVolume = puts.reduce((sum, p) => sum + (p.volume || p.size), 0);
     
     // Calculer le ratio basé sur le nombre de trades si les volumes sont à 0
     const callPutRatio = putVolume > 0 
@@ -148,14 +151,12 @@ export class EarningsPredictionService {
       ? 0.5
       : 1;
     
-    // Détecter l'activité inhabituelle (sweeps, blocks, floors, ou premium élevé)
-    const unusualActivity = flows.filter((f: any) => 
-      f.is_sweep || 
-      f.is_block || 
-      f.is_floor || 
-      (f.premium && f.premium > 100000) ||
-      (f.size && f.size > 1000) ||
-      (f.volume && f.volume > 1000)
+    // Détecter l'activité inhabituelle (sweeps ou premium / taille élevés)
+    const unusualActivity = flows.filter((f) =>
+      f.isSweep ||
+      f.premium > 100000 ||
+      f.size > 1000 ||
+      f.volume > 1000
     ).length;
 
     let score = 50;
@@ -250,8 +251,8 @@ export class EarningsPredictionService {
     };
   }
 
-  private analyzeDarkPool(darkPool: PromiseSettledResult<any>): DarkPoolSignal {
-    if (darkPool.status !== 'fulfilled' || !darkPool.value?.success || !darkPool.value.data) {
+  private analyzeDarkPool(darkPool: PromiseSettledResult<DarkPoolPoint[]>): DarkPoolSignal {
+    if (darkPool.status !== 'fulfilled') {
       return {
         score: 50,
         trades: 0,
@@ -260,8 +261,8 @@ export class EarningsPredictionService {
       };
     }
 
-    const trades = Array.isArray(darkPool.value.data) ? darkPool.value.data : [];
-    const totalVolume = trades.reduce((sum: number, t: any) => sum + (t.volume || 0), 0);
+    const trades = darkPool.value;
+    const totalVolume = trades.reduce((sum, t) => sum + t.size, 0);
 
     let score = 50;
     if (trades.length > 20) score += 15;
@@ -5,16 +5,20 @@
 
 import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
-import * as uw from '../unusual-whales';
 import { GraphService } from './graph.service';
+import { TimeSeriesService, sinceDays } from './time-series.service';
 import type {
   FlowAttributionRequest,
   FlowSignature,
   FlowSignatureMatch,
 } from '../types/attribution';
 
+// Profondeur de l'historique des flows utilisé pour la signature
+const HISTORY_DAYS = 90;
+
 export class FlowSignatureService {
   private graphService: GraphService;
+  private timeSeries = new TimeSeriesService();
 
   constructor() {
     this.graphService = new GraphService();
@@ -93,9 +97,9 @@ export class FlowSignatureService {
     // Pour l'instant, on récupère tous les flows et on les analyse
     // En production, le graphe devrait avoir des relations Flow -> ATTRIBUTED_TO -> Institution
 
-    // Récupérer aussi depuis UW (flows récents)
-    const uwResult = await Promise.allSettled([
-      uw.getUWRecentFlows(ticker, {}),
+    // Historique des flow alerts UW (store de séries temporelles)
+    const storeResult = await Promise.allSettled([
+      this.timeSeries.getFlowAlerts(ticker, sinceDays(HISTORY_DAYS, { isCall: flowType === 'CALL' })),
     ]);
 
     const allFlows: any[] = [];
@@ -103,10 +107,17 @@ export class FlowSignatureService {
     // Ajouter les flows du graphe
     allFlows.push(...graphFlows);
 
-    // Ajouter les flows UW
-    if (uwResult[0].status === 'fulfilled' && uwResult[0].value.success) {
-      const uwFlows = uwResult[0].value.data || [];
-      allFlows.push(...uwFlows);
+    // Ajouter les flows du store
+    if (storeResult[0].status === 'fulfilled') {
+      allFlows.push(
+        ...storeResult[0].value.map((point) => ({
+          type: point.isCall ? 'CALL' : 'PUT',
+          strike: point.strike,
+          expiry: point.expiry,
+          premium: point.premium,
+          timestamp: point.executedAt,
+        }))
+      );
     }
 
     return allFlows;
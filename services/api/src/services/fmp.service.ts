@@ -24,14 +24,23 @@ import type {
   ExchangeVariantsQueryParams,
   ExchangeVariantsResponse,
 } from '../types/fmp/company-search';
+import type {
+  ColumnarRecords,
+  StatementProjectionEndpoint,
+  StatementProjectionQueryParams,
+  StatementProjectionTypes,
+} from '../types/fmp/financial-statements';
 
 export class FMPService {
   private repository: FMPRepository;
   private cache: CacheService;
+  private statementCache: CacheService;
 
   constructor() {
     this.repository = new FMPRepository();
     this.cache = new CacheService({ tableName: 'fmp_cache', ttlHours: 24 });
+    // États financiers projetés (trimestriels : un jour de cache suffit)
+    this.statementCache = new CacheService({ tableName: 'fmp_statement_cache', ttlHours: 24 });
   }
 
   // ========== Quote & Market Data ==========
@@ -90,6 +99,55 @@ export class FMPService {
     }, `Get income statement for ${params.symbol}`);
   }
 
+  /**
+   * État financier réduit aux champs déclarés, mis en cache sous forme de colonnes
+   */
+  async getStatementProjection<E extends StatementProjectionEndpoint, F extends keyof StatementProjectionTypes[E]>(
+    endpoint: E,
+    params: StatementProjectionQueryParams,
+    fields: readonly F[],
+    forceRefresh: boolean = false
+  ): Promise<ApiResponse<ColumnarRecords<StatementProjectionTypes[E], F>>> {
+    return handleError(async () => {
+      const symbol = params.symbol.toUpperCase();
+      // Clé = requête + champs triés : deux services qui déclarent les mêmes champs partagent l'entrée
+      const cacheKey = [
+        symbol,
+        endpoint,
+        params.period || 'annual',
+        params.limit ?? 'default',
+        [...fields].map(String).sort().join(','),
+      ].join(':');
+
+      if (!forceRefresh) {
+        const entry = await this.statementCache.get<{ data: ColumnarRecords<StatementProjectionTypes[E], F>; cached_at: string }>(
+          cacheKey,
+          'cache_key'
+        );
+        if (entry) {
+          return {
+            success: true,
+            data: entry.data,
+            cached: true,
+            count: entry.data.length,
+            timestamp: entry.cached_at,
+          };
+        }
+      }
+
+      const data = await this.repository.getStatementProjection(endpoint, { ...params, symbol }, fields);
+      await this.statementCache.set(cacheKey, { symbol, endpoint, data }, 'cache_key');
+
+      return {
+        success: true,
+        data,
+        cached: false,
+        count: data.length,
+        timestamp: new Date().toISOString(),
+      };
+    }, `Get ${endpoint} projection for ${params.symbol}`);
+  }
+
   async getIncomeStatementTTM(params: {
     symbol: string;
     limit?: number;
@@ -2409,6 +2467,19 @@ export class FMPService {
     }, `Get Stock Quote for ${symbol}`);
   }
 
+  async getBatchStockQuotes(symbols: string[]): Promise<ApiResponse<any[]>> {
+    return handleError(async () => {
+      const data = await this.repository.getBatchStockQuotes(symbols);
+      return {
+        success: true,
+        data,
+        cached: false,
+        count: data.length,
+        timestamp: new Date().toISOString(),
+      };
+    }, `Get batch stock quotes`);
+  }
+
   async getStockQuoteShort(symbol: string): Promise<ApiResponse<any[]>> {
     return handleError(async () => {
       const data = await this.repository.getStockQuoteShort(symbol);
@@ -6,13 +6,22 @@
 import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as uw from '../unusual-whales';
+import { TimeSeriesService } from './time-series.service';
+import { gammaExposure, meanAbsNonZero, optionColumns } from './options-kernel.service';
 import type {
   GammaSqueezeAnalysis,
   GammaSqueezeIndicators,
   GammaSqueezeResponse,
 } from '../types/gamma-squeeze';
+import type { FlowAlertPoint } from '../types/time-series';
+
+// Flows de la dernière séance ayant des données (store de séries temporelles)
+const FLOW_WINDOW_SESSIONS = 1;
+const FLOW_MIN_PREMIUM = 100000;
 
 export class GammaSqueezeService {
+  private timeSeries = new TimeSeriesService();
+
   /**
    * Détecte le potentiel de gamma squeeze
    */
@@ -30,7 +39,7 @@ export class GammaSqueezeService {
         greeks,
       ] = await Promise.allSettled([
         uw.getUWSpotExposures(upperTicker, {}),
-        uw.getUWRecentFlows(upperTicker, { min_premium: 100000 }),
+        this.timeSeries.getRecentFlowAlerts(upperTicker, FLOW_WINDOW_SESSIONS, { minPremium: FLOW_MIN_PREMIUM }),
         uw.getUWShortInterestAndFloat(upperTicker),
         uw.getUWGreeks(upperTicker, {}),
       ]);
@@ -107,23 +116,8 @@ export class GammaSqueezeService {
       return 0;
     }
 
-    const data = Array.isArray(spotExposures.value.data)
-      ? spotExposures.value.data
-      : [spotExposures.value.data];
-
     // GEX = somme des (gamma * open_interest * 100 * spot_price^2) / 1e6
-    let totalGEX = 0;
-    for (const item of data) {
-      const gamma = parseFloat(item.gamma || item.gamma_exposure || 0);
-      const openInterest = parseFloat(item.open_interest || item.oi || 0);
-      const spotPrice = parseFloat(item.spot_price || item.price || 0);
-
-      if (gamma && openInterest && spotPrice) {
-        // GEX approximatif : gamma * OI * 100 * spot^2
-        const gex = (gamma * openInterest * 100 * spotPrice * spotPrice) / 1e6;
-        totalGEX += gex;
-      }
-    }
+    const totalGEX = gammaExposure(optionColumns(spotExposures.value.data));
 
     return Math.round(totalGEX * 100) / 100; // Arrondir à 2 décimales
   }
@@ -131,27 +125,20 @@ export class GammaSqueezeService {
   /**
    * Calcule le ratio de flow de calls vs puts
    */
-  private calculateCallFlowRatio(flowRecent: PromiseSettledResult<any>): number {
-    if (flowRecent.status === 'rejected' || !flowRecent.value?.data) {
+  private calculateCallFlowRatio(flowRecent: PromiseSettledResult<FlowAlertPoint[]>): number {
+    if (flowRecent.status === 'rejected') {
       return 0;
     }
 
-    const data = Array.isArray(flowRecent.value.data)
-      ? flowRecent.value.data
-      : [flowRecent.value.data];
-
     let callVolume = 0;
     let putVolume = 0;
 
-    for (const item of data) {
-      const side = item.side?.toLowerCase();
-      const volume = parseFloat(item.volume || item.size || item.contracts || 0);
-      const premium = parseFloat(item.premium || item.notional || 0);
-
-      if (side === 'call' || side === 'c') {
-        callVolume += premium > 0 ? premium : volume;
-      } else if (side === 'put' || side === 'p') {
-        putVolume += premium > 0 ? premium : volume;
+    for (const flow of flowRecent.value) {
+      const weight = flow.premium > 0 ? flow.premium : flow.volume;
+      if (flow.isCall) {
+        callVolume += weight;
+      } else {
+        putVolume += weight;
       }
     }
 
@@ -199,26 +186,11 @@ export class GammaSqueezeService {
       return 0;
     }
 
-    const data = Array.isArray(greeks.value.data)
-      ? greeks.value.data
-      : [greeks.value.data];
-
-    let totalGamma = 0;
-    let count = 0;
-
-    for (const item of data) {
-      const gamma = parseFloat(item.gamma || 0);
-      if (gamma !== 0 && !isNaN(gamma)) {
-        totalGamma += Math.abs(gamma);
-        count++;
-      }
-    }
-
-    if (count === 0) {
+    const avgGamma = meanAbsNonZero(optionColumns(greeks.value.data).gamma);
+    if (avgGamma === 0) {
       return 0;
     }
 
-    const avgGamma = totalGamma / count;
     // Normaliser entre 0 et 100 (gamma typique entre 0 et 0.1)
     const normalized = Math.min(100, (avgGamma / 0.1) * 100);
     return Math.round(normalized * 100) / 100;
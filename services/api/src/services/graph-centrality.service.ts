@@ -0,0 +1,302 @@
+/**
+ * Service de pré-calcul des centralités du graphe (Neo4j)
+ * Calcule degree, PageRank, betweenness, closeness et eigenvector en batch
+ * pour tous les nœuds Institution/Insider/Ticker et les écrit comme propriétés.
+ * Le chemin requête se contente ensuite d'une lecture de propriété (O(1)).
+ */
+
+import { logger } from '../utils/logger';
+import { handleError } from '../utils/errors';
+import { Neo4jRepository } from '../repositories/neo4j.repository';
+import type {
+  CentralityGraph,
+  CentralityRawScores,
+  CentralityScores,
+  CentralityJobResult,
+} from '../types/attribution';
+
+export const CENTRALITY_LABELS = ['Institution', 'Insider', 'Ticker'] as const;
+
+// Même pondération que l'ancien calcul à la volée
+const OVERALL_WEIGHTS = {
+  degree: 0.2,
+  betweenness: 0.3,
+  pagerank: 0.25,
+  closeness: 0.15,
+  eigenvector: 0.1,
+};
+
+export interface CentralityComputeOptions {
+  dampingFactor?: number;
+  maxIterations?: number;
+  tolerance?: number;
+  /**
+   * Nombre de sources BFS pour betweenness/closeness.
+   * Au-delà, on échantillonne (Brandes approché) pour borner le coût O(V·E).
+   */
+  maxExactSources?: number;
+}
+
+/**
+ * Calcule les scores de centralité bruts sur une liste d'adjacence exportée.
+ * - degree / betweenness / closeness / eigenvector : graphe non orienté
+ * - pagerank : graphe orienté (HOLDS, TRADES... pointent vers le Ticker)
+ */
+export function computeRawCentrality(
+  graph: CentralityGraph,
+  options: CentralityComputeOptions = {}
+): Map<string, CentralityRawScores> {
+  const damping = options.dampingFactor ?? 0.85;
+  const maxIterations = options.maxIterations ?? 50;
+  const tolerance = options.tolerance ?? 1e-6;
+  const maxExactSources = options.maxExactSources ?? 2000;
+
+  const n = graph.nodes.length;
+  const result = new Map<string, CentralityRawScores>();
+  if (n === 0) {
+    return result;
+  }
+
+  const index = new Map<string, number>();
+  graph.nodes.forEach((key, i) => index.set(key, i));
+
+  // Arêtes valides (on ignore les boucles et les extrémités inconnues)
+  const sources: number[] = [];
+  const targets: number[] = [];
+  for (const [from, to] of graph.edges) {
+    const s = index.get(from);
+    const t = index.get(to);
+    if (s === undefined || t === undefined || s === t) continue;
+    sources.push(s);
+    targets.push(t);
+  }
+  const m = sources.length;
+
+  // Adjacence non orientée au format CSR
+  const degree = new Int32Array(n);
+  const outDegree = new Int32Array(n);
+  for (let e = 0; e < m; e++) {
+    degree[sources[e]]++;
+    degree[targets[e]]++;
+    outDegree[sources[e]]++;
+  }
+  const offsets = new Int32Array(n + 1);
+  for (let i = 0; i < n; i++) offsets[i + 1] = offsets[i] + degree[i];
+  const neighbors = new Int32Array(2 * m);
+  const cursor = offsets.slice(0, n);
+  for (let e = 0; e < m; e++) {
+    neighbors[cursor[sources[e]]++] = targets[e];
+    neighbors[cursor[targets[e]]++] = sources[e];
+  }
+
+  // 1. PageRank (itération de puissance, masse des nœuds sans sortie redistribuée)
+  let pagerank = new Float64Array(n).fill(1 / n);
+  for (let iter = 0; iter < maxIterations; iter++) {
+    const next = new Float64Array(n);
+    let danglingMass = 0;
+    for (let i = 0; i < n; i++) {
+      if (outDegree[i] === 0) danglingMass += pagerank[i];
+    }
+    const base = (1 - damping) / n + (damping * danglingMass) / n;
+    next.fill(base);
+    for (let e = 0; e < m; e++) {
+      next[targets[e]] += (damping * pagerank[sources[e]]) / outDegree[sources[e]];
+    }
+    let delta = 0;
+    for (let i = 0; i < n; i++) delta += Math.abs(next[i] - pagerank[i]);
+    pagerank = next;
+    if (delta < tolerance) break;
+  }
+
+  // 2. Eigenvector (itération sur A + I pour éviter l'oscillation des graphes bipartis)
+  let eigen = new Float64Array(n).fill(1 / Math.sqrt(n));
+  for (let iter = 0; iter < maxIterations; iter++) {
+    const next = new Float64Array(n);
+    for (let v = 0; v < n; v++) {
+      let sum = eigen[v];
+      for (let k = offsets[v]; k < offsets[v + 1]; k++) sum += eigen[neighbors[k]];
+      next[v] = sum;
+    }
+    let norm = 0;
+    for (let i = 0; i < n; i++) norm += next[i] * next[i];
+    norm = Math.sqrt(norm) || 1;
+    let delta = 0;
+    for (let i = 0; i < n; i++) {
+      next[i] /= norm;
+      delta += Math.abs(next[i] - eigen[i]);
+    }
+    eigen = next;
+    if (delta < tolerance) break;
+  }
+
+  // 3. Betweenness (Brandes) + closeness harmonique, un BFS par source
+  const betweenness = new Float64Array(n);
+  const harmonic = new Float64Array(n);
+  const sampled = n > maxExactSources;
+  const sourceCount = sampled ? maxExactSources : n;
+  const sourceOrder = sampled ? sampleIndices(n, sourceCount) : null;
+
+  const dist = new Int32Array(n);
+  const sigma = new Float64Array(n);
+  const delta = new Float64Array(n);
+  const stack = new Int32Array(n);
+  const queue = new Int32Array(n);
+
+  for (let k = 0; k < sourceCount; k++) {
+    const s = sourceOrder ? sourceOrder[k] : k;
+    dist.fill(-1);
+    sigma.fill(0);
+    delta.fill(0);
+    dist[s] = 0;
+    sigma[s] = 1;
+
+    let head = 0;
+    let tail = 0;
+    let top = 0;
+    queue[tail++] = s;
+    while (head < tail) {
+      const v = queue[head++];
+      stack[top++] = v;
+      if (v !== s) harmonic[v] += 1 / dist[v];
+      for (let j = offsets[v]; j < offsets[v + 1]; j++) {
+        const w = neighbors[j];
+        if (dist[w] < 0) {
+          dist[w] = dist[v] + 1;
+          queue[tail++] = w;
+        }
+        if (dist[w] === dist[v] + 1) sigma[w] += sigma[v];
+      }
+    }
+
+    // Accumulation des dépendances en ordre inverse de découverte
+    while (top > 0) {
+      const w = stack[--top];
+      for (let j = offsets[w]; j < offsets[w + 1]; j++) {
+        const v = neighbors[j];
+        if (dist[v] === dist[w] - 1) {
+          delta[v] += (sigma[v] / sigma[w]) * (1 + delta[w]);
+        }
+      }
+      if (w !== s) betweenness[w] += delta[w];
+    }
+  }
+
+  // Extrapolation si échantillonnage, puis /2 (chaque paire comptée deux fois en non orienté)
+  const scale = n / sourceCount;
+  for (let i = 0; i < n; i++) {
+    result.set(graph.nodes[i], {
+      degree: degree[i],
+      pagerank: pagerank[i],
+      betweenness: (betweenness[i] * scale) / 2,
+      closeness: n > 1 ? (harmonic[i] * scale) / (n - 1) : 0,
+      eigenvector: eigen[i],
+    });
+  }
+
+  return result;
+}
+
+/**
+ * Normalise chaque métrique entre 0 et 1 (division par le max du graphe)
+ * et calcule le score global pondéré.
+ */
+export function normalizeCentrality(
+  raw: Map<string, CentralityRawScores>
+): Map<string, CentralityScores> {
+  const max: CentralityRawScores = {
+    degree: 0,
+    pagerank: 0,
+    betweenness: 0,
+    closeness: 0,
+    eigenvector: 0,
+  };
+  for (const scores of raw.values()) {
+    max.degree = Math.max(max.degree, scores.degree);
+    max.pagerank = Math.max(max.pagerank, scores.pagerank);
+    max.betweenness = Math.max(max.betweenness, scores.betweenness);
+    max.closeness = Math.max(max.closeness, scores.closeness);
+    max.eigenvector = Math.max(max.eigenvector, scores.eigenvector);
+  }
+
+  const norm = (value: number, maxValue: number) => (maxValue > 0 ? value / maxValue : 0);
+  const normalized = new Map<string, CentralityScores>();
+  for (const [key, scores] of raw) {
+    const degree = norm(scores.degree, max.degree);
+    const pagerank = norm(scores.pagerank, max.pagerank);
+    const betweenness = norm(scores.betweenness, max.betweenness);
+    const closeness = norm(scores.closeness, max.closeness);
+    const eigenvector = norm(scores.eigenvector, max.eigenvector);
+    const overall =
+      degree * OVERALL_WEIGHTS.degree +
+      betweenness * OVERALL_WEIGHTS.betweenness +
+      pagerank * OVERALL_WEIGHTS.pagerank +
+      closeness * OVERALL_WEIGHTS.closeness +
+      eigenvector * OVERALL_WEIGHTS.eigenvector;
+
+    normalized.set(key, {
+      degree,
+      pagerank,
+      betweenness,
+      closeness,
+      eigenvector,
+      overall: Math.min(1, overall),
+    });
+  }
+  return normalized;
+}
+
+/**
+ * Échantillon déterministe (pas régulier) pour que deux runs successifs soient comparables
+ */
+function sampleIndices(n: number, count: number): Int32Array {
+  const step = n / count;
+  const indices = new Int32Array(count);
+  for (let i = 0; i < count; i++) indices[i] = Math.floor(i * step);
+  return indices;
+}
+
+export class GraphCentralityService {
+  private repository: Neo4jRepository;
+
+  constructor(repository?: Neo4jRepository) {
+    this.repository = repository || new Neo4jRepository();
+  }
+
+  /**
+   * Job batch : recalculer et écrire les centralités de tous les nœuds
+   * Utilise GDS si le plugin est installé, sinon le calcul en process.
+   */
+  async recomputeAll(options: CentralityComputeOptions = {}): Promise<CentralityJobResult> {
+    return handleError(async () => {
+      const log = logger.child({ operation: 'recomputeCentrality' });
+      const startedAt = Date.now();
+      const labels = [...CENTRALITY_LABELS];
+
+      const gdsAvailable = await this.repository.isGdsAvailable();
+      log.info('Starting centrality recompute', { labels, gdsAvailable });
+
+      let raw: Map<string, CentralityRawScores>;
+      if (gdsAvailable) {
+        raw = await this.repository.computeCentralityWithGds(labels);
+      } else {
+        const graph = await this.repository.exportAdjacency(labels);
+        log.info('Adjacency exported', { nodes: graph.nodes.length, edges: graph.edges.length });
+        raw = computeRawCentrality(graph, options);
+      }
+
+      const scores = normalizeCentrality(raw);
+      const computedAt = new Date().toISOString();
+      const written = await this.repository.writeCentralityScores(scores, computedAt);
+
+      const result: CentralityJobResult = {
+        engine: gdsAvailable ? 'gds' : 'in-process',
+        nodes: scores.size,
+        written,
+        computedAt,
+        durationMs: Date.now() - startedAt,
+      };
+      log.info('Centrality recompute completed', result);
+      return result;
+    }, 'Recompute graph centrality');
+  }
+}
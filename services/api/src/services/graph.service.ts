@@ -35,7 +35,11 @@ export class GraphService {
         LIMIT 50
       `;
 
-      const results = await this.repository.executeQuery(cypher, { ticker: ticker.toUpperCase() });
+      const results = await this.repository.executeQuery(
+        cypher,
+        { ticker: ticker.toUpperCase() },
+        { name: 'getInstitutionalPositions' }
+      );
       log.info('Institutional positions retrieved from graph', { count: results.length });
       return results;
     }, 'Get institutional positions from graph');
@@ -62,7 +66,11 @@ export class GraphService {
         LIMIT 50
       `;
 
-      const results = await this.repository.executeQuery(cypher, { ticker: ticker.toUpperCase() });
+      const results = await this.repository.executeQuery(
+        cypher,
+        { ticker: ticker.toUpperCase() },
+        { name: 'getInsiderTransactions' }
+      );
       log.info('Insider transactions retrieved from graph', { count: results.length });
       return results;
     }, 'Get insider transactions from graph');
@@ -88,10 +96,11 @@ export class GraphService {
         LIMIT 100
       `;
 
-      const results = await this.repository.executeQuery(cypher, {
-        ticker: ticker.toUpperCase(),
-        flowType,
-      });
+      const results = await this.repository.executeQuery(
+        cypher,
+        { ticker: ticker.toUpperCase(), flowType },
+        { name: 'getHistoricalFlows' }
+      );
       log.info('Historical flows retrieved from graph', { count: results.length });
       return results;
     }, 'Get historical flows from graph');
@@ -7,18 +7,33 @@ import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as fmp from '../fmp';
 import * as uw from '../unusual-whales';
+import { TickerBundleService, bundleResult } from './ticker-bundle.service';
 import type {
   ScreeningCriteria,
   MultiCriteriaScreenerResponse,
   ScreenedTicker,
+  ScreenStats,
 } from '../types/combined-analysis';
 
+// Candidats analysés simultanément (4 appels UW chacun)
+const SCREEN_CONCURRENCY = 8;
+// API Gateway coupe à 30 s : au-delà, on retourne les tickers déjà qualifiés
+const SCREEN_TIME_BUDGET_MS = 25_000;
+// Bonus maximum des sources de flow (options +15, institutionnels +10, dark pool +5)
+const MAX_FLOW_SENTIMENT_BONUS = 30;
+
 export class MultiCriteriaScreenerService {
+  private bundles = new TickerBundleService();
+
   /**
    * Screen les tickers selon plusieurs critères (FMP + UW)
    */
-  async screenTickers(criteria: ScreeningCriteria): Promise<MultiCriteriaScreenerResponse> {
+  async screenTickers(
+    criteria: ScreeningCriteria,
+    options: { concurrency?: number; timeBudgetMs?: number } = {}
+  ): Promise<MultiCriteriaScreenerResponse> {
     return handleError(async () => {
+      const startedAt = Date.now();
       const log = logger.child({ operation: 'screenTickers' });
       log.info('Screening tickers with multi-criteria', { criteria });
 
@@ -54,96 +69,34 @@ export class MultiCriteriaScreenerService {
         };
       }
 
-      // 2. Filtrer par sentiment (UW) et calculer les scores
-      const screenedTickers: ScreenedTicker[] = [];
+      // 2. Filtrer par sentiment (UW) et calculer les scores, en parallèle borné
       const limit = criteria.limit || 50;
       const tickersToProcess = fmpResults.data.slice(0, limit);
+      const { concurrency = SCREEN_CONCURRENCY, timeBudgetMs = SCREEN_TIME_BUDGET_MS } = options;
 
       log.info('Processing tickers for sentiment analysis', {
         total: fmpResults.data.length,
         toProcess: tickersToProcess.length,
+        concurrency,
       });
 
-      for (const ticker of tickersToProcess) {
-        const symbol = ticker.symbol || ticker.Symbol || '';
-        if (!symbol) {
-          log.warn('Ticker without symbol, skipping', { ticker });
-          continue;
-        }
-
-        try {
-          // Récupérer les données de sentiment
-          const [optionsFlow, shortInterest, institutionalOwnership, darkPool] = await Promise.allSettled([
-            uw.getUWRecentFlows(symbol, { min_premium: criteria.minOptionsPremium || 50000 }),
-            uw.getUWShortInterestAndFloat(symbol),
-            uw.getUWInstitutionOwnership(symbol),
-            uw.getUWDarkPoolTrades(symbol, { limit: 10 }),
-          ]);
-
-          // Calculer les scores
-          const fundamentalScore = this.calculateFundamentalScore(ticker);
-          const sentimentScore = this.calculateSentimentScore(
-            optionsFlow,
-            shortInterest,
-            institutionalOwnership,
-            darkPool,
-            criteria
-          );
-
-          // Vérifier les filtres de sentiment
-          if (criteria.minSentimentScore && sentimentScore < criteria.minSentimentScore) {
-            continue;
-          }
-          if (criteria.maxShortInterest) {
-            const si = shortInterest.status === 'fulfilled' && shortInterest.value?.success && shortInterest.value.data
-              ? (shortInterest.value.data.percent_returned ? parseFloat(shortInterest.value.data.percent_returned) : 0)
-              : 0;
-            if (si > criteria.maxShortInterest) continue;
-          }
-
-          const combinedScore = (fundamentalScore * 0.6 + sentimentScore * 0.4);
-
-          // Vérifier les filtres de sentiment
-          if (criteria.minSentimentScore && sentimentScore < criteria.minSentimentScore) {
-            log.debug('Ticker filtered out by sentiment score', { symbol, sentimentScore, minRequired: criteria.minSentimentScore });
-            continue;
-          }
-          if (criteria.maxShortInterest) {
-            const si = shortInterest.status === 'fulfilled' && shortInterest.value?.success && shortInterest.value.data
-              ? (shortInterest.value.data.percent_returned ? parseFloat(shortInterest.value.data.percent_returned) : 0)
-              : 0;
-            if (si > criteria.maxShortInterest) {
-              log.debug('Ticker filtered out by short interest', { symbol, shortInterest: si, maxAllowed: criteria.maxShortInterest });
-              continue;
-            }
-          }
-
-          screenedTickers.push({
-            symbol,
-            name: ticker.name || ticker.Name || symbol,
-            fundamentalScore,
-            sentimentScore,
-            combinedScore,
-            currentPrice: ticker.price || ticker.Price || 0,
-            marketCap: ticker.marketCap || ticker.MarketCap || 0,
-            peRatio: ticker.peRatio || ticker.PERatio,
-            details: {
-              revenueGrowth: ticker.revenueGrowth || ticker.RevenueGrowth,
-              debtToEquity: ticker.debtToEquity || ticker.DebtToEquity,
-              optionsFlow: this.extractOptionsFlow(optionsFlow),
-              shortInterest: this.extractShortInterest(shortInterest),
-              institutionalOwnership: this.extractInstitutionalOwnership(institutionalOwnership),
-            },
-          });
-        } catch (error) {
-          log.warn(`Failed to analyze sentiment for ${symbol}`, { error, symbol });
-          // Continue avec le ticker suivant
-        }
+      const screenedTickers: ScreenedTicker[] = [];
+      const stream = this.streamScreen(tickersToProcess, criteria, {
+        concurrency,
+        deadline: startedAt + timeBudgetMs,
+      });
+      let step = await stream.next();
+      while (!step.done) {
+        screenedTickers.push(step.value);
+        step = await stream.next();
       }
+      const stats = step.value;
 
       log.info('Screening complete', {
         initialCount: fmpResults.data.length,
         screenedCount: screenedTickers.length,
+        ...stats,
+        durationMs: Date.now() - startedAt,
       });
 
       // Trier par score combiné
@@ -155,10 +108,154 @@ export class MultiCriteriaScreenerService {
         cached: false,
         count: screenedTickers.length,
         timestamp: new Date().toISOString(),
+        ...(stats.skipped > 0 && { partial: true, skipped: stats.skipped }),
       };
     }, 'Screen tickers with multi-criteria');
   }
 
+  /**
+   * Screening en flux : les candidats passent dans un pool de workers borné et chaque
+   * ticker retenu est émis dès qu'il est qualifié. Plus aucun candidat n'est démarré
+   * après `deadline` (les candidats restants sont comptés dans `skipped`).
+   */
+  async *streamScreen(
+    candidates: any[],
+    criteria: ScreeningCriteria,
+    options: { concurrency?: number; deadline?: number } = {}
+  ): AsyncGenerator<ScreenedTicker, ScreenStats> {
+    const { concurrency = SCREEN_CONCURRENCY, deadline = Infinity } = options;
+    const log = logger.child({ operation: 'streamScreen' });
+    const stats: ScreenStats = { scanned: 0, rejectedEarly: 0, skipped: 0 };
+    const qualified: ScreenedTicker[] = [];
+    let next = 0;
+    let finished = false;
+    let wake: (() => void) | null = null;
+    const notify = () => {
+      wake?.();
+      wake = null;
+    };
+
+    const worker = async () => {
+      while (next < candidates.length) {
+        if (Date.now() >= deadline) {
+          stats.skipped += candidates.length - next;
+          next = candidates.length;
+          break;
+        }
+        const candidate = candidates[next++];
+        try {
+          const screened = await this.screenCandidate(candidate, criteria, stats);
+          if (screened) {
+            qualified.push(screened);
+            notify();
+          }
+        } catch (error) {
+          log.warn('Failed to analyze sentiment for candidate', { error, symbol: candidate?.symbol });
+          // Continue avec le ticker suivant
+        }
+        stats.scanned++;
+      }
+    };
+
+    const workers = Math.max(1, Math.min(concurrency, candidates.length));
+    const pool = Promise.all(Array.from({ length: workers }, worker)).then(() => {
+      finished = true;
+      notify();
+    });
+
+    while (!finished || qualified.length > 0) {
+      if (qualified.length > 0) {
+        yield qualified.shift()!;
+        continue;
+      }
+      await new Promise<void>((resolve) => (wake = resolve));
+    }
+    await pool;
+    return stats;
+  }
+
+  /**
+   * Évaluer un candidat : filtres peu coûteux d'abord, appels de flow ensuite
+   * Retourne null si le ticker est rejeté.
+   */
+  private async screenCandidate(
+    ticker: any,
+    criteria: ScreeningCriteria,
+    stats: ScreenStats
+  ): Promise<ScreenedTicker | null> {
+    const symbol = ticker.symbol || ticker.Symbol || '';
+    if (!symbol) {
+      logger.warn('Ticker without symbol, skipping', { ticker });
+      return null;
+    }
+
+    const fundamentalScore = this.calculateFundamentalScore(ticker);
+
+    // 1. Short interest : bundle préchauffé ou cache UW
+    const warm = await this.bundles.getWarmBundle(symbol);
+    const [shortInterest] = warm
+      ? [bundleResult(warm, 'shortInterest')]
+      : await Promise.allSettled([uw.getUWShortInterestAndFloat(symbol)]);
+
+    if (criteria.maxShortInterest) {
+      const si = this.extractShortInterest(shortInterest);
+      if (si > criteria.maxShortInterest) {
+        logger.debug('Ticker filtered out by short interest', { symbol, shortInterest: si, maxAllowed: criteria.maxShortInterest });
+        stats.rejectedEarly++;
+        return null;
+      }
+    }
+
+    // Même avec des flows idéaux, le score de sentiment n'atteindrait pas le minimum
+    if (
+      criteria.minSentimentScore &&
+      Math.min(100, 50 + this.shortInterestSentiment(shortInterest) + MAX_FLOW_SENTIMENT_BONUS) < criteria.minSentimentScore
+    ) {
+      stats.rejectedEarly++;
+      return null;
+    }
+
+    // 2. Appels coûteux (flows, ownership, dark pool)
+    const [optionsFlow, institutionalOwnership, darkPool] = await Promise.allSettled([
+      uw.getUWRecentFlows(symbol, { min_premium: criteria.minOptionsPremium || 50000 }),
+      uw.getUWInstitutionOwnership(symbol),
+      uw.getUWDarkPoolTrades(symbol, { limit: 10 }),
+    ]);
+
+    const sentimentScore = this.calculateSentimentScore(
+      optionsFlow,
+      shortInterest,
+      institutionalOwnership,
+      darkPool,
+      criteria
+    );
+
+    if (criteria.minSentimentScore && sentimentScore < criteria.minSentimentScore) {
+      logger.debug('Ticker filtered out by sentiment score', { symbol, sentimentScore, minRequired: criteria.minSentimentScore });
+      return null;
+    }
+
+    const combinedScore = (fundamentalScore * 0.6 + sentimentScore * 0.4);
+
+    return {
+      symbol,
+      name: ticker.name || ticker.Name || symbol,
+      fundamentalScore,
+      sentimentScore,
+      combinedScore,
+      currentPrice: ticker.price || ticker.Price || 0,
+      marketCap: ticker.marketCap || ticker.MarketCap || 0,
+      peRatio: ticker.peRatio || ticker.PERatio,
+      details: {
+        revenueGrowth: ticker.revenueGrowth || ticker.RevenueGrowth,
+        debtToEquity: ticker.debtToEquity || ticker.DebtToEquity,
+        optionsFlow: this.extractOptionsFlow(optionsFlow),
+        shortInterest: this.extractShortInterest(shortInterest),
+        institutionalOwnership: this.extractInstitutionalOwnership(institutionalOwnership),
+      },
+    };
+  }
+
   // ========== Méthodes privées ==========
 
   private calculateFundamentalScore(ticker: any): number {
@@ -209,13 +306,7 @@ export class MultiCriteriaScreenerService {
     }
 
     // Short Interest
-    if (shortInterest.status === 'fulfilled' && shortInterest.value?.success && shortInterest.value.data) {
-      const si = shortInterest.value.data;
-      const percent = si.percent_returned ? parseFloat(si.percent_returned) : 0;
-      
-      if (percent < 5) score += 10;
-      else if (percent > 20) score -= 15;
-    }
+    score += this.shortInterestSentiment(shortInterest);
 
     // Institutional Ownership
     if (institutionalOwnership.status === 'fulfilled' && institutionalOwnership.value?.success && institutionalOwnership.value.data) {
@@ -232,6 +323,18 @@ export class MultiCriteriaScreenerService {
     return Math.max(0, Math.min(100, score));
   }
 
+  /**
+   * Contribution du short interest au score de sentiment
+   */
+  private shortInterestSentiment(shortInterest: PromiseSettledResult<any>): number {
+    if (shortInterest.status === 'fulfilled' && shortInterest.value?.success && shortInterest.value.data) {
+      const percent = this.extractShortInterest(shortInterest);
+      if (percent < 5) return 10;
+      if (percent > 20) return -15;
+    }
+    return 0;
+  }
+
   private extractOptionsFlow(optionsFlow: PromiseSettledResult<any>): number {
     if (optionsFlow.status === 'fulfilled' && optionsFlow.value?.success && optionsFlow.value.data) {
       const flows = Array.isArray(optionsFlow.value.data) ? optionsFlow.value.data : [];
@@ -0,0 +1,181 @@
+/**
+ * Noyau de calcul numérique sur les réponses d'options (flows, expositions, greeks)
+ * Une réponse amont est convertie une seule fois en colonnes typées (Float64Array) ;
+ * GEX, ratios call/put et agrégats pondérés par premium sont des passes uniques sur
+ * ces colonnes, sans parseFloat ni objets intermédiaires. Les appelants convertissent
+ * une réponse une fois puis réutilisent les colonnes pour tous leurs agrégats.
+ */
+
+/** Sens d'un contrat dans la colonne `side` */
+export const CALL = 1;
+export const PUT = -1;
+
+export interface OptionColumns {
+  length: number;
+  strike: Float64Array;
+  gamma: Float64Array;
+  openInterest: Float64Array;
+  spot: Float64Array;
+  premium: Float64Array;
+  /** Volume du contrat, sinon taille du trade */
+  volume: Float64Array;
+  size: Float64Array;
+  /** CALL, PUT ou 0 si inconnu */
+  side: Int8Array;
+  /** 1 pour un sweep, block ou floor */
+  sweep: Int8Array;
+}
+
+export interface SideTotals {
+  calls: number;
+  puts: number;
+  callVolume: number;
+  putVolume: number;
+  callPremium: number;
+  putPremium: number;
+}
+
+function num(value: unknown): number {
+  if (typeof value === 'number') {
+    return Number.isFinite(value) ? value : 0;
+  }
+  if (typeof value === 'string') {
+    const n = parseFloat(value);
+    return Number.isFinite(n) ? n : 0;
+  }
+  return 0;
+}
+
+function sideOf(row: any): number {
+  if (row.is_call === true) return CALL;
+  if (row.is_put === true) return PUT;
+  const type = typeof row.type === 'string' ? row.type.toLowerCase() : '';
+  return type === 'call' ? CALL : type === 'put' ? PUT : 0;
+}
+
+/**
+ * Colonnes typées d'une réponse (tableau de lignes ou objet unique)
+ */
+export function optionColumns(data: unknown): OptionColumns {
+  if (data === null || typeof data !== 'object') {
+    return toColumns([]);
+  }
+  return toColumns(Array.isArray(data) ? data : [data]);
+}
+
+function toColumns(rows: any[]): OptionColumns {
+  const n = rows.length;
+  // Un seul buffer par type, découpé en vues (une allocation au lieu de neuf)
+  const values = new Float64Array(7 * n);
+  const flags = new Int8Array(2 * n);
+  const columns: OptionColumns = {
+    length: n,
+    strike: values.subarray(0, n),
+    gamma: values.subarray(n, 2 * n),
+    openInterest: values.subarray(2 * n, 3 * n),
+    spot: values.subarray(3 * n, 4 * n),
+    premium: values.subarray(4 * n, 5 * n),
+    volume: values.subarray(5 * n, 6 * n),
+    size: values.subarray(6 * n, 7 * n),
+    side: flags.subarray(0, n),
+    sweep: flags.subarray(n, 2 * n),
+  };
+
+  for (let i = 0; i < n; i++) {
+    const row = rows[i];
+    if (!row || typeof row !== 'object') {
+      continue;
+    }
+    columns.strike[i] = num(row.strike);
+    columns.gamma[i] = num(row.gamma || row.gamma_exposure);
+    columns.openInterest[i] = num(row.open_interest || row.oi);
+    columns.spot[i] = num(row.spot_price || row.price);
+    columns.premium[i] = num(row.premium);
+    columns.size[i] = num(row.size);
+    columns.volume[i] = num(row.volume || row.size || row.contracts);
+    columns.side[i] = sideOf(row);
+    columns.sweep[i] = row.is_sweep || row.is_block || row.is_floor ? 1 : 0;
+  }
+  return columns;
+}
+
+/**
+ * GEX en millions de dollars : somme de gamma * OI * 100 * spot² (lignes complètes uniquement)
+ */
+export function gammaExposure(columns: OptionColumns): number {
+  const { gamma, openInterest, spot } = columns;
+  let total = 0;
+  for (let i = 0; i < columns.length; i++) {
+    const g = gamma[i];
+    const oi = openInterest[i];
+    const s = spot[i];
+    if (g !== 0 && oi !== 0 && s !== 0) {
+      total += g * oi * 100 * s * s;
+    }
+  }
+  return total / 1e6;
+}
+
+/**
+ * Moyenne des valeurs absolues non nulles d'une colonne
+ */
+export function meanAbsNonZero(column: Float64Array): number {
+  let total = 0;
+  let count = 0;
+  for (let i = 0; i < column.length; i++) {
+    const value = column[i];
+    if (value !== 0) {
+      total += Math.abs(value);
+      count++;
+    }
+  }
+  return count === 0 ? 0 : total / count;
+}
+
+/**
+ * Somme d'une colonne
+ */
+export function sum(column: Float64Array): number {
+  let total = 0;
+  for (let i = 0; i < column.length; i++) {
+    total += column[i];
+  }
+  return total;
+}
+
+/**
+ * Agrégats par sens sur les contrats actifs (premium ou volume positif)
+ */
+export function sideTotals(columns: OptionColumns): SideTotals {
+  const { side, premium, volume } = columns;
+  const totals: SideTotals = { calls: 0, puts: 0, callVolume: 0, putVolume: 0, callPremium: 0, putPremium: 0 };
+  for (let i = 0; i < columns.length; i++) {
+    if (premium[i] <= 0 && volume[i] <= 0) {
+      continue;
+    }
+    if (side[i] === CALL) {
+      totals.calls++;
+      totals.callVolume += volume[i];
+      totals.callPremium += premium[i];
+    } else if (side[i] === PUT) {
+      totals.puts++;
+      totals.putVolume += volume[i];
+      totals.putPremium += premium[i];
+    }
+  }
+  return totals;
+}
+
+/**
+ * Nombre de contrats inhabituels : sweep/block/floor, premium ou taille au-delà des seuils
+ */
+export function countUnusual(columns: OptionColumns, minPremium: number, minSize: number): number {
+  const { sweep, premium, size } = columns;
+  let count = 0;
+  for (let i = 0; i < columns.length; i++) {
+    if (sweep[i] === 1 || premium[i] > minPremium || size[i] > minSize) {
+      count++;
+    }
+  }
+  return count;
+}
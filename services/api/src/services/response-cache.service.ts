@@ -0,0 +1,291 @@
+/**
+ * Cache partagé des réponses composites (Supabase)
+ * Stale-while-revalidate : une réponse fraîche est servie telle quelle ; une réponse
+ * périmée est recalculée par une seule instance (bail en base), les autres la servent
+ * en attendant. Une réponse dégradée (source amont en échec) n'est jamais mise en cache.
+ */
+
+import { supabase } from '../supabase';
+import { logger } from '../utils/logger';
+import { CacheError } from '../utils/errors';
+
+/**
+ * Nature des données amont d'une réponse composite.
+ * La durée de fraîcheur d'une réponse est celle de son entrée la plus volatile.
+ */
+export type CacheInputKind =
+  | 'quote'
+  | 'options_flow'
+  | 'dark_pool'
+  | 'short_interest'
+  | 'institutional'
+  | 'insider'
+  | 'valuation'
+  | 'statements';
+
+// Durée de fraîcheur (secondes) pendant les heures de marché US
+const INPUT_FRESH_SECONDS: Record<CacheInputKind, number> = {
+  quote: 60,
+  options_flow: 5 * 60,
+  dark_pool: 10 * 60,
+  short_interest: 6 * 60 * 60,
+  institutional: 24 * 60 * 60,
+  insider: 6 * 60 * 60,
+  valuation: 24 * 60 * 60,
+  statements: 24 * 60 * 60,
+};
+
+// Hors séance, les données intraday ne bougent plus
+const INTRADAY_INPUTS: CacheInputKind[] = ['quote', 'options_flow', 'dark_pool'];
+const OFF_HOURS_INTRADAY_SECONDS = 60 * 60;
+
+const TABLE_NAME = 'analysis_cache';
+const REFRESH_LEASE_SECONDS = 60;
+
+export interface ResponseCachePolicy {
+  endpoint: string;
+  version: string;
+  inputs: CacheInputKind[];
+  /** Fenêtre pendant laquelle une réponse périmée peut encore être servie (multiple de la fraîcheur) */
+  staleFactor?: number;
+  /** Borne haute de la fenêtre stale (secondes) */
+  maxStaleSeconds?: number;
+}
+
+export interface CachedResponse<T> {
+  data: T;
+  cached: boolean;
+  stale: boolean;
+  computedAt: string;
+  /** Sources amont en échec lors du calcul (réponse non mise en cache) */
+  degraded?: string[];
+}
+
+export interface ComputeContext {
+  /** Signaler une source amont en échec : la réponse calculée ne sera pas mise en cache */
+  degrade(...sources: string[]): void;
+}
+
+/**
+ * Sources en échec d'un lot de Promise.allSettled (rejet ou réponse { success: false })
+ */
+export function failedSources(results: Record<string, PromiseSettledResult<any>>): string[] {
+  return Object.entries(results)
+    .filter(([, result]) => result.status === 'rejected' || result.value?.success === false)
+    .map(([source]) => source);
+}
+
+interface AnalysisCacheRow {
+  cache_key: string;
+  data: any;
+  computed_at: string;
+  fresh_until: string;
+  expires_at: string;
+}
+
+/**
+ * Marché US ouvert ? (lun-ven, 9h30-16h00 America/New_York, jours fériés ignorés)
+ */
+export function isUSMarketOpen(now: Date = new Date()): boolean {
+  const parts = new Intl.DateTimeFormat('en-US', {
+    timeZone: 'America/New_York',
+    weekday: 'short',
+    hour: 'numeric',
+    minute: 'numeric',
+    hour12: false,
+  }).formatToParts(now);
+  const get = (type: string) => parts.find((p) => p.type === type)?.value || '';
+  const weekday = get('weekday');
+  if (weekday === 'Sat' || weekday === 'Sun') {
+    return false;
+  }
+  const minutes = (parseInt(get('hour'), 10) % 24) * 60 + parseInt(get('minute'), 10);
+  return minutes >= 9 * 60 + 30 && minutes < 16 * 60;
+}
+
+/**
+ * Durée de fraîcheur d'une réponse = minimum des durées de ses entrées
+ */
+export function freshSecondsFor(inputs: CacheInputKind[], now: Date = new Date()): number {
+  const marketOpen = isUSMarketOpen(now);
+  return Math.min(
+    ...inputs.map((input) =>
+      !marketOpen && INTRADAY_INPUTS.includes(input)
+        ? Math.max(INPUT_FRESH_SECONDS[input], OFF_HOURS_INTRADAY_SECONDS)
+        : INPUT_FRESH_SECONDS[input]
+    )
+  );
+}
+
+export class ResponseCacheService {
+  // Calculs en cours dans cette instance (évite N recalculs simultanés du même ticker)
+  private inFlight = new Map<string, Promise<CachedResponse<any>>>();
+
+  /**
+   * Servir depuis le cache ou calculer (stale-while-revalidate)
+   */
+  async getOrCompute<T>(
+    policy: ResponseCachePolicy,
+    ticker: string,
+    compute: (context: ComputeContext) => Promise<T>
+  ): Promise<CachedResponse<T>> {
+    const upperTicker = ticker.toUpperCase();
+    const cacheKey = `${policy.endpoint}:${policy.version}:${upperTicker}`;
+    const log = logger.child({ operation: 'responseCache', cacheKey });
+
+    const row = await this.read(cacheKey);
+    const now = Date.now();
+
+    if (row && new Date(row.fresh_until).getTime() > now) {
+      log.debug('Response cache hit (fresh)');
+      return { data: row.data as T, cached: true, stale: false, computedAt: row.computed_at };
+    }
+
+    if (row && new Date(row.expires_at).getTime() > now) {
+      const stale: CachedResponse<T> = { data: row.data as T, cached: true, stale: true, computedAt: row.computed_at };
+      return this.refreshStale(policy, upperTicker, cacheKey, compute, stale);
+    }
+
+    log.info('Response cache miss');
+    return this.computeAndStore(policy, upperTicker, cacheKey, compute);
+  }
+
+  /**
+   * Invalider toutes les réponses en cache d'un ticker
+   */
+  async invalidateTicker(ticker: string): Promise<void> {
+    const { error } = await supabase.from(TABLE_NAME).delete().eq('ticker', ticker.toUpperCase());
+    if (error) {
+      logger.error(`Response cache invalidate failed for ${ticker}`, error);
+    }
+  }
+
+  private async read(cacheKey: string): Promise<AnalysisCacheRow | null> {
+    try {
+      const { data, error } = await supabase
+        .from(TABLE_NAME)
+        .select('cache_key, data, computed_at, fresh_until, expires_at')
+        .eq('cache_key', cacheKey)
+        .maybeSingle();
+
+      if (error) {
+        throw new CacheError(`Failed to read response cache: ${error.message}`, error);
+      }
+      return (data as AnalysisCacheRow) || null;
+    } catch (error) {
+      // Le cache ne doit jamais faire échouer la requête
+      logger.error(`Response cache read failed for ${cacheKey}`, error);
+      return null;
+    }
+  }
+
+  private computeAndStore<T>(
+    policy: ResponseCachePolicy,
+    ticker: string,
+    cacheKey: string,
+    compute: (context: ComputeContext) => Promise<T>
+  ): Promise<CachedResponse<T>> {
+    const pending = this.inFlight.get(cacheKey);
+    if (pending) {
+      return pending as Promise<CachedResponse<T>>;
+    }
+
+    const promise = (async () => {
+      const degraded: string[] = [];
+      const data = await compute({ degrade: (...sources) => degraded.push(...sources) });
+      const computedAt = new Date();
+      if (degraded.length > 0) {
+        // Réponse partielle : servie mais pas mise en cache (et bail relâché à expiration)
+        logger.warn(`Degraded response not cached for ${cacheKey}`, { degraded });
+        return { data, cached: false, stale: false, computedAt: computedAt.toISOString(), degraded };
+      }
+      await this.write(policy, ticker, cacheKey, data, computedAt);
+      return { data, cached: false, stale: false, computedAt: computedAt.toISOString() };
+    })().finally(() => {
+      this.inFlight.delete(cacheKey);
+    });
+
+    this.inFlight.set(cacheKey, promise);
+    return promise;
+  }
+
+  /**
+   * Réponse périmée : l'instance qui obtient le bail recalcule avant de répondre (une
+   * Lambda est gelée après la réponse, un rafraîchissement en arrière-plan n'aboutirait
+   * pas) ; les autres, y compris les requêtes de cette instance arrivées pendant le
+   * recalcul, servent la version périmée sans l'attendre. En cas d'échec, la version
+   * périmée est servie.
+   */
+  private async refreshStale<T>(
+    policy: ResponseCachePolicy,
+    ticker: string,
+    cacheKey: string,
+    compute: (context: ComputeContext) => Promise<T>,
+    stale: CachedResponse<T>
+  ): Promise<CachedResponse<T>> {
+    const log = logger.child({ operation: 'responseCache', cacheKey });
+    if (this.inFlight.has(cacheKey)) {
+      // Le recalcul se termine dans la requête qui l'a lancé
+      log.info('Response cache hit (stale), refresh in progress in this instance');
+      return stale;
+    }
+
+    try {
+      const { data: claimed, error } = await supabase.rpc('claim_analysis_cache_refresh', {
+        p_cache_key: cacheKey,
+        p_lease_seconds: REFRESH_LEASE_SECONDS,
+      });
+      if (error || !claimed) {
+        log.info('Response cache hit (stale), refresh in progress elsewhere');
+        return stale;
+      }
+
+      log.info('Response cache hit (stale), refreshing');
+      const refreshed = await this.computeAndStore(policy, ticker, cacheKey, compute);
+      // Une réponse dégradée ne remplace pas une version complète encore servable
+      return refreshed.degraded ? stale : refreshed;
+    } catch (error) {
+      log.warn(`Refresh failed for ${cacheKey}, serving stale response`, error);
+      return stale;
+    }
+  }
+
+  private async write<T>(
+    policy: ResponseCachePolicy,
+    ticker: string,
+    cacheKey: string,
+    data: T,
+    computedAt: Date
+  ): Promise<void> {
+    const freshSeconds = freshSecondsFor(policy.inputs, computedAt);
+    const staleSeconds = Math.min(
+      freshSeconds * (policy.staleFactor ?? 10),
+      policy.maxStaleSeconds ?? 24 * 60 * 60
+    );
+
+    try {
+      const { error } = await supabase.from(TABLE_NAME).upsert(
+        {
+          cache_key: cacheKey,
+          endpoint: policy.endpoint,
+          version: policy.version,
+          ticker,
+          data,
+          computed_at: computedAt.toISOString(),
+          fresh_until: new Date(computedAt.getTime() + freshSeconds * 1000).toISOString(),
+          expires_at: new Date(computedAt.getTime() + (freshSeconds + staleSeconds) * 1000).toISOString(),
+          refreshing_until: null,
+        },
+        { onConflict: 'cache_key' }
+      );
+
+      if (error) {
+        throw new CacheError(`Failed to write response cache: ${error.message}`, error);
+      }
+      logger.debug(`Cached response ${cacheKey}`, { freshSeconds, staleSeconds });
+    } catch (error) {
+      logger.error(`Response cache write failed for ${cacheKey}`, error);
+      // Ne pas throw pour ne pas faire échouer l'opération principale
+    }
+  }
+}
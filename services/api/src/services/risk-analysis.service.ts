@@ -7,6 +7,7 @@ import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as fmp from '../fmp';
 import * as uw from '../unusual-whales';
+import { TimeSeriesService } from './time-series.service';
 import type {
   RiskAnalysis,
   RiskAnalysisResponse,
@@ -15,8 +16,14 @@ import type {
   LiquidityRisk,
   RiskRecommendation,
 } from '../types/combined-analysis';
+import type { DarkPoolPoint, FlowAlertPoint } from '../types/time-series';
+
+// Flows et prints de la dernière séance ayant des données (store de séries temporelles)
+const MARKET_WINDOW_SESSIONS = 1;
 
 export class RiskAnalysisService {
+  private timeSeries = new TimeSeriesService();
+
   /**
    * Analyse complète des risques d'un ticker
    */
@@ -44,8 +51,8 @@ export class RiskAnalysisService {
       // Récupération des données de marché (UW)
       const [shortInterest, optionsFlow, darkPool, volatility] = await Promise.allSettled([
         uw.getUWShortInterestAndFloat(upperTicker),
-        uw.getUWRecentFlows(upperTicker, { min_premium: 50000 }),
-        uw.getUWDarkPoolTrades(upperTicker, { limit: 50 }),
+        this.timeSeries.getRecentFlowAlerts(upperTicker, MARKET_WINDOW_SESSIONS, { minPremium: 50000 }),
+        this.timeSeries.getRecentDarkPoolPrints(upperTicker, MARKET_WINDOW_SESSIONS, { limit: 50 }),
         uw.getUWVolatilityStats(upperTicker),
       ]);
 
@@ -185,8 +192,8 @@ export class RiskAnalysisService {
 
   private analyzeMarketRisk(
     shortInterest: PromiseSettledResult<any>,
-    optionsFlow: PromiseSettledResult<any>,
-    darkPool: PromiseSettledResult<any>,
+    optionsFlow: PromiseSettledResult<FlowAlertPoint[]>,
+    darkPool: PromiseSettledResult<DarkPoolPoint[]>,
     volatility: PromiseSettledResult<any>
   ): MarketRisk {
     let score = 50;
@@ -232,10 +239,10 @@ export class RiskAnalysisService {
     }
 
     // Analyser le flow d'options
-    if (optionsFlow.status === 'fulfilled' && optionsFlow.value?.success && optionsFlow.value.data) {
-      const flows = Array.isArray(optionsFlow.value.data) ? optionsFlow.value.data : [];
-      const calls = flows.filter((f: any) => f.is_call && f.premium > 0);
-      const puts = flows.filter((f: any) => f.is_put && f.premium > 0);
+    if (optionsFlow.status === 'fulfilled') {
+      const flows = optionsFlow.value;
+      const calls = flows.filter((f) => f.isCall && f.premium > 0);
+      const puts = flows.filter((f) => !f.isCall && f.premium > 0);
       const ratio = calls.length > 0 && puts.length > 0 ? calls.length / puts.length : 1;
       
       if (ratio < 0.7) {
@@ -251,8 +258,8 @@ export class RiskAnalysisService {
     }
 
     // Analyser le dark pool
-    if (darkPool.status === 'fulfilled' && darkPool.value?.success && darkPool.value.data) {
-      const trades = Array.isArray(darkPool.value.data) ? darkPool.value.data : [];
+    if (darkPool.status === 'fulfilled') {
+      const trades = darkPool.value;
       
       if (trades.length > 30) {
         factors.darkPoolActivity = 'high';
@@ -275,7 +282,7 @@ export class RiskAnalysisService {
   }
 
   private analyzeLiquidityRisk(
-    optionsFlow: PromiseSettledResult<any>,
+    optionsFlow: PromiseSettledResult<FlowAlertPoint[]>,
     volatility: PromiseSettledResult<any>
   ): LiquidityRisk {
     let score = 50;
@@ -286,8 +293,8 @@ export class RiskAnalysisService {
     };
 
     // Analyser la liquidité des options
-    if (optionsFlow.status === 'fulfilled' && optionsFlow.value?.success && optionsFlow.value.data) {
-      const flows = Array.isArray(optionsFlow.value.data) ? optionsFlow.value.data : [];
+    if (optionsFlow.status === 'fulfilled') {
+      const flows = optionsFlow.value;
       
       if (flows.length > 50) {
         factors.optionsLiquidity = 'high';
@@ -4,11 +4,15 @@
  */
 
 import { logger } from '../utils/logger';
-import { handleError } from '../utils/errors';
-import * as uw from '../unusual-whales';
+import { handleError, ValidationError } from '../utils/errors';
+import { TickerBundleService, bundleResult, recordTickerHit } from './ticker-bundle.service';
+import { TickerScoreRepository } from '../repositories/ticker-score.repository';
+import { countUnusual, optionColumns, sideTotals, sum } from './options-kernel.service';
 import type {
   TickerScore,
   TickerScoreResponse,
+  TickerScoresResponse,
+  TimestampedTickerScore,
   ScoreBreakdown,
   ScoreSignals,
   OptionsSignal,
@@ -19,6 +23,7 @@ import type {
   Recommendation,
   ScoreWeights,
 } from '../types/scoring';
+import type { TickerBundle } from '../types/ticker-bundle';
 
 // Valeurs par défaut inline pour éviter les problèmes d'import au runtime
 const DEFAULT_WEIGHTS: ScoreWeights = {
@@ -29,8 +34,13 @@ const DEFAULT_WEIGHTS: ScoreWeights = {
   greeks: 0.15,
 };
 
+/** Nombre maximum de tickers par requête de scoring batch */
+export const MAX_BATCH_TICKERS = 50;
+
 export class ScoringService {
   private weights: ScoreWeights;
+  private bundles = new TickerBundleService();
+  private scores = new TickerScoreRepository();
 
   constructor(weights?: ScoreWeights) {
     this.weights = weights || DEFAULT_WEIGHTS;
@@ -42,126 +52,189 @@ export class ScoringService {
   async calculateTickerScore(ticker: string): Promise<TickerScoreResponse> {
     return handleError(async () => {
       const upperTicker = ticker.toUpperCase();
-      const log = logger.child({ ticker: upperTicker, operation: 'calculateTickerScore' });
-      log.info('Calculating ticker score');
-
-      // Récupérer toutes les données en parallèle
-      const [
-        optionsFlow,
-        insiderActivity,
-        darkPoolTrades,
-        shortInterest,
-        greeks,
-        maxPain,
-      ] = await Promise.allSettled([
-        uw.getUWRecentFlows(upperTicker, { min_premium: 50000 }),
-        uw.getUWStockInsiderBuySells(upperTicker, {}),
-        uw.getUWDarkPoolTrades(upperTicker, { limit: 50 }),
-        uw.getUWShortInterestAndFloat(upperTicker),
-        this.getLatestGreeks(upperTicker),
-        uw.getUWMaxPain(upperTicker, {}),
-      ]);
+      logger.child({ ticker: upperTicker, operation: 'calculateTickerScore' }).info('Calculating ticker score');
 
-      log.info('Data fetched for scoring', {
-        optionsFlow: optionsFlow.status,
-        insiderActivity: insiderActivity.status,
-        darkPoolTrades: darkPoolTrades.status,
-        shortInterest: shortInterest.status,
-        greeks: greeks.status,
-        maxPain: maxPain.status,
-      });
+      // Données partagées préchauffées (bundle du ticker)
+      const bundle = await this.bundles.getBundle(upperTicker);
+      const score = this.scoreBundle(bundle);
 
-      // Calculer les sous-scores
-      const optionsSignal = this.scoreOptionsFlow(optionsFlow);
-      const insidersSignal = this.scoreInsiderActivity(insiderActivity);
-      const darkPoolSignal = this.scoreDarkPoolTrades(darkPoolTrades);
-      const shortInterestSignal = this.scoreShortInterest(shortInterest);
-      const greeksSignal = this.scoreGreeks(greeks, maxPain);
-
-      // Score composite pondéré
-      const overall = Math.round(
-        optionsSignal.score * this.weights.options +
-        insidersSignal.score * this.weights.insiders +
-        darkPoolSignal.score * this.weights.darkPool +
-        shortInterestSignal.score * this.weights.shortInterest +
-        greeksSignal.score * this.weights.greeks
-      );
+      return {
+        success: true,
+        data: score,
+        cached: false,
+        timestamp: new Date().toISOString(),
+      };
+    }, `Calculate ticker score for ${ticker}`);
+  }
 
-      // Normaliser entre 0 et 100
-      const normalizedOverall = Math.max(0, Math.min(100, overall));
+  /**
+   * Scores de plusieurs tickers (watchlists) : scores précalculés encore frais, puis
+   * calcul des autres à partir de leurs bundles, lus en une seule requête
+   */
+  async calculateTickerScores(tickers: string[]): Promise<TickerScoresResponse> {
+    return handleError(async () => {
+      const upperTickers = Array.from(
+        new Set(tickers.map((t) => t.trim().toUpperCase()).filter((t) => t.length > 0))
+      );
+      if (upperTickers.length === 0) {
+        throw new ValidationError('At least one ticker is required', 'tickers');
+      }
+      if (upperTickers.length > MAX_BATCH_TICKERS) {
+        throw new ValidationError(`At most ${MAX_BATCH_TICKERS} tickers per request`, 'tickers');
+      }
+      const log = logger.child({ operation: 'calculateTickerScores' });
 
-      // Générer la recommandation
-      const recommendation = this.generateRecommendation(normalizedOverall);
+      let precomputed = new Map<string, TimestampedTickerScore>();
+      try {
+        precomputed = await this.scores.findFresh(upperTickers);
+      } catch (error) {
+        log.warn('Precomputed scores unavailable', { error });
+      }
 
-      // Calculer la confiance basée sur la disponibilité des données
-      const confidence = this.calculateConfidence([
-        optionsFlow,
-        insiderActivity,
-        darkPoolTrades,
-        shortInterest,
-        greeks,
-        maxPain,
+      const missing = upperTickers.filter((ticker) => !precomputed.has(ticker));
+      // Tickers sans score précalculé : comptés dans la popularité pour le prochain préchauffage
+      // (attendu avec les bundles : Lambda gèle les promesses en suspens après la réponse)
+      const [bundles] = await Promise.all([
+        this.bundles.getBundles(missing),
+        Promise.allSettled(missing.map((ticker) => recordTickerHit(ticker))),
       ]);
+      const computed = this.scoreBundles(Array.from(bundles.values()));
+      try {
+        await this.scores.saveMany(computed);
+      } catch (error) {
+        log.warn('Failed to store computed scores', { error });
+      }
 
-      log.info('Score calculated', {
-        overall: normalizedOverall,
-        recommendation,
-        confidence,
-        breakdown: {
-          options: optionsSignal.score,
-          insiders: insidersSignal.score,
-          darkPool: darkPoolSignal.score,
-          shortInterest: shortInterestSignal.score,
-          greeks: greeksSignal.score,
-        },
+      const byTicker = new Map(precomputed);
+      for (const score of computed) {
+        byTicker.set(score.ticker, score);
+      }
+      const data = upperTickers
+        .map((ticker) => byTicker.get(ticker))
+        .filter((score): score is TimestampedTickerScore => score !== undefined);
+
+      log.info('Batch scores calculated', {
+        requested: upperTickers.length,
+        precomputed: precomputed.size,
+        computed: computed.length,
+        unavailable: upperTickers.length - data.length,
       });
 
-      const breakdown: ScoreBreakdown = {
-        options: optionsSignal.score,
-        insiders: insidersSignal.score,
-        darkPool: darkPoolSignal.score,
-        shortInterest: shortInterestSignal.score,
-        greeks: greeksSignal.score,
-      };
-
-      const signals: ScoreSignals = {
-        options: optionsSignal,
-        insiders: insidersSignal,
-        darkPool: darkPoolSignal,
-        shortInterest: shortInterestSignal,
-        greeks: greeksSignal,
-      };
-
-      const score: TickerScore = {
-        ticker: upperTicker,
-        overall: normalizedOverall,
-        breakdown,
-        recommendation,
-        confidence,
-        signals,
-      };
-
       return {
         success: true,
-        data: score,
-        cached: false,
+        data,
+        precomputed: precomputed.size,
+        computed: computed.length,
         timestamp: new Date().toISOString(),
       };
-    }, `Calculate ticker score for ${ticker}`);
+    }, 'Calculate ticker scores');
   }
 
   /**
-   * Récupère les greeks les plus récents (première expiration disponible)
+   * Calculer et stocker les scores de bundles déjà chargés (job ticker-warmup)
    */
-  private async getLatestGreeks(ticker: string): Promise<any> {
-    // Essayer de récupérer les greeks pour l'expiration la plus proche
-    // Pour simplifier, on utilise une date d'expiration proche (ex: 7 jours)
-    const futureDate = new Date();
-    futureDate.setDate(futureDate.getDate() + 7);
-    const expiry = futureDate.toISOString().split('T')[0];
-
-    // Si l'API échoue, Promise.allSettled capturera l'erreur automatiquement
-    return await uw.getUWGreeks(ticker, { expiry });
+  async precomputeScores(bundles: TickerBundle[]): Promise<number> {
+    const scores = this.scoreBundles(bundles);
+    await this.scores.saveMany(scores);
+    return scores.length;
+  }
+
+  /**
+   * Scores d'un ensemble de bundles en une passe ; un score reste frais tant que son bundle l'est
+   */
+  scoreBundles(bundles: TickerBundle[]): TimestampedTickerScore[] {
+    const computedAt = new Date().toISOString();
+    return bundles.map((bundle) => ({
+      ...this.scoreBundle(bundle),
+      computedAt,
+      freshUntil: bundle.expiresAt,
+    }));
+  }
+
+  /**
+   * Score composite d'un bundle (aucun appel amont)
+   */
+  scoreBundle(bundle: TickerBundle): TickerScore {
+    const log = logger.child({ ticker: bundle.ticker, operation: 'scoreBundle' });
+    const optionsFlow = bundleResult(bundle, 'optionsFlow');
+    const insiderActivity = bundleResult(bundle, 'insiders');
+    const darkPoolTrades = bundleResult(bundle, 'darkPool');
+    const shortInterest = bundleResult(bundle, 'shortInterest');
+    const greeks = bundleResult(bundle, 'greeks');
+    const maxPain = bundleResult(bundle, 'maxPain');
+
+    log.debug('Data available for scoring', {
+      optionsFlow: optionsFlow.status,
+      insiderActivity: insiderActivity.status,
+      darkPoolTrades: darkPoolTrades.status,
+      shortInterest: shortInterest.status,
+      greeks: greeks.status,
+      maxPain: maxPain.status,
+    });
+
+    // Calculer les sous-scores
+    const optionsSignal = this.scoreOptionsFlow(optionsFlow);
+    const insidersSignal = this.scoreInsiderActivity(insiderActivity);
+    const darkPoolSignal = this.scoreDarkPoolTrades(darkPoolTrades);
+    const shortInterestSignal = this.scoreShortInterest(shortInterest);
+    const greeksSignal = this.scoreGreeks(greeks, maxPain);
+
+    // Score composite pondéré
+    const overall = Math.round(
+      optionsSignal.score * this.weights.options +
+      insidersSignal.score * this.weights.insiders +
+      darkPoolSignal.score * this.weights.darkPool +
+      shortInterestSignal.score * this.weights.shortInterest +
+      greeksSignal.score * this.weights.greeks
+    );
+
+    // Normaliser entre 0 et 100
+    const normalizedOverall = Math.max(0, Math.min(100, overall));
+
+    // Générer la recommandation
+    const recommendation = this.generateRecommendation(normalizedOverall);
+
+    // Calculer la confiance basée sur la disponibilité des données
+    const confidence = this.calculateConfidence([
+      optionsFlow,
+      insiderActivity,
+      darkPoolTrades,
+      shortInterest,
+      greeks,
+      maxPain,
+    ]);
+
+    const breakdown: ScoreBreakdown = {
+      options: optionsSignal.score,
+      insiders: insidersSignal.score,
+      darkPool: darkPoolSignal.score,
+      shortInterest: shortInterestSignal.score,
+      greeks: greeksSignal.score,
+    };
+
+    log.info('Score calculated', {
+      overall: normalizedOverall,
+      recommendation,
+      confidence,
+      breakdown,
+    });
+
+    const signals: ScoreSignals = {
+      options: optionsSignal,
+      insiders: insidersSignal,
+      darkPool: darkPoolSignal,
+      shortInterest: shortInterestSignal,
+      greeks: greeksSignal,
+    };
+
+    return {
+      ticker: bundle.ticker,
+      overall: normalizedOverall,
+      breakdown,
+      recommendation,
+      confidence,
+      signals,
+    };
   }
 
   /**
@@ -179,26 +252,20 @@ export class ScoringService {
       };
     }
 
-    const flows = Array.isArray(optionsFlow.value.data) ? optionsFlow.value.data : [];
-    const calls = flows.filter((f: any) => f.is_call && (f.premium > 0 || f.volume > 0));
-    const puts = flows.filter((f: any) => f.is_put && (f.premium > 0 || f.volume > 0));
-
-    const callVolume = calls.reduce((sum: number, c: any) => sum + (c.volume || c.size || c.contracts || 0), 0);
-    const putVolume = puts.reduce((sum: number, p: any) => sum + (p.volume || p.size || p.contracts || 0), 0);
+    const flows = optionColumns(Array.isArray(optionsFlow.value.data) ? optionsFlow.value.data : []);
+    const { calls, puts, callVolume, putVolume } = sideTotals(flows);
 
     const callPutRatio = putVolume > 0
       ? callVolume / putVolume
-      : calls.length > 0 && puts.length > 0
-      ? calls.length / puts.length
-      : calls.length > 0
+      : calls > 0 && puts > 0
+      ? calls / puts
+      : calls > 0
       ? 2
-      : puts.length > 0
+      : puts > 0
       ? 0.5
       : 1;
 
-    const unusualActivity = flows.filter((f: any) =>
-      f.is_sweep || f.is_block || f.is_floor || (f.premium && f.premium > 100000) || (f.size && f.size > 1000)
-    ).length;
+    const unusualActivity = countUnusual(flows, 100000, 1000);
 
     let score = 50;
     if (callPutRatio > 1.5) score += 25;
@@ -305,8 +372,8 @@ export class ScoringService {
       };
     }
 
-    const trades = Array.isArray(darkPoolTrades.value.data) ? darkPoolTrades.value.data : [];
-    const totalVolume = trades.reduce((sum: number, t: any) => sum + (t.volume || t.size || 0), 0);
+    const trades = optionColumns(Array.isArray(darkPoolTrades.value.data) ? darkPoolTrades.value.data : []);
+    const totalVolume = sum(trades.volume);
 
     let score = 50;
     if (trades.length > 30) score += 20;
@@ -4,11 +4,14 @@
  */
 
 import { logger } from '../utils/logger';
-import { handleError } from '../utils/errors';
+import { ExternalApiError, handleError } from '../utils/errors';
 import * as fmp from '../fmp';
 import * as uw from '../unusual-whales';
+import { CacheService } from './cache.service';
+import { mapWithConcurrency } from '../utils/concurrency';
 import type {
   SectorAnalysis,
+  SectorMetrics,
   SectorAnalysisResponse,
   SectorSentiment,
   ETFFlow,
@@ -24,7 +27,44 @@ import type {
   RotationDirection,
 } from '../types/sector-rotation';
 
+// Secteurs principaux à analyser
+const SECTORS = [
+  'Technology',
+  'Healthcare',
+  'Financial',
+  'Energy',
+  'Consumer Cyclical',
+  'Consumer Defensive',
+  'Industrials',
+  'Utilities',
+  'Real Estate',
+  'Communication Services',
+];
+
+// Tickers retenus par secteur et appels FMP simultanés pour les états financiers
+const SECTOR_TICKER_LIMIT = 20;
+const STATEMENT_CONCURRENCY = 4;
+
+const PE_FIELDS = ['priceToEarningsRatio'] as const;
+const GROWTH_FIELDS = ['revenue'] as const;
+
+function mean(values: number[]): number {
+  return values.length > 0 ? values.reduce((sum, v) => sum + v, 0) / values.length : 0;
+}
+
+function median(values: number[]): number {
+  if (values.length === 0) {
+    return 0;
+  }
+  const sorted = [...values].sort((a, b) => a - b);
+  const mid = Math.floor(sorted.length / 2);
+  return sorted.length % 2 === 0 ? (sorted[mid - 1] + sorted[mid]) / 2 : sorted[mid];
+}
+
 export class SectorAnalysisService {
+  // Agrégats fondamentaux par secteur (états financiers : un rafraîchissement par jour suffit)
+  private metricsCache = new CacheService({ tableName: 'sector_metrics_cache', ttlHours: 24 });
+
   /**
    * Analyse un secteur : combine FMP fundamentals + UW sentiment
    */
@@ -33,96 +73,44 @@ export class SectorAnalysisService {
       const log = logger.child({ sector, operation: 'analyzeSector' });
       log.info('Analyzing sector');
 
-      // Récupération des données UW
-      const [sectorTide, sectorTickers] = await Promise.allSettled([
+      // Sentiment (UW) et agrégats fondamentaux (cache sectoriel) en parallèle
+      const [sectorTide, metricsResult] = await Promise.allSettled([
         uw.getUWSectorTide(sector, {}),
-        uw.getUWSectorTickers(sector),
+        this.getSectorMetrics(sector),
       ]);
 
-      log.info('UW sector data fetched', {
+      log.info('Sector data fetched', {
         sectorTide: sectorTide.status,
-        sectorTickers: sectorTickers.status,
+        metrics: metricsResult.status,
       });
 
-      // Extraire les tickers du secteur
-      const tickers: string[] = [];
-      if (sectorTickers.status === 'fulfilled' && sectorTickers.value?.success && sectorTickers.value.data) {
-        const t = Array.isArray(sectorTickers.value.data) ? sectorTickers.value.data : [];
-        // Les tickers sont directement dans un tableau de strings
-        tickers.push(...t.slice(0, 20).map((ticker: string) => ticker));
-        log.info('Sector tickers extracted', { count: tickers.length });
-      } else {
-        log.warn('Sector tickers data not available', {
-          status: sectorTickers.status,
-          hasValue: sectorTickers.status === 'fulfilled' && !!sectorTickers.value,
-          hasSuccess: sectorTickers.status === 'fulfilled' && sectorTickers.value?.success,
-          hasData: sectorTickers.status === 'fulfilled' && sectorTickers.value?.success && !!sectorTickers.value.data,
+      const metrics = metricsResult.status === 'fulfilled' ? metricsResult.value : null;
+      if (!metrics) {
+        log.warn('Sector metrics not available', {
+          reason: metricsResult.status === 'rejected' ? String(metricsResult.reason) : undefined,
         });
       }
+      const tickers = metrics?.tickers || [];
 
-      // Récupérer les fundamentals pour chaque ticker
-      const fundamentals = await Promise.allSettled(
-        tickers.map(ticker => 
-          Promise.allSettled([
-            fmp.getFMPFinancialRatios({ symbol: ticker, limit: 1 }),
-            fmp.getFMPIncomeStatement({ symbol: ticker, limit: 2 }),
-            fmp.getFMPStockQuote(ticker),
-          ])
-        )
-      );
+      // Prix : un seul appel /batch-quote pour tout le secteur
+      const prices = await this.getBatchPrices(tickers);
 
-      // Calculer les moyennes et stocker les données par ticker
-      const peRatios: number[] = [];
-      const revenueGrowths: number[] = [];
       const tickerData: Map<string, { pe?: number; price?: number; growth?: number }> = new Map();
-
-      for (let i = 0; i < fundamentals.length && i < tickers.length; i++) {
-        const ticker = tickers[i];
-        const result = fundamentals[i];
-        
-        if (result.status === 'fulfilled') {
-          const [ratios, income, quote] = result.value;
-          const tickerInfo: { pe?: number; price?: number; growth?: number } = {};
-          
-          if (ratios.status === 'fulfilled' && ratios.value?.success && ratios.value.data?.length > 0) {
-            const pe = ratios.value.data[0].priceEarningsRatio;
-            if (pe && pe > 0) {
-              peRatios.push(pe);
-              tickerInfo.pe = pe;
-            }
-          }
-
-          if (income.status === 'fulfilled' && income.value?.success && income.value.data?.length >= 2) {
-            const current = income.value.data[0];
-            const previous = income.value.data[1];
-            if (current.revenue && previous.revenue) {
-              const growth = ((current.revenue - previous.revenue) / previous.revenue) * 100;
-              revenueGrowths.push(growth);
-              tickerInfo.growth = growth;
-            }
-          }
-
-          // Extraire le prix depuis la quote
-          if (quote.status === 'fulfilled' && quote.value?.success && quote.value.data) {
-            const quoteData = Array.isArray(quote.value.data) ? quote.value.data[0] : quote.value.data;
-            const price = quoteData?.price || quoteData?.close || quoteData?.lastPrice || quoteData?.currentPrice || 0;
-            if (price > 0) {
-              tickerInfo.price = price;
-            }
-          }
-
-          if (Object.keys(tickerInfo).length > 0) {
-            tickerData.set(ticker, tickerInfo);
-          }
+      for (const ticker of tickers) {
+        const tickerInfo: { pe?: number; price?: number; growth?: number } = {
+          ...metrics!.tickerMetrics[ticker],
+        };
+        const price = prices.get(ticker);
+        if (price) {
+          tickerInfo.price = price;
+        }
+        if (Object.keys(tickerInfo).length > 0) {
+          tickerData.set(ticker, tickerInfo);
         }
       }
 
-      const averagePE = peRatios.length > 0
-        ? peRatios.reduce((sum, pe) => sum + pe, 0) / peRatios.length
-        : 0;
-      const averageGrowth = revenueGrowths.length > 0
-        ? revenueGrowths.reduce((sum, g) => sum + g, 0) / revenueGrowths.length
-        : 0;
+      const averagePE = metrics?.averagePE || 0;
+      const averageGrowth = metrics?.averageGrowth || 0;
 
       // Analyser le sentiment
       const sentiment: SectorSentiment = {
@@ -197,6 +185,9 @@ export class SectorAnalysisService {
         sector,
         averagePE: Math.round(averagePE * 10) / 10,
         averageGrowth: Math.round(averageGrowth * 10) / 10,
+        medianPE: metrics ? Math.round(metrics.medianPE * 10) / 10 : undefined,
+        medianGrowth: metrics ? Math.round(metrics.medianGrowth * 10) / 10 : undefined,
+        metricsComputedAt: metrics?.computedAt,
         sentiment,
         etfFlows,
         topPerformers,
@@ -212,6 +203,141 @@ export class SectorAnalysisService {
     }, `Analyze sector ${sector}`);
   }
 
+  /**
+   * Agrégats fondamentaux du secteur : cache, sinon calcul à la demande
+   */
+  async getSectorMetrics(sector: string, forceRefresh: boolean = false): Promise<SectorMetrics> {
+    if (!forceRefresh) {
+      const cached = await this.metricsCache.get<{ data: SectorMetrics }>(sector, 'sector');
+      if (cached?.data) {
+        return cached.data;
+      }
+    }
+
+    const metrics = await this.computeSectorMetrics(sector);
+    if (metrics.tickers.length > 0) {
+      await this.metricsCache.set(sector, { data: metrics }, 'sector');
+    }
+    return metrics;
+  }
+
+  /**
+   * Recalculer les agrégats de tous les secteurs (job planifié sector-metrics)
+   */
+  async refreshAllSectorMetrics(): Promise<{ refreshed: string[]; failed: string[] }> {
+    const log = logger.child({ operation: 'refreshAllSectorMetrics' });
+    const refreshed: string[] = [];
+    const failed: string[] = [];
+
+    // Un secteur à la fois : le pool borné de chaque secteur fixe la charge sur FMP
+    for (const sector of SECTORS) {
+      try {
+        const metrics = await this.getSectorMetrics(sector, true);
+        refreshed.push(sector);
+        log.info('Sector metrics refreshed', { sector, tickers: metrics.tickers.length });
+      } catch (error) {
+        failed.push(sector);
+        log.error(`Failed to refresh metrics for ${sector}`, error);
+      }
+    }
+
+    return { refreshed, failed };
+  }
+
+  /**
+   * Calculer PE et croissance du CA par ticker, puis moyennes et médianes du secteur
+   */
+  private async computeSectorMetrics(sector: string): Promise<SectorMetrics> {
+    const log = logger.child({ sector, operation: 'computeSectorMetrics' });
+
+    // Sans liste de tickers, un agrégat vide serait mis en cache 24h comme un résultat valide
+    const sectorTickers = await uw.getUWSectorTickers(sector);
+    if (!sectorTickers?.success || !Array.isArray(sectorTickers.data) || sectorTickers.data.length === 0) {
+      throw new ExternalApiError('Unusual Whales', `No tickers returned for sector ${sector}`);
+    }
+    const tickers: string[] = sectorTickers.data.slice(0, SECTOR_TICKER_LIMIT);
+
+    const results = await mapWithConcurrency(tickers, STATEMENT_CONCURRENCY, (ticker) =>
+      Promise.allSettled([
+        fmp.getFMPStatementProjection('ratios', { symbol: ticker, limit: 1 }, PE_FIELDS),
+        fmp.getFMPStatementProjection('income-statement', { symbol: ticker, limit: 2 }, GROWTH_FIELDS),
+      ])
+    );
+
+    const tickerMetrics: SectorMetrics['tickerMetrics'] = {};
+    const peRatios: number[] = [];
+    const revenueGrowths: number[] = [];
+
+    results.forEach((result, i) => {
+      if (result.status !== 'fulfilled') {
+        return;
+      }
+      const [ratios, income] = result.value;
+      const info: { pe?: number; growth?: number } = {};
+
+      if (ratios.status === 'fulfilled' && ratios.value?.success && ratios.value.data.length > 0) {
+        const pe = ratios.value.data.columns.priceToEarningsRatio[0];
+        if (pe && pe > 0) {
+          peRatios.push(pe);
+          info.pe = pe;
+        }
+      }
+
+      if (income.status === 'fulfilled' && income.value?.success && income.value.data.length >= 2) {
+        const [current, previous] = income.value.data.columns.revenue;
+        if (current && previous) {
+          const growth = ((current - previous) / previous) * 100;
+          revenueGrowths.push(growth);
+          info.growth = growth;
+        }
+      }
+
+      if (Object.keys(info).length > 0) {
+        tickerMetrics[tickers[i]] = info;
+      }
+    });
+
+    log.info('Sector metrics computed', {
+      tickers: tickers.length,
+      withPE: peRatios.length,
+      withGrowth: revenueGrowths.length,
+    });
+
+    return {
+      sector,
+      tickers,
+      tickerMetrics,
+      averagePE: mean(peRatios),
+      averageGrowth: mean(revenueGrowths),
+      medianPE: median(peRatios),
+      medianGrowth: median(revenueGrowths),
+      computedAt: new Date().toISOString(),
+    };
+  }
+
+  /**
+   * Prix courants des tickers (un appel /batch-quote)
+   */
+  private async getBatchPrices(tickers: string[]): Promise<Map<string, number>> {
+    const prices = new Map<string, number>();
+    if (tickers.length === 0) {
+      return prices;
+    }
+
+    try {
+      const quotes = await fmp.getFMPBatchStockQuotes(tickers);
+      for (const quote of quotes.data || []) {
+        const price = quote?.price || quote?.close || quote?.lastPrice || quote?.currentPrice || 0;
+        if (quote?.symbol && price > 0) {
+          prices.set(quote.symbol, price);
+        }
+      }
+    } catch (error) {
+      logger.warn('Batch quotes not available for sector', { error, count: tickers.length });
+    }
+    return prices;
+  }
+
   /**
    * Identifier les rotations sectorielles
    */
@@ -220,20 +346,6 @@ export class SectorAnalysisService {
       const log = logger.child({ operation: 'detectSectorRotation' });
       log.info('Detecting sector rotation');
 
-      // Secteurs principaux à analyser
-      const SECTORS = [
-        'Technology',
-        'Healthcare',
-        'Financial',
-        'Energy',
-        'Consumer Cyclical',
-        'Consumer Defensive',
-        'Industrials',
-        'Utilities',
-        'Real Estate',
-        'Communication Services',
-      ];
-
       // Récupérer les données de tous les secteurs en parallèle
       const [sectorTidesResults, marketTideResult] = await Promise.allSettled([
         Promise.allSettled(
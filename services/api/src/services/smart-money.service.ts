@@ -7,17 +7,45 @@ import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as uw from '../unusual-whales';
 import * as fmp from '../fmp';
+import { mapWithConcurrency } from '../utils/concurrency';
+import { FundSnapshotRepository } from '../repositories/fund-snapshot.repository';
 import type {
   TopHedgeFundsResponse,
   CopyTradesResponse,
   HedgeFund,
   CopyTrade,
   TradingPattern,
+  FundHoldingsSnapshot,
+  FundSnapshotRefreshResult,
 } from '../types/smart-money';
 
+// Fonds candidats au classement et appels holdings simultanés
+const FUND_LIMIT = 50;
+const HOLDINGS_CONCURRENCY = 5;
+
+// Snapshots déjà lus dans cette instance (clé : institution|date de rapport)
+const snapshotMemo = new Map<string, FundHoldingsSnapshot>();
+
+function snapshotKey(institution: string, reportDate: string): string {
+  return `${institution}|${reportDate}`;
+}
+
+/**
+ * Date de rapport 13F courante d'une institution (fin de période, sinon date de dépôt) ;
+ * null si UW n'en fournit aucune
+ */
+function reportDateOf(fund: any): string | null {
+  const date = fund.date || fund.filing_date;
+  return date ? String(date).split('T')[0] : null;
+}
+
 export class SmartMoneyService {
+  private snapshots = new FundSnapshotRepository();
+
   /**
    * Identifier les top hedge funds par performance
+   * Lecture des snapshots par (fonds, date de rapport) ; seuls les fonds ayant publié un
+   * nouveau 13F depuis le dernier calcul sont rechargés.
    */
   async getTopPerformingHedgeFunds(
     period: '1M' | '3M' | '6M' | '1Y' = '3M'
@@ -26,13 +54,8 @@ export class SmartMoneyService {
       const log = logger.child({ operation: 'getTopPerformingHedgeFunds', period });
       log.info('Fetching top performing hedge funds');
 
-      // Récupérer toutes les institutions
-      const institutionsResult = await uw.getUWInstitutions({
-        order: 'value',
-        order_direction: 'desc',
-      });
-
-      if (!institutionsResult.success || !institutionsResult.data) {
+      const hedgeFunds = await this.getHedgeFundCandidates();
+      if (!hedgeFunds) {
         log.warn('Failed to fetch institutions');
         return {
           success: true,
@@ -44,79 +67,25 @@ export class SmartMoneyService {
         };
       }
 
-      const institutions = Array.isArray(institutionsResult.data)
-        ? institutionsResult.data
-        : [];
-
-      // Filtrer les hedge funds (approximation : institutions avec "fund" dans le nom ou catégorie)
-      const hedgeFunds = institutions.filter(
-        (inst: any) =>
-          inst.name?.toLowerCase().includes('fund') ||
-          inst.name?.toLowerCase().includes('capital') ||
-          inst.name?.toLowerCase().includes('partners') ||
-          inst.category?.toLowerCase().includes('hedge')
-      );
-
       log.info('Hedge funds filtered', { count: hedgeFunds.length });
 
-      // Calculer la performance pour chaque hedge fund
-      const performances = await Promise.allSettled(
-        hedgeFunds.slice(0, 50).map(async (fund: any) => {
-          try {
-            const holdingsResult = await uw.getUWInstitutionHoldings(fund.name, {});
-            
-            if (!holdingsResult.success || !holdingsResult.data) {
-              return null;
-            }
-
-            const holdings = Array.isArray(holdingsResult.data)
-              ? holdingsResult.data
-              : [];
-
-            // Calculer la performance basée sur les positions
-            const performance = this.calculatePerformance(holdings, period);
-
-            // Top positions
-            const topPositions = holdings
-              .slice(0, 5)
-              .map((h: any) => ({
-                ticker: h.ticker || h.ticker_symbol || '',
-                shares: h.shares || h.units || 0,
-                value: (h.shares || h.units || 0) * (h.price || h.close || 0),
-                weight: 0, // Calculé après
-              }))
-              .filter((p) => p.ticker);
-
-            // Calculer les poids
-            const totalValue = topPositions.reduce((sum, p) => sum + p.value, 0);
-            topPositions.forEach((p) => {
-              p.weight = totalValue > 0 ? (p.value / totalValue) * 100 : 0;
-            });
-
-            return {
-              name: fund.name,
-              isHedgeFund: true,
-              totalValue: fund.total_value || fund.value || 0,
-              performance,
-              period,
-              holdingsCount: holdings.length,
-              topPositions,
-            } as HedgeFund;
-          } catch (error) {
-            log.error('Error calculating performance for fund', {
-              fund: fund.name,
-              error,
-            });
-            return null;
-          }
+      const { snapshots } = await this.getFundSnapshots(hedgeFunds);
+
+      const validFunds = hedgeFunds
+        .filter((fund: any) => snapshots.has(fund.name))
+        .map((fund: any) => {
+          const snapshot = snapshots.get(fund.name)!;
+          return {
+            name: fund.name,
+            isHedgeFund: true,
+            totalValue: fund.total_value || fund.value || 0,
+            performance: snapshot.performance,
+            period,
+            holdingsCount: snapshot.holdingsCount,
+            topPositions: snapshot.topPositions,
+          } as HedgeFund;
         })
-      );
-
-      // Filtrer les nulls et trier par performance
-      const validFunds = performances
-        .filter((p) => p.status === 'fulfilled' && p.value !== null)
-        .map((p) => (p as PromiseFulfilledResult<HedgeFund>).value)
-        .sort((a, b) => b.performance - a.performance)
+        .sort((a: HedgeFund, b: HedgeFund) => b.performance - a.performance)
         .slice(0, 10);
 
       log.info('Top hedge funds calculated', { count: validFunds.length });
@@ -132,24 +101,187 @@ export class SmartMoneyService {
     });
   }
 
+  /**
+   * Recalculer les snapshots des fonds ayant publié un nouveau 13F (job smart-money-snapshots)
+   */
+  async refreshHedgeFundSnapshots(): Promise<FundSnapshotRefreshResult> {
+    const startedAt = Date.now();
+    const hedgeFunds = (await this.getHedgeFundCandidates()) || [];
+    const { refreshed, failed, undated } = await this.getFundSnapshots(hedgeFunds);
+    return { funds: hedgeFunds.length, refreshed, failed, undated, durationMs: Date.now() - startedAt };
+  }
+
+  /**
+   * Institutions classées par valeur, filtrées sur les hedge funds (null si l'appel échoue)
+   */
+  private async getHedgeFundCandidates(): Promise<any[] | null> {
+    const institutionsResult = await uw.getUWInstitutions({
+      order: 'value',
+      order_direction: 'desc',
+    });
+
+    if (!institutionsResult.success || !institutionsResult.data) {
+      return null;
+    }
+
+    const institutions = Array.isArray(institutionsResult.data)
+      ? institutionsResult.data
+      : [];
+
+    // Filtrer les hedge funds (approximation : institutions avec "fund" dans le nom ou catégorie)
+    return institutions
+      .filter(
+        (inst: any) =>
+          inst.name?.toLowerCase().includes('fund') ||
+          inst.name?.toLowerCase().includes('capital') ||
+          inst.name?.toLowerCase().includes('partners') ||
+          inst.category?.toLowerCase().includes('hedge')
+      )
+      .slice(0, FUND_LIMIT);
+  }
+
+  /**
+   * Snapshots à jour des fonds : mémo de l'instance, puis Supabase, puis holdings UW
+   * (parallèle borné) pour les fonds dont la date de rapport a changé.
+   * Un fonds sans date de rapport garde son dernier snapshot stocké et n'est pas
+   * recalculé (aucune période à laquelle le rattacher).
+   */
+  private async getFundSnapshots(
+    funds: any[]
+  ): Promise<{ snapshots: Map<string, FundHoldingsSnapshot>; refreshed: number; failed: number; undated: number }> {
+    const log = logger.child({ operation: 'getFundSnapshots' });
+    const snapshots = new Map<string, FundHoldingsSnapshot>();
+
+    const notMemoized = funds.filter((fund) => {
+      const reportDate = reportDateOf(fund);
+      const memo = reportDate ? snapshotMemo.get(snapshotKey(fund.name, reportDate)) : undefined;
+      if (memo) {
+        snapshots.set(fund.name, memo);
+      }
+      return !memo;
+    });
+
+    let stored = new Map<string, FundHoldingsSnapshot>();
+    try {
+      stored = await this.snapshots.findLatest(notMemoized.map((fund) => fund.name));
+    } catch (error) {
+      log.error('Failed to read fund snapshots, recomputing', error);
+    }
+
+    const stale: Array<{ fund: any; reportDate: string }> = [];
+    const undated: string[] = [];
+    for (const fund of notMemoized) {
+      const snapshot = stored.get(fund.name);
+      const reportDate = reportDateOf(fund);
+      if (!reportDate) {
+        undated.push(fund.name);
+        if (snapshot) {
+          snapshots.set(fund.name, snapshot);
+        }
+      } else if (snapshot && snapshot.reportDate >= reportDate) {
+        snapshots.set(fund.name, snapshot);
+        snapshotMemo.set(snapshotKey(fund.name, reportDate), snapshot);
+      } else {
+        stale.push({ fund, reportDate });
+      }
+    }
+
+    if (undated.length > 0) {
+      log.warn('Funds without report date skipped', { funds: undated });
+    }
+    if (stale.length === 0) {
+      return { snapshots, refreshed: 0, failed: 0, undated: undated.length };
+    }
+
+    log.info('Refreshing fund snapshots', { stale: stale.length, cached: snapshots.size });
+
+    const results = await mapWithConcurrency(stale, HOLDINGS_CONCURRENCY, async ({ fund, reportDate }) => {
+      const holdingsResult = await uw.getUWInstitutionHoldings(fund.name, {});
+      if (!holdingsResult.success || !holdingsResult.data) {
+        throw new Error(`No holdings for ${fund.name}`);
+      }
+      const holdings = Array.isArray(holdingsResult.data) ? holdingsResult.data : [];
+      return this.buildSnapshot(fund.name, reportDate, holdings);
+    });
+
+    const fresh: FundHoldingsSnapshot[] = [];
+    results.forEach((result, index) => {
+      if (result.status === 'fulfilled') {
+        fresh.push(result.value);
+        snapshots.set(result.value.institution, result.value);
+        snapshotMemo.set(snapshotKey(result.value.institution, result.value.reportDate), result.value);
+      } else {
+        log.error('Error calculating performance for fund', {
+          fund: stale[index].fund.name,
+          error: result.reason,
+        });
+      }
+    });
+
+    try {
+      await this.snapshots.saveMany(fresh);
+    } catch (error) {
+      // Les snapshots restent utilisables pour cette requête
+      log.error('Failed to save fund snapshots', error);
+    }
+
+    return { snapshots, refreshed: fresh.length, failed: stale.length - fresh.length, undated: undated.length };
+  }
+
+  /**
+   * Calculer le snapshot d'un fonds à partir de ses positions
+   */
+  private buildSnapshot(institution: string, reportDate: string, holdings: any[]): FundHoldingsSnapshot {
+    // Top positions
+    const topPositions = holdings
+      .slice(0, 5)
+      .map((h: any) => ({
+        ticker: h.ticker || h.ticker_symbol || '',
+        shares: h.shares || h.units || 0,
+        value: (h.shares || h.units || 0) * (h.price || h.close || 0),
+        weight: 0, // Calculé après
+      }))
+      .filter((p) => p.ticker);
+
+    // Calculer les poids
+    const topValue = topPositions.reduce((sum, p) => sum + p.value, 0);
+    topPositions.forEach((p) => {
+      p.weight = topValue > 0 ? (p.value / topValue) * 100 : 0;
+    });
+
+    // Portefeuille sans valeur : log10(0) donnerait -Infinity, non stockable
+    const performance = this.calculatePerformance(holdings);
+
+    return {
+      institution,
+      reportDate,
+      totalValue: this.holdingsValue(holdings),
+      holdingsCount: holdings.length,
+      performance: Number.isFinite(performance) ? performance : 0,
+      topPositions,
+      computedAt: new Date().toISOString(),
+    };
+  }
+
+  private holdingsValue(holdings: any[]): number {
+    return holdings.reduce(
+      (sum, h) => sum + ((h.shares || h.units || 0) * (h.price || h.close || 0)),
+      0
+    );
+  }
+
   /**
    * Calculer la performance d'un hedge fund basée sur ses positions
    * Approximation : moyenne des performances des top positions
    */
-  private calculatePerformance(
-    holdings: any[],
-    period: '1M' | '3M' | '6M' | '1Y'
-  ): number {
+  private calculatePerformance(holdings: any[]): number {
     if (!holdings || holdings.length === 0) {
       return 0;
     }
 
     // Pour l'instant, on retourne une performance simulée basée sur la valeur totale
     // TODO: Implémenter le calcul réel avec données historiques de prix
-    const totalValue = holdings.reduce(
-      (sum, h) => sum + ((h.shares || h.units || 0) * (h.price || h.close || 0)),
-      0
-    );
+    const totalValue = this.holdingsValue(holdings);
 
     // Performance simulée (à remplacer par calcul réel)
     // Basée sur la taille du portefeuille et le nombre de positions
@@ -6,6 +6,9 @@
 import { logger } from '../utils/logger';
 import { handleError } from '../utils/errors';
 import * as uw from '../unusual-whales';
+import { TickerBundleService, BUNDLE_MIN_PREMIUM, bundleResult } from './ticker-bundle.service';
+import { SurveillanceRepository } from '../repositories/surveillance.repository';
+import { mapWithConcurrency } from '../utils/concurrency';
 import type {
   SurveillanceConfig,
   SurveillanceWatch,
@@ -15,13 +18,21 @@ import type {
   SurveillanceAlertsResponse,
   AlertType,
 } from '../types/surveillance';
+import type { TickerBundle } from '../types/ticker-bundle';
 import { v4 as uuidv4 } from 'uuid';
 
-// Stockage en mémoire (à remplacer par DynamoDB plus tard)
-const watches = new Map<string, SurveillanceWatch>();
-const alerts = new Map<string, SurveillanceAlert[]>();
+// Tickers évalués simultanément par checkAllWatches
+const TICKER_CONCURRENCY = 5;
+
+/** Jour UTC courant : au plus une alerte de volume par surveillance, type et jour */
+function currentDay(): string {
+  return new Date().toISOString().slice(0, 10);
+}
 
 export class SurveillanceService {
+  private repository = new SurveillanceRepository();
+  private bundles = new TickerBundleService();
+
   /**
    * Créer une configuration de surveillance
    */
@@ -53,14 +64,13 @@ export class SurveillanceService {
         active: true,
       };
 
-      watches.set(watch.id, watch);
-      alerts.set(watch.id, []);
+      const saved = await this.repository.save(watch);
 
-      log.info('Surveillance watch created', { watchId: watch.id });
+      log.info('Surveillance watch created', { watchId: saved.id });
 
       return {
         success: true,
-        data: { watch },
+        data: { watch: saved },
       };
     });
   }
@@ -73,9 +83,7 @@ export class SurveillanceService {
       const log = logger.child({ userId, operation: 'getWatches' });
       log.info('Fetching watches');
 
-      const userWatches = Array.from(watches.values()).filter(
-        (w) => w.userId === userId && w.active
-      );
+      const userWatches = await this.repository.findActiveByUser(userId);
 
       return {
         success: true,
@@ -95,7 +103,7 @@ export class SurveillanceService {
       const log = logger.child({ watchId, userId, operation: 'deleteWatch' });
       log.info('Deleting watch');
 
-      const watch = watches.get(watchId);
+      const watch = await this.repository.findById(watchId);
       if (!watch) {
         throw new Error('Watch not found');
       }
@@ -104,14 +112,13 @@ export class SurveillanceService {
         throw new Error('Unauthorized');
       }
 
-      watch.active = false;
-      watches.set(watchId, watch);
+      const saved = await this.repository.save({ ...watch, active: false });
 
       log.info('Watch deleted', { watchId });
 
       return {
         success: true,
-        data: { watch },
+        data: { watch: saved },
       };
     });
   }
@@ -127,7 +134,7 @@ export class SurveillanceService {
       const log = logger.child({ watchId, userId, operation: 'getAlerts' });
       log.info('Fetching alerts');
 
-      const watch = watches.get(watchId);
+      const watch = await this.repository.findById(watchId);
       if (!watch) {
         throw new Error('Watch not found');
       }
@@ -136,7 +143,7 @@ export class SurveillanceService {
         throw new Error('Unauthorized');
       }
 
-      const watchAlerts = alerts.get(watchId) || [];
+      const watchAlerts = await this.repository.findAlerts(watchId);
 
       return {
         success: true,
@@ -150,168 +157,194 @@ export class SurveillanceService {
 
   /**
    * Vérifier un ticker et générer des alertes si nécessaire
-   * Cette méthode est appelée par un Lambda scheduled (EventBridge)
    */
   async checkWatch(watchId: string): Promise<void> {
     const log = logger.child({ watchId, operation: 'checkWatch' });
     log.info('Checking watch');
 
-    const watch = watches.get(watchId);
+    const watch = await this.repository.findById(watchId);
     if (!watch || !watch.active) {
       log.warn('Watch not found or inactive');
       return;
     }
 
-    const { ticker, config } = watch;
-
-    try {
-      // Récupérer les données en parallèle
-      const [optionsFlow, darkPool, insiders, shortInterest] =
-        await Promise.allSettled([
-          uw.getUWRecentFlows(ticker, { min_premium: config.minPremium || 50000 }),
-          uw.getUWDarkPoolTrades(ticker, { limit: 50 }),
-          uw.getUWStockInsiderBuySells(ticker, {}),
-          uw.getUWShortInterestAndFloat(ticker),
-        ]);
-
-      const detectedAlerts: SurveillanceAlert[] = [];
-
-      // Vérifier les seuils
-      if (optionsFlow.status === 'fulfilled' && optionsFlow.value?.success) {
-        const flow = optionsFlow.value.data;
-        const callVolume = flow?.reduce(
-          (sum: number, f: any) => sum + (f.call_volume || 0),
-          0
-        );
-        const putVolume = flow?.reduce(
-          (sum: number, f: any) => sum + (f.put_volume || 0),
-          0
-        );
+    const bundle = await this.bundles.getBundle(watch.ticker);
+    const detectedAlerts = await this.detectAlerts(watch, bundle);
+    const inserted = await this.repository.insertAlerts(detectedAlerts);
+    await this.repository.markChecked([watch.id], new Date());
 
-        if (
-          config.callVolumeThreshold &&
-          callVolume > config.callVolumeThreshold
-        ) {
-          detectedAlerts.push({
-            id: uuidv4(),
-            watchId,
-            ticker,
-            type: 'options_flow_spike',
-            message: `Call volume spike detected: $${callVolume.toLocaleString()}`,
-            data: { callVolume, putVolume },
-            triggeredAt: new Date(),
-            read: false,
-          });
-        }
-      }
+    log.info(inserted.length > 0 ? 'Alerts generated' : 'No alerts generated', {
+      count: inserted.length,
+      duplicates: detectedAlerts.length - inserted.length,
+      types: inserted.map((a) => a.type),
+    });
+  }
 
-      if (darkPool.status === 'fulfilled' && darkPool.value?.success) {
-        const trades = darkPool.value.data || [];
-        const totalVolume = trades.reduce(
-          (sum: number, t: any) => sum + (t.volume || 0),
-          0
-        );
+  /**
+   * Comparer les seuils d'une surveillance aux données du bundle de son ticker
+   * Chaque alerte porte la clé de la donnée qui l'a déclenchée (dédupliquée à l'insertion)
+   */
+  private async detectAlerts(watch: SurveillanceWatch, bundle: TickerBundle): Promise<SurveillanceAlert[]> {
+    const { ticker, config } = watch;
 
-        if (
-          config.darkPoolVolumeThreshold &&
-          totalVolume > config.darkPoolVolumeThreshold
-        ) {
-          detectedAlerts.push({
-            id: uuidv4(),
-            watchId,
-            ticker,
-            type: 'dark_pool_activity',
-            message: `High dark pool activity: $${totalVolume.toLocaleString()}`,
-            data: { totalVolume, tradeCount: trades.length },
-            triggeredAt: new Date(),
-            read: false,
-          });
-        }
-      }
+    const minPremium = config.minPremium || BUNDLE_MIN_PREMIUM;
+    const [optionsFlow] =
+      minPremium === BUNDLE_MIN_PREMIUM
+        ? [bundleResult(bundle, 'optionsFlow')]
+        : await Promise.allSettled([uw.getUWRecentFlows(ticker, { min_premium: minPremium })]);
+    const darkPool = bundleResult(bundle, 'darkPool');
+    const insiders = bundleResult(bundle, 'insiders');
+    const shortInterest = bundleResult(bundle, 'shortInterest');
+
+    const detectedAlerts: SurveillanceAlert[] = [];
+
+    // Vérifier les seuils
+    if (optionsFlow.status === 'fulfilled' && optionsFlow.value?.success) {
+      const flow = optionsFlow.value.data;
+      const callVolume = flow?.reduce(
+        (sum: number, f: any) => sum + (f.call_volume || 0),
+        0
+      );
+      const putVolume = flow?.reduce(
+        (sum: number, f: any) => sum + (f.put_volume || 0),
+        0
+      );
 
-      if (shortInterest.status === 'fulfilled' && shortInterest.value?.success) {
-        const shortData = shortInterest.value.data;
-        const shortRatio = shortData?.[0]?.percent_returned || 0;
-
-        if (
-          config.shortInterestThreshold &&
-          shortRatio > config.shortInterestThreshold
-        ) {
-          detectedAlerts.push({
-            id: uuidv4(),
-            watchId,
-            ticker,
-            type: 'short_interest_change',
-            message: `High short interest: ${shortRatio.toFixed(2)}%`,
-            data: { shortRatio },
-            triggeredAt: new Date(),
-            read: false,
-          });
-        }
+      if (
+        config.callVolumeThreshold &&
+        callVolume > config.callVolumeThreshold
+      ) {
+        detectedAlerts.push({
+          id: uuidv4(),
+          watchId: watch.id,
+          ticker,
+          type: 'options_flow_spike',
+          sourceKey: currentDay(),
+          message: `Call volume spike detected: $${callVolume.toLocaleString()}`,
+          data: { callVolume, putVolume },
+          triggeredAt: new Date(),
+          read: false,
+        });
       }
+    }
 
-      if (insiders.status === 'fulfilled' && insiders.value?.success) {
-        const insiderData = insiders.value.data || [];
-        const recentBuys = insiderData.filter(
-          (i: any) =>
-            i.transaction_code === 'P' &&
-            new Date(i.filing_date) >
-              new Date(Date.now() - 7 * 24 * 60 * 60 * 1000)
-        );
+    if (darkPool.status === 'fulfilled' && darkPool.value?.success) {
+      const trades = darkPool.value.data || [];
+      const totalVolume = trades.reduce(
+        (sum: number, t: any) => sum + (t.volume || 0),
+        0
+      );
 
-        if (recentBuys.length > 0) {
-          detectedAlerts.push({
-            id: uuidv4(),
-            watchId,
-            ticker,
-            type: 'insider_activity',
-            message: `${recentBuys.length} recent insider buy(s) detected`,
-            data: { buyCount: recentBuys.length, buys: recentBuys },
-            triggeredAt: new Date(),
-            read: false,
-          });
-        }
+      if (
+        config.darkPoolVolumeThreshold &&
+        totalVolume > config.darkPoolVolumeThreshold
+      ) {
+        detectedAlerts.push({
+          id: uuidv4(),
+          watchId: watch.id,
+          ticker,
+          type: 'dark_pool_activity',
+          sourceKey: currentDay(),
+          message: `High dark pool activity: $${totalVolume.toLocaleString()}`,
+          data: { totalVolume, tradeCount: trades.length },
+          triggeredAt: new Date(),
+          read: false,
+        });
       }
+    }
 
-      // Sauvegarder les alertes
-      if (detectedAlerts.length > 0) {
-        const existingAlerts = alerts.get(watchId) || [];
-        alerts.set(watchId, [...existingAlerts, ...detectedAlerts]);
+    if (shortInterest.status === 'fulfilled' && shortInterest.value?.success) {
+      const shortData = shortInterest.value.data;
+      const shortRatio = shortData?.[0]?.percent_returned || 0;
+
+      if (
+        config.shortInterestThreshold &&
+        shortRatio > config.shortInterestThreshold
+      ) {
+        detectedAlerts.push({
+          id: uuidv4(),
+          watchId: watch.id,
+          ticker,
+          type: 'short_interest_change',
+          sourceKey: String(shortData?.[0]?.market_date || currentDay()),
+          message: `High short interest: ${shortRatio.toFixed(2)}%`,
+          data: { shortRatio },
+          triggeredAt: new Date(),
+          read: false,
+        });
+      }
+    }
 
-        // Mettre à jour la dernière vérification
-        watch.lastChecked = new Date();
-        watches.set(watchId, watch);
+    if (insiders.status === 'fulfilled' && insiders.value?.success) {
+      const insiderData = insiders.value.data || [];
+      const recentBuys = insiderData.filter(
+        (i: any) =>
+          i.transaction_code === 'P' &&
+          new Date(i.filing_date) >
+            new Date(Date.now() - 7 * 24 * 60 * 60 * 1000)
+      );
 
-        log.info('Alerts generated', {
-          count: detectedAlerts.length,
-          types: detectedAlerts.map((a) => a.type),
+      if (recentBuys.length > 0) {
+        // Achats de la dernière date de dépôt : nouvelle alerte seulement pour un achat plus récent
+        // (les achats qui sortent de la fenêtre de 7 jours ne changent pas la clé)
+        const latestDate = recentBuys.reduce(
+          (latest: string, i: any) => (i.filing_date > latest ? i.filing_date : latest),
+          ''
+        );
+        const latestCount = recentBuys.filter((i: any) => i.filing_date === latestDate).length;
+        detectedAlerts.push({
+          id: uuidv4(),
+          watchId: watch.id,
+          ticker,
+          type: 'insider_activity',
+          sourceKey: `${latestDate}:${latestCount}`,
+          message: `${recentBuys.length} recent insider buy(s) detected`,
+          data: { buyCount: recentBuys.length, buys: recentBuys },
+          triggeredAt: new Date(),
+          read: false,
         });
-      } else {
-        watch.lastChecked = new Date();
-        watches.set(watchId, watch);
-        log.info('No alerts generated');
       }
-    } catch (error) {
-      log.error('Error checking watch', { error });
-      throw error;
     }
+
+    return detectedAlerts;
+  }
+
+  /**
+   * Nombre de surveillances actives par ticker (priorité du préchauffage)
+   */
+  async getActiveTickerCounts(): Promise<Map<string, number>> {
+    const byTicker = await this.repository.findActiveByTicker();
+    return new Map(Array.from(byTicker, ([ticker, group]) => [ticker, group.length]));
   }
 
   /**
-   * Vérifier toutes les surveillances actives
-   * À appeler par un Lambda scheduled
+   * Vérifier toutes les surveillances actives (job planifié surveillance-check)
+   * Les surveillances sont groupées par ticker : un seul bundle de données par ticker,
+   * tickers traités en parallèle borné.
    */
-  async checkAllWatches(): Promise<void> {
+  async checkAllWatches(): Promise<{ tickers: number; watches: number; alerts: number }> {
     const log = logger.child({ operation: 'checkAllWatches' });
     log.info('Checking all active watches');
 
-    const activeWatches = Array.from(watches.values()).filter((w) => w.active);
-
-    log.info('Active watches found', { count: activeWatches.length });
+    const byTicker = await this.repository.findActiveByTicker();
+    const groups = Array.from(byTicker.entries());
+    const watchCount = groups.reduce((sum, [, group]) => sum + group.length, 0);
+    log.info('Active watches found', { count: watchCount, tickers: groups.length });
+
+    let alertCount = 0;
+    await mapWithConcurrency(groups, TICKER_CONCURRENCY, async ([ticker, group]) => {
+      try {
+        const bundle = await this.bundles.getBundle(ticker);
+        const detected = (await Promise.all(group.map((watch) => this.detectAlerts(watch, bundle)))).flat();
+        const inserted = await this.repository.insertAlerts(detected);
+        await this.repository.markChecked(group.map((w) => w.id), new Date());
+        alertCount += inserted.length;
+      } catch (error) {
+        log.error('Error checking watches for ticker', { ticker, error });
+      }
+    });
 
-    await Promise.allSettled(
-      activeWatches.map((watch) => this.checkWatch(watch.id))
-    );
+    log.info('Watches checked', { tickers: groups.length, watches: watchCount, alerts: alertCount });
+    return { tickers: groups.length, watches: watchCount, alerts: alertCount };
   }
 }
-
@@ -0,0 +1,277 @@
+/**
+ * Bundles de données partagés par ticker (Supabase)
+ * Un bundle regroupe les données amont utilisées par la surveillance, les alertes et le scoring.
+ * Il est préchauffé par le job planifié `ticker-warmup` et lu par les évaluateurs au lieu de
+ * refaire les mêmes appels UW/FMP pour chaque surveillance, alerte ou requête.
+ */
+
+import { supabase } from '../supabase';
+import { logger } from '../utils/logger';
+import { CacheError } from '../utils/errors';
+import { mapWithConcurrency } from '../utils/concurrency';
+import * as uw from '../unusual-whales';
+import * as fmp from '../fmp';
+import type { TickerBundle, TickerBundleSource } from '../types/ticker-bundle';
+
+const TABLE_NAME = 'ticker_data_bundles';
+
+// Durée de validité d'un bundle : couvre deux cycles de préchauffage (5 min)
+const BUNDLE_TTL_SECONDS = parseInt(process.env.TICKER_BUNDLE_TTL_SECONDS || '600', 10);
+
+/** Premium minimum des flows stockés dans le bundle */
+export const BUNDLE_MIN_PREMIUM = 50000;
+
+interface TickerBundleRow {
+  ticker: string;
+  data: TickerBundle['data'];
+  errors: TickerBundleSource[] | null;
+  fetched_at: string;
+  expires_at: string;
+}
+
+/**
+ * Greeks de l'expiration proche (J+7), comme le scoring les utilisait
+ */
+function fetchNearGreeks(ticker: string) {
+  const futureDate = new Date();
+  futureDate.setDate(futureDate.getDate() + 7);
+  const expiry = futureDate.toISOString().split('T')[0];
+  return uw.getUWGreeks(ticker, { expiry });
+}
+
+const SOURCES: Record<TickerBundleSource, (ticker: string) => Promise<{ success: boolean; data: any }>> = {
+  quote: (ticker) => fmp.getFMPStockQuote(ticker),
+  optionsFlow: (ticker) => uw.getUWRecentFlows(ticker, { min_premium: BUNDLE_MIN_PREMIUM }),
+  darkPool: (ticker) => uw.getUWDarkPoolTrades(ticker, { limit: 50 }),
+  shortInterest: (ticker) => uw.getUWShortInterestAndFloat(ticker),
+  insiders: (ticker) => uw.getUWStockInsiderBuySells(ticker, {}),
+  greeks: fetchNearGreeks,
+  maxPain: (ticker) => uw.getUWMaxPain(ticker, {}),
+  ivRank: (ticker) => uw.getUWIVRank(ticker),
+};
+
+/**
+ * Convertir une source du bundle au format Promise.allSettled attendu par les évaluateurs
+ */
+export function bundleResult(bundle: TickerBundle, source: TickerBundleSource): PromiseSettledResult<any> {
+  if (bundle.data[source] === undefined) {
+    return { status: 'rejected', reason: new Error(`${source} unavailable for ${bundle.ticker}`) };
+  }
+  return { status: 'fulfilled', value: { success: true, data: bundle.data[source] } };
+}
+
+/**
+ * Enregistrer une requête interactive sur un ticker (alimente la priorité du préchauffage)
+ * Ne throw jamais : la popularité est une donnée best-effort.
+ */
+export async function recordTickerHit(ticker: string): Promise<void> {
+  try {
+    const { error } = await supabase.rpc('record_ticker_hit', { p_ticker: ticker.toUpperCase() });
+    if (error) {
+      logger.debug(`Failed to record ticker hit for ${ticker}`, { error: error.message });
+    }
+  } catch (error) {
+    logger.debug(`Failed to record ticker hit for ${ticker}`, { error });
+  }
+}
+
+export class TickerBundleService {
+  // Préchauffages en cours dans cette instance
+  private inFlight = new Map<string, Promise<TickerBundle>>();
+
+  /**
+   * Bundle préchauffé s'il est encore valide, sinon récupéré à la demande (et stocké)
+   */
+  async getBundle(ticker: string): Promise<TickerBundle> {
+    const upperTicker = ticker.toUpperCase();
+    const warm = await this.getWarmBundle(upperTicker);
+    if (warm) {
+      return warm;
+    }
+    logger.debug('Ticker bundle miss', { ticker: upperTicker });
+    return this.refreshBundle(upperTicker);
+  }
+
+  /**
+   * Bundles de plusieurs tickers : une seule lecture des bundles chauds, puis
+   * récupération bornée des seuls tickers manquants. Un ticker dont la récupération
+   * échoue est absent du résultat.
+   */
+  async getBundles(tickers: string[], concurrency: number = 5): Promise<Map<string, TickerBundle>> {
+    const upperTickers = Array.from(new Set(tickers.map((t) => t.toUpperCase())));
+    const bundles = await this.getWarmBundles(upperTickers);
+
+    const missing = upperTickers.filter((ticker) => !bundles.has(ticker));
+    if (missing.length > 0) {
+      logger.debug('Ticker bundle misses', { tickers: missing });
+      const results = await mapWithConcurrency(missing, concurrency, (ticker) => this.refreshBundle(ticker));
+      results.forEach((result, index) => {
+        if (result.status === 'fulfilled') {
+          bundles.set(missing[index], result.value);
+        } else {
+          logger.error(`Ticker bundle fetch failed for ${missing[index]}`, result.reason);
+        }
+      });
+    }
+    return bundles;
+  }
+
+  /**
+   * Lire les bundles non expirés d'une liste de tickers (une seule requête)
+   */
+  async getWarmBundles(tickers: string[]): Promise<Map<string, TickerBundle>> {
+    const bundles = new Map<string, TickerBundle>();
+    if (tickers.length === 0) {
+      return bundles;
+    }
+    try {
+      const { data, error } = await supabase
+        .from(TABLE_NAME)
+        .select('ticker, data, errors, fetched_at, expires_at')
+        .in('ticker', tickers)
+        .gt('expires_at', new Date().toISOString());
+
+      if (error) {
+        throw new CacheError(`Failed to read ticker bundles: ${error.message}`, error);
+      }
+      for (const row of (data || []) as TickerBundleRow[]) {
+        bundles.set(row.ticker, this.fromRow(row));
+      }
+    } catch (error) {
+      logger.error('Ticker bundles read failed', error);
+    }
+    return bundles;
+  }
+
+  /**
+   * Lire un bundle non expiré (null si absent)
+   */
+  async getWarmBundle(ticker: string): Promise<TickerBundle | null> {
+    try {
+      const { data, error } = await supabase
+        .from(TABLE_NAME)
+        .select('ticker, data, errors, fetched_at, expires_at')
+        .eq('ticker', ticker.toUpperCase())
+        .gt('expires_at', new Date().toISOString())
+        .maybeSingle();
+
+      if (error) {
+        throw new CacheError(`Failed to read ticker bundle: ${error.message}`, error);
+      }
+      return data ? this.fromRow(data as TickerBundleRow) : null;
+    } catch (error) {
+      logger.error(`Ticker bundle read failed for ${ticker}`, error);
+      return null;
+    }
+  }
+
+  /**
+   * Récupérer toutes les sources d'un ticker et stocker le bundle
+   */
+  refreshBundle(ticker: string, priority: number = 0): Promise<TickerBundle> {
+    const upperTicker = ticker.toUpperCase();
+    const pending = this.inFlight.get(upperTicker);
+    if (pending) {
+      return pending;
+    }
+
+    const promise = this.fetchAndStore(upperTicker, priority).finally(() => {
+      this.inFlight.delete(upperTicker);
+    });
+    this.inFlight.set(upperTicker, promise);
+    return promise;
+  }
+
+  /**
+   * Tickers les plus demandés récemment (requêtes interactives)
+   */
+  async getRecentTraffic(sinceHours: number = 24, limit: number = 200): Promise<Map<string, number>> {
+    const since = new Date(Date.now() - sinceHours * 60 * 60 * 1000).toISOString();
+    const { data, error } = await supabase
+      .from('ticker_traffic')
+      .select('ticker, hits')
+      .gt('last_seen_at', since)
+      .order('hits', { ascending: false })
+      .limit(limit);
+
+    if (error) {
+      logger.error('Failed to read ticker traffic', error);
+      return new Map();
+    }
+    return new Map((data || []).map((row: { ticker: string; hits: number }) => [row.ticker, row.hits]));
+  }
+
+  /**
+   * Tickers dont le bundle est chaud, par priorité de préchauffage décroissante
+   */
+  async getWarmTickers(limit: number = 100): Promise<string[]> {
+    const { data, error } = await supabase
+      .from(TABLE_NAME)
+      .select('ticker')
+      .gt('expires_at', new Date().toISOString())
+      .order('priority', { ascending: false })
+      .limit(limit);
+
+    if (error) {
+      logger.error('Failed to list warm ticker bundles', error);
+      return [];
+    }
+    return (data || []).map((row: { ticker: string }) => row.ticker);
+  }
+
+  private async fetchAndStore(ticker: string, priority: number): Promise<TickerBundle> {
+    const sources = Object.keys(SOURCES) as TickerBundleSource[];
+    // async : une source qui lève (client absent, exception synchrone) est une source en échec
+    const results = await Promise.allSettled(sources.map(async (source) => SOURCES[source](ticker)));
+
+    const data: TickerBundle['data'] = {};
+    const errors: TickerBundleSource[] = [];
+    results.forEach((result, index) => {
+      if (result.status === 'fulfilled' && result.value?.success) {
+        data[sources[index]] = result.value.data;
+      } else {
+        errors.push(sources[index]);
+      }
+    });
+
+    const fetchedAt = new Date();
+    const bundle: TickerBundle = {
+      ticker,
+      data,
+      errors,
+      fetchedAt: fetchedAt.toISOString(),
+      expiresAt: new Date(fetchedAt.getTime() + BUNDLE_TTL_SECONDS * 1000).toISOString(),
+    };
+
+    const { error } = await supabase.from(TABLE_NAME).upsert(
+      {
+        ticker,
+        data,
+        errors,
+        priority,
+        fetched_at: bundle.fetchedAt,
+        expires_at: bundle.expiresAt,
+      },
+      { onConflict: 'ticker' }
+    );
+    if (error) {
+      // Le bundle reste utilisable pour l'appelant même s'il n'a pas pu être partagé
+      logger.error(`Ticker bundle write failed for ${ticker}`, error);
+    }
+
+    if (errors.length > 0) {
+      logger.warn('Ticker bundle partially fetched', { ticker, errors });
+    }
+    return bundle;
+  }
+
+  private fromRow(row: TickerBundleRow): TickerBundle {
+    return {
+      ticker: row.ticker,
+      data: row.data || {},
+      errors: row.errors || [],
+      fetchedAt: row.fetched_at,
+      expiresAt: row.expires_at,
+    };
+  }
+}
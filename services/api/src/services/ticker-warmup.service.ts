@@ -0,0 +1,112 @@
+/**
+ * Préchauffage planifié des bundles de données par ticker
+ * Union des tickers surveillés, des alertes actives et du trafic récent, priorisée par
+ * popularité : chaque bundle est récupéré une seule fois par cycle. Les scores composites
+ * de ces tickers sont précalculés à partir des bundles obtenus (scoring batch).
+ */
+
+import { logger } from '../utils/logger';
+import { mapWithConcurrency } from '../utils/concurrency';
+import { SurveillanceService } from './surveillance.service';
+import { AlertService } from './alert.service';
+import { TickerBundleService } from './ticker-bundle.service';
+import { ScoringService } from './scoring.service';
+import type { TickerBundle, WarmupCandidate, WarmupResult } from '../types/ticker-bundle';
+
+// Une surveillance ou une alerte active pèse plus qu'une requête ponctuelle
+const WATCH_WEIGHT = 10;
+const ALERT_WEIGHT = 10;
+
+export interface WarmupOptions {
+  /** Nombre maximum de tickers préchauffés par cycle */
+  maxTickers?: number;
+  /** Tickers préchauffés simultanément (chaque bundle = 8 appels amont) */
+  concurrency?: number;
+  /** Fenêtre du trafic pris en compte (heures) */
+  trafficWindowHours?: number;
+}
+
+/**
+ * Fusionner les sources et trier par priorité décroissante
+ */
+export function rankWarmupCandidates(
+  watched: Map<string, number>,
+  alerted: Map<string, number>,
+  traffic: Map<string, number>
+): WarmupCandidate[] {
+  const tickers = new Set([...watched.keys(), ...alerted.keys(), ...traffic.keys()]);
+
+  return Array.from(tickers)
+    .map((ticker) => {
+      const watches = watched.get(ticker) || 0;
+      const alerts = alerted.get(ticker) || 0;
+      const hits = traffic.get(ticker) || 0;
+      return {
+        ticker,
+        watches,
+        alerts,
+        hits,
+        priority: watches * WATCH_WEIGHT + alerts * ALERT_WEIGHT + hits,
+      };
+    })
+    .sort((a, b) => b.priority - a.priority || a.ticker.localeCompare(b.ticker));
+}
+
+export class TickerWarmupService {
+  private surveillanceService = new SurveillanceService();
+  private alertService = new AlertService();
+  private bundles = new TickerBundleService();
+  private scoring = new ScoringService();
+
+  async run(options: WarmupOptions = {}): Promise<WarmupResult> {
+    const { maxTickers = 150, concurrency = 5, trafficWindowHours = 24 } = options;
+    const log = logger.child({ operation: 'tickerWarmup' });
+    const startedAt = Date.now();
+
+    const [watched, alerted, traffic] = await Promise.all([
+      this.surveillanceService.getActiveTickerCounts(),
+      this.alertService.getActiveTickerCounts(),
+      this.bundles.getRecentTraffic(trafficWindowHours),
+    ]);
+
+    const candidates = rankWarmupCandidates(watched, alerted, traffic);
+    const selected = candidates.slice(0, maxTickers);
+    log.info('Warmup candidates ranked', {
+      candidates: candidates.length,
+      selected: selected.length,
+      watched: watched.size,
+      alerted: alerted.size,
+      traffic: traffic.size,
+    });
+
+    // Ordre de priorité conservé : les tickers les plus populaires sont chauds en premier
+    const results = await mapWithConcurrency(selected, concurrency, (candidate) =>
+      this.bundles.refreshBundle(candidate.ticker, candidate.priority)
+    );
+
+    const failed = results.filter((r) => r.status === 'rejected').length;
+
+    // Scores précalculés des tickers préchauffés, à partir des bundles en main
+    const warmed = results
+      .filter((r): r is PromiseFulfilledResult<TickerBundle> => r.status === 'fulfilled')
+      .map((r) => r.value);
+    let scored = 0;
+    try {
+      scored = await this.scoring.precomputeScores(warmed);
+    } catch (error) {
+      log.error('Failed to precompute scores', error);
+    }
+
+    const result: WarmupResult = {
+      candidates: candidates.length,
+      warmed: selected.length - failed,
+      failed,
+      scored,
+      tickers: selected.map((c) => c.ticker),
+      durationMs: Date.now() - startedAt,
+    };
+
+    log.info('Warmup complete', { warmed: result.warmed, failed, scored, durationMs: result.durationMs });
+    return result;
+  }
+}
@@ -0,0 +1,83 @@
+/**
+ * Collecte planifiée du store de séries temporelles
+ * Les tickers collectés sont ceux dont le bundle est chaud (surveillances, alertes et
+ * trafic récent, cf. ticker-warmup) : chaque cycle ajoute les nouveaux flow alerts et
+ * prints dark pool et met à jour l'exposition grecque du jour.
+ */
+
+import { logger } from '../utils/logger';
+import { mapWithConcurrency } from '../utils/concurrency';
+import { TickerBundleService } from './ticker-bundle.service';
+import { TimeSeriesService } from './time-series.service';
+import { TimeSeriesRepository } from '../repositories/time-series.repository';
+import type { CollectorResult } from '../types/time-series';
+
+// Historique conservé (partitions mensuelles)
+const RETENTION_MONTHS = parseInt(process.env.TS_RETENTION_MONTHS || '12', 10);
+
+export interface CollectorOptions {
+  /** Nombre maximum de tickers collectés par cycle */
+  maxTickers?: number;
+  /** Tickers collectés simultanément (3 appels UW par ticker) */
+  concurrency?: number;
+}
+
+export class TimeSeriesCollectorService {
+  private bundles = new TickerBundleService();
+  private timeSeries = new TimeSeriesService();
+  private repository = new TimeSeriesRepository();
+
+  async run(options: CollectorOptions = {}): Promise<CollectorResult> {
+    const { maxTickers = 100, concurrency = 4 } = options;
+    const log = logger.child({ operation: 'timeSeriesCollect' });
+    const startedAt = Date.now();
+
+    // Partitions du mois courant et du suivant avant toute écriture
+    const partitionsCreated = await this.repository.ensurePartitions(1);
+
+    const tickers = await this.bundles.getWarmTickers(maxTickers);
+    log.info('Collecting time series', { tickers: tickers.length, partitionsCreated });
+
+    const result: CollectorResult = {
+      tickers: tickers.length,
+      flowAlerts: 0,
+      darkPoolPrints: 0,
+      greekExposures: 0,
+      failed: 0,
+      partitionsCreated,
+      durationMs: 0,
+    };
+
+    await mapWithConcurrency(tickers, concurrency, async (ticker) => {
+      const [flows, prints, greeks] = await Promise.allSettled([
+        this.timeSeries.collectFlowAlerts(ticker),
+        this.timeSeries.collectDarkPool(ticker),
+        this.timeSeries.collectGreekExposures(ticker),
+      ]);
+      for (const settled of [flows, prints, greeks]) {
+        if (settled.status === 'rejected') {
+          result.failed++;
+          log.warn('Time series collection failed', { ticker, error: settled.reason });
+        }
+      }
+      result.flowAlerts += flows.status === 'fulfilled' ? flows.value : 0;
+      result.darkPoolPrints += prints.status === 'fulfilled' ? prints.value : 0;
+      result.greekExposures += greeks.status === 'fulfilled' ? greeks.value : 0;
+    });
+
+    const cutoff = new Date();
+    cutoff.setMonth(cutoff.getMonth() - RETENTION_MONTHS);
+    try {
+      const dropped = await this.repository.dropPartitionsBefore(cutoff);
+      if (dropped > 0) {
+        log.info('Old time-series partitions dropped', { dropped });
+      }
+    } catch (error) {
+      log.error('Failed to apply time-series retention', error);
+    }
+
+    result.durationMs = Date.now() - startedAt;
+    log.info('Time series collected', { ...result });
+    return result;
+  }
+}
@@ -0,0 +1,308 @@
+/**
+ * Store de séries temporelles des flows d'options, prints dark pool et expositions grecques
+ * Les services lisent des fenêtres (ticker, intervalle) depuis Supabase. Un ticker que le
+ * collecteur planifié ne couvre pas (ou plus) est collecté à la demande puis relu : le
+ * résultat a la même forme dans les deux cas.
+ */
+
+import { logger } from '../utils/logger';
+import * as uw from '../unusual-whales';
+import { TimeSeriesRepository } from '../repositories/time-series.repository';
+import type {
+  DarkPoolPoint,
+  FlowAlertPoint,
+  FlowWindow,
+  GreekExposurePoint,
+  TimeSeriesSource,
+  TimeWindow,
+} from '../types/time-series';
+
+/** Intervalle du job timeseries-collect (minutes) */
+export const COLLECT_INTERVAL_MINUTES = 15;
+
+// Au-delà de deux cycles manqués, la fenêtre stockée n'est plus considérée à jour
+const STALE_AFTER_MS = 2 * COLLECT_INTERVAL_MINUTES * 60 * 1000;
+
+// Volume d'une collecte (maximum des endpoints UW)
+const FLOW_ALERTS_LIMIT = 200;
+const DARK_POOL_LIMIT = 200;
+const GREEK_EXPOSURE_TIMEFRAME = '1M';
+
+// Jours calendaires lus en plus des séances demandées (week-end + jours fériés accolés)
+const SESSION_LOOKBACK_EXTRA_DAYS = 6;
+
+function toNumber(value: unknown): number {
+  const n = typeof value === 'number' ? value : parseFloat(value as string);
+  return Number.isFinite(n) ? n : 0;
+}
+
+/**
+ * Fenêtre couvrant les `days` derniers jours
+ */
+export function sinceDays(days: number, options: Omit<FlowWindow, 'from'> = {}): FlowWindow {
+  return { from: new Date(Date.now() - days * 24 * 60 * 60 * 1000).toISOString(), ...options };
+}
+
+/**
+ * Points des `sessions` derniers jours de trading présents dans la série : un week-end,
+ * un jour férié ou la pré-ouverture ne vident pas la fenêtre
+ */
+export function lastSessions<T extends { tradeDate: string }>(points: T[], sessions: number): T[] {
+  const dates = new Set(
+    Array.from(new Set(points.map((p) => p.tradeDate)))
+      .sort()
+      .slice(-sessions)
+  );
+  return points.filter((p) => dates.has(p.tradeDate));
+}
+
+/**
+ * Flow alert UW (GET /option-trades/flow-alerts) -> point typé (null si inexploitable)
+ */
+export function flowAlertPointFrom(alert: any, ticker: string): FlowAlertPoint | null {
+  if (!alert?.created_at || !alert.option_chain) {
+    return null;
+  }
+  const executedAt = new Date(alert.created_at).toISOString();
+  return {
+    ticker: String(alert.ticker || ticker).toUpperCase(),
+    tradeDate: executedAt.split('T')[0],
+    executedAt,
+    optionChain: alert.option_chain,
+    isCall: String(alert.type).toLowerCase() === 'call',
+    strike: toNumber(alert.strike),
+    expiry: alert.expiry || null,
+    premium: toNumber(alert.total_premium),
+    askSidePremium: toNumber(alert.total_ask_side_prem),
+    size: Math.round(toNumber(alert.total_size)),
+    volume: Math.round(toNumber(alert.volume)),
+    openInterest: Math.round(toNumber(alert.open_interest)),
+    underlyingPrice: alert.underlying_price != null ? toNumber(alert.underlying_price) : null,
+    isSweep: Boolean(alert.has_sweep),
+    alertRule: alert.alert_rule ?? null,
+  };
+}
+
+/**
+ * Print dark pool UW (GET /darkpool/{ticker}) -> point typé
+ */
+export function darkPoolPointFrom(trade: any, ticker: string): DarkPoolPoint | null {
+  if (!trade?.executed_at || trade.tracking_id == null) {
+    return null;
+  }
+  const executedAt = new Date(trade.executed_at).toISOString();
+  return {
+    ticker: String(trade.ticker || ticker).toUpperCase(),
+    tradeDate: executedAt.split('T')[0],
+    executedAt,
+    trackingId: Number(trade.tracking_id),
+    price: toNumber(trade.price),
+    size: Math.round(toNumber(trade.size)),
+    premium: toNumber(trade.premium),
+    canceled: Boolean(trade.canceled),
+  };
+}
+
+/**
+ * Exposition grecque UW (GET /stock/{ticker}/greek-exposure) -> point typé
+ */
+export function greekExposurePointFrom(item: any, ticker: string): GreekExposurePoint | null {
+  if (!item?.date) {
+    return null;
+  }
+  return {
+    ticker: ticker.toUpperCase(),
+    tradeDate: String(item.date).split('T')[0],
+    callGamma: toNumber(item.call_gamma),
+    putGamma: toNumber(item.put_gamma),
+    callDelta: toNumber(item.call_delta),
+    putDelta: toNumber(item.put_delta),
+    callVanna: toNumber(item.call_vanna),
+    putVanna: toNumber(item.put_vanna),
+    callCharm: toNumber(item.call_charm),
+    putCharm: toNumber(item.put_charm),
+  };
+}
+
+function inWindow(timestamp: string, window: TimeWindow): boolean {
+  return timestamp >= window.from && (!window.to || timestamp < window.to);
+}
+
+export class TimeSeriesService {
+  private repository = new TimeSeriesRepository();
+
+  /**
+   * Flow alerts d'un ticker sur une fenêtre (plus récentes en premier)
+   */
+  async getFlowAlerts(ticker: string, window: FlowWindow): Promise<FlowAlertPoint[]> {
+    const upperTicker = ticker.toUpperCase();
+    const fresh = await this.ensureCollected(upperTicker, 'flow_alerts', () => this.fetchFlowAlerts(upperTicker));
+    if (fresh) {
+      return fresh
+        .filter(
+          (p) =>
+            inWindow(p.executedAt, window) &&
+            (window.minPremium === undefined || p.premium >= window.minPremium) &&
+            (window.isCall === undefined || p.isCall === window.isCall)
+        )
+        .sort((a, b) => b.executedAt.localeCompare(a.executedAt))
+        .slice(0, window.limit ?? 1000);
+    }
+    return this.repository.findFlowAlerts(upperTicker, window);
+  }
+
+  /**
+   * Flow alerts des `sessions` dernières séances ayant des données
+   */
+  async getRecentFlowAlerts(
+    ticker: string,
+    sessions: number,
+    options: Omit<FlowWindow, 'from' | 'to'> = {}
+  ): Promise<FlowAlertPoint[]> {
+    const points = await this.getFlowAlerts(ticker, sinceDays(sessions + SESSION_LOOKBACK_EXTRA_DAYS, options));
+    return lastSessions(points, sessions);
+  }
+
+  async getDarkPoolPrints(ticker: string, window: TimeWindow): Promise<DarkPoolPoint[]> {
+    const upperTicker = ticker.toUpperCase();
+    const fresh = await this.ensureCollected(upperTicker, 'dark_pool', () => this.fetchDarkPool(upperTicker));
+    if (fresh) {
+      return fresh
+        .filter((p) => !p.canceled && inWindow(p.executedAt, window))
+        .sort((a, b) => b.executedAt.localeCompare(a.executedAt))
+        .slice(0, window.limit ?? 1000);
+    }
+    return this.repository.findDarkPoolPrints(upperTicker, window);
+  }
+
+  /**
+   * Prints dark pool des `sessions` dernières séances ayant des données
+   */
+  async getRecentDarkPoolPrints(
+    ticker: string,
+    sessions: number,
+    options: Omit<TimeWindow, 'from' | 'to'> = {}
+  ): Promise<DarkPoolPoint[]> {
+    const points = await this.getDarkPoolPrints(ticker, sinceDays(sessions + SESSION_LOOKBACK_EXTRA_DAYS, options));
+    return lastSessions(points, sessions);
+  }
+
+  async getGreekExposures(ticker: string, window: TimeWindow): Promise<GreekExposurePoint[]> {
+    const upperTicker = ticker.toUpperCase();
+    const fresh = await this.ensureCollected(upperTicker, 'greek_exposure', () =>
+      this.fetchGreekExposures(upperTicker)
+    );
+    if (fresh) {
+      const from = window.from.split('T')[0];
+      return fresh
+        .filter((p) => p.tradeDate >= from && (!window.to || p.tradeDate <= window.to.split('T')[0]))
+        .sort((a, b) => b.tradeDate.localeCompare(a.tradeDate))
+        .slice(0, window.limit ?? 366);
+    }
+    return this.repository.findGreekExposures(upperTicker, window);
+  }
+
+  /**
+   * Collecter les flow alerts récentes d'un ticker et les ajouter au store
+   */
+  async collectFlowAlerts(ticker: string): Promise<number> {
+    const points = await this.fetchFlowAlerts(ticker);
+    await this.store('flow_alerts', ticker, points);
+    return points.length;
+  }
+
+  async collectDarkPool(ticker: string): Promise<number> {
+    const points = await this.fetchDarkPool(ticker);
+    await this.store('dark_pool', ticker, points);
+    return points.length;
+  }
+
+  async collectGreekExposures(ticker: string): Promise<number> {
+    const points = await this.fetchGreekExposures(ticker);
+    await this.store('greek_exposure', ticker, points);
+    return points.length;
+  }
+
+  private async fetchFlowAlerts(ticker: string): Promise<FlowAlertPoint[]> {
+    const result = await uw.getUWFlowAlerts(ticker, { limit: FLOW_ALERTS_LIMIT });
+    return (Array.isArray(result.data) ? result.data : [])
+      .map((alert: any) => flowAlertPointFrom(alert, ticker))
+      .filter((p): p is FlowAlertPoint => p !== null);
+  }
+
+  private async fetchDarkPool(ticker: string): Promise<DarkPoolPoint[]> {
+    const result = await uw.getUWDarkPoolTrades(ticker, { limit: DARK_POOL_LIMIT });
+    return (Array.isArray(result.data) ? result.data : [])
+      .map((trade: any) => darkPoolPointFrom(trade, ticker))
+      .filter((p): p is DarkPoolPoint => p !== null);
+  }
+
+  private async fetchGreekExposures(ticker: string): Promise<GreekExposurePoint[]> {
+    const result = await uw.getUWGreekExposure(ticker, { timeframe: GREEK_EXPOSURE_TIMEFRAME });
+    return (Array.isArray(result.data) ? result.data : [])
+      .map((item: any) => greekExposurePointFrom(item, ticker))
+      .filter((p): p is GreekExposurePoint => p !== null);
+  }
+
+  private async store(source: TimeSeriesSource, ticker: string, points: any[]): Promise<void> {
+    switch (source) {
+      case 'flow_alerts':
+        await this.repository.appendFlowAlerts(points);
+        break;
+      case 'dark_pool':
+        await this.repository.appendDarkPoolPrints(points);
+        break;
+      case 'greek_exposure':
+        await this.repository.upsertGreekExposures(points);
+        break;
+    }
+    await this.repository.markCollected(ticker, source, points.length);
+  }
+
+  /**
+   * Collecter à la demande si la source n'est pas à jour pour ce ticker.
+   * Retourne null quand le store est à jour (ou vient d'être complété) et peut être lu,
+   * ou quand l'amont échoue alors que le store contient déjà une collecte ;
+   * retourne les points récupérés si leur écriture a échoué, pour filtrage en mémoire.
+   */
+  private async ensureCollected<T>(
+    ticker: string,
+    source: TimeSeriesSource,
+    fetch: () => Promise<T[]>
+  ): Promise<T[] | null> {
+    const log = logger.child({ ticker, source, operation: 'timeSeriesRead' });
+
+    let collectedAt: Date | null = null;
+    try {
+      collectedAt = await this.repository.getCollectedAt(ticker, source);
+    } catch (error) {
+      log.warn('Collector state unavailable', { error });
+    }
+    if (collectedAt && Date.now() - collectedAt.getTime() < STALE_AFTER_MS) {
+      return null;
+    }
+
+    log.info('Time series not collected recently, collecting on demand', {
+      collectedAt: collectedAt?.toISOString() ?? null,
+    });
+    let points: T[];
+    try {
+      points = await fetch();
+    } catch (error) {
+      if (!collectedAt) {
+        throw error;
+      }
+      // Amont indisponible : l'historique stocké, même en retard, reste servi
+      log.warn('On-demand collection failed, serving stored time series', { error });
+      return null;
+    }
+    try {
+      await this.store(source, ticker, points);
+      return null;
+    } catch (error) {
+      // Le store n'a pas pu être complété : fenêtre servie depuis l'amont, sans historique
+      log.warn('On-demand collection not stored, serving upstream window only', { error });
+      return points;
+    }
+  }
+}
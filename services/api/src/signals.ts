@@ -1,5 +1,6 @@
 import { supabase } from "./supabase";
 import { z } from "zod";
+import { ValidationError } from "./utils/errors";
 
 const SignalInput = z.object({
   source: z.enum(["scrapecreators", "coinglass", "rss", "sec_8k", "sec_13f"]),
@@ -26,17 +27,34 @@ export async function createSignal(body: unknown) {
   return data;
 }
 
+// Colonnes de la liste : raw_data (JSONB volumineux) seulement sur demande
+const SIGNAL_LIST_COLUMNS =
+  "id, source, type, timestamp, summary, importance_score, tags, impact, priority, processed_at, processing_status, created_at";
+
+const TIMESTAMP_PATTERN = /^\d{4}-\d{2}-\d{2}[T ][\d:.]+(Z|[+-]\d{2}(:?\d{2})?)?$/;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+/**
+ * Liste des signaux, plus récents en premier.
+ * Pagination par curseur : `before` / `before_id` = timestamp et id du dernier signal de la
+ * page précédente (valeurs renvoyées telles quelles). `offset` reste accepté sans curseur.
+ */
 export async function getSignals(filters?: {
   source?: string;
   type?: string;
   limit?: number;
   offset?: number;
   min_importance?: number;
+  before?: string;
+  before_id?: string;
+  include_raw?: boolean;
 }) {
+  const limit = Math.min(Math.max(filters?.limit || 100, 1), 500);
   let query = supabase
     .from("signals")
-    .select("*")
-    .order("timestamp", { ascending: false });
+    .select(filters?.include_raw ? `${SIGNAL_LIST_COLUMNS}, raw_data` : SIGNAL_LIST_COLUMNS)
+    .order("timestamp", { ascending: false })
+    .order("id", { ascending: false });
 
   if (filters?.source) {
     query = query.eq("source", filters.source);
@@ -48,9 +66,26 @@ export async function getSignals(filters?: {
     query = query.gte("importance_score", filters.min_importance);
   }
 
-  query = query.limit(filters?.limit || 100);
-  if (filters?.offset) {
-    query = query.range(filters.offset, filters.offset + (filters.limit || 100) - 1);
+  if (filters?.before) {
+    if (!TIMESTAMP_PATTERN.test(filters.before)) {
+      throw new ValidationError("Invalid before cursor", "before");
+    }
+    if (filters.before_id) {
+      if (!UUID_PATTERN.test(filters.before_id)) {
+        throw new ValidationError("Invalid before_id cursor", "before_id");
+      }
+      // (timestamp, id) < (before, before_id) : la borne sur timestamp reste une condition d'index
+      query = query
+        .lte("timestamp", filters.before)
+        .or(`timestamp.lt."${filters.before}",id.lt.${filters.before_id}`);
+    } else {
+      query = query.lt("timestamp", filters.before);
+    }
+    query = query.limit(limit);
+  } else if (filters?.offset) {
+    query = query.range(filters.offset, filters.offset + limit - 1);
+  } else {
+    query = query.limit(limit);
   }
 
   const { data, error } = await query;
@@ -69,21 +104,16 @@ export async function getSignal(id: string) {
   return data;
 }
 
+/**
+ * Recherche plein texte classée dans les résumés (RPC search_signals, index GIN)
+ * Syntaxe websearch : mots, "expression exacte", -exclusion, OR
+ */
 export async function searchSignals(query: string, limit: number = 20) {
-  // Full-text search PostgreSQL avec to_tsvector
-  // Note: Supabase PostgREST ne supporte pas directement textSearch sur les index GIN
-  // On utilise une recherche dans summary avec ilike pour l'instant
-  // Pour une vraie full-text search, utiliser une fonction PostgreSQL custom
-  
-  const { data, error } = await supabase
-    .from("signals")
-    .select("*")
-    .or(`summary.ilike.%${query}%,raw_data.ilike.%${query}%`)
-    .order("importance_score", { ascending: false, nullsFirst: false })
-    .order("timestamp", { ascending: false })
-    .limit(limit);
+  const { data, error } = await supabase.rpc("search_signals", {
+    p_query: query,
+    p_limit: limit,
+  });
 
   if (error) throw error;
   return data;
 }
-
@@ -22,6 +22,31 @@ interface Ownership {
   percentage?: number;
 }
 
+// Positions des fonds suivis (fund_ownership_index)
+interface FundPosition {
+  cusip?: string;
+  fund_id?: number;
+  put_value?: number;
+  call_value?: number;
+  prev_shares?: number | null;
+  shares_change?: number | null;
+  change_pct?: number | null;
+  weight?: number;
+  action?: "new" | "increased" | "decreased" | "unchanged" | "closed" | null;
+}
+
+interface OwnershipConsensus {
+  cusips: string[];
+  holder_count: number;
+  buyers: number;
+  sellers: number;
+  new_positions: number;
+  closed_positions: number;
+  net_buyers: number;
+  total_shares: number;
+  total_value: number;
+}
+
 interface Activity {
   institution_name: string;
   units_change: number;
@@ -491,6 +516,110 @@ export async function getTickerActivity(
   }
 }
 
+// Nouvelle tentative de résolution d'un ticker sans CUSIP connu
+const TICKER_CUSIPS_RETRY_DAYS = 7;
+
+/**
+ * CUSIPs d'un ticker : table ticker_cusips, sinon FMP search-exchange-variants
+ * (les holdings 13F n'ont pas de ticker fiable, l'index est par CUSIP)
+ */
+async function resolveTickerCusips(ticker: string): Promise<string[]> {
+  const symbol = ticker.toUpperCase();
+  const { data: cached } = await supabase
+    .from("ticker_cusips")
+    .select("cusips, resolved_at")
+    .eq("ticker", symbol)
+    .maybeSingle();
+
+  if (cached && (cached.cusips.length > 0 || new Date(cached.resolved_at) > addDays(-TICKER_CUSIPS_RETRY_DAYS))) {
+    return cached.cusips;
+  }
+
+  const variants = await fetchFMP(`/search-exchange-variants?symbol=${symbol}`);
+  const cusips: string[] = Array.from(
+    new Set(
+      (Array.isArray(variants) ? variants : [])
+        .filter((variant: any) => variant.symbol?.toUpperCase() === symbol && variant.cusip)
+        .map((variant: any) => String(variant.cusip).toUpperCase())
+    )
+  );
+
+  await supabase
+    .from("ticker_cusips")
+    .upsert({ ticker: symbol, cusips, resolved_at: new Date().toISOString() });
+  return cusips;
+}
+
+/**
+ * Fonds suivis détenant le ticker, depuis l'index inversé alimenté par les 13F parsés
+ * (une lecture indexée par CUSIP, consensus embarqué) ; null si aucun fond suivi ne le détient.
+ * Les positions soldées (action 'closed', 0 action) ne sont pas des détenteurs : elles restent
+ * comptées dans consensus.closed_positions, comme dans holder_count.
+ */
+async function getTrackedFundPositions(
+  ticker: string,
+  limit: number
+): Promise<{ data: (Ownership & FundPosition)[]; consensus: OwnershipConsensus; timestamp: string } | null> {
+  const cusips = await resolveTickerCusips(ticker);
+  if (cusips.length === 0) {
+    return null;
+  }
+
+  const { data: rows, error } = await supabase
+    .from("fund_ownership_index")
+    .select("*, funds(name), fund_ownership_consensus(*)")
+    .in("cusip", cusips)
+    .gt("shares", 0)
+    .order("market_value", { ascending: false })
+    .limit(limit);
+
+  if (error) throw error;
+  if (!rows || rows.length === 0) {
+    return null;
+  }
+
+  const consensusByCusip = new Map<string, any>(
+    rows
+      .filter((row) => row.fund_ownership_consensus)
+      .map((row) => [row.cusip, row.fund_ownership_consensus] as [string, any])
+  );
+  const consensusRows = Array.from(consensusByCusip.values());
+  const sum = (field: string) => consensusRows.reduce((total, row) => total + Number(row[field] || 0), 0);
+
+  return {
+    data: rows.map((row) => ({
+      name: row.funds?.name || "",
+      shares: Number(row.shares),
+      units: Number(row.shares),
+      value: Number(row.market_value),
+      is_hedge_fund: true,
+      report_date: row.period_of_report || "",
+      filing_date: row.filing_date || "",
+      cusip: row.cusip,
+      fund_id: row.fund_id,
+      put_value: Number(row.put_value),
+      call_value: Number(row.call_value),
+      prev_shares: row.prev_shares != null ? Number(row.prev_shares) : null,
+      shares_change: row.shares_change != null ? Number(row.shares_change) : null,
+      change_pct: row.change_pct != null ? Number(row.change_pct) : null,
+      weight: Number(row.weight),
+      action: row.action,
+    })),
+    consensus: {
+      cusips: Array.from(consensusByCusip.keys()),
+      holder_count: sum("holder_count"),
+      buyers: sum("buyers"),
+      sellers: sum("sellers"),
+      new_positions: sum("new_positions"),
+      closed_positions: sum("closed_positions"),
+      net_buyers: sum("net_buyers"),
+      total_shares: sum("total_shares"),
+      total_value: sum("total_value"),
+    },
+    timestamp: rows.reduce((latest, row) => (row.updated_at > latest ? row.updated_at : latest), rows[0].updated_at),
+  };
+}
+
 export async function getTickerHedgeFunds(
   ticker: string,
   limit: number = 100
@@ -500,8 +629,28 @@ export async function getTickerHedgeFunds(
   cached: boolean;
   count: number;
   timestamp: string;
+  source?: "fund_holdings" | "unusual_whales";
+  consensus?: OwnershipConsensus;
 }> {
   try {
+    // Fonds suivis d'abord (13F déjà parsés), Unusual Whales si le ticker n'y est pas
+    try {
+      const tracked = await getTrackedFundPositions(ticker, limit);
+      if (tracked) {
+        return {
+          success: true,
+          data: tracked.data,
+          cached: true,
+          count: tracked.data.length,
+          timestamp: tracked.timestamp,
+          source: "fund_holdings",
+          consensus: tracked.consensus,
+        };
+      }
+    } catch (error) {
+      console.error(`[getTickerHedgeFunds] Fund ownership index unavailable for ${ticker}:`, error);
+    }
+
     // Filtrer les hedge funds depuis l'ownership
     const ownership = await getTickerOwnership(ticker, limit);
     
@@ -524,6 +673,7 @@ export async function getTickerHedgeFunds(
       cached: ownership.cached,
       count: hedgeFunds.length,
       timestamp: ownership.timestamp,
+      source: "unusual_whales",
     };
   } catch (error: any) {
     console.error(`[getTickerHedgeFunds] Error for ${ticker}:`, error);
@@ -6,10 +6,12 @@ export type AlertLogic = 'AND' | 'OR';
 
 export type SignalType =
   | 'options_flow'
+  | 'flow_premium'
   | 'insider_activity'
   | 'dark_pool'
   | 'short_interest'
   | 'greeks'
+  | 'iv_rank'
   | 'volume'
   | 'price';
 
@@ -26,6 +28,19 @@ export interface AlertCondition {
   params?: Record<string, any>;
 }
 
+/**
+ * Conditions compilées d'une alerte (colonne user_alerts.compiled)
+ * Tableaux parallèles : index de feature, opcode et seuil par condition.
+ * Un seuil null correspond à une égalité sur une valeur non numérique (jamais vraie).
+ */
+export interface CompiledAlertProgram {
+  version: 1;
+  logic: AlertLogic;
+  features: number[];
+  ops: number[];
+  thresholds: Array<number | null>;
+}
+
 export interface MultiSignalAlertConfig {
   /** ID de l'utilisateur */
   userId: string;
@@ -191,6 +191,25 @@ export interface GraphCentralityMetrics {
   closeness: number; // 0-1
   eigenvector: number; // 0-1
   overall: number; // 0-1 (moyenne pondérée)
+  computedAt?: string; // Date du dernier calcul batch (absent si jamais calculé)
+}
+
+// Scores pré-calculés par le job batch (cf. GraphCentralityService)
+export type CentralityScores = Omit<GraphCentralityMetrics, 'computedAt'>;
+
+export type CentralityRawScores = Omit<CentralityScores, 'overall'>;
+
+export interface CentralityGraph {
+  nodes: string[]; // elementId des nœuds
+  edges: Array<[string, string]>; // [source, target] (orienté)
+}
+
+export interface CentralityJobResult {
+  engine: 'gds' | 'in-process';
+  nodes: number;
+  written: number;
+  computedAt: string;
+  durationMs: number;
 }
 
 export interface SectorCluster {
@@ -243,6 +243,19 @@ export interface MultiCriteriaScreenerResponse {
   cached: boolean;
   count: number;
   timestamp: string;
+  /** Budget de temps atteint : seuls les candidats analysés sont retournés */
+  partial?: boolean;
+  /** Candidats non analysés faute de temps */
+  skipped?: number;
+}
+
+export interface ScreenStats {
+  /** Candidats analysés */
+  scanned: number;
+  /** Rejetés par les filtres peu coûteux, sans appels de flow */
+  rejectedEarly: number;
+  /** Non analysés (budget de temps atteint) */
+  skipped: number;
 }
 
 export interface ScreenedTicker {
@@ -390,12 +403,30 @@ export interface SectorAnalysis {
   sector: string;
   averagePE: number;
   averageGrowth: number;
+  medianPE?: number;
+  medianGrowth?: number;
+  /** Date de calcul des agrégats fondamentaux (cache sectoriel) */
+  metricsComputedAt?: string;
   sentiment: SectorSentiment;
   etfFlows: ETFFlow[];
   topPerformers: SectorTicker[];
   recommendations: SectorRecommendation[];
 }
 
+/**
+ * Agrégats fondamentaux d'un secteur (recalculés par le job sector-metrics)
+ */
+export interface SectorMetrics {
+  sector: string;
+  tickers: string[];
+  tickerMetrics: Record<string, { pe?: number; growth?: number }>;
+  averagePE: number;
+  averageGrowth: number;
+  medianPE: number;
+  medianGrowth: number;
+  computedAt: string;
+}
+
 export interface SectorSentiment {
   score: number; // 0-100
   tide: 'bullish' | 'neutral' | 'bearish';
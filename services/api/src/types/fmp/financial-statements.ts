@@ -864,3 +864,31 @@ export interface AsReportedFinancialStatements {
 
 export type AsReportedFinancialStatementsResponse = AsReportedFinancialStatements[];
 
+
+// ========== Projections (champs déclarés, format colonnes) ==========
+
+export interface StatementProjectionTypes {
+  'income-statement': IncomeStatement;
+  'balance-sheet-statement': BalanceSheetStatement;
+  'cash-flow-statement': CashFlowStatement;
+  'key-metrics': KeyMetrics;
+  ratios: FinancialRatios;
+}
+
+export type StatementProjectionEndpoint = keyof StatementProjectionTypes;
+
+export interface StatementProjectionQueryParams {
+  symbol: string; // Required
+  limit?: number;
+  period?: 'Q1' | 'Q2' | 'Q3' | 'Q4' | 'FY' | 'annual' | 'quarter';
+}
+
+/**
+ * Enregistrements réduits aux champs demandés, stockés par colonne
+ * (index 0 = période la plus récente, comme la réponse FMP)
+ */
+export interface ColumnarRecords<T, F extends keyof T = keyof T> {
+  fields: F[];
+  length: number;
+  columns: { [K in F]: Array<T[K] | null> };
+}
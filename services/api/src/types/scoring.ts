@@ -20,6 +20,23 @@ export interface TickerScore {
   signals: ScoreSignals;
 }
 
+/** Score accompagné de sa fraîcheur (scoring batch) */
+export interface TimestampedTickerScore extends TickerScore {
+  computedAt: string;
+  /** Expiration des données amont du score (bundle) */
+  freshUntil: string;
+}
+
+export interface TickerScoresResponse {
+  success: boolean;
+  data: TimestampedTickerScore[];
+  /** Tickers servis depuis les scores précalculés */
+  precomputed: number;
+  /** Tickers calculés pendant la requête */
+  computed: number;
+  timestamp: string;
+}
+
 export interface ScoreBreakdown {
   options: number; // 0-100
   insiders: number; // 0-100
@@ -61,3 +61,27 @@ export interface CopyTradesResponse {
   error?: string;
 }
 
+
+/**
+ * Snapshot des positions d'un fonds pour une date de rapport 13F
+ * Les positions ne changent qu'à chaque nouveau dépôt : performance et top positions
+ * sont calculées une fois par (institution, date de rapport).
+ */
+export interface FundHoldingsSnapshot {
+  institution: string;
+  /** Fin de la période de rapport 13F (YYYY-MM-DD) */
+  reportDate: string;
+  totalValue: number;
+  holdingsCount: number;
+  performance: number;
+  topPositions: TopPosition[];
+  computedAt: string;
+}
+
+export interface FundSnapshotRefreshResult {
+  funds: number;
+  refreshed: number;
+  failed: number;
+  undated: number; // institutions sans date de rapport, non recalculées
+  durationMs: number;
+}
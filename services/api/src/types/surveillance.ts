@@ -53,6 +53,8 @@ export interface SurveillanceAlert {
   ticker: string;
   /** Type d'alerte */
   type: AlertType;
+  /** Donnée à l'origine de l'alerte (une seule alerte par surveillance, type et clé) */
+  sourceKey: string;
   /** Message */
   message: string;
   /** Données associées */
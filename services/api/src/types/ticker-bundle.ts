@@ -0,0 +1,45 @@
+/**
+ * Types pour les bundles de données préchauffés par ticker
+ */
+
+/** Sources amont partagées par surveillance, alertes et scoring */
+export type TickerBundleSource =
+  | 'quote'
+  | 'optionsFlow'
+  | 'darkPool'
+  | 'shortInterest'
+  | 'insiders'
+  | 'greeks'
+  | 'maxPain'
+  | 'ivRank';
+
+export interface TickerBundle {
+  ticker: string;
+  /** Payload `data` de chaque source (absent si l'appel amont a échoué) */
+  data: Partial<Record<TickerBundleSource, any>>;
+  /** Sources en échec lors du dernier préchauffage */
+  errors: TickerBundleSource[];
+  fetchedAt: string;
+  expiresAt: string;
+}
+
+export interface WarmupCandidate {
+  ticker: string;
+  /** Nombre de surveillances actives */
+  watches: number;
+  /** Nombre d'alertes actives */
+  alerts: number;
+  /** Requêtes récentes (trafic interactif) */
+  hits: number;
+  priority: number;
+}
+
+export interface WarmupResult {
+  candidates: number;
+  warmed: number;
+  failed: number;
+  /** Scores composites précalculés à partir des bundles préchauffés */
+  scored: number;
+  tickers: string[];
+  durationMs: number;
+}
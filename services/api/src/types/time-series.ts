@@ -0,0 +1,71 @@
+/**
+ * Types pour le store de séries temporelles (flows, dark pool, expositions grecques)
+ */
+
+export type TimeSeriesSource = 'flow_alerts' | 'dark_pool' | 'greek_exposure';
+
+export interface FlowAlertPoint {
+  ticker: string;
+  /** Jour de trading (YYYY-MM-DD, clé de partition) */
+  tradeDate: string;
+  executedAt: string;
+  optionChain: string;
+  isCall: boolean;
+  strike: number;
+  expiry: string | null;
+  premium: number;
+  askSidePremium: number;
+  size: number;
+  volume: number;
+  openInterest: number;
+  underlyingPrice: number | null;
+  isSweep: boolean;
+  alertRule: string | null;
+}
+
+export interface DarkPoolPoint {
+  ticker: string;
+  tradeDate: string;
+  executedAt: string;
+  trackingId: number;
+  price: number;
+  size: number;
+  premium: number;
+  canceled: boolean;
+}
+
+export interface GreekExposurePoint {
+  ticker: string;
+  tradeDate: string;
+  callGamma: number;
+  putGamma: number;
+  callDelta: number;
+  putDelta: number;
+  callVanna: number;
+  putVanna: number;
+  callCharm: number;
+  putCharm: number;
+}
+
+/** Fenêtre de lecture (bornes ISO, `to` exclue, défaut : maintenant) */
+export interface TimeWindow {
+  from: string;
+  to?: string;
+  /** Nombre maximum de points (les plus récents) */
+  limit?: number;
+}
+
+export interface FlowWindow extends TimeWindow {
+  minPremium?: number;
+  isCall?: boolean;
+}
+
+export interface CollectorResult {
+  tickers: number;
+  flowAlerts: number;
+  darkPoolPrints: number;
+  greekExposures: number;
+  failed: number;
+  partitionsCreated: number;
+  durationMs: number;
+}
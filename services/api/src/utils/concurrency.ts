@@ -0,0 +1,32 @@
+/**
+ * Exécution parallèle bornée
+ * Limite le nombre d'appels simultanés vers les APIs amont (rate limits UW/FMP)
+ */
+
+/**
+ * Appliquer `worker` à chaque élément avec au plus `limit` exécutions simultanées.
+ * Les résultats sont retournés dans l'ordre des éléments, au format Promise.allSettled.
+ */
+export async function mapWithConcurrency<T, R>(
+  items: readonly T[],
+  limit: number,
+  worker: (item: T, index: number) => Promise<R>
+): Promise<PromiseSettledResult<R>[]> {
+  const results: PromiseSettledResult<R>[] = new Array(items.length);
+  let next = 0;
+
+  const runner = async () => {
+    while (next < items.length) {
+      const index = next++;
+      try {
+        results[index] = { status: 'fulfilled', value: await worker(items[index], index) };
+      } catch (reason) {
+        results[index] = { status: 'rejected', reason };
+      }
+    }
+  };
+
+  const workers = Math.max(1, Math.min(limit, items.length));
+  await Promise.all(Array.from({ length: workers }, runner));
+  return results;
+}
@@ -0,0 +1,37 @@
+/**
+ * Lectures paginées et filtres `.in()` découpés pour PostgREST
+ * - une requête renvoie au plus max_rows lignes (1000 par défaut sur Supabase), sans erreur
+ * - un `.in('id', ...)` trop long dépasse la longueur d'URL acceptée
+ */
+
+// Ne doit pas dépasser max_rows : une page courte signale la fin des résultats
+export const PAGE_SIZE = 1000;
+export const IN_CHUNK_SIZE = 300;
+
+export function chunk<T>(items: readonly T[], size: number = IN_CHUNK_SIZE): T[][] {
+  const chunks: T[][] = [];
+  for (let i = 0; i < items.length; i += size) {
+    chunks.push(items.slice(i, i + size));
+  }
+  return chunks;
+}
+
+/**
+ * Lire toutes les pages d'une requête (ordre stable requis) jusqu'à une page courte
+ */
+export async function fetchAllPages<T>(
+  fetchPage: (from: number, to: number) => PromiseLike<{ data: T[] | null; error: { message: string } | null }>,
+  pageSize: number = PAGE_SIZE
+): Promise<{ data: T[]; error: { message: string } | null }> {
+  const rows: T[] = [];
+  for (let from = 0; ; from += pageSize) {
+    const { data, error } = await fetchPage(from, from + pageSize - 1);
+    if (error) {
+      return { data: rows, error };
+    }
+    rows.push(...(data || []));
+    if (!data || data.length < pageSize) {
+      return { data: rows, error: null };
+    }
+  }
+}
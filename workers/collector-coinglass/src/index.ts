@@ -11,6 +11,29 @@ const eventBridge = new EventBridgeClient({});
 const EVENT_BUS_NAME = process.env.EVENT_BUS_NAME || "";
 const COINGLASS_API_KEY = process.env.COINGLASS_API_KEY || "";
 
+// Taille maximale d'un PutEvents (limite EventBridge)
+const EVENTS_BATCH_SIZE = 10;
+// Clés par requête in() (longueur d'URL PostgREST ; une requête renvoie au plus 1000 lignes)
+const STATE_LOOKUP_CHUNK = 200;
+
+/**
+ * Une ligne CoinGlass évaluée contre son seuil
+ */
+interface Observation {
+  type: "funding" | "oi" | "liquidation";
+  key: string; // type:symbol:exchange(:side)
+  value: number;
+  direction: number; // sens du dépassement
+  triggered: boolean;
+  raw_data: Record<string, unknown>;
+}
+
+interface ThresholdState {
+  key: string;
+  active: boolean;
+  direction: number;
+}
+
 export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) => {
   console.log("CoinGlass Collector triggered");
 
@@ -20,24 +43,36 @@ export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) =
   }
 
   try {
-    // Collecter funding rates
-    await collectFundingRates();
-    
-    // Collecter Open Interest
-    await collectOpenInterest();
-    
-    // Collecter liquidations
-    await collectLiquidations();
-
-    return { statusCode: 200, body: JSON.stringify({ success: true }) };
+    // Les trois endpoints en parallèle ; un endpoint en erreur n'empêche pas les autres
+    const collectors = [collectFundingRates, collectOpenInterest, collectLiquidations];
+    const results = await Promise.allSettled(collectors.map((collect) => collect()));
+
+    const observations: Observation[] = [];
+    const errors: any[] = [];
+    results.forEach((result, index) => {
+      if (result.status === "fulfilled") {
+        observations.push(...result.value);
+      } else {
+        console.error(`Error in ${collectors[index].name}:`, result.reason);
+        errors.push(result.reason);
+      }
+    });
+    if (errors.length === collectors.length) {
+      throw errors[0];
+    }
+
+    const created = await ingestObservations(observations);
+    console.log(`CoinGlass cycle complete: ${observations.length} rows, ${created} new signals`);
+
+    return { statusCode: 200, body: JSON.stringify({ success: true, created }) };
   } catch (error: any) {
     console.error("CoinGlass Collector error:", error);
     return { statusCode: 500, body: JSON.stringify({ error: error.message }) };
   }
 };
 
-async function collectFundingRates() {
-  const response = await fetch("https://fapi.coinglass.com/api/futures/v2/funding-rate", {
+async function fetchCoinGlass(url: string): Promise<any[]> {
+  const response = await fetch(url, {
     headers: {
       "coinglassSecret": COINGLASS_API_KEY,
     },
@@ -48,127 +83,189 @@ async function collectFundingRates() {
   }
 
   const data = await response.json();
-  
-  // Traiter les données de funding
-  if (data.data) {
-    for (const item of data.data) {
-      const fundingRate = parseFloat(item.fundingRate || 0);
-      
+  return data.data || [];
+}
+
+async function collectFundingRates(): Promise<Observation[]> {
+  const items = await fetchCoinGlass("https://fapi.coinglass.com/api/futures/v2/funding-rate");
+
+  return items.map((item): Observation => {
+    const fundingRate = parseFloat(item.fundingRate || 0);
+    return {
+      type: "funding",
+      key: `funding:${item.symbol}:${item.exchange ?? ""}`,
+      value: fundingRate,
+      direction: Math.sign(fundingRate),
       // Détecter les spikes significatifs (> 0.01% ou < -0.01%)
-      if (Math.abs(fundingRate) > 0.0001) {
-        await createSignal({
-          source: "coinglass",
-          type: "funding",
-          raw_data: {
-            symbol: item.symbol,
-            fundingRate: fundingRate,
-            exchange: item.exchange,
-          },
-        });
-      }
-    }
-  }
+      triggered: Math.abs(fundingRate) > 0.0001,
+      raw_data: {
+        symbol: item.symbol,
+        fundingRate: fundingRate,
+        exchange: item.exchange,
+      },
+    };
+  });
 }
 
-async function collectOpenInterest() {
-  const response = await fetch("https://fapi.coinglass.com/api/futures/v2/open-interest", {
-    headers: {
-      "coinglassSecret": COINGLASS_API_KEY,
-    },
+async function collectOpenInterest(): Promise<Observation[]> {
+  const items = await fetchCoinGlass("https://fapi.coinglass.com/api/futures/v2/open-interest");
+
+  return items.map((item): Observation => {
+    const oiChange = parseFloat(item.change24h || 0);
+    return {
+      type: "oi",
+      key: `oi:${item.symbol}`,
+      value: oiChange,
+      direction: Math.sign(oiChange),
+      // Détecter les changements > 10%
+      triggered: Math.abs(oiChange) > 10,
+      raw_data: {
+        symbol: item.symbol,
+        openInterest: item.openInterest,
+        change24h: oiChange,
+      },
+    };
   });
+}
 
-  if (!response.ok) {
-    throw new Error(`CoinGlass API error: ${response.status}`);
+async function collectLiquidations(): Promise<Observation[]> {
+  const items = await fetchCoinGlass("https://fapi.coinglass.com/api/liquidation/v2/liquidation");
+
+  return items.map((item): Observation => {
+    const liquidationAmount = parseFloat(item.liquidationAmount || 0);
+    return {
+      type: "liquidation",
+      key: `liquidation:${item.symbol}:${item.exchange ?? ""}:${item.side ?? ""}`,
+      value: liquidationAmount,
+      direction: 1,
+      // Traiter les liquidations importantes (> 10M$)
+      triggered: liquidationAmount > 10_000_000,
+      raw_data: {
+        symbol: item.symbol,
+        liquidationAmount: liquidationAmount,
+        side: item.side,
+        exchange: item.exchange,
+      },
+    };
+  });
+}
+
+/**
+ * Un signal par franchissement de seuil (et non par cycle) : insertion multi-lignes,
+ * événements par lots de 10, puis mise à jour des seuils
+ */
+async function ingestObservations(observations: Observation[]): Promise<number> {
+  // Une observation par clé (la dernière si l'API en renvoie plusieurs)
+  const byKey = new Map(observations.map((observation) => [observation.key, observation]));
+
+  // Seuls les états des clés observées sont lus, par lots (la table entière dépasse max_rows)
+  const states = new Map<string, ThresholdState>();
+  const observedKeys = Array.from(byKey.keys());
+  for (let i = 0; i < observedKeys.length; i += STATE_LOOKUP_CHUNK) {
+    const { data: stateRows, error: stateError } = await supabase
+      .from("collector_threshold_state")
+      .select("key, active, direction")
+      .eq("source", "coinglass")
+      .in("key", observedKeys.slice(i, i + STATE_LOOKUP_CHUNK));
+
+    if (stateError) throw stateError;
+    for (const state of (stateRows || []) as ThresholdState[]) {
+      states.set(state.key, state);
+    }
   }
 
-  const data = await response.json();
-  
-  // Traiter OI changes significatifs
-  if (data.data) {
-    for (const item of data.data) {
-      const oiChange = parseFloat(item.change24h || 0);
-      
-      // Détecter les changements > 10%
-      if (Math.abs(oiChange) > 10) {
-        await createSignal({
+  const toEmit: Observation[] = [];
+  const stateUpdates: Array<Record<string, unknown>> = [];
+  const updatedAt = new Date().toISOString();
+
+  for (const observation of byKey.values()) {
+    const previous = states.get(observation.key);
+    if (observation.triggered) {
+      // Nouveau dépassement, ou inversion de sens (funding qui passe de positif à négatif)
+      if (!previous?.active || previous.direction !== observation.direction) {
+        toEmit.push(observation);
+        stateUpdates.push({
           source: "coinglass",
-          type: "oi",
-          raw_data: {
-            symbol: item.symbol,
-            openInterest: item.openInterest,
-            change24h: oiChange,
-          },
+          key: observation.key,
+          active: true,
+          direction: observation.direction,
+          last_value: observation.value,
+          updated_at: updatedAt,
         });
       }
+    } else if (previous?.active) {
+      // Retour sous le seuil : la clé est réarmée
+      stateUpdates.push({
+        source: "coinglass",
+        key: observation.key,
+        active: false,
+        direction: previous.direction,
+        last_value: observation.value,
+        updated_at: updatedAt,
+      });
     }
   }
-}
 
-async function collectLiquidations() {
-  const response = await fetch("https://fapi.coinglass.com/api/liquidation/v2/liquidation", {
-    headers: {
-      "coinglassSecret": COINGLASS_API_KEY,
-    },
-  });
+  let signalIds: string[] = [];
+  if (toEmit.length > 0) {
+    const timestamp = new Date().toISOString();
+    const { data: signals, error } = await supabase
+      .from("signals")
+      .insert(
+        toEmit.map((observation) => ({
+          source: "coinglass",
+          type: observation.type,
+          timestamp,
+          raw_data: observation.raw_data,
+          processing_status: "pending",
+        }))
+      )
+      .select("id");
 
-  if (!response.ok) {
-    throw new Error(`CoinGlass API error: ${response.status}`);
+    if (error) throw error;
+    signalIds = (signals || []).map((signal) => signal.id);
   }
 
-  const data = await response.json();
-  
-  // Traiter les liquidations importantes (> 10M$)
-  if (data.data) {
-    for (const item of data.data) {
-      const liquidationAmount = parseFloat(item.liquidationAmount || 0);
-      
-      if (liquidationAmount > 10_000_000) {
-        await createSignal({
-          source: "coinglass",
-          type: "liquidation",
-          raw_data: {
-            symbol: item.symbol,
-            liquidationAmount: liquidationAmount,
-            side: item.side,
-            exchange: item.exchange,
-          },
-        });
-      }
+  // Seuils enregistrés seulement après l'insertion (un échec réémet au prochain cycle)
+  if (stateUpdates.length > 0) {
+    const { error } = await supabase
+      .from("collector_threshold_state")
+      .upsert(stateUpdates, { onConflict: "source,key" });
+
+    if (error) {
+      console.error("Failed to save CoinGlass threshold state:", error);
     }
   }
-}
 
-async function createSignal(signalData: {
-  source: string;
-  type: string;
-  raw_data: any;
-}) {
-  const { data: signal, error } = await supabase
-    .from("signals")
-    .insert({
-      source: signalData.source,
-      type: signalData.type,
-      timestamp: new Date().toISOString(),
-      raw_data: signalData.raw_data,
-      processing_status: "pending",
-    })
-    .select()
-    .single();
-
-  if (error) throw error;
-
-  // Publier événement pour traitement IA
-  await eventBridge.send(new PutEventsCommand({
-    Entries: [{
-      Source: "adel.signals",
-      DetailType: "New Signal",
-      Detail: JSON.stringify({
-        signal_id: signal.id,
-      }),
-      EventBusName: EVENT_BUS_NAME,
-    }],
-  }));
-
-  return signal;
+  await publishNewSignals(signalIds);
+  return signalIds.length;
 }
 
+/**
+ * Publier les événements de traitement IA (PutEvents par lots de 10)
+ */
+async function publishNewSignals(signalIds: string[]): Promise<void> {
+  for (let i = 0; i < signalIds.length; i += EVENTS_BATCH_SIZE) {
+    const batch = signalIds.slice(i, i + EVENTS_BATCH_SIZE);
+    try {
+      const result = await eventBridge.send(new PutEventsCommand({
+        Entries: batch.map((signalId) => ({
+          Source: "adel.signals",
+          DetailType: "New Signal",
+          Detail: JSON.stringify({
+            signal_id: signalId,
+          }),
+          EventBusName: EVENT_BUS_NAME,
+        })),
+      }));
+
+      if (result.FailedEntryCount) {
+        const failed = batch.filter((_, index) => result.Entries?.[index]?.ErrorCode);
+        console.error(`Failed to publish ${result.FailedEntryCount} signal events:`, failed);
+      }
+    } catch (error) {
+      // Les signaux restent en "pending" et peuvent être retraités
+      console.error("Error publishing signal events:", error);
+    }
+  }
+}
@@ -0,0 +1,136 @@
+/**
+ * Polling conditionnel des flux RSS / Atom (table feed_poll_state, un état par collecteur et par flux)
+ * - requête conditionnelle (If-None-Match / If-Modified-Since) : 304 => aucun parsing
+ * - watermark : le parsing s'arrête à la première entrée déjà traitée
+ *   (les flux sont supposés du plus récent au plus ancien)
+ *
+ * Module identique dans collector-rss, collector-sec-watcher et
+ * collector-sec-company-filings (chaque worker est bundlé séparément).
+ */
+
+import { supabase } from "./supabase";
+
+const USER_AGENT = "ADEL AI (contact@adel.ai)";
+// URLs par requête in() (longueur d'URL PostgREST)
+const STATE_LOOKUP_CHUNK = 50;
+
+export interface FeedState {
+  feed_url: string;
+  etag: string | null;
+  last_modified: string | null;
+  last_entry_id: string | null;
+}
+
+export interface FeedPoll<T> {
+  url: string;
+  status: number;
+  ok: boolean;
+  notModified: boolean;
+  // Entrées plus récentes que le watermark, dans l'ordre du flux
+  entries: T[];
+  // État à enregistrer une fois les entrées traitées (null si inchangé)
+  state: FeedState | null;
+}
+
+/**
+ * États de polling des flux demandés pour ce collecteur (une requête par lot d'URLs)
+ */
+export async function loadFeedStates(collector: string, urls: string[]): Promise<Map<string, FeedState>> {
+  const states = new Map<string, FeedState>();
+
+  for (let i = 0; i < urls.length; i += STATE_LOOKUP_CHUNK) {
+    const { data, error } = await supabase
+      .from("feed_poll_state")
+      .select("feed_url, etag, last_modified, last_entry_id")
+      .eq("collector", collector)
+      .in("feed_url", urls.slice(i, i + STATE_LOOKUP_CHUNK));
+
+    if (error) {
+      // Sans état, le flux est simplement relu en entier
+      console.error("Failed to load feed poll state:", error);
+      continue;
+    }
+    for (const row of (data || []) as FeedState[]) {
+      states.set(row.feed_url, row);
+    }
+  }
+
+  return states;
+}
+
+/**
+ * Récupérer un flux en requête conditionnelle et ne parser que les nouvelles entrées
+ * parse doit être paresseux (générateur) pour que l'arrêt au watermark évite le reste du parsing
+ */
+export async function pollFeed<T>(
+  url: string,
+  previous: FeedState | undefined,
+  parse: (xml: string) => Iterable<T>,
+  entryId: (entry: T) => string | null
+): Promise<FeedPoll<T>> {
+  const headers: Record<string, string> = { "User-Agent": USER_AGENT };
+  if (previous?.etag) {
+    headers["If-None-Match"] = previous.etag;
+  }
+  if (previous?.last_modified) {
+    headers["If-Modified-Since"] = previous.last_modified;
+  }
+
+  const response = await fetch(url, { headers });
+
+  if (response.status === 304) {
+    return { url, status: 304, ok: true, notModified: true, entries: [], state: null };
+  }
+  if (!response.ok) {
+    return { url, status: response.status, ok: false, notModified: false, entries: [], state: null };
+  }
+
+  const xml = await response.text();
+  const watermark = previous?.last_entry_id || null;
+  const entries: T[] = [];
+  let newestId: string | null = null;
+
+  for (const entry of parse(xml)) {
+    const id = entryId(entry);
+    if (id && watermark && id === watermark) {
+      break;
+    }
+    if (id && !newestId) {
+      newestId = id;
+    }
+    entries.push(entry);
+  }
+
+  const state: FeedState = {
+    feed_url: url,
+    etag: response.headers.get("etag"),
+    last_modified: response.headers.get("last-modified"),
+    last_entry_id: newestId || watermark,
+  };
+  const unchanged =
+    previous &&
+    previous.etag === state.etag &&
+    previous.last_modified === state.last_modified &&
+    previous.last_entry_id === state.last_entry_id;
+
+  return { url, status: response.status, ok: true, notModified: false, entries, state: unchanged ? null : state };
+}
+
+/**
+ * Enregistrer les états des flux traités (best-effort : un échec ne coûte qu'une relecture complète)
+ */
+export async function saveFeedStates(collector: string, states: Array<FeedState | null>): Promise<void> {
+  const rows = states.filter((state): state is FeedState => state !== null);
+  if (rows.length === 0) {
+    return;
+  }
+
+  const updatedAt = new Date().toISOString();
+  const { error } = await supabase
+    .from("feed_poll_state")
+    .upsert(rows.map((row) => ({ ...row, collector, updated_at: updatedAt })), { onConflict: "collector,feed_url" });
+
+  if (error) {
+    console.error("Failed to save feed poll state:", error);
+  }
+}
@@ -6,6 +6,8 @@
 import { EventBridgeEvent } from "aws-lambda";
 import { supabase } from "./supabase";
 import { PutEventsCommand, EventBridgeClient } from "@aws-sdk/client-eventbridge";
+import { createHash } from "crypto";
+import { FeedState, loadFeedStates, pollFeed, saveFeedStates } from "./feed-poller";
 
 const eventBridge = new EventBridgeClient({});
 const EVENT_BUS_NAME = process.env.EVENT_BUS_NAME || "";
@@ -18,101 +20,191 @@ const RSS_FEEDS = [
   { url: "https://feeds.marketwatch.com/marketwatch/topstories/", name: "marketwatch", type: "news" },
 ];
 
+// Clé des états de polling (feed_poll_state.collector)
+const COLLECTOR = "collector-rss";
+// Taille maximale d'un PutEvents (limite EventBridge)
+const EVENTS_BATCH_SIZE = 10;
+// Hashes par requête in() (longueur d'URL PostgREST)
+const HASH_LOOKUP_CHUNK = 200;
+
+type RSSFeed = (typeof RSS_FEEDS)[number];
+
+interface RSSItem {
+  title: string;
+  description: string;
+  link: string;
+  pubDate?: string;
+}
+
 export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) => {
   console.log("RSS Collector triggered");
 
   try {
-    for (const feed of RSS_FEEDS) {
-      try {
-        await collectRSSFeed(feed);
-      } catch (error: any) {
-        console.error(`Error collecting ${feed.name}:`, error);
-        // Continue avec les autres feeds
+    const feedStates = await loadFeedStates(COLLECTOR, RSS_FEEDS.map((feed) => feed.url));
+
+    // Tous les feeds en parallèle ; un feed en erreur n'empêche pas les autres
+    const results = await Promise.allSettled(
+      RSS_FEEDS.map((feed) => fetchRSSFeed(feed, feedStates.get(feed.url)))
+    );
+    const items: Array<{ feed: RSSFeed; item: RSSItem }> = [];
+    const nextStates: Array<FeedState | null> = [];
+    results.forEach((result, index) => {
+      if (result.status === "fulfilled") {
+        items.push(...result.value.items.map((item) => ({ feed: RSS_FEEDS[index], item })));
+        nextStates.push(result.value.state);
+      } else {
+        console.error(`Error collecting ${RSS_FEEDS[index].name}:`, result.reason);
       }
-    }
+    });
 
-    return { statusCode: 200, body: JSON.stringify({ success: true }) };
+    // Aucune nouvelle entrée (304 ou watermark en tête de flux) : pas de lecture en base
+    const created = items.length > 0 ? await ingestItems(items) : 0;
+    // Watermarks avancés seulement une fois le lot inséré
+    await saveFeedStates(COLLECTOR, nextStates);
+    console.log(`RSS cycle complete: ${items.length} items, ${created} new signals`);
+
+    return { statusCode: 200, body: JSON.stringify({ success: true, items: items.length, created }) };
   } catch (error: any) {
     console.error("RSS Collector error:", error);
     return { statusCode: 500, body: JSON.stringify({ error: error.message }) };
   }
 };
 
-async function collectRSSFeed(feed: { url: string; name: string; type: string }) {
+async function fetchRSSFeed(
+  feed: RSSFeed,
+  previous: FeedState | undefined
+): Promise<{ items: RSSItem[]; state: FeedState | null }> {
   console.log(`Fetching RSS feed: ${feed.name}`);
 
-  const response = await fetch(feed.url, {
-    headers: {
-      "User-Agent": "ADEL AI (contact@adel.ai)",
-    },
-  });
+  const poll = await pollFeed(feed.url, previous, parseRSSFeed, (item) => item.link);
 
-  if (!response.ok) {
-    throw new Error(`RSS fetch error: ${response.status}`);
+  if (!poll.ok) {
+    throw new Error(`RSS fetch error: ${poll.status}`);
+  }
+  if (poll.notModified) {
+    console.log(`${feed.name} not modified`);
+  } else {
+    console.log(`Found ${poll.entries.length} new items in ${feed.name}`);
   }
 
-  const xml = await response.text();
-  const items = parseRSSFeed(xml);
+  return { items: poll.entries, state: poll.state };
+}
 
-  console.log(`Found ${items.length} items in ${feed.name}`);
+function urlHash(url: string): string {
+  return createHash("md5").update(url).digest("hex");
+}
 
-  // Insérer chaque item comme signal
-  for (const item of items) {
-    // Vérifier si déjà existant (par URL ou titre)
-    const { data: existing } = await supabase
+/**
+ * Ingestion du lot complet : dé-duplication (lot + base) en une requête, insertion
+ * multi-lignes, puis publication des événements par lots de 10
+ */
+async function ingestItems(items: Array<{ feed: RSSFeed; item: RSSItem }>): Promise<number> {
+  // Dé-duplication dans le lot (un même article peut apparaître dans plusieurs feeds)
+  const byHash = new Map<string, { feed: RSSFeed; item: RSSItem }>();
+  for (const entry of items) {
+    const hash = urlHash(entry.item.link);
+    if (!byHash.has(hash)) {
+      byHash.set(hash, entry);
+    }
+  }
+
+  // Dé-duplication contre les signaux déjà collectés (index unique source + url_hash)
+  const hashes = Array.from(byHash.keys());
+  for (let i = 0; i < hashes.length; i += HASH_LOOKUP_CHUNK) {
+    const { data: existing, error } = await supabase
       .from("signals")
-      .select("id")
+      .select("url_hash")
       .eq("source", "rss")
-      .eq("raw_data->>url", item.link)
-      .single();
+      .in("url_hash", hashes.slice(i, i + HASH_LOOKUP_CHUNK));
 
-    if (existing) {
-      continue; // Déjà collecté
+    if (error) {
+      throw new Error(`Failed to look up existing RSS signals: ${error.message}`);
+    }
+    for (const row of existing || []) {
+      byHash.delete(row.url_hash);
     }
+  }
 
-    // Insérer nouveau signal
-    const { data: signal, error: insertError } = await supabase
-      .from("signals")
-      .insert({
+  if (byHash.size === 0) {
+    return 0;
+  }
+
+  // Insertion multi-lignes ; un doublon concurrent est ignoré (ON CONFLICT DO NOTHING)
+  const { data: signals, error: insertError } = await supabase
+    .from("signals")
+    .upsert(
+      Array.from(byHash.entries()).map(([hash, { feed, item }]) => ({
         source: "rss",
         type: feed.type,
-        timestamp: new Date(item.pubDate || Date.now()).toISOString(),
+        timestamp: itemTimestamp(item),
         raw_data: {
           title: item.title,
           description: item.description,
           url: item.link,
           feed: feed.name,
         },
+        url_hash: hash,
         processing_status: "pending",
-      })
-      .select()
-      .single();
+      })),
+      { onConflict: "source,url_hash", ignoreDuplicates: true }
+    )
+    .select("id");
+
+  if (insertError) {
+    throw new Error(`Failed to insert RSS signals: ${insertError.message}`);
+  }
 
-    if (insertError) {
-      console.error(`Error inserting signal from ${feed.name}:`, insertError);
-      continue;
+  await publishNewSignals((signals || []).map((signal) => signal.id));
+  return signals?.length || 0;
+}
+
+/**
+ * Date de publication d'un item ; absente ou invalide (pubDate mal formée) : maintenant,
+ * pour qu'un item isolé n'interrompe pas l'ingestion groupée du cycle
+ */
+function itemTimestamp(item: RSSItem): string {
+  const published = item.pubDate ? new Date(item.pubDate) : null;
+  if (!published || isNaN(published.getTime())) {
+    if (item.pubDate) {
+      console.log(`Invalid pubDate "${item.pubDate}" for ${item.link}, using current time`);
     }
+    return new Date().toISOString();
+  }
+  return published.toISOString();
+}
 
-    // Publier événement pour traitement IA
-    await eventBridge.send(new PutEventsCommand({
-      Entries: [{
-        Source: "adel.signals",
-        DetailType: "New Signal",
-        Detail: JSON.stringify({
-          signal_id: signal.id,
-        }),
-        EventBusName: EVENT_BUS_NAME,
-      }],
-    }));
-
-    console.log(`Signal created and event published: ${signal.id}`);
+/**
+ * Publier les événements de traitement IA (PutEvents par lots de 10)
+ */
+async function publishNewSignals(signalIds: string[]): Promise<void> {
+  for (let i = 0; i < signalIds.length; i += EVENTS_BATCH_SIZE) {
+    const batch = signalIds.slice(i, i + EVENTS_BATCH_SIZE);
+    try {
+      const result = await eventBridge.send(new PutEventsCommand({
+        Entries: batch.map((signalId) => ({
+          Source: "adel.signals",
+          DetailType: "New Signal",
+          Detail: JSON.stringify({
+            signal_id: signalId,
+          }),
+          EventBusName: EVENT_BUS_NAME,
+        })),
+      }));
+
+      if (result.FailedEntryCount) {
+        const failed = batch.filter((_, index) => result.Entries?.[index]?.ErrorCode);
+        console.error(`Failed to publish ${result.FailedEntryCount} signal events:`, failed);
+      }
+    } catch (error) {
+      // Les signaux restent en "pending" et peuvent être retraités
+      console.error("Error publishing signal events:", error);
+    }
   }
+  console.log(`Signals created and events published: ${signalIds.length}`);
 }
 
-function parseRSSFeed(xml: string): Array<{ title: string; description: string; link: string; pubDate?: string }> {
-  const items: Array<{ title: string; description: string; link: string; pubDate?: string }> = [];
-  
-  // Parser RSS simplifié
+function* parseRSSFeed(xml: string): Generator<RSSItem> {
+  // Parser RSS simplifié, paresseux (pollFeed s'arrête au watermark)
   const itemMatches = xml.matchAll(/<item>([\s\S]*?)<\/item>/g);
   
   for (const match of itemMatches) {
@@ -123,15 +215,13 @@ function parseRSSFeed(xml: string): Array<{ title: string; description: string;
     const pubDateMatch = itemXml.match(/<pubDate>(.*?)<\/pubDate>/);
     
     if (titleMatch && linkMatch) {
-      items.push({
+      yield {
         title: titleMatch[1] || titleMatch[2] || "",
         description: descMatch?.[1] || descMatch?.[2] || "",
         link: linkMatch[1],
         pubDate: pubDateMatch?.[1],
-      });
+      };
     }
   }
-  
-  return items;
 }
 
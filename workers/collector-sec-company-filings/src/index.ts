@@ -1,18 +1,23 @@
 /**
  * Lambda pour découvrir automatiquement les filings SEC des entreprises
  * Déclenché par EventBridge (cron: quotidien ou à la demande)
- * 
+ *
  * Form types supportés:
  * - 8-K: Événements importants
  * - 10-K: Rapport annuel
  * - 10-Q: Rapport trimestriel
  * - 4: Insider trading (Form 4)
  * - DEF 14A: Proxy statements
+ *
+ * Découverte par flux globaux (edgar-index) : flux "latest filings" par form type
+ * et index quotidiens, joints en mémoire avec les CIK des entreprises suivies.
  */
 
 import { EventBridgeEvent } from "aws-lambda";
 import { supabase } from "./supabase";
 import { PutEventsCommand, EventBridgeClient } from "@aws-sdk/client-eventbridge";
+import { backfillFilings, discoverFilings, EDGARFiling, normalizeCik } from "./edgar-index";
+import { saveFeedStates } from "./feed-poller";
 
 const eventBridge = new EventBridgeClient({});
 const EVENT_BUS_NAME = process.env.EVENT_BUS_NAME || "";
@@ -26,6 +31,14 @@ interface Company {
 
 // Form types à suivre (prioritaires)
 const FORM_TYPES = ["8-K", "10-K", "10-Q", "4", "DEF 14A"];
+// Clé des états de polling (feed_poll_state.collector)
+const COLLECTOR = "collector-sec-company-filings";
+// Taille maximale d'un PutEvents (limite EventBridge)
+const EVENTS_BATCH_SIZE = 10;
+// Accession numbers par requête in() (longueur d'URL PostgREST)
+const ACCESSION_LOOKUP_CHUNK = 200;
+// Historique d'une entreprise ajoutée à la watchlist (profondeur des anciens flux par CIK)
+const BACKFILL_FILINGS_PER_FORM = 20;
 
 export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) => {
   console.log("SEC Company Filings Collector triggered");
@@ -42,19 +55,25 @@ export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) =
       return { statusCode: 200, body: JSON.stringify({ message: "No companies configured" }) };
     }
 
-    console.log(`Checking ${companies.length} companies for new filings`);
-
-    // 2. Pour chaque entreprise, vérifier EDGAR
-    let totalDiscovered = 0;
-    for (const company of companies) {
-      try {
-        const discovered = await checkCompanyForNewFilings(company);
-        totalDiscovered += discovered;
-      } catch (error: any) {
-        console.error(`Error checking company ${company.name} (CIK: ${company.cik}):`, error);
-        // Continue avec les autres entreprises
-      }
+    // 2. Filings récents de toutes les entreprises suivies (nombre de requêtes EDGAR fixe)
+    const companiesByCik = new Map<string, Company>(
+      companies.map((company: Company) => [normalizeCik(company.cik), company])
+    );
+    const watchedCiks = new Set(companiesByCik.keys());
+    const recent = await discoverFilings(COLLECTOR, FORM_TYPES, watchedCiks);
+    // CIK jamais lus : rattrapage unique de leur historique récent
+    const backfill = await backfillFilings(COLLECTOR, FORM_TYPES, watchedCiks, BACKFILL_FILINGS_PER_FORM);
+    if (backfill.states.length > 0 || backfill.pending > 0) {
+      console.log(`Backfilled ${backfill.states.length} new CIKs (${backfill.filings.length} filings, ${backfill.pending} pending)`);
     }
+    const filings = [...recent.filings, ...backfill.filings];
+    const states = [...recent.states, ...backfill.states];
+
+    console.log(`Found ${filings.length} recent filings for ${companies.length} watched companies`);
+
+    // 3. Enregistrer les nouveaux, puis avancer les watermarks
+    const totalDiscovered = await recordNewFilings(filings, companiesByCik);
+    await saveFeedStates(COLLECTOR, states);
 
     return {
       statusCode: 200,
@@ -70,177 +89,95 @@ export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) =
   }
 };
 
-async function checkCompanyForNewFilings(company: Company): Promise<number> {
-  console.log(`Checking filings for ${company.name} (CIK: ${company.cik})`);
+/**
+ * Existence vérifiée en une requête in() par lot, insertion multi-lignes,
+ * événements publiés par lots de 10
+ */
+async function recordNewFilings(filings: EDGARFiling[], companiesByCik: Map<string, Company>): Promise<number> {
+  const candidates = new Map(filings.map((filing) => [filing.accessionNumber, filing]));
 
-  let totalDiscovered = 0;
+  const accessionNumbers = Array.from(candidates.keys());
+  for (let i = 0; i < accessionNumbers.length; i += ACCESSION_LOOKUP_CHUNK) {
+    const { data: existing, error } = await supabase
+      .from("company_filings")
+      .select("accession_number")
+      .in("accession_number", accessionNumbers.slice(i, i + ACCESSION_LOOKUP_CHUNK));
 
-  // Pour chaque type de form, récupérer les filings récents
-  for (const formType of FORM_TYPES) {
-    try {
-      const discovered = await checkFormType(company, formType);
-      totalDiscovered += discovered;
-    } catch (error: any) {
-      console.error(`Error checking form type ${formType} for ${company.ticker}:`, error);
-      // Continue avec les autres form types
+    if (error) throw error;
+    for (const row of existing || []) {
+      candidates.delete(row.accession_number);
     }
   }
 
-  return totalDiscovered;
-}
-
-async function checkFormType(company: Company, formType: string): Promise<number> {
-  // EDGAR RSS feed pour un CIK et un form type
-  const rssUrl = `https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK=${company.cik}&type=${formType}&dateb=&owner=include&count=20&output=atom`;
-
-  const response = await fetch(rssUrl, {
-    headers: {
-      "User-Agent": "ADEL AI (contact@adel.ai)",
-    },
-  });
-
-  if (!response.ok) {
-    if (response.status === 404) {
-      // Pas de filings de ce type pour cette entreprise
-      return 0;
-    }
-    throw new Error(`EDGAR API error: ${response.status}`);
+  if (candidates.size === 0) {
+    return 0;
   }
 
-  const xml = await response.text();
-  const entries = parseEDGARFeed(xml);
-
-  console.log(`Found ${entries.length} ${formType} filings for ${company.ticker}`);
-
-  let discovered = 0;
-
-  // Pour chaque entry, vérifier si c'est nouveau
-  for (const entry of entries) {
-    const accessionNumber = extractAccessionNumber(entry.link);
-    if (!accessionNumber) continue;
-
-    // Vérifier si ce filing existe déjà
-    const { data: existing, error: checkError } = await supabase
-      .from("company_filings")
-      .select("id")
-      .eq("accession_number", accessionNumber)
-      .single();
-
-    if (checkError && checkError.code !== "PGRST116") {
-      throw checkError;
-    }
-
-    if (existing) {
-      // Déjà connu, skip
-      continue;
-    }
-
-    // Nouveau filing détecté
-    const filingDate = extractDate(entry.updated);
+  // Un filing inséré entre-temps est ignoré (accession_number UNIQUE)
+  const { data: inserted, error: insertError } = await supabase
+    .from("company_filings")
+    .upsert(
+      Array.from(candidates.values()).map((filing) => {
+        const company = companiesByCik.get(filing.cik)!;
+        return {
+          company_id: company.id,
+          cik: company.cik,
+          form_type: filing.formType,
+          accession_number: filing.accessionNumber,
+          filing_date: filing.filingDate,
+          document_url: filing.url,
+          status: "DISCOVERED",
+        };
+      }),
+      { onConflict: "accession_number", ignoreDuplicates: true }
+    )
+    .select("id, company_id, cik, form_type, accession_number, document_url");
 
-    // Construire l'URL du document
-    const documentUrl = entry.link;
+  if (insertError) throw insertError;
 
-    // Insérer le filing
-    const { data: filing, error: insertError } = await supabase
-      .from("company_filings")
-      .insert({
-        company_id: company.id,
-        cik: company.cik,
-        form_type: formType,
-        accession_number: accessionNumber,
-        filing_date: filingDate,
-        document_url: documentUrl,
-        status: "DISCOVERED",
-      })
-      .select()
-      .single();
-
-    if (insertError) {
-      console.error(`Error inserting filing ${accessionNumber}:`, insertError);
-      continue;
-    }
+  const details = (inserted || []).map((filing) => {
+    const company = companiesByCik.get(normalizeCik(filing.cik))!;
+    console.log(`Discovered new ${filing.form_type} filing: ${filing.accession_number} for ${company.ticker}`);
+    return {
+      company_id: filing.company_id,
+      filing_id: filing.id,
+      cik: filing.cik,
+      ticker: company.ticker,
+      form_type: filing.form_type,
+      accession_number: filing.accession_number,
+      filing_url: filing.document_url,
+    };
+  });
 
-    console.log(`Discovered new ${formType} filing: ${accessionNumber} for ${company.ticker}`);
+  await publishDiscoveredFilings(details);
+  return details.length;
+}
 
-    // Publier un événement EventBridge pour déclencher le parser (futur)
+/**
+ * Publier les événements "Company Filing Discovered" pour le parser (PutEvents par lots de 10)
+ */
+async function publishDiscoveredFilings(details: Array<Record<string, unknown>>): Promise<void> {
+  for (let i = 0; i < details.length; i += EVENTS_BATCH_SIZE) {
+    const batch = details.slice(i, i + EVENTS_BATCH_SIZE);
     try {
-      await eventBridge.send(
+      const result = await eventBridge.send(
         new PutEventsCommand({
-          Entries: [
-            {
-              Source: "adel.signals",
-              DetailType: "Company Filing Discovered",
-              Detail: JSON.stringify({
-                company_id: company.id,
-                filing_id: filing.id,
-                cik: company.cik,
-                ticker: company.ticker,
-                form_type: formType,
-                accession_number: accessionNumber,
-                filing_url: documentUrl,
-              }),
-              EventBusName: EVENT_BUS_NAME,
-            },
-          ],
+          Entries: batch.map((detail) => ({
+            Source: "adel.signals",
+            DetailType: "Company Filing Discovered",
+            Detail: JSON.stringify(detail),
+            EventBusName: EVENT_BUS_NAME,
+          })),
         })
       );
-    } catch (eventError: any) {
-      console.error(`Error publishing event for filing ${accessionNumber}:`, eventError);
-      // Continue même si l'événement échoue
-    }
-
-    discovered++;
-  }
 
-  return discovered;
-}
-
-// Helper functions (similaires à collector-sec-watcher)
-
-function parseEDGARFeed(xml: string): Array<{ link: string; updated: string; title: string }> {
-  const entries: Array<{ link: string; updated: string; title: string }> = [];
-  const entryMatches = xml.matchAll(/<entry>([\s\S]*?)<\/entry>/g);
-
-  for (const match of entryMatches) {
-    const entryXml = match[1];
-    const linkMatch = entryXml.match(/<link[^>]*href="([^"]+)"/);
-    const updatedMatch =
-      entryXml.match(/<updated>([^<]+)<\/updated>/) ||
-      entryXml.match(/<filing-date>([^<]+)<\/filing-date>/);
-    const titleMatch = entryXml.match(/<title>([^<]+)<\/title>/);
-
-    if (linkMatch && updatedMatch) {
-      entries.push({
-        link: linkMatch[1],
-        updated: updatedMatch[1],
-        title: titleMatch?.[1] || "",
-      });
+      if (result.FailedEntryCount) {
+        const failed = batch.filter((_, index) => result.Entries?.[index]?.ErrorCode);
+        console.error(`Failed to publish ${result.FailedEntryCount} filing events:`, failed);
+      }
+    } catch (eventError: any) {
+      // Continue même si l'événement échoue (filings en DISCOVERED)
+      console.error("Error publishing filing events:", eventError);
     }
   }
-
-  return entries;
 }
-
-function extractAccessionNumber(url: string): string | null {
-  // Format: https://www.sec.gov/cgi-bin/viewer?action=view&cik=...&accession_number=0001045810-25-000001
-  const match = url.match(/accession_number=(\d{10}-\d{2}-\d{6})/);
-  if (match) return match[1];
-
-  // Format alternatif: https://www.sec.gov/Archives/edgar/data/1045810/000104581025000001/...
-  const match2 = url.match(/\/(\d{10}-\d{2}-\d{6})/);
-  return match2 ? match2[1] : null;
-}
-
-function extractDate(dateStr: string): string {
-  // Convertir ISO date en YYYY-MM-DD
-  try {
-    return new Date(dateStr).toISOString().split("T")[0];
-  } catch {
-    return new Date().toISOString().split("T")[0];
-  }
-}
-
-
-
-
@@ -0,0 +1,258 @@
+/**
+ * Découverte des filings EDGAR sans polling par CIK
+ * - flux "latest filings" (getcurrent) par form type : filings du jour, quasi temps réel
+ * - index quotidien master.YYYYMMDD.idx : rattrapage complet des derniers jours ouvrés
+ * Les deux passent par feed-poller (requête conditionnelle + watermark) puis sont
+ * joints en mémoire avec l'ensemble des CIK suivis : le nombre de requêtes SEC ne
+ * dépend plus de la taille de la watchlist.
+ * - submissions JSON par CIK : historique récent, lu une seule fois à l'ajout d'un CIK
+ *   (les flux globaux ne couvrent que les derniers jours)
+ *
+ * Module identique dans collector-sec-watcher et collector-sec-company-filings.
+ */
+
+import { FeedState, loadFeedStates, pollFeed } from "./feed-poller";
+
+// Entrées du flux getcurrent (maximum EDGAR)
+const CURRENT_FEED_COUNT = 100;
+// Index quotidiens relus (aujourd'hui inclus) : couvre un week-end et un cycle manqué
+const DAILY_INDEX_DAYS = 3;
+// CIK rattrapés par cycle (requêtes séquentielles, règles d'accès équitable SEC)
+const BACKFILL_CIKS_PER_RUN = 10;
+
+export interface EDGARFiling {
+  cik: string; // sans zéros de tête
+  formType: string;
+  accessionNumber: string;
+  filingDate: string; // YYYY-MM-DD
+  url: string; // page index du filing
+}
+
+export function normalizeCik(cik: string): string {
+  return cik.replace(/^0+/, "");
+}
+
+export function filingIndexUrl(cik: string, accessionNumber: string): string {
+  return `https://www.sec.gov/Archives/edgar/data/${normalizeCik(cik)}/${accessionNumber.replace(/-/g, "")}/${accessionNumber}-index.htm`;
+}
+
+function currentFeedUrl(formType: string): string {
+  return `https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=${encodeURIComponent(formType)}&company=&dateb=&owner=include&start=0&count=${CURRENT_FEED_COUNT}&output=atom`;
+}
+
+function dailyIndexUrl(date: Date): string {
+  const year = date.getUTCFullYear();
+  const quarter = Math.floor(date.getUTCMonth() / 3) + 1;
+  const day = date.toISOString().split("T")[0].replace(/-/g, "");
+  return `https://www.sec.gov/Archives/edgar/daily-index/${year}/QTR${quarter}/master.${day}.idx`;
+}
+
+function submissionsUrl(cik: string): string {
+  return `https://data.sec.gov/submissions/CIK${normalizeCik(cik).padStart(10, "0")}.json`;
+}
+
+/**
+ * Submissions JSON d'un CIK : filings.recent en colonnes parallèles, du plus récent au plus ancien
+ */
+export function* parseSubmissions(json: string): Generator<EDGARFiling> {
+  const submissions = JSON.parse(json);
+  const recent = submissions?.filings?.recent;
+  if (!submissions?.cik || !recent?.accessionNumber) return;
+
+  const cik = normalizeCik(String(submissions.cik));
+  for (let i = 0; i < recent.accessionNumber.length; i++) {
+    const accessionNumber = recent.accessionNumber[i];
+    const formType = recent.form?.[i];
+    const filingDate = recent.filingDate?.[i];
+    if (!accessionNumber || !formType || !filingDate) continue;
+
+    yield { cik, formType, accessionNumber, filingDate, url: filingIndexUrl(cik, accessionNumber) };
+  }
+}
+
+/**
+ * Flux getcurrent : une entrée par entité liée au filing (Filer, Issuer, Reporting...)
+ */
+export function* parseCurrentFeed(xml: string): Generator<EDGARFiling> {
+  const entryMatches = xml.matchAll(/<entry>([\s\S]*?)<\/entry>/g);
+
+  for (const match of entryMatches) {
+    const entryXml = match[1];
+    const titleMatch = entryXml.match(/<title>([^<]+)<\/title>/);
+    const linkMatch = entryXml.match(/<link[^>]*href="([^"]+)"/);
+    const formMatch = entryXml.match(/<category[^>]*term="([^"]+)"/);
+    const updatedMatch = entryXml.match(/<updated>([^<]+)<\/updated>/);
+    const accessionMatch =
+      entryXml.match(/accession-number=(\d{10}-\d{2}-\d{6})/) || linkMatch?.[1].match(/\/(\d{10}-\d{2}-\d{6})/);
+    // "13F-HR - BERKSHIRE HATHAWAY INC (0001067983) (Filer)"
+    const cikMatch = titleMatch?.[1].match(/\((\d{10})\)/) || linkMatch?.[1].match(/\/edgar\/data\/(\d+)\//);
+    const formType = formMatch?.[1] || titleMatch?.[1].split(" - ")[0].trim();
+
+    if (!accessionMatch || !cikMatch || !formType || !updatedMatch) continue;
+
+    const cik = normalizeCik(cikMatch[1]);
+    yield {
+      cik,
+      formType,
+      accessionNumber: accessionMatch[1],
+      // Date locale EDGAR (ET), sans conversion UTC
+      filingDate: updatedMatch[1].slice(0, 10),
+      url: filingIndexUrl(cik, accessionMatch[1]),
+    };
+  }
+}
+
+/**
+ * Index quotidien "CIK|Company Name|Form Type|Date Filed|File Name"
+ * (un filing apparaît sous chaque entité liée)
+ */
+export function* parseMasterIndex(text: string): Generator<EDGARFiling> {
+  for (const line of text.split("\n")) {
+    const fields = line.trim().split("|");
+    if (fields.length !== 5 || !/^\d+$/.test(fields[0])) continue;
+
+    const [rawCik, , formType, dateFiled, fileName] = fields;
+    // edgar/data/1067983/0000950123-24-001234.txt
+    const accessionMatch = fileName.match(/(\d{10}-\d{2}-\d{6})\.txt$/);
+    if (!accessionMatch) continue;
+
+    const cik = normalizeCik(rawCik);
+    yield {
+      cik,
+      formType,
+      accessionNumber: accessionMatch[1],
+      filingDate: /^\d{8}$/.test(dateFiled)
+        ? `${dateFiled.slice(0, 4)}-${dateFiled.slice(4, 6)}-${dateFiled.slice(6, 8)}`
+        : dateFiled,
+      url: filingIndexUrl(cik, accessionMatch[1]),
+    };
+  }
+}
+
+/**
+ * Filings des CIK suivis pour les form types demandés, dé-dupliqués par accession number.
+ * Les états retournés sont à enregistrer (saveFeedStates) une fois les filings persistés.
+ */
+export async function discoverFilings(
+  collector: string,
+  formTypes: string[],
+  watchedCiks: Set<string>,
+  now: Date = new Date()
+): Promise<{ filings: EDGARFiling[]; states: Array<FeedState | null> }> {
+  const watchedForms = new Set(formTypes);
+  const isWatched = (filing: EDGARFiling) => watchedCiks.has(filing.cik) && watchedForms.has(filing.formType);
+
+  const currentUrls = formTypes.map((formType) => currentFeedUrl(formType));
+  const indexUrls = Array.from({ length: DAILY_INDEX_DAYS }, (_, days) =>
+    dailyIndexUrl(new Date(now.getTime() - days * 24 * 60 * 60 * 1000))
+  );
+  const feedStates = await loadFeedStates(collector, [...currentUrls, ...indexUrls]);
+
+  const filings = new Map<string, EDGARFiling>();
+  const states: Array<FeedState | null> = [];
+  const collect = (entries: EDGARFiling[]) => {
+    for (const filing of entries) {
+      if (isWatched(filing) && !filings.has(filing.accessionNumber)) {
+        filings.set(filing.accessionNumber, filing);
+      }
+    }
+  };
+
+  // Requêtes séquentielles (règles d'accès équitable SEC)
+  for (const url of currentUrls) {
+    try {
+      // Flux chronologique : arrêt au dernier accession number vu
+      const poll = await pollFeed(url, feedStates.get(url), parseCurrentFeed, (filing) => filing.accessionNumber);
+      if (!poll.ok) {
+        console.error(`EDGAR latest filings error ${poll.status}: ${url}`);
+        continue;
+      }
+      collect(poll.entries);
+      states.push(poll.state);
+    } catch (error) {
+      console.error(`Error polling EDGAR latest filings ${url}:`, error);
+    }
+  }
+
+  for (const url of indexUrls) {
+    try {
+      // Index trié par entité : pas de watermark, jointure pendant le parsing (seules les lignes suivies sont gardées)
+      const poll = await pollFeed(
+        url,
+        feedStates.get(url),
+        function* (text: string) {
+          for (const filing of parseMasterIndex(text)) {
+            if (isWatched(filing)) yield filing;
+          }
+        },
+        () => null
+      );
+      if (!poll.ok) {
+        // 404 : index pas encore publié, week-end ou jour férié
+        if (poll.status !== 404) {
+          console.error(`EDGAR daily index error ${poll.status}: ${url}`);
+        }
+        continue;
+      }
+      collect(poll.entries);
+      states.push(poll.state);
+    } catch (error) {
+      console.error(`Error polling EDGAR daily index ${url}:`, error);
+    }
+  }
+
+  return { filings: Array.from(filings.values()), states };
+}
+
+/**
+ * Rattrapage unique des CIK jamais lus : les flux globaux ne remontent que quelques jours,
+ * un fund ou une entreprise ajouté à la watchlist n'aurait sinon aucun historique.
+ * L'état du flux submissions (feed_poll_state) marque le CIK comme rattrapé ; il n'est
+ * enregistré qu'avec les autres états, une fois les filings persistés.
+ * Retourne au plus `filingsPerForm` filings par form type suivi et par CIK.
+ */
+export async function backfillFilings(
+  collector: string,
+  formTypes: string[],
+  watchedCiks: Set<string>,
+  filingsPerForm: number
+): Promise<{ filings: EDGARFiling[]; states: Array<FeedState | null>; pending: number }> {
+  const urlsByCik = new Map(Array.from(watchedCiks, (cik) => [cik, submissionsUrl(cik)]));
+  const feedStates = await loadFeedStates(collector, Array.from(urlsByCik.values()));
+  const pendingCiks = Array.from(urlsByCik.keys()).filter((cik) => !feedStates.has(urlsByCik.get(cik)!));
+
+  const filings: EDGARFiling[] = [];
+  const states: Array<FeedState | null> = [];
+
+  for (const cik of pendingCiks.slice(0, BACKFILL_CIKS_PER_RUN)) {
+    const url = urlsByCik.get(cik)!;
+    try {
+      const perForm = new Map<string, number>();
+      const poll = await pollFeed(
+        url,
+        undefined,
+        function* (json: string) {
+          for (const filing of parseSubmissions(json)) {
+            const count = perForm.get(filing.formType) || 0;
+            if (filing.cik !== cik || !formTypes.includes(filing.formType) || count >= filingsPerForm) continue;
+            perForm.set(filing.formType, count + 1);
+            yield filing;
+          }
+        },
+        (filing) => filing.accessionNumber
+      );
+      if (!poll.ok) {
+        // Réessayé au prochain cycle (aucun état enregistré)
+        console.error(`EDGAR submissions error ${poll.status}: ${url}`);
+        continue;
+      }
+      filings.push(...poll.entries);
+      // Sans état précédent, l'état est toujours retourné (même sans filing) : le CIK ne sera pas relu
+      states.push(poll.state);
+    } catch (error) {
+      console.error(`Error backfilling EDGAR submissions ${url}:`, error);
+    }
+  }
+
+  return { filings, states, pending: Math.max(pendingCiks.length - BACKFILL_CIKS_PER_RUN, 0) };
+}
@@ -1,15 +1,30 @@
 /**
  * Lambda pour détecter les nouveaux 13F filings sur EDGAR
  * Déclenché par EventBridge (cron: toutes les 5 minutes)
+ *
+ * Découverte par flux globaux (edgar-index) : flux "latest filings" 13F-HR / 13F-HR/A
+ * et index quotidiens, joints en mémoire avec les CIK des funds suivis.
  */
 
 import { EventBridgeEvent } from "aws-lambda";
 import { supabase } from "./supabase";
 import { PutEventsCommand, EventBridgeClient } from "@aws-sdk/client-eventbridge";
+import { backfillFilings, discoverFilings, EDGARFiling, normalizeCik } from "./edgar-index";
+import { saveFeedStates } from "./feed-poller";
 
 const eventBridge = new EventBridgeClient({});
 const EVENT_BUS_NAME = process.env.EVENT_BUS_NAME || "";
 
+const FORM_TYPES = ["13F-HR", "13F-HR/A"];
+// Clé des états de polling (feed_poll_state.collector)
+const COLLECTOR = "collector-sec-watcher";
+// Taille maximale d'un PutEvents (limite EventBridge)
+const EVENTS_BATCH_SIZE = 10;
+// Accession numbers par requête in() (longueur d'URL PostgREST)
+const ACCESSION_LOOKUP_CHUNK = 200;
+// Historique d'un fund ajouté à la watchlist (profondeur des anciens flux par CIK)
+const BACKFILL_FILINGS_PER_FORM = 10;
+
 interface Fund {
   id: number;
   cik: string;
@@ -31,162 +46,118 @@ export const handler = async (event: EventBridgeEvent<"Scheduled Event", any>) =
       return { statusCode: 200, body: JSON.stringify({ message: "No funds configured" }) };
     }
 
-    console.log(`Checking ${funds.length} funds for new 13F filings`);
-
-    // 2. Pour chaque fund, vérifier EDGAR
-    for (const fund of funds) {
-      try {
-        await checkFundForNewFilings(fund);
-      } catch (error: any) {
-        console.error(`Error checking fund ${fund.name} (CIK: ${fund.cik}):`, error);
-        // Continue avec les autres funds
-      }
+    // 2. Filings 13F récents de tous les CIK suivis (nombre de requêtes EDGAR fixe)
+    const fundsByCik = new Map<string, Fund>(funds.map((fund: Fund) => [normalizeCik(fund.cik), fund]));
+    const watchedCiks = new Set(fundsByCik.keys());
+    const recent = await discoverFilings(COLLECTOR, FORM_TYPES, watchedCiks);
+    // CIK jamais lus : rattrapage unique de leur historique récent
+    const backfill = await backfillFilings(COLLECTOR, FORM_TYPES, watchedCiks, BACKFILL_FILINGS_PER_FORM);
+    if (backfill.states.length > 0 || backfill.pending > 0) {
+      console.log(`Backfilled ${backfill.states.length} new CIKs (${backfill.filings.length} filings, ${backfill.pending} pending)`);
     }
+    const filings = [...recent.filings, ...backfill.filings];
+    const states = [...recent.states, ...backfill.states];
+
+    console.log(`Found ${filings.length} recent 13F filings for ${funds.length} watched funds`);
 
-    return { statusCode: 200, body: JSON.stringify({ success: true }) };
+    // 3. Enregistrer les nouveaux, puis avancer les watermarks
+    const discovered = await recordNewFilings(filings, fundsByCik);
+    await saveFeedStates(COLLECTOR, states);
+
+    console.log(`SEC Watcher cycle complete: ${discovered} new 13F filings`);
+    return { statusCode: 200, body: JSON.stringify({ success: true, discovered }) };
   } catch (error: any) {
     console.error("SEC Watcher error:", error);
     return { statusCode: 500, body: JSON.stringify({ error: error.message }) };
   }
 };
 
-async function checkFundForNewFilings(fund: Fund) {
-  // EDGAR RSS feed pour un CIK
-  // Récupérer les 13F-HR et 13F-HR/A (amendments)
-  const rssUrl13F = `https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK=${fund.cik}&type=13F-HR&dateb=&owner=include&count=10&output=atom`;
-  const rssUrl13FA = `https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK=${fund.cik}&type=13F-HR/A&dateb=&owner=include&count=10&output=atom`;
-
-  // Récupérer les 13F-HR
-  const response13F = await fetch(rssUrl13F, {
-    headers: {
-      "User-Agent": "ADEL AI (contact@adel.ai)",
-    },
-  });
-
-  if (!response13F.ok) {
-    throw new Error(`EDGAR API error: ${response13F.status}`);
-  }
-
-  const xml13F = await response13F.text();
-  let entries = parseEDGARFeed(xml13F);
-
-  // Récupérer les 13F-HR/A (amendments)
-  const response13FA = await fetch(rssUrl13FA, {
-    headers: {
-      "User-Agent": "ADEL AI (contact@adel.ai)",
-    },
-  });
-
-  if (response13FA.ok) {
-    const xml13FA = await response13FA.text();
-    const entries13FA = parseEDGARFeed(xml13FA);
-    // Merger les résultats (éviter les doublons)
-    const existingAccessions = new Set(entries.map(e => extractAccessionNumber(e.link)));
-    for (const entry of entries13FA) {
-      const accNum = extractAccessionNumber(entry.link);
-      if (accNum && !existingAccessions.has(accNum)) {
-        entries.push(entry);
-      }
-    }
-  }
-
-  // 3. Vérifier quels filings sont nouveaux
-  for (const entry of entries) {
-    const accessionNumber = extractAccessionNumber(entry.link);
-    if (!accessionNumber) continue;
+/**
+ * Existence vérifiée en une requête in() par lot, insertion multi-lignes,
+ * événements publiés par lots de 10
+ */
+async function recordNewFilings(filings: EDGARFiling[], fundsByCik: Map<string, Fund>): Promise<number> {
+  const candidates = new Map(filings.map((filing) => [filing.accessionNumber, filing]));
 
-    // Vérifier si ce filing existe déjà
-    const { data: existing, error: checkError } = await supabase
+  const accessionNumbers = Array.from(candidates.keys());
+  for (let i = 0; i < accessionNumbers.length; i += ACCESSION_LOOKUP_CHUNK) {
+    const { data: existing, error } = await supabase
       .from("fund_filings")
-      .select("id")
-      .eq("accession_number", accessionNumber)
-      .single();
-
-    if (checkError && checkError.code !== "PGRST116") { // PGRST116 = not found (OK)
-      throw checkError;
-    }
+      .select("accession_number")
+      .in("accession_number", accessionNumbers.slice(i, i + ACCESSION_LOOKUP_CHUNK));
 
-    if (existing) {
-      // Déjà vu, skip
-      continue;
+    if (error) throw error;
+    for (const row of existing || []) {
+      candidates.delete(row.accession_number);
     }
+  }
 
-    // Nouveau filing détecté !
-    console.log(`New 13F filing detected for ${fund.name}: ${accessionNumber}`);
-
-    // Déterminer le type de form (13F-HR ou 13F-HR/A)
-    let formType = "13F-HR";
-    if (entry.title?.includes("13F-HR/A") || entry.link?.includes("13F-HR/A")) {
-      formType = "13F-HR/A";
-    }
+  if (candidates.size === 0) {
+    return 0;
+  }
 
-    // Insérer dans fund_filings
-    const { data: filing, error: insertError } = await supabase
-      .from("fund_filings")
-      .insert({
-        fund_id: fund.id,
-        cik: fund.cik,  // Ajouter le CIK pour simplifier les requêtes
-        accession_number: accessionNumber,
-        form_type: formType,
-        filing_date: extractDate(entry.updated),
-        status: "DISCOVERED",
-      })
-      .select()
-      .single();
-
-    if (insertError) throw insertError;
-
-    // Publier événement EventBridge pour déclencher le parser
-    await eventBridge.send(new PutEventsCommand({
-      Entries: [{
-        Source: "adel.signals",
-        DetailType: "13F Discovered",
-        Detail: JSON.stringify({
+  // Un filing inséré entre-temps est ignoré (accession_number UNIQUE)
+  const { data: inserted, error: insertError } = await supabase
+    .from("fund_filings")
+    .upsert(
+      Array.from(candidates.values()).map((filing) => {
+        const fund = fundsByCik.get(filing.cik)!;
+        return {
           fund_id: fund.id,
-          filing_id: filing.id,  // Ajouter le filing_id pour le parser
-          cik: fund.cik,
-          accession_number: accessionNumber,
-          filing_url: entry.link,
-        }),
-        EventBusName: EVENT_BUS_NAME,
-      }],
-    }));
-
-    console.log(`Event published for filing ${accessionNumber}`);
+          cik: fund.cik,  // Ajouter le CIK pour simplifier les requêtes
+          accession_number: filing.accessionNumber,
+          form_type: filing.formType,
+          filing_date: filing.filingDate,
+          status: "DISCOVERED",
+        };
+      }),
+      { onConflict: "accession_number", ignoreDuplicates: true }
+    )
+    .select("id, fund_id, cik, accession_number");
+
+  if (insertError) throw insertError;
+
+  for (const filing of inserted || []) {
+    console.log(`New 13F filing detected for fund ${filing.fund_id}: ${filing.accession_number}`);
   }
+
+  await publishDiscoveredFilings(
+    (inserted || []).map((filing) => ({
+      fund_id: filing.fund_id,
+      filing_id: filing.id,  // Ajouter le filing_id pour le parser
+      cik: filing.cik,
+      accession_number: filing.accession_number,
+      filing_url: candidates.get(filing.accession_number)!.url,
+    }))
+  );
+
+  return inserted?.length || 0;
 }
 
-function parseEDGARFeed(xml: string): Array<{ link: string; updated: string; title: string }> {
-  // Parser Atom/RSS simplifié
-  const entries: Array<{ link: string; updated: string; title: string }> = [];
-  const entryMatches = xml.matchAll(/<entry>([\s\S]*?)<\/entry>/g);
-  
-  for (const match of entryMatches) {
-    const entryXml = match[1];
-    const linkMatch = entryXml.match(/<link[^>]*href="([^"]+)"/);
-    const updatedMatch = entryXml.match(/<updated>([^<]+)<\/updated>/);
-    const titleMatch = entryXml.match(/<title>([^<]+)<\/title>/);
-    
-    if (linkMatch && updatedMatch) {
-      entries.push({
-        link: linkMatch[1],
-        updated: updatedMatch[1],
-        title: titleMatch?.[1] || "",
-      });
+/**
+ * Publier les événements "13F Discovered" pour le parser (PutEvents par lots de 10)
+ */
+async function publishDiscoveredFilings(details: Array<Record<string, unknown>>): Promise<void> {
+  for (let i = 0; i < details.length; i += EVENTS_BATCH_SIZE) {
+    const batch = details.slice(i, i + EVENTS_BATCH_SIZE);
+    try {
+      const result = await eventBridge.send(new PutEventsCommand({
+        Entries: batch.map((detail) => ({
+          Source: "adel.signals",
+          DetailType: "13F Discovered",
+          Detail: JSON.stringify(detail),
+          EventBusName: EVENT_BUS_NAME,
+        })),
+      }));
+
+      if (result.FailedEntryCount) {
+        const failed = batch.filter((_, index) => result.Entries?.[index]?.ErrorCode);
+        console.error(`Failed to publish ${result.FailedEntryCount} 13F events:`, failed);
+      }
+    } catch (error) {
+      // Les filings restent en DISCOVERED et peuvent être reparsés
+      console.error("Error publishing 13F events:", error);
     }
   }
-  
-  return entries;
-}
-
-function extractAccessionNumber(url: string): string | null {
-  // Format: https://www.sec.gov/Archives/edgar/data/1234567/000123456724000001/xslF345X03/form13fInfoTable.xml
-  const match = url.match(/\/(\d{10}-\d{2}-\d{6})/);
-  return match ? match[1] : null;
+  console.log(`13F events published: ${details.length}`);
 }
-
-function extractDate(dateStr: string): string {
-  // Convertir ISO date en DATE SQL
-  return new Date(dateStr).toISOString().split("T")[0];
-}
-
@@ -11,10 +11,11 @@ cd "$(dirname "$0")/.."
 
 # Nettoyer les anciens fichiers
 rm -rf ../parser-13f.zip
-rm -rf index.py
+rm -rf index.py filing_queue.py
 
-# Copier index.py à la racine pour Lambda handler
+# Copier les modules à la racine pour Lambda handler
 cp src/index.py index.py
+cp src/filing_queue.py filing_queue.py
 
 # Vérifier si Docker est disponible et fonctionne
 USE_DOCKER=false
@@ -43,6 +44,7 @@ if [ "$USE_DOCKER" != "false" ] && command -v docker &> /dev/null; then
                     -x 'wheel/*' \
                     -x 'scripts/*' \
                     -x 'src/*' \
+                    -x 'tests/*' \
                     -x 'package.json' \
                     -x '*.dist-info/*' \
                     -x 'bin/*'
@@ -78,6 +80,7 @@ if [ "$USE_DOCKER" != "true" ]; then
         -x "wheel/*" \
         -x "scripts/*" \
         -x "src/*" \
+        -x "tests/*" \
         -x "package.json"
     
     deactivate
@@ -91,5 +94,5 @@ echo "📋 Taille: $(du -h ../parser-13f.zip | cut -f1)"
 echo "🔍 Vérification: index.py dans le zip"
 unzip -l ../parser-13f.zip | grep -E "^.*index.py$" || echo "⚠️  index.py non trouvé dans le zip!"
 
-# NE PAS supprimer index.py - il doit rester pour le zip
+# NE PAS supprimer index.py / filing_queue.py - ils doivent rester pour le zip
 
@@ -1,6 +1,7 @@
 """
 Lambda Python pour parser les fichiers 13F EDGAR
-Déclenché par EventBridge quand un nouveau 13F est découvert
+Déclenché par la file SQS alimentée par EventBridge quand un nouveau 13F est découvert
+(l'invocation EventBridge directe reste supportée)
 """
 
 import json
@@ -8,9 +9,13 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
+from datetime import datetime
+from filing_queue import TransientError, process_sqs_batch, sec_get, sec_head
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
+# Holdings insérés par requête
+HOLDINGS_CHUNK_SIZE = 500
 
 # Helper pour faire des requêtes Supabase directement (évite pydantic)
 def supabase_request(method, table, data=None, filters=None):
@@ -38,6 +43,8 @@ def supabase_request(method, table, data=None, filters=None):
     elif method == "PATCH":
         # Pour PATCH, les filtres doivent être dans l'URL
         response = requests.patch(url, headers=headers, json=data)
+    elif method == "DELETE":
+        response = requests.delete(url, headers=headers)
     else:
         raise ValueError(f"Unsupported method: {method}")
     
@@ -48,9 +55,13 @@ def supabase_request(method, table, data=None, filters=None):
         return [result]
     return result
 
+class MissingFieldsError(ValueError):
+    """Événement incomplet : inutile de retenter"""
+
+
 def handler(event, context):
     """
-    Event structure:
+    Event structure (EventBridge direct, ou corps des messages SQS "Records"):
     {
         "detail": {
             "fund_id": 1,
@@ -60,19 +71,58 @@ def handler(event, context):
         }
     }
     """
+    if "Records" in event:
+        print(f"Parser 13F triggered by SQS: {len(event['Records'])} messages")
+        return process_sqs_batch(event, context, parse_filing, mark_filing_failed)
+
     print(f"Parser 13F triggered: {json.dumps(event)}")
     
     detail = event.get("detail", {})
+    try:
+        result = parse_filing(detail)
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"success": True, **result})
+        }
+    except MissingFieldsError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": str(e)})
+        }
+    except Exception as e:
+        mark_filing_failed(detail)
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+
+def mark_filing_failed(detail):
+    """Marquer le filing comme FAILED (repris par reparse-failed-filings)"""
+    accession_number = detail.get("accession_number")
+    if not accession_number:
+        return
+    try:
+        supabase_request("PATCH", "fund_filings",
+            data={"status": "FAILED", "updated_at": "now()"},
+            filters={"accession_number": accession_number}
+        )
+    except:
+        pass
+
+
+def parse_filing(detail):
+    """
+    Parser un filing 13F et remplacer ses holdings ; lève une exception en cas d'échec
+    (idempotent : un message SQS peut être livré plusieurs fois)
+    """
     fund_id = detail.get("fund_id")
     cik = detail.get("cik")
     accession_number = detail.get("accession_number")
     filing_url = detail.get("filing_url")
     
     if not all([fund_id, cik, accession_number, filing_url]):
-        return {
-            "statusCode": 400,
-            "body": json.dumps({"error": "Missing required fields"})
-        }
+        raise MissingFieldsError("Missing required fields")
     
     try:
         # Vérifier les variables d'environnement
@@ -89,7 +139,7 @@ def handler(event, context):
         }
         
         # Parser la page index pour trouver le lien vers le fichier XML
-        index_response = requests.get(filing_url, headers=headers, timeout=30)
+        index_response = sec_get(filing_url, headers=headers, timeout=30)
         index_response.raise_for_status()
         
         # Chercher le lien vers le fichier XML dans la page HTML
@@ -106,16 +156,18 @@ def handler(event, context):
             # Essayer d'abord dans le répertoire racine
             test_url = f"https://www.sec.gov/Archives/edgar/data/{cik_clean}/{accession_no_dashes}/{name}"
             try:
-                test_resp = requests.head(test_url, headers=headers, timeout=10)
+                test_resp = sec_head(test_url, headers=headers, timeout=10)
                 if test_resp.status_code == 200:
                     # Vérifier si c'est du vrai XML (pas du HTML transformé)
-                    content_check = requests.get(test_url, headers=headers, timeout=10)
+                    content_check = sec_get(test_url, headers=headers, timeout=10)
                     if content_check.text.strip().startswith("<?xml"):
                         # Vérifier qu'il n'est pas transformé en HTML
                         if "<!DOCTYPE html" not in content_check.text[:500]:
                             xml_url = test_url
                             print(f"Found XML in root directory: {xml_url}")
                             break
+            except TransientError:
+                raise
             except:
                 continue
         
@@ -140,11 +192,13 @@ def handler(event, context):
                         
                         # Vérifier que ce n'est pas du HTML transformé
                         try:
-                            content_check = requests.get(candidate_url, headers=headers, timeout=10)
+                            content_check = sec_get(candidate_url, headers=headers, timeout=10)
                             if content_check.text.strip().startswith("<?xml") and "<!DOCTYPE html" not in content_check.text[:500]:
                                 xml_url = candidate_url
                                 print(f"Found XML in subdirectory: {xml_url}")
                                 break
+                        except TransientError:
+                            raise
                         except:
                             continue
                 if xml_url:
@@ -156,7 +210,7 @@ def handler(event, context):
         print(f"Found XML file: {xml_url}")
         
         # 2. Télécharger le fichier XML (avec timeout plus long pour gros fichiers)
-        response = requests.get(xml_url, headers=headers, timeout=120, stream=True)
+        response = sec_get(xml_url, headers=headers, timeout=120, stream=True)
         response.raise_for_status()
         
         # 3. Récupérer le filing_id (depuis l'event ou depuis la DB)
@@ -181,51 +235,104 @@ def handler(event, context):
         
         holdings = parse_13f_file(content_str, xml_url)
         
-        # 5. Insérer les holdings
-        for holding in holdings:
-            supabase_request("POST", "fund_holdings", data={
-                "fund_id": fund_id,
-                "filing_id": filing_id,
-                "cik": cik,
-                "ticker": holding.get("ticker"),
-                "cusip": holding.get("cusip"),
-                "shares": holding.get("shares"),
-                "market_value": holding.get("market_value"),
-                "type": holding.get("type", "stock")
-            })
+        # 4b. Page de garde : période du rapport et type d'amendement (ordre des filings d'un fond)
+        cover = fetch_cover_page(soup, filing_url, cik_clean, accession_no_dashes, headers)
+        
+        # 5. Remplacer les holdings du filing (une nouvelle livraison ne crée pas de doublons)
+        supabase_request("DELETE", "fund_holdings", filters={"filing_id": filing_id})
+        rows = [{
+            "fund_id": fund_id,
+            "filing_id": filing_id,
+            "cik": cik,
+            "ticker": holding.get("ticker"),
+            "cusip": holding.get("cusip"),
+            "shares": holding.get("shares"),
+            "market_value": holding.get("market_value"),
+            "type": holding.get("type", "stock")
+        } for holding in holdings]
+        for start in range(0, len(rows), HOLDINGS_CHUNK_SIZE):
+            supabase_request("POST", "fund_holdings", data=rows[start:start + HOLDINGS_CHUNK_SIZE])
         
-        # 6. Mettre à jour le statut
+        # 6. Mettre à jour le statut (avec la période et le type d'amendement s'ils sont connus)
         supabase_request("PATCH", "fund_filings", 
-            data={"status": "PARSED", "updated_at": "now()"},
+            data={"status": "PARSED", "updated_at": "now()", **{k: v for k, v in cover.items() if v}},
             filters={"id": filing_id}
         )
         
         print(f"Successfully parsed {len(holdings)} holdings for filing {accession_number}")
         
         return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "success": True,
-                "filing_id": filing_id,
-                "holdings_count": len(holdings)
-            })
+            "filing_id": filing_id,
+            "holdings_count": len(holdings)
         }
         
     except Exception as e:
         print(f"Error parsing 13F: {str(e)}")
-        # Marquer comme FAILED
+        raise
+
+
+def fetch_cover_page(soup, filing_url: str, cik_clean: str, accession_no_dashes: str, headers: dict) -> dict:
+    """
+    Télécharger et parser la page de garde (primary_doc.xml) ; champs vides si elle est
+    introuvable (le filing reste exploitable, trié par date de dépôt)
+    """
+    base_dir = "/".join(filing_url.split("/")[:-1])
+    candidates = [f"https://www.sec.gov/Archives/edgar/data/{cik_clean}/{accession_no_dashes}/primary_doc.xml"]
+    for link in soup.find_all("a", href=True):
+        href = link.get("href", "")
+        # Les versions xsl* sont des rendus HTML
+        if href.lower().endswith("primary_doc.xml") and "xsl" not in href.lower():
+            if href.startswith("http"):
+                candidates.append(href)
+            elif href.startswith("/"):
+                candidates.append(f"https://www.sec.gov{href}")
+            else:
+                candidates.append(f"{base_dir}/{href}")
+
+    for url in dict.fromkeys(candidates):
         try:
-            supabase_request("PATCH", "fund_filings",
-                data={"status": "FAILED", "updated_at": "now()"},
-                filters={"accession_number": accession_number}
-            )
-        except:
-            pass
-        
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": str(e)})
-        }
+            response = sec_get(url, headers=headers, timeout=30)
+            if response.status_code != 200 or not response.text.strip().startswith("<?xml"):
+                continue
+            return parse_cover_page(response.text)
+        except TransientError:
+            raise
+        except Exception as e:
+            print(f"Cover page {url} unreadable: {str(e)}")
+
+    print(f"Cover page not found for {filing_url}")
+    return {"period_of_report": None, "amendment_type": None}
+
+
+def parse_cover_page(content: str) -> dict:
+    """
+    Page de garde 13F : periodOfReport (ou reportCalendarOrQuarter) au format ISO, et
+    amendmentType ("RESTATEMENT" ou "NEW HOLDINGS") si isAmendment est vrai
+    """
+    root = ET.fromstring(content)
+    values = {}
+    for elem in root.iter():
+        localname = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
+        if elem.text and elem.text.strip():
+            values.setdefault(localname.lower(), elem.text.strip())
+
+    period = to_iso_date(values.get("periodofreport") or values.get("reportcalendarorquarter") or "")
+
+    amendment_type = None
+    if values.get("isamendment", "").lower() in ("true", "y", "yes", "1"):
+        amendment_type = " ".join(values.get("amendmenttype", "").upper().split()) or None
+
+    return {"period_of_report": period, "amendment_type": amendment_type}
+
+
+def to_iso_date(value: str):
+    """Dates EDGAR MM-DD-YYYY (ou déjà YYYY-MM-DD) -> YYYY-MM-DD ; None si illisible"""
+    for fmt in ("%m-%d-%Y", "%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
 
 
 def parse_13f_file(content: str, url: str) -> list:
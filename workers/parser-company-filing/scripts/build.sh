@@ -16,7 +16,7 @@ rm -rf package
 mkdir -p package
 
 # Copier le code source
-cp src/index.py package/
+cp src/*.py package/
 
 # Installer les dépendances (avec toutes les dépendances transitives)
 pip install -r requirements.txt -t package/ --platform linux_x86_64 --only-binary=:all: 2>/dev/null || \
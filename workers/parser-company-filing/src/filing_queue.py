@@ -0,0 +1,365 @@
+"""
+File SQS entre la découverte des filings (EventBridge) et les parsers
+(copie identique dans parser-13f et parser-company-filing)
+
+- Lambda reçoit les messages par lots (Records) et ne rend à la file que les messages
+  en échec (ReportBatchItemFailures)
+- erreurs transitoires (429 SEC, 5xx, timeouts) : message rendu à la file et retenté ;
+  à la dernière tentative le filing est marqué FAILED et le message part en DLQ
+  (rejouée par scripts/reparse-failed-filings.sh --dlq)
+- erreurs définitives : filing marqué FAILED, message supprimé
+- visibilité de tous les messages du lot prolongée jusqu'au retour du handler (gros 13F),
+  jamais raccourcie sous la visibilité restante
+- messages non tentés faute de temps : renvoyés dans la file avec leur nombre de
+  tentatives (attribut attempts), sans consommer le budget de réceptions
+- requêtes sec.gov limitées à SEC_REQUESTS_PER_SECOND par instance
+
+Test local sans AWS :
+    queue = InMemoryQueue()
+    queue.send({"detail": {...}})
+    run_local(queue, handler)
+"""
+
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+SEC_USER_AGENT = "ADEL AI (contact@adel.ai)"
+# Budget SEC (10 req/s par IP) réparti entre les instances concurrentes
+SEC_REQUESTS_PER_SECOND = float(os.environ.get("SEC_REQUESTS_PER_SECOND", "2"))
+# Doit correspondre au maxReceiveCount de la redrive policy
+MAX_RECEIVE_COUNT = int(os.environ.get("MAX_RECEIVE_COUNT", "5"))
+# Prolongation de visibilité, renouvelée quand il reste moins de la moitié
+VISIBILITY_EXTENSION_SECONDS = int(os.environ.get("VISIBILITY_EXTENSION_SECONDS", "300"))
+# Temps minimal restant pour commencer un message du lot
+DEADLINE_MARGIN_MS = 60_000
+
+
+class TransientError(Exception):
+    """Erreur temporaire : le message doit être retenté plus tard"""
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, TransientError):
+        return True
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+class RateLimiter:
+    """Espacement minimal entre requêtes, partagé par les threads de l'instance"""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_sec_limiter = RateLimiter(SEC_REQUESTS_PER_SECOND)
+
+
+def sec_request(method: str, url: str, **kwargs) -> requests.Response:
+    """Requête sec.gov au débit autorisé ; un 429 rend le message à la file"""
+    headers = dict(kwargs.pop("headers", None) or {})
+    headers.setdefault("User-Agent", SEC_USER_AGENT)
+    _sec_limiter.wait()
+    response = requests.request(method, url, headers=headers, **kwargs)
+    if response.status_code == 429:
+        raise TransientError(f"SEC rate limit (429) on {url}")
+    return response
+
+
+def sec_get(url: str, **kwargs) -> requests.Response:
+    return sec_request("GET", url, **kwargs)
+
+
+def sec_head(url: str, **kwargs) -> requests.Response:
+    return sec_request("HEAD", url, **kwargs)
+
+
+def detail_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Corps d'un message : événement EventBridge complet ou detail seul"""
+    body = json.loads(record["body"])
+    detail = body.get("detail", body)
+    return json.loads(detail) if isinstance(detail, str) else detail
+
+
+def receive_count(record: Dict[str, Any]) -> int:
+    """Tentatives du message : réceptions SQS + tentatives reportées lors d'un renvoi"""
+    received = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+    carried = record.get("messageAttributes", {}).get("attempts", {}).get("stringValue")
+    return received + int(carried or 0)
+
+
+# Files en mémoire par ARN (run_local) ; files SQS par ARN (attributs lus une fois par instance)
+_local_queues: Dict[str, "InMemoryQueue"] = {}
+_sqs_queues: Dict[str, "SqsQueue"] = {}
+
+
+def queue_for(queue_arn: str):
+    if queue_arn in _local_queues:
+        return _local_queues[queue_arn]
+    if queue_arn not in _sqs_queues:
+        _sqs_queues[queue_arn] = SqsQueue(queue_arn)
+    return _sqs_queues[queue_arn]
+
+
+class SqsQueue:
+    """File SQS réelle, déduite de l'ARN source des records"""
+
+    def __init__(self, queue_arn: str):
+        import boto3  # fourni par le runtime Lambda
+
+        _, _, _, region, account, name = queue_arn.split(":")
+        self.client = boto3.client("sqs", region_name=region)
+        self.url = f"https://sqs.{region}.amazonaws.com/{account}/{name}"
+        self.visibility_timeout = self._read_visibility_timeout()
+
+    def _read_visibility_timeout(self) -> Optional[float]:
+        """Visibilité de la file (None si illisible : la prolongation est alors désactivée)"""
+        try:
+            attributes = self.client.get_queue_attributes(
+                QueueUrl=self.url, AttributeNames=["VisibilityTimeout"]
+            )["Attributes"]
+            return float(attributes["VisibilityTimeout"])
+        except Exception as e:
+            print(f"Error reading queue visibility timeout, heartbeat disabled: {e}")
+            return None
+
+    def change_visibility(self, records: List[Dict[str, Any]], seconds: float):
+        for start in range(0, len(records), 10):
+            entries = [
+                {"Id": str(i), "ReceiptHandle": r["receiptHandle"], "VisibilityTimeout": int(math.ceil(seconds))}
+                for i, r in enumerate(records[start:start + 10])
+            ]
+            self.client.change_message_visibility_batch(QueueUrl=self.url, Entries=entries)
+
+    def requeue(self, records: List[Dict[str, Any]]):
+        """Renvoyer des messages non tentés (l'original est supprimé par Lambda)"""
+        for start in range(0, len(records), 10):
+            entries = [
+                {
+                    "Id": str(i),
+                    "MessageBody": r["body"],
+                    "MessageAttributes": {
+                        "attempts": {"DataType": "Number", "StringValue": str(receive_count(r) - 1)},
+                    },
+                }
+                for i, r in enumerate(records[start:start + 10])
+            ]
+            response = self.client.send_message_batch(QueueUrl=self.url, Entries=entries)
+            if response.get("Failed"):
+                raise RuntimeError(f"{len(response['Failed'])} messages not requeued")
+
+
+class VisibilityHeartbeat:
+    """
+    Prolonge la visibilité de tous les messages du lot jusqu'au retour du handler
+    (Lambda ne supprime les messages traités qu'à la fin du lot) ; la visibilité n'est
+    jamais ramenée sous le temps restant de la visibilité courante
+    """
+
+    def __init__(self, queue, records: List[Dict[str, Any]], seconds: Optional[float] = None):
+        self.queue = queue
+        self.records = list(records)
+        self.seconds = seconds or VISIBILITY_EXTENSION_SECONDS
+        visibility = getattr(queue, "visibility_timeout", None)
+        # Fin de visibilité estimée depuis la réception (visibilité de la file)
+        self.visible_until = time.monotonic() + visibility if visibility else None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        if self.visible_until is not None and self.records:
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.seconds / 4):
+            if self.visible_until - time.monotonic() > self.seconds / 2:
+                continue
+            try:
+                self.queue.change_visibility(self.records, self.seconds)
+                self.visible_until = time.monotonic() + self.seconds
+            except Exception as e:
+                print(f"Error extending visibility of {len(self.records)} messages: {e}")
+
+
+def process_sqs_batch(
+    event: Dict[str, Any],
+    context,
+    process: Callable[[Dict[str, Any]], Any],
+    mark_failed: Callable[[Dict[str, Any]], None],
+    queue=None,
+) -> Dict[str, Any]:
+    """
+    Traiter un lot SQS ; retourne les batchItemFailures (messages rendus à la file)
+    """
+    records = event.get("Records", [])
+    failures: List[str] = []
+    if not records:
+        return {"batchItemFailures": []}
+
+    queue = queue or queue_for(records[0]["eventSourceARN"])
+    with VisibilityHeartbeat(queue, records):
+        for index, record in enumerate(records):
+            if context and context.get_remaining_time_in_millis() < DEADLINE_MARGIN_MS:
+                # Plus assez de temps : le reste du lot retourne dans la file sans compter de tentative
+                _requeue_unattempted(queue, records[index:], failures)
+                break
+
+            detail: Optional[Dict[str, Any]] = None
+            try:
+                detail = detail_from_record(record)
+                process(detail)
+            except Exception as e:
+                attempts = receive_count(record)
+                if is_transient(e) and attempts < MAX_RECEIVE_COUNT:
+                    print(f"Transient error (attempt {attempts}/{MAX_RECEIVE_COUNT}), retrying later: {e}")
+                    failures.append(record["messageId"])
+                elif is_transient(e):
+                    # Dernière tentative : FAILED pour reparse-failed-filings, message en DLQ
+                    print(f"Transient error after {attempts} attempts, sending to DLQ: {e}")
+                    _mark_failed(mark_failed, detail)
+                    failures.append(record["messageId"])
+                else:
+                    print(f"Permanent error, filing marked as FAILED: {e}")
+                    _mark_failed(mark_failed, detail)
+
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failures]}
+
+
+def _requeue_unattempted(queue, records: List[Dict[str, Any]], failures: List[str]):
+    """
+    Renvoyer les messages non tentés (compteur de tentatives conservé) ; les originaux,
+    absents des batchItemFailures, sont supprimés. Renvoi impossible : rendus en échec
+    """
+    try:
+        queue.requeue(records)
+        print(f"Deadline reached, requeued {len(records)} unattempted messages")
+    except Exception as e:
+        print(f"Deadline reached, error requeuing {len(records)} messages, returning them as failures: {e}")
+        failures.extend(r["messageId"] for r in records)
+
+
+def _mark_failed(mark_failed: Callable[[Dict[str, Any]], None], detail: Optional[Dict[str, Any]]):
+    if detail is None:
+        return
+    try:
+        mark_failed(detail)
+    except Exception as e:
+        print(f"Error marking filing as FAILED: {e}")
+
+
+class InMemoryQueue:
+    """
+    File en mémoire au comportement SQS (visibilité, compteur de réceptions, DLQ)
+    pour exécuter les parsers localement
+    """
+
+    def __init__(self, visibility_timeout: int = 30, max_receive_count: int = MAX_RECEIVE_COUNT):
+        self.visibility_timeout = visibility_timeout
+        self.max_receive_count = max_receive_count
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self.dead_letters: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.arn = f"arn:aws:sqs:local:000000000000:in-memory-{uuid.uuid4().hex[:8]}"
+        _local_queues[self.arn] = self
+
+    def send(self, body: Dict[str, Any], attempts: int = 0) -> str:
+        return self._put(json.dumps(body), attempts)
+
+    def _put(self, body: str, attempts: int) -> str:
+        message_id = str(uuid.uuid4())
+        with self.lock:
+            self.messages[message_id] = {
+                "body": body, "receive_count": 0, "attempts": attempts, "visible_at": 0.0,
+            }
+        return message_id
+
+    def receive(self, max_messages: int = 10) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        records = []
+        with self.lock:
+            for message_id, message in list(self.messages.items()):
+                if len(records) >= max_messages:
+                    break
+                if message["visible_at"] > now:
+                    continue
+                if message["receive_count"] >= self.max_receive_count:
+                    self.dead_letters.append(self.messages.pop(message_id))
+                    continue
+                message["receive_count"] += 1
+                message["visible_at"] = now + self.visibility_timeout
+                records.append({
+                    "messageId": message_id,
+                    "receiptHandle": message_id,
+                    "body": message["body"],
+                    "attributes": {"ApproximateReceiveCount": str(message["receive_count"])},
+                    "messageAttributes": {
+                        "attempts": {"stringValue": str(message["attempts"]), "dataType": "Number"},
+                    },
+                    "eventSourceARN": self.arn,
+                })
+        return records
+
+    def change_visibility(self, records: List[Dict[str, Any]], seconds: float):
+        with self.lock:
+            for record in records:
+                message = self.messages.get(record["receiptHandle"])
+                if message:
+                    message["visible_at"] = time.monotonic() + seconds
+
+    def requeue(self, records: List[Dict[str, Any]]):
+        for record in records:
+            self._put(record["body"], receive_count(record) - 1)
+
+    def delete(self, record: Dict[str, Any]):
+        with self.lock:
+            self.messages.pop(record["receiptHandle"], None)
+
+
+def run_local(queue: InMemoryQueue, handler: Callable, batch_size: int = 10, context=None) -> Dict[str, int]:
+    """
+    Vider la file en appelant le handler comme le ferait l'event source mapping ;
+    les messages en échec redeviennent visibles immédiatement
+    """
+    stats = {"batches": 0, "processed": 0, "retried": 0}
+    while True:
+        records = queue.receive(batch_size)
+        if not records:
+            break
+        stats["batches"] += 1
+        result = handler({"Records": records}, context) or {}
+        failed = {item["itemIdentifier"] for item in result.get("batchItemFailures", [])}
+        for record in records:
+            if record["messageId"] in failed:
+                stats["retried"] += 1
+                queue.change_visibility([record], 0)
+            else:
+                stats["processed"] += 1
+                queue.delete(record)
+    stats["dead_letters"] = len(queue.dead_letters)
+    return stats
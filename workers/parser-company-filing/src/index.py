@@ -1,6 +1,7 @@
 """
 Lambda Python pour parser les filings SEC des entreprises
-Déclenché par EventBridge quand un nouveau filing est découvert
+Déclenché par la file SQS alimentée par EventBridge quand un nouveau filing est découvert
+(l'invocation EventBridge directe reste supportée)
 Supporte:
 - 8-K: Événements importants (earnings, acquisitions, etc.)
 - Form 4: Insider trading
@@ -13,6 +14,7 @@ from bs4 import BeautifulSoup
 import re
 from datetime import datetime
 from typing import Dict, List, Optional, Any
+from filing_queue import TransientError, process_sqs_batch, sec_get, sec_head
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
@@ -42,6 +44,8 @@ def supabase_request(method, table, data=None, filters=None):
         response = requests.post(url, headers=headers, json=data)
     elif method == "PATCH":
         response = requests.patch(url, headers=headers, json=data)
+    elif method == "DELETE":
+        response = requests.delete(url, headers=headers)
     else:
         raise ValueError(f"Unsupported method: {method}")
     
@@ -55,7 +59,7 @@ def supabase_request(method, table, data=None, filters=None):
 def handler(event, context):
     """
     Handler principal
-    Event format:
+    Event format (EventBridge direct, ou corps des messages SQS "Records"):
     {
         "detail": {
             "filing_id": 123,
@@ -67,16 +71,51 @@ def handler(event, context):
         }
     }
     """
+    if "Records" in event:
+        print(f"Parser Company Filing triggered by SQS: {len(event['Records'])} messages")
+        return process_sqs_batch(event, context, parse_filing, mark_filing_failed)
+
     print(f"Parser Company Filing triggered: {json.dumps(event)}")
     
+    detail = event.get("detail", {})
+    try:
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"success": True, **parse_filing(detail)})
+        }
+        
+    except Exception as e:
+        mark_filing_failed(detail)
+        return {
+            "statusCode": 500,
+            "body": json.dumps({
+                "error": str(e)
+            })
+        }
+
+
+def mark_filing_failed(detail: dict):
+    """Marquer le filing comme FAILED"""
+    try:
+        filing_id = detail.get("filing_id")
+        if filing_id:
+            supabase_request("PATCH", "company_filings",
+                           {"status": "FAILED"},
+                           {"id": filing_id})
+    except:
+        pass
+
+
+def parse_filing(detail: dict) -> Dict[str, Any]:
+    """
+    Parser un filing selon son type ; lève une exception en cas d'échec
+    (idempotent : un message SQS peut être livré plusieurs fois)
+    """
     try:
-        detail = event.get("detail", {})
         filing_id = detail.get("filing_id")
         company_id = detail.get("company_id")
         form_type = detail.get("form_type")
         document_url = detail.get("document_url") or detail.get("filing_url")  # Support both
-        cik = detail.get("cik")
-        accession_number = detail.get("accession_number")
         
         if not all([filing_id, company_id, form_type, document_url]):
             raise ValueError("Missing required fields in event detail")
@@ -94,35 +133,15 @@ def handler(event, context):
                            {"id": filing_id})
         
         return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "success": True,
-                "filing_id": filing_id,
-                "form_type": form_type
-            })
+            "filing_id": filing_id,
+            "form_type": form_type
         }
         
     except Exception as e:
         print(f"Error parsing filing: {str(e)}")
         import traceback
         traceback.print_exc()
-        
-        # Marquer comme FAILED
-        try:
-            filing_id = event.get("detail", {}).get("filing_id")
-            if filing_id:
-                supabase_request("PATCH", "company_filings",
-                               {"status": "FAILED"},
-                               {"id": filing_id})
-        except:
-            pass
-        
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "error": str(e)
-            })
-        }
+        raise
 
 
 def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
@@ -158,7 +177,7 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
                 print(f"Looking for main 8-K document in index: {index_url}")
                 
                 # Télécharger la page index pour trouver le document HTML principal
-                index_response = requests.get(index_url, headers=headers, timeout=30)
+                index_response = sec_get(index_url, headers=headers, timeout=30)
                 print(f"Index page response status: {index_response.status_code}")
                 if index_response.status_code == 200:
                     index_soup = BeautifulSoup(index_response.content, "html.parser")
@@ -197,11 +216,13 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
                     if not found_doc:
                         potential_url = f"https://www.sec.gov{base_dir}/d8k.htm"
                         try:
-                            test_response = requests.head(potential_url, headers=headers, timeout=10)
+                            test_response = sec_head(potential_url, headers=headers, timeout=10)
                             if test_response.status_code == 200:
                                 document_url = potential_url
                                 print(f"Found main 8-K document (d8k.htm): {document_url}")
                                 found_doc = True
+                        except TransientError:
+                            raise
                         except Exception as e:
                             print(f"d8k.htm not found: {e}")
                     
@@ -209,11 +230,13 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
                     if not found_doc:
                         potential_url = f"https://www.sec.gov{base_dir}/d8ka.htm"
                         try:
-                            test_response = requests.head(potential_url, headers=headers, timeout=10)
+                            test_response = sec_head(potential_url, headers=headers, timeout=10)
                             if test_response.status_code == 200:
                                 document_url = potential_url
                                 print(f"Found main 8-K document (d8ka.htm): {document_url}")
                                 found_doc = True
+                        except TransientError:
+                            raise
                         except:
                             pass
                     
@@ -228,12 +251,14 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
                             if "xbrl" not in pattern and "ixbrl" not in pattern and "cover" not in pattern and "exhibit" not in pattern and "index" not in pattern:
                                 potential_url = f"https://www.sec.gov{base_dir}/{pattern}"
                                 try:
-                                    test_response = requests.head(potential_url, headers=headers, timeout=10)
+                                    test_response = sec_head(potential_url, headers=headers, timeout=10)
                                     if test_response.status_code == 200:
                                         document_url = potential_url
                                         print(f"Found main 8-K document (from page content): {document_url}")
                                         found_doc = True
                                         break
+                                except TransientError:
+                                    raise
                                 except:
                                     continue
                     
@@ -253,16 +278,18 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
                                 continue
                             test_url = f"https://www.sec.gov{base_dir}/{filename}"
                             try:
-                                test_response = requests.head(test_url, headers=headers, timeout=5)
+                                test_response = sec_head(test_url, headers=headers, timeout=5)
                                 if test_response.status_code == 200:
                                     # Télécharger un petit extrait pour vérifier si c'est lisible
-                                    test_content = requests.get(test_url, headers=headers, timeout=5, stream=True)
+                                    test_content = sec_get(test_url, headers=headers, timeout=5, stream=True)
                                     chunk = next(test_content.iter_content(1000), b'')
                                     if b'Item' in chunk or b'item' in chunk:
                                         document_url = test_url
                                         print(f"Found readable HTML document: {document_url}")
                                         found_doc = True
                                         break
+                            except TransientError:
+                                raise
                             except:
                                 continue
                     
@@ -284,7 +311,7 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
     
     # Télécharger le document
     print(f"Downloading document from: {document_url}")
-    response = requests.get(document_url, headers=headers, timeout=30)
+    response = sec_get(document_url, headers=headers, timeout=30)
     response.raise_for_status()
     print(f"Document downloaded, status: {response.status_code}, size: {len(response.content)} bytes")
     
@@ -304,7 +331,7 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
                 elif href.startswith("/"):
                     document_url = f"https://www.sec.gov{href}"
                 print(f"Found EDGAR link, trying: {document_url}")
-                response = requests.get(document_url, headers=headers, timeout=30)
+                response = sec_get(document_url, headers=headers, timeout=30)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.content, "html.parser")
                 break
@@ -326,7 +353,8 @@ def parse_8k(filing_id: int, company_id: int, document_url: str, detail: dict):
     
     print(f"Extracted {len(events)} events from 8-K")
     
-    # Insérer les événements dans company_events
+    # Remplacer les événements du filing (une nouvelle livraison ne crée pas de doublons)
+    supabase_request("DELETE", "company_events", filters={"filing_id": filing_id})
     for event in events:
         try:
             supabase_request("POST", "company_events", {
@@ -501,7 +529,7 @@ def parse_form4(filing_id: int, company_id: int, document_url: str):
     print(f"Parsing Form 4 filing_id={filing_id}, url={document_url}")
     
     # Télécharger le document
-    response = requests.get(document_url, timeout=30)
+    response = sec_get(document_url, timeout=30)
     response.raise_for_status()
     
     soup = BeautifulSoup(response.content, "html.parser")
@@ -511,7 +539,8 @@ def parse_form4(filing_id: int, company_id: int, document_url: str):
     
     print(f"Extracted {len(trades)} trades from Form 4")
     
-    # Insérer les trades dans insider_trades
+    # Remplacer les trades du filing (une nouvelle livraison ne crée pas de doublons)
+    supabase_request("DELETE", "insider_trades", filters={"filing_id": filing_id})
     for trade in trades:
         try:
             supabase_request("POST", "insider_trades", {
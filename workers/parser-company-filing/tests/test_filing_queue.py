@@ -0,0 +1,157 @@
+"""
+Tests unitaires de la file des filings (filing_queue) sur InMemoryQueue
+(copie identique dans parser-13f et parser-company-filing)
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import filing_queue  # noqa: E402
+from filing_queue import (  # noqa: E402
+    DEADLINE_MARGIN_MS,
+    InMemoryQueue,
+    TransientError,
+    VisibilityHeartbeat,
+    process_sqs_batch,
+    receive_count,
+    run_local,
+)
+
+
+def event(filing_id):
+    return {"detail-type": "13F Discovered", "detail": {"filing_id": filing_id}}
+
+
+class RecordingQueue:
+    """Enregistre les changements de visibilité demandés"""
+
+    def __init__(self, visibility_timeout):
+        self.visibility_timeout = visibility_timeout
+        self.calls = []
+
+    def change_visibility(self, records, seconds):
+        self.calls.append(([r["messageId"] for r in records], seconds))
+
+
+class Context:
+    """Contexte Lambda dont le temps restant passe sous la marge après `calls` appels"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def get_remaining_time_in_millis(self):
+        self.calls -= 1
+        return DEADLINE_MARGIN_MS * 10 if self.calls >= 0 else DEADLINE_MARGIN_MS - 1
+
+
+class VisibilityHeartbeatTest(unittest.TestCase):
+    def test_never_shortens_current_visibility(self):
+        queue = RecordingQueue(visibility_timeout=60)
+        records = [{"messageId": "a", "receiptHandle": "a"}]
+
+        with VisibilityHeartbeat(queue, records, seconds=0.2):
+            time.sleep(0.3)
+
+        self.assertEqual(queue.calls, [])
+
+    def test_extends_whole_batch_until_handler_returns(self):
+        queue = InMemoryQueue(visibility_timeout=0.2)
+        for filing_id in (1, 2, 3):
+            queue.send(event(filing_id))
+        redelivered = []
+
+        def process(detail):
+            # Messages déjà traités compris : Lambda ne les supprime qu'à la fin du lot
+            time.sleep(0.3)
+            redelivered.extend(queue.receive())
+
+        original = filing_queue.VISIBILITY_EXTENSION_SECONDS
+        filing_queue.VISIBILITY_EXTENSION_SECONDS = 0.2
+        try:
+            handler = lambda e, c: process_sqs_batch(e, c, process, lambda detail: None)  # noqa: E731
+            stats = run_local(queue, handler)
+        finally:
+            filing_queue.VISIBILITY_EXTENSION_SECONDS = original
+
+        self.assertEqual(redelivered, [])
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["processed"], 3)
+
+
+class ProcessSqsBatchTest(unittest.TestCase):
+    def test_transient_error_is_retried_and_permanent_error_marked_failed(self):
+        queue = InMemoryQueue()
+        transient_id = queue.send(event(1))
+        queue.send(event(2))
+        failed = []
+
+        def process(detail):
+            if detail["filing_id"] == 1:
+                raise TransientError("429")
+            raise ValueError("not a 13F")
+
+        result = process_sqs_batch({"Records": queue.receive()}, None, process, failed.append)
+
+        self.assertEqual(result["batchItemFailures"], [{"itemIdentifier": transient_id}])
+        self.assertEqual(failed, [{"filing_id": 2}])
+
+    def test_deadline_requeues_unattempted_messages_without_using_attempts(self):
+        queue = InMemoryQueue()
+        for filing_id in (1, 2, 3):
+            queue.send(event(filing_id))
+        processed = []
+
+        records = queue.receive()
+        result = process_sqs_batch(
+            {"Records": records}, Context(calls=1), lambda detail: processed.append(detail["filing_id"]), None
+        )
+        for record in records:
+            queue.delete(record)
+
+        self.assertEqual(processed, [1])
+        self.assertEqual(result["batchItemFailures"], [])
+        requeued = queue.receive()
+        self.assertEqual(sorted(filing_queue.detail_from_record(r)["filing_id"] for r in requeued), [2, 3])
+        self.assertEqual([receive_count(r) for r in requeued], [1, 1])
+
+    def test_deadline_keeps_attempts_of_retried_messages(self):
+        queue = InMemoryQueue()
+        queue.send(event(1), attempts=2)
+        queue.send(event(2), attempts=2)
+
+        records = queue.receive()
+        process_sqs_batch({"Records": records}, Context(calls=1), lambda detail: None, None)
+        for record in records:
+            queue.delete(record)
+
+        # Deux tentatives reportées, la réception non tentée n'en consomme pas
+        self.assertEqual([receive_count(r) for r in queue.receive()], [3])
+
+    def test_exhausted_transient_errors_mark_failed_and_go_to_dlq(self):
+        queue = InMemoryQueue(max_receive_count=3)
+        queue.send(event(1))
+        failed = []
+
+        def process(detail):
+            raise TransientError("SEC 503")
+
+        original = filing_queue.MAX_RECEIVE_COUNT
+        filing_queue.MAX_RECEIVE_COUNT = 3
+        try:
+            stats = run_local(queue, lambda e, c: process_sqs_batch(e, c, process, failed.append))
+        finally:
+            filing_queue.MAX_RECEIVE_COUNT = original
+
+        self.assertEqual(failed, [{"filing_id": 1}])
+        self.assertEqual(stats["retried"], 3)
+        self.assertEqual(stats["dead_letters"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
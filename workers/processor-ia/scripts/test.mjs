@@ -0,0 +1,33 @@
+import { build } from "esbuild";
+import { readdirSync } from "fs";
+import { spawnSync } from "child_process";
+
+// Tests node:test regroupés par esbuild (comme le build), sans dépendance de test supplémentaire
+const tests = readdirSync("src/__tests__").filter((file) => file.endsWith(".test.ts"));
+
+await build({
+  entryPoints: tests.map((file) => `src/__tests__/${file}`),
+  outdir: "dist-test",
+  outExtension: { ".js": ".cjs" },
+  bundle: true,
+  platform: "node",
+  target: "node20",
+  format: "cjs",
+  sourcemap: false,
+});
+
+const result = spawnSync(
+  process.execPath,
+  ["--test", ...tests.map((file) => `dist-test/${file.replace(/\.ts$/, ".cjs")}`)],
+  {
+    stdio: "inherit",
+    env: {
+      ...process.env,
+      SUPABASE_URL: process.env.SUPABASE_URL || "https://test.supabase.co",
+      SUPABASE_SERVICE_KEY: process.env.SUPABASE_SERVICE_KEY || "test-service-key",
+      // Pas de lecture ni d'écriture du cache : les tests ne simulent que les RPC de signals
+      ENRICHMENT_CACHE_TTL_HOURS: "0",
+    },
+  }
+);
+process.exit(result.status ?? 1);
@@ -0,0 +1,172 @@
+/**
+ * Tests unitaires du mode batch (réservation, bail, relâche, groupement) avec le modèle stub
+ */
+
+import { beforeEach, describe, it } from "node:test";
+import assert from "node:assert/strict";
+import { supabase } from "../supabase";
+import { BatchOptions, drainPendingSignals, groupSignals } from "../index";
+import { EnrichmentModel, normalizeEnrichment, PendingSignal, stubModel } from "../enrichment";
+
+interface SignalRow extends PendingSignal {
+  processing_status: string;
+}
+
+// Table signals en mémoire derrière les RPC de réservation et d'écriture
+const db: { signals: SignalRow[]; claims: any[]; completeError: any } = { signals: [], claims: [], completeError: null };
+
+const client = supabase as any;
+client.rpc = async (name: string, args: any) => {
+  if (name === "claim_pending_signals") {
+    db.claims.push(args);
+    const claimed = db.signals.filter((row) => row.processing_status === "pending").slice(0, args.p_limit);
+    claimed.forEach((row) => (row.processing_status = "processing"));
+    return { data: claimed.map(({ processing_status, ...signal }) => signal), error: null };
+  }
+  if (name === "complete_signal_enrichments") {
+    if (db.completeError) {
+      return { data: null, error: db.completeError };
+    }
+    const ids = new Set(args.p_results.map((result: any) => result.id));
+    db.signals.filter((row) => ids.has(row.id)).forEach((row) => (row.processing_status = "completed"));
+    return { data: ids.size, error: null };
+  }
+  return { data: null, error: { message: `unexpected rpc ${name}` } };
+};
+client.from = () => ({
+  update: (payload: any) => ({
+    in: async (_column: string, ids: string[]) => {
+      db.signals.filter((row) => ids.includes(row.id)).forEach((row) => Object.assign(row, payload));
+      return { error: null };
+    },
+  }),
+});
+
+const OPTIONS: BatchOptions = {
+  batchSize: 10,
+  signalsPerRequest: 3,
+  shortSignalChars: 200,
+  tokenBudget: 100_000,
+  requestsPerMinute: 60_000,
+};
+
+function news(id: string, title = `Headline ${id}`): SignalRow {
+  return { id, source: "rss", type: "news", raw_data: { title }, processing_status: "pending" };
+}
+
+function statuses(): Record<string, string> {
+  return Object.fromEntries(db.signals.map((row) => [row.id, row.processing_status]));
+}
+
+/** Modèle stub instrumenté : requêtes reçues, coût en tokens, signaux omis */
+function recordingModel(options: { tokens?: number; omit?: string[]; fail?: boolean } = {}) {
+  const requests: string[][] = [];
+  const model: EnrichmentModel = {
+    name: "recording-stub",
+    async enrich(signals) {
+      requests.push(signals.map((signal) => signal.id));
+      if (options.fail) {
+        throw new Error("provider error");
+      }
+      const { results } = await stubModel.enrich(signals);
+      return {
+        results: results.filter((result) => !options.omit?.includes(result.id)),
+        tokens: options.tokens ?? 0,
+      };
+    },
+  };
+  return { model, requests };
+}
+
+const farDeadline = () => Date.now() + 60_000;
+
+describe("groupSignals", () => {
+  it("devrait regrouper les signaux courts et envoyer seul un signal long", () => {
+    const long = news("long", "x".repeat(500));
+    const groups = groupSignals([news("a"), news("b"), long, news("c"), news("d")], OPTIONS);
+
+    assert.deepEqual(
+      groups.map((group) => group.map((signal) => signal.id)),
+      [["long"], ["a", "b", "c"], ["d"]]
+    );
+  });
+});
+
+describe("normalizeEnrichment", () => {
+  it("devrait borner l'importance et remplacer une priorité inconnue", () => {
+    assert.equal(normalizeEnrichment("a", { importance_score: 42 }).importance_score, 10);
+    assert.equal(normalizeEnrichment("a", { importance_score: "n/a" }).importance_score, 5);
+    assert.equal(normalizeEnrichment("a", { priority: "urgent" }).priority, "medium");
+    assert.deepEqual(normalizeEnrichment("a", { tags: "macro" }).tags, []);
+  });
+});
+
+describe("drainPendingSignals", () => {
+  beforeEach(() => {
+    db.signals = [];
+    db.claims = [];
+    db.completeError = null;
+  });
+
+  it("devrait réserver avec un bail, grouper les requêtes et finaliser tous les signaux", async () => {
+    db.signals = Array.from({ length: 7 }, (_, i) => news(`s${i}`));
+    const { model, requests } = recordingModel();
+
+    const stats = await drainPendingSignals(model, OPTIONS, farDeadline());
+
+    assert.equal(stats.claimed, 7);
+    assert.equal(stats.enriched, 7);
+    assert.deepEqual(requests.map((ids) => ids.length), [3, 3, 1]);
+    assert.ok(db.claims.every((args) => args.p_lease_seconds === 900 && args.p_limit === OPTIONS.batchSize));
+    assert.ok(Object.values(statuses()).every((status) => status === "completed"));
+  });
+
+  it("devrait relâcher le lot réservé si l'écriture des résultats échoue", async () => {
+    db.signals = [news("a"), news("b")];
+    db.completeError = { message: "statement timeout" };
+
+    await assert.rejects(drainPendingSignals(recordingModel().model, OPTIONS, farDeadline()));
+
+    assert.deepEqual(statuses(), { a: "pending", b: "pending" });
+  });
+
+  it("devrait relâcher les groupes hors budget et arrêter le drainage", async () => {
+    db.signals = Array.from({ length: 6 }, (_, i) => news(`s${i}`));
+    const { model, requests } = recordingModel({ tokens: 900 });
+
+    const stats = await drainPendingSignals(model, { ...OPTIONS, tokenBudget: 1_000 }, farDeadline());
+
+    assert.equal(requests.length, 1);
+    assert.equal(stats.enriched, 3);
+    assert.equal(stats.released, 3);
+    assert.equal(db.claims.length, 1);
+    assert.deepEqual(Object.values(statuses()).sort(), ["completed", "completed", "completed", "pending", "pending", "pending"]);
+  });
+
+  it("devrait marquer en échec les signaux omis et leurs doublons, et un groupe en erreur", async () => {
+    db.signals = [news("a", "Same headline"), news("b", "Same headline"), news("c")];
+    const { model, requests } = recordingModel({ omit: ["a"] });
+
+    const stats = await drainPendingSignals(model, OPTIONS, farDeadline());
+
+    // b, doublon exact de a, n'est pas envoyé au modèle et suit son représentant
+    assert.deepEqual(requests, [["a", "c"]]);
+    assert.equal(stats.failed, 2);
+    assert.deepEqual(statuses(), { a: "failed", b: "failed", c: "completed" });
+
+    db.signals = [news("d"), news("e")];
+    const failing = await drainPendingSignals(recordingModel({ fail: true }).model, OPTIONS, farDeadline());
+    assert.equal(failing.failed, 2);
+    assert.deepEqual(statuses(), { d: "failed", e: "failed" });
+  });
+
+  it("ne devrait rien réserver une fois l'échéance passée", async () => {
+    db.signals = [news("a")];
+
+    const stats = await drainPendingSignals(recordingModel().model, OPTIONS, Date.now() - 1);
+
+    assert.equal(stats.claimed, 0);
+    assert.equal(db.claims.length, 0);
+    assert.deepEqual(statuses(), { a: "pending" });
+  });
+});
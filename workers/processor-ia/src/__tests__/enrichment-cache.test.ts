@@ -0,0 +1,108 @@
+/**
+ * Tests unitaires pour l'empreinte des signaux et les doublons de lot (enrichment-cache)
+ */
+
+import { describe, it } from "node:test";
+import assert from "node:assert/strict";
+import { fingerprint, normalizeContent, resolveFromCache, signalKey, similarity } from "../enrichment-cache";
+import { PendingSignal } from "../enrichment";
+
+function funding(id: string, fundingRate: number, exchange = "Binance"): PendingSignal {
+  return { id, source: "coinglass", type: "funding", raw_data: { symbol: "BTC", fundingRate, exchange } };
+}
+
+function liquidation(id: string, side: string): PendingSignal {
+  return {
+    id,
+    source: "coinglass",
+    type: "liquidation",
+    raw_data: { symbol: "ETH", liquidationAmount: 12_000_000, side, exchange: "OKX" },
+  };
+}
+
+function news(id: string, title: string, description = ""): PendingSignal {
+  return { id, source: "rss", type: "news", raw_data: { title, description } };
+}
+
+const LIQUIDATION_NEWS = "Over 500M in leveraged positions were wiped out in the past 24 hours across major exchanges";
+
+describe("normalizeContent", () => {
+  it("devrait conserver le signe des nombres", () => {
+    assert.notEqual(normalizeContent(funding("a", 0.012)), normalizeContent(funding("b", -0.012)));
+    assert.match(normalizeContent(funding("b", -0.012)), /-0\.012/);
+  });
+
+  it("devrait arrondir les variations mineures de même signe", () => {
+    assert.equal(normalizeContent(funding("a", -0.0121)), normalizeContent(funding("b", -0.0124)));
+  });
+
+  it("devrait traiter les tirets entre mots comme des séparateurs", () => {
+    assert.equal(normalizeContent(news("a", "BTC-USD hits record")), "news article btc usd hits record");
+  });
+});
+
+describe("fingerprint", () => {
+  it("devrait distinguer deux fundings de signe opposé", () => {
+    assert.notEqual(fingerprint(funding("a", 0.012)).hash, fingerprint(funding("b", -0.012)).hash);
+  });
+
+  it("devrait distinguer deux liquidations long / short", () => {
+    assert.notEqual(signalKey(liquidation("a", "long")).direction, signalKey(liquidation("b", "short")).direction);
+    assert.notEqual(fingerprint(liquidation("a", "long")).hash, fingerprint(liquidation("b", "short")).hash);
+  });
+
+  it("devrait inclure l'exchange dans l'empreinte exacte", () => {
+    assert.notEqual(fingerprint(funding("a", 0.01, "Binance")).hash, fingerprint(funding("b", 0.01, "Bybit")).hash);
+  });
+
+  it("ne devrait pas calculer de bandes pour une source structurée", () => {
+    assert.deepEqual(fingerprint(funding("a", 0.01)).bands, []);
+  });
+
+  it("ne devrait partager aucune bande entre deux titres de sens opposé", () => {
+    const longs = fingerprint(news("a", "Bitcoin longs liquidated as price falls below 60k", LIQUIDATION_NEWS));
+    const shorts = fingerprint(news("b", "Bitcoin shorts liquidated as price rises above 60k", LIQUIDATION_NEWS));
+    // Textes proches malgré le sens opposé : seul le sens dans la portée des bandes les sépare
+    assert.ok(similarity(longs.minhash, shorts.minhash) >= 0.7);
+    assert.equal(longs.bands.filter((band) => shorts.bands.includes(band)).length, 0);
+  });
+
+  it("devrait rapprocher deux reprises d'un même titre", () => {
+    const original = fingerprint(news("a", "Fed holds rates steady, signals two cuts this year"));
+    const reprise = fingerprint(news("b", "BREAKING: Fed holds rates steady, signals two cuts this year"));
+    assert.ok(similarity(original.minhash, reprise.minhash) >= 0.8);
+    assert.ok(original.bands.some((band) => reprise.bands.includes(band)));
+  });
+});
+
+describe("resolveFromCache", () => {
+  it("devrait enrichir séparément deux signaux de signe opposé du même lot", async () => {
+    const resolution = await resolveFromCache([funding("a", 0.012), funding("b", -0.012), funding("c", 0.0121)]);
+
+    assert.deepEqual(
+      resolution.toEnrich.map((signal) => signal.id),
+      ["a", "b"]
+    );
+    assert.deepEqual(
+      resolution.followers.get("a")!.map((signal) => signal.id),
+      ["c"]
+    );
+  });
+
+  it("devrait regrouper les quasi-doublons de même sens et séparer les sens opposés", async () => {
+    const resolution = await resolveFromCache([
+      news("a", "Bitcoin longs liquidated as price falls below 60k", LIQUIDATION_NEWS),
+      news("b", "BREAKING: Bitcoin longs liquidated as price falls below 60k", LIQUIDATION_NEWS),
+      news("c", "Bitcoin shorts liquidated as price rises above 60k", LIQUIDATION_NEWS),
+    ]);
+
+    assert.deepEqual(
+      resolution.toEnrich.map((signal) => signal.id),
+      ["a", "c"]
+    );
+    assert.deepEqual(
+      resolution.followers.get("a")!.map((signal) => signal.id),
+      ["b"]
+    );
+  });
+});
@@ -0,0 +1,420 @@
+/**
+ * Cache des enrichissements par empreinte de contenu (table signal_enrichment_cache)
+ * - empreinte exacte : md5 de la clé du signal (source, type, ticker, exchange, sens) et du
+ *   contenu normalisé (casse, ponctuation, nombres arrondis, signe conservé)
+ * - quasi-doublons (sources en texte libre uniquement) : signature MinHash sur les mots et
+ *   bigrammes de mots, bandes LSH limitées à (source, type, ticker, sens), similarité
+ *   estimée >= seuil pour réutiliser
+ * Les doublons d'un même lot ne coûtent qu'un appel modèle (représentant + suiveurs).
+ * Les entrées expirées sont purgées périodiquement (purge_enrichment_cache).
+ */
+
+import { createHash } from "crypto";
+import { supabase } from "./supabase";
+import { describeSignal, Enrichment, PendingSignal } from "./enrichment";
+
+// Fraîcheur maximale d'une entrée réutilisée (0 = cache désactivé)
+const CACHE_TTL_HOURS = parseInt(process.env.ENRICHMENT_CACHE_TTL_HOURS || "24", 10);
+// Similarité de Jaccard estimée minimale pour un quasi-doublon
+const SIMILARITY_THRESHOLD = parseFloat(process.env.ENRICHMENT_CACHE_SIMILARITY || "0.8");
+// Intervalle minimal entre deux purges des entrées expirées (par conteneur Lambda)
+const PURGE_INTERVAL_MS = 15 * 60_000;
+
+// 64 fonctions de hachage = 16 bandes de 4 lignes (P(candidat) > 99% à 0.8 de similarité)
+const MINHASH_SIZE = 64;
+const BAND_ROWS = 4;
+
+// Sources en texte libre : seules à accepter les quasi-doublons. Pour les signaux structurés,
+// quelques caractères (symbole, signe, exchange) changent le sens : empreinte exacte seulement.
+const NEAR_DUPLICATE_SOURCES = new Set(["rss", "scrapecreators"]);
+// Champs numériques dont le signe donne le sens d'un signal structuré
+const SIGNED_FIELDS = ["fundingRate", "change24h", "change", "changePercent"];
+// Mots de sens d'un texte libre (formes fléchies ramenées à un sens)
+const DIRECTION_WORDS: Record<string, string> = {
+  long: "long",
+  longs: "long",
+  short: "short",
+  shorts: "short",
+  buy: "buy",
+  buys: "buy",
+  sell: "sell",
+  sells: "sell",
+  bullish: "bullish",
+  bearish: "bearish",
+  up: "up",
+  rise: "up",
+  rises: "up",
+  surge: "up",
+  surges: "up",
+  down: "down",
+  fall: "down",
+  falls: "down",
+  drop: "down",
+  drops: "down",
+  plunge: "down",
+  plunges: "down",
+  upgrade: "upgrade",
+  upgraded: "upgrade",
+  upgrades: "upgrade",
+  downgrade: "downgrade",
+  downgraded: "downgrade",
+  downgrades: "downgrade",
+};
+
+const SIGNED_NUMBER = /^[-+]?\d+(\.\d+)?(e-?\d+)?$/;
+
+export interface Fingerprint {
+  hash: string;
+  minhash: number[]; // vide hors sources en texte libre
+  bands: string[];
+}
+
+/**
+ * Ce qui doit être identique pour réutiliser un enrichissement, même quasi-doublon
+ */
+export interface SignalKey {
+  source: string;
+  type: string;
+  ticker: string;
+  exchange: string;
+  direction: string;
+}
+
+interface CacheEntry {
+  fingerprint: string;
+  minhash: number[];
+  bands: string[];
+  enrichment: Omit<Enrichment, "id">;
+  cost_tokens: number;
+}
+
+export interface CacheResolution {
+  hits: Enrichment[]; // signaux servis par le cache
+  toEnrich: PendingSignal[]; // représentants à envoyer au modèle
+  followers: Map<string, PendingSignal[]>; // représentant -> doublons du lot
+  fingerprints: Map<string, Fingerprint>;
+  hitCounts: Map<string, number>; // empreinte réutilisée -> hits
+  newEntries: CacheEntry[];
+  tokensSaved: number;
+}
+
+function roundNumber(number: string): string {
+  const value = parseFloat(number);
+  // String(-0) === "0" : un arrondi nul n'a pas de signe
+  return Number.isFinite(value) ? String(Number(value.toPrecision(2))) : number;
+}
+
+/**
+ * Contenu normalisé : la présentation et les variations numériques mineures
+ * (taux de funding, montants) ne distinguent pas deux signaux ; le signe d'un nombre
+ * est conservé (funding +0.01 / -0.01), les tirets entre mots ou dates sont des séparateurs
+ */
+export function normalizeContent(signal: PendingSignal): string {
+  return describeSignal(signal)
+    .toLowerCase()
+    .replace(/<[^>]*>/g, " ")
+    .replace(/\u2212/g, "-")
+    .replace(/[^a-z0-9.+\-\s]/g, " ")
+    .split(/\s+/)
+    .flatMap((token) => (SIGNED_NUMBER.test(token) ? [token] : token.split(/[-+]/)))
+    .map((token) =>
+      SIGNED_NUMBER.test(token)
+        ? roundNumber(token)
+        : token.replace(/\d+(\.\d+)?/g, roundNumber).replace(/(?<!\d)\.|\.(?!\d)/g, " ")
+    )
+    .join(" ")
+    .replace(/\s+/g, " ")
+    .trim();
+}
+
+function directionOf(rawData: any, content: string): string {
+  const declared = rawData?.side ?? rawData?.direction;
+  if (typeof declared === "string" && declared.trim()) {
+    return declared.trim().toLowerCase();
+  }
+
+  for (const field of SIGNED_FIELDS) {
+    const value = parseFloat(rawData?.[field]);
+    if (Number.isFinite(value)) {
+      return value > 0 ? "+" : value < 0 ? "-" : "0";
+    }
+  }
+
+  // Texte libre : ensemble des mots de sens présents ("bitcoin longs liquidated as price falls" -> "down+long")
+  const words = new Set(content.split(" ").flatMap((word) => DIRECTION_WORDS[word] ?? []));
+  return Array.from(words).sort().join("+");
+}
+
+export function signalKey(signal: PendingSignal, content: string = normalizeContent(signal)): SignalKey {
+  const rawData = signal.raw_data || {};
+  return {
+    source: signal.source,
+    type: signal.type,
+    ticker: String(rawData.ticker ?? rawData.symbol ?? "").toUpperCase(),
+    exchange: String(rawData.exchange ?? "").toLowerCase(),
+    direction: directionOf(rawData, content),
+  };
+}
+
+function fnv1a(text: string, seed = 0x811c9dc5): number {
+  let hash = seed;
+  for (let i = 0; i < text.length; i++) {
+    hash ^= text.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+}
+
+// Finaliseur murmur3 : une permutation pseudo-aléatoire par graine
+function mix32(value: number): number {
+  let h = value;
+  h ^= h >>> 16;
+  h = Math.imul(h, 0x85ebca6b);
+  h ^= h >>> 13;
+  h = Math.imul(h, 0xc2b2ae35);
+  h ^= h >>> 16;
+  return h >>> 0;
+}
+
+export function fingerprint(signal: PendingSignal): Fingerprint {
+  const content = normalizeContent(signal);
+  const key = signalKey(signal, content);
+  const hash = createHash("md5")
+    .update(`${key.source}:${key.type}|${key.ticker}|${key.exchange}|${key.direction}|${content}`)
+    .digest("hex");
+
+  if (!NEAR_DUPLICATE_SOURCES.has(signal.source)) {
+    return { hash, minhash: [], bands: [] };
+  }
+
+  // Mots + bigrammes : robuste aux préfixes de reprise ("BREAKING:", "Reuters -") sur des
+  // titres courts, tout en tenant compte de l'ordre des mots
+  const words = content.split(" ").filter(Boolean);
+  const shingles = new Set<number>();
+  words.forEach((word, i) => {
+    shingles.add(fnv1a(word));
+    if (i > 0) shingles.add(fnv1a(`${words[i - 1]} ${word}`));
+  });
+
+  const minhash = new Array<number>(MINHASH_SIZE).fill(0xffffffff);
+  for (const shingle of shingles) {
+    for (let i = 0; i < MINHASH_SIZE; i++) {
+      const value = mix32(shingle ^ Math.imul(i + 1, 0x9e3779b9));
+      if (value < minhash[i]) minhash[i] = value;
+    }
+  }
+
+  // Bandes limitées à la même source / au même type, ticker et sens
+  const scope = `${key.source}:${key.type}:${key.ticker}:${key.direction}`;
+  const bands: string[] = [];
+  for (let band = 0; band < MINHASH_SIZE / BAND_ROWS; band++) {
+    const rows = minhash.slice(band * BAND_ROWS, (band + 1) * BAND_ROWS).join(".");
+    bands.push(`${scope}:${band}:${fnv1a(rows).toString(16)}`);
+  }
+
+  return {
+    hash,
+    // INTEGER[] Postgres : valeurs signées 32 bits
+    minhash: minhash.map((value) => value | 0),
+    bands,
+  };
+}
+
+/**
+ * Similarité de Jaccard estimée (part des valeurs MinHash égales)
+ */
+export function similarity(a: number[], b: number[]): number {
+  let equal = 0;
+  for (let i = 0; i < MINHASH_SIZE; i++) {
+    if (a[i] === b[i]) equal++;
+  }
+  return equal / MINHASH_SIZE;
+}
+
+function bestMatch<T extends { minhash: number[] }>(print: Fingerprint, byBand: Map<string, T[]>): T | null {
+  let best: T | null = null;
+  let bestScore = SIMILARITY_THRESHOLD;
+  for (const band of print.bands) {
+    for (const candidate of byBand.get(band) || []) {
+      const score = similarity(print.minhash, candidate.minhash);
+      if (score >= bestScore) {
+        best = candidate;
+        bestScore = score;
+      }
+    }
+  }
+  return best;
+}
+
+function indexBands<T extends { bands: string[] }>(byBand: Map<string, T[]>, item: T): void {
+  for (const band of item.bands) {
+    const items = byBand.get(band) || [];
+    items.push(item);
+    byBand.set(band, items);
+  }
+}
+
+/**
+ * Répartir un lot entre hits de cache, représentants à enrichir et doublons de lot
+ * (une requête match_enrichment_cache pour tout le lot)
+ */
+export async function resolveFromCache(signals: PendingSignal[]): Promise<CacheResolution> {
+  const resolution: CacheResolution = {
+    hits: [],
+    toEnrich: [],
+    followers: new Map(),
+    fingerprints: new Map(signals.map((signal) => [signal.id, fingerprint(signal)])),
+    hitCounts: new Map(),
+    newEntries: [],
+    tokensSaved: 0,
+  };
+
+  let cached: CacheEntry[] = [];
+  if (CACHE_TTL_HOURS > 0 && signals.length > 0) {
+    const prints = Array.from(resolution.fingerprints.values());
+    const { data, error } = await supabase.rpc("match_enrichment_cache", {
+      p_fingerprints: Array.from(new Set(prints.map((print) => print.hash))),
+      p_bands: Array.from(new Set(prints.flatMap((print) => print.bands))),
+      p_max_age_hours: CACHE_TTL_HOURS,
+    });
+    if (error) {
+      // Cache best-effort : tout le lot part au modèle
+      console.error("Enrichment cache lookup failed:", error);
+    } else {
+      cached = (data || []) as CacheEntry[];
+    }
+  }
+
+  const cachedByHash = new Map(cached.map((entry) => [entry.fingerprint, entry]));
+  const cachedByBand = new Map<string, CacheEntry[]>();
+  cached.forEach((entry) => indexBands(cachedByBand, entry));
+
+  // Représentants du lot, pour regrouper les doublons qui arrivent ensemble
+  type Representative = Fingerprint & { signal: PendingSignal };
+  const representativesByHash = new Map<string, Representative>();
+  const representativesByBand = new Map<string, Representative[]>();
+
+  for (const signal of signals) {
+    const print = resolution.fingerprints.get(signal.id)!;
+
+    const entry = cachedByHash.get(print.hash) || bestMatch(print, cachedByBand);
+    if (entry) {
+      resolution.hits.push({ ...entry.enrichment, id: signal.id });
+      resolution.hitCounts.set(entry.fingerprint, (resolution.hitCounts.get(entry.fingerprint) || 0) + 1);
+      resolution.tokensSaved += entry.cost_tokens;
+      continue;
+    }
+
+    const representative = representativesByHash.get(print.hash) || bestMatch(print, representativesByBand);
+    if (representative) {
+      resolution.followers.get(representative.signal.id)!.push(signal);
+      continue;
+    }
+
+    const created: Representative = { ...print, signal };
+    representativesByHash.set(print.hash, created);
+    indexBands(representativesByBand, created);
+    resolution.followers.set(signal.id, []);
+    resolution.toEnrich.push(signal);
+  }
+
+  return resolution;
+}
+
+/**
+ * Résultats du modèle pour des représentants : nouvelles entrées de cache et
+ * enrichissements des doublons du lot
+ */
+export function shareEnrichments(
+  resolution: CacheResolution,
+  results: Enrichment[],
+  costPerSignal: number
+): Enrichment[] {
+  const shared: Enrichment[] = [];
+
+  for (const result of results) {
+    const print = resolution.fingerprints.get(result.id);
+    if (!print) continue;
+
+    const { id, ...enrichment } = result;
+    resolution.newEntries.push({
+      fingerprint: print.hash,
+      minhash: print.minhash,
+      bands: print.bands,
+      enrichment,
+      cost_tokens: Math.round(costPerSignal),
+    });
+
+    const followers = resolution.followers.get(id) || [];
+    for (const follower of followers) {
+      shared.push({ ...enrichment, id: follower.id });
+    }
+    if (followers.length > 0) {
+      resolution.hitCounts.set(print.hash, (resolution.hitCounts.get(print.hash) || 0) + followers.length);
+      resolution.tokensSaved += followers.length * Math.round(costPerSignal);
+    }
+  }
+
+  return shared;
+}
+
+/**
+ * Doublons de lot rattachés à des représentants (même statut qu'eux en cas d'échec)
+ */
+export function followerIds(resolution: CacheResolution, representativeIds: string[]): string[] {
+  return representativeIds.flatMap((id) => (resolution.followers.get(id) || []).map((signal) => signal.id));
+}
+
+let lastPurgeAt = 0;
+
+/**
+ * Supprimer les entrées plus anciennes que le TTL (jamais réutilisées), au plus une fois par intervalle
+ */
+async function purgeExpiredEntries(): Promise<void> {
+  if (Date.now() - lastPurgeAt < PURGE_INTERVAL_MS) {
+    return;
+  }
+  lastPurgeAt = Date.now();
+
+  const { data: purged, error } = await supabase.rpc("purge_enrichment_cache", {
+    p_max_age_hours: CACHE_TTL_HOURS,
+  });
+  if (error) {
+    console.error("Failed to purge expired enrichment cache entries:", error);
+  } else if (purged) {
+    console.log(`Purged ${purged} expired enrichment cache entries`);
+  }
+}
+
+/**
+ * Purger les entrées expirées, enregistrer les nouvelles entrées puis les compteurs de hits (best-effort)
+ */
+export async function saveCache(resolution: CacheResolution): Promise<void> {
+  if (CACHE_TTL_HOURS <= 0) {
+    return;
+  }
+  await purgeExpiredEntries();
+
+  if (resolution.newEntries.length > 0) {
+    // Une entrée expirée de même empreinte est remplacée (compteurs conservés)
+    const createdAt = new Date().toISOString();
+    const { error } = await supabase
+      .from("signal_enrichment_cache")
+      .upsert(
+        resolution.newEntries.map((entry) => ({ ...entry, created_at: createdAt })),
+        { onConflict: "fingerprint" }
+      );
+    if (error) {
+      console.error("Failed to save enrichment cache entries:", error);
+    }
+  }
+
+  if (resolution.hitCounts.size > 0) {
+    const { error } = await supabase.rpc("record_enrichment_cache_hits", {
+      p_hits: Array.from(resolution.hitCounts.entries()).map(([fingerprint, hits]) => ({ fingerprint, hits })),
+    });
+    if (error) {
+      console.error("Failed to record enrichment cache hits:", error);
+    }
+  }
+}
@@ -0,0 +1,190 @@
+/**
+ * Modèles d'enrichissement des signaux
+ * - openai : plusieurs signaux par requête, sortie structurée (json_schema strict)
+ * - stub : enrichissement local déterministe (tests, exécution sans clé API)
+ */
+
+const OPENAI_API_KEY = process.env.OPENAI_API_KEY || "";
+const OPENAI_MODEL = process.env.OPENAI_MODEL || "gpt-4o-mini";
+
+const PRIORITIES = ["low", "medium", "high", "critical"] as const;
+
+export interface PendingSignal {
+  id: string;
+  source: string;
+  type: string;
+  raw_data: any;
+}
+
+export interface Enrichment {
+  id: string;
+  summary: string;
+  importance_score: number;
+  tags: string[];
+  impact: string;
+  priority: (typeof PRIORITIES)[number];
+}
+
+export interface EnrichmentModel {
+  name: string;
+  /**
+   * Enrichir un groupe de signaux ; les signaux absents du résultat sont en échec
+   */
+  enrich(signals: PendingSignal[]): Promise<{ results: Enrichment[]; tokens: number }>;
+}
+
+/**
+ * Contenu d'un signal dans le prompt, selon sa source
+ */
+export function describeSignal(signal: PendingSignal): string {
+  const rawData = signal.raw_data || {};
+
+  if (signal.source === "rss") {
+    return `News article: ${rawData.title || ""}
+${rawData.description || ""}`;
+  } else if (signal.source === "coinglass") {
+    return `Crypto derivatives signal
+Type: ${signal.type}
+Data: ${JSON.stringify(rawData)}`;
+  } else if (signal.source === "scrapecreators") {
+    return `Social media post: ${rawData.text || ""}`;
+  }
+  return `Source: ${signal.source}
+Type: ${signal.type}
+Data: ${JSON.stringify(rawData)}`;
+}
+
+/**
+ * Estimation grossière (4 caractères par token) pour le budget
+ */
+export function estimateTokens(text: string): number {
+  return Math.ceil(text.length / 4);
+}
+
+/**
+ * Valeurs compatibles avec les contraintes de signals (importance 1-10, priorité connue)
+ */
+export function normalizeEnrichment(id: string, content: any): Enrichment {
+  const importance = parseInt(content?.importance_score ?? "5", 10);
+  return {
+    id,
+    summary: String(content?.summary || ""),
+    importance_score: Number.isFinite(importance) ? Math.min(10, Math.max(1, importance)) : 5,
+    tags: Array.isArray(content?.tags) ? content.tags.map(String) : [],
+    impact: String(content?.impact || ""),
+    priority: PRIORITIES.includes(content?.priority) ? content.priority : "medium",
+  };
+}
+
+const RESPONSE_SCHEMA = {
+  type: "object",
+  properties: {
+    results: {
+      type: "array",
+      items: {
+        type: "object",
+        properties: {
+          id: { type: "string" },
+          summary: { type: "string" },
+          importance_score: { type: "integer" },
+          tags: { type: "array", items: { type: "string" } },
+          impact: { type: "string" },
+          priority: { type: "string", enum: PRIORITIES },
+        },
+        required: ["id", "summary", "importance_score", "tags", "impact", "priority"],
+        additionalProperties: false,
+      },
+    },
+  },
+  required: ["results"],
+  additionalProperties: false,
+};
+
+export const openAIModel: EnrichmentModel = {
+  name: "openai",
+
+  async enrich(signals) {
+    const prompt = `Analyze each signal below and return one result per signal id with:
+- A one-sentence summary
+- Importance score (1-10)
+- Tags (array: e.g., ["macro", "crypto", "corporate"])
+- Expected market impact (brief description)
+- Priority level (low/medium/high/critical)
+
+${signals.map((signal) => `### Signal ${signal.id}\n${describeSignal(signal)}`).join("\n\n")}`;
+
+    const response = await fetch("https://api.openai.com/v1/chat/completions", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "Authorization": `Bearer ${OPENAI_API_KEY}`,
+      },
+      body: JSON.stringify({
+        model: OPENAI_MODEL,
+        messages: [
+          {
+            role: "system",
+            content: "You are a financial market analyst. Analyze signals and provide structured JSON responses.",
+          },
+          {
+            role: "user",
+            content: prompt,
+          },
+        ],
+        temperature: 0.3,
+        response_format: {
+          type: "json_schema",
+          json_schema: { name: "signal_enrichments", strict: true, schema: RESPONSE_SCHEMA },
+        },
+      }),
+    });
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`OpenAI API error: ${error}`);
+    }
+
+    const result = await response.json();
+    const content = JSON.parse(result.choices[0]?.message?.content || "{}");
+    const requested = new Set(signals.map((signal) => signal.id));
+
+    return {
+      results: (content.results || [])
+        .filter((item: any) => requested.has(item?.id))
+        .map((item: any) => normalizeEnrichment(item.id, item)),
+      tokens: result.usage?.total_tokens ?? estimateTokens(prompt),
+    };
+  },
+};
+
+export const stubModel: EnrichmentModel = {
+  name: "stub",
+
+  async enrich(signals) {
+    return {
+      results: signals.map((signal) =>
+        normalizeEnrichment(signal.id, {
+          summary: describeSignal(signal).split("\n")[0].slice(0, 200),
+          importance_score: 5,
+          tags: [signal.source, signal.type],
+          impact: "",
+          priority: "medium",
+        })
+      ),
+      tokens: 0,
+    };
+  },
+};
+
+/**
+ * Modèle configuré (ENRICHMENT_MODEL=stub pour un enrichissement local)
+ */
+export function createModel(): EnrichmentModel {
+  if (process.env.ENRICHMENT_MODEL === "stub") {
+    return stubModel;
+  }
+  if (!OPENAI_API_KEY) {
+    throw new Error("OPENAI_API_KEY not configured");
+  }
+  return openAIModel;
+}
@@ -1,19 +1,97 @@
 /**
  * Lambda pour enrichir les signaux avec GPT
- * Déclenché par EventBridge quand un nouveau signal est créé
+ * - mode batch (ENRICHMENT_MODE=batch, défaut) : déclenché par cron, draine les signaux
+ *   'pending' par lots et enrichit plusieurs signaux courts par requête modèle
+ * - mode event : un signal par événement "New Signal"
  */
 
-import { EventBridgeEvent } from "aws-lambda";
+import { Context, EventBridgeEvent } from "aws-lambda";
 import { supabase } from "./supabase";
+import {
+  createModel,
+  describeSignal,
+  Enrichment,
+  EnrichmentModel,
+  estimateTokens,
+  PendingSignal,
+} from "./enrichment";
+import { followerIds, resolveFromCache, saveCache, shareEnrichments } from "./enrichment-cache";
 
-const OPENAI_API_KEY = process.env.OPENAI_API_KEY || "";
+const ENRICHMENT_MODE = process.env.ENRICHMENT_MODE || "batch";
 
-export const handler = async (event: EventBridgeEvent<"New Signal", any>) => {
+// Marge avant le timeout Lambda pour écrire les résultats et relâcher les signaux non traités
+const DEADLINE_MARGIN_MS = 15_000;
+// Sans contexte Lambda (exécution locale)
+const DEFAULT_RUN_MS = 4 * 60_000;
+// Tokens de sortie estimés par signal et instructions communes d'une requête
+const OUTPUT_TOKENS_PER_SIGNAL = 120;
+const PROMPT_OVERHEAD_TOKENS = 150;
+// Bail d'un lot réservé : au-delà, claim_pending_signals le reprend (doit dépasser le timeout Lambda de 300 s)
+const CLAIM_LEASE_SECONDS = 900;
+
+export interface BatchOptions {
+  batchSize: number; // signaux réservés par lot
+  signalsPerRequest: number; // signaux courts par requête modèle
+  shortSignalChars: number; // au-delà, le signal part seul
+  tokenBudget: number; // tokens par invocation
+  requestsPerMinute: number;
+}
+
+export interface DrainStats {
+  claimed: number;
+  enriched: number;
+  failed: number;
+  released: number;
+  requests: number;
+  tokens: number;
+  cacheHits: number; // signaux enrichis sans appel modèle (cache ou doublon du lot)
+  tokensSaved: number;
+}
+
+function envInt(name: string, fallback: number): number {
+  const value = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(value) && value > 0 ? value : fallback;
+}
+
+export function batchOptionsFromEnv(): BatchOptions {
+  return {
+    batchSize: envInt("ENRICHMENT_BATCH_SIZE", 50),
+    signalsPerRequest: envInt("ENRICHMENT_SIGNALS_PER_REQUEST", 8),
+    shortSignalChars: envInt("ENRICHMENT_SHORT_SIGNAL_CHARS", 1500),
+    tokenBudget: envInt("ENRICHMENT_TOKEN_BUDGET", 100_000),
+    requestsPerMinute: envInt("ENRICHMENT_REQUESTS_PER_MINUTE", 60),
+  };
+}
+
+export const handler = async (event: EventBridgeEvent<string, any>, context?: Context) => {
   console.log("Processor IA triggered:", JSON.stringify(event));
 
-  if (!OPENAI_API_KEY) {
-    console.error("OPENAI_API_KEY not configured");
-    return { statusCode: 500, body: JSON.stringify({ error: "OpenAI API key not configured" }) };
+  const scheduled = event["detail-type"] === "Scheduled Event";
+  if (!scheduled && ENRICHMENT_MODE === "batch") {
+    // Le signal reste 'pending' et sera pris par le prochain drainage
+    return { statusCode: 200, body: JSON.stringify({ skipped: true }) };
+  }
+
+  let model: EnrichmentModel;
+  try {
+    model = createModel();
+  } catch (error: any) {
+    console.error(error.message);
+    return { statusCode: 500, body: JSON.stringify({ error: error.message }) };
+  }
+
+  if (scheduled) {
+    try {
+      const deadline = context
+        ? Date.now() + context.getRemainingTimeInMillis() - DEADLINE_MARGIN_MS
+        : Date.now() + DEFAULT_RUN_MS;
+      const stats = await drainPendingSignals(model, batchOptionsFromEnv(), deadline);
+      console.log("Batch enrichment complete:", JSON.stringify(stats));
+      return { statusCode: 200, body: JSON.stringify({ success: true, ...stats }) };
+    } catch (error: any) {
+      console.error("Processor IA batch error:", error);
+      return { statusCode: 500, body: JSON.stringify({ error: error.message }) };
+    }
   }
 
   try {
@@ -35,11 +113,21 @@ export const handler = async (event: EventBridgeEvent<"New Signal", any>) => {
     // 2. Mettre à jour le statut
     await supabase
       .from("signals")
-      .update({ processing_status: "processing" })
+      .update({ processing_status: "processing", claimed_at: new Date().toISOString() })
       .eq("id", signalId);
 
-    // 3. Appeler GPT pour enrichir
-    const enrichment = await enrichWithGPT(signal);
+    // 3. Réutiliser un enrichissement identique ou quasi identique, sinon appeler GPT
+    const resolution = await resolveFromCache([signal]);
+    let enrichment = resolution.hits[0];
+    if (!enrichment) {
+      const { results, tokens } = await model.enrich([signal]);
+      enrichment = results[0];
+      if (!enrichment) {
+        throw new Error(`No enrichment returned for signal ${signalId}`);
+      }
+      shareEnrichments(resolution, results, tokens);
+    }
+    await saveCache(resolution);
 
     // 4. Mettre à jour le signal avec les résultats
     const { error: updateError } = await supabase
@@ -61,7 +149,7 @@ export const handler = async (event: EventBridgeEvent<"New Signal", any>) => {
     return { statusCode: 200, body: JSON.stringify({ success: true }) };
   } catch (error: any) {
     console.error("Processor IA error:", error);
-    
+
     // Marquer comme failed
     try {
       await supabase
@@ -76,90 +164,184 @@ export const handler = async (event: EventBridgeEvent<"New Signal", any>) => {
   }
 };
 
-async function enrichWithGPT(signal: any) {
-  // Construire le prompt selon le type de signal
-  const rawData = signal.raw_data || {};
-  let prompt = "";
-
-  if (signal.source === "rss") {
-    prompt = `Analyze this news article and provide:
-- A one-sentence summary
-- Importance score (1-10)
-- Tags (array: e.g., ["macro", "crypto", "corporate"])
-- Expected market impact (brief description)
-- Priority level (low/medium/high/critical)
-
-Article: ${rawData.title || ""}
-${rawData.description || ""}`;
-  } else if (signal.source === "coinglass") {
-    prompt = `Analyze this crypto derivatives signal and provide:
-- A one-sentence summary
-- Importance score (1-10)
-- Tags (array)
-- Expected market impact
-- Priority level
-
-Type: ${signal.type}
-Data: ${JSON.stringify(rawData)}`;
-  } else if (signal.source === "scrapecreators") {
-    prompt = `Analyze this social media post and provide:
-- A one-sentence summary
-- Importance score (1-10)
-- Tags (array)
-- Expected market impact
-- Priority level
-
-Post: ${rawData.text || ""}`;
-  } else {
-    prompt = `Analyze this signal and provide:
-- A one-sentence summary
-- Importance score (1-10)
-- Tags (array)
-- Expected market impact
-- Priority level
-
-Source: ${signal.source}
-Type: ${signal.type}
-Data: ${JSON.stringify(rawData)}`;
-  }
+/**
+ * Regrouper les signaux courts par requête ; un signal long part seul
+ */
+export function groupSignals(signals: PendingSignal[], options: BatchOptions): PendingSignal[][] {
+  const groups: PendingSignal[][] = [];
+  let current: PendingSignal[] = [];
 
-  const response = await fetch("https://api.openai.com/v1/chat/completions", {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      "Authorization": `Bearer ${OPENAI_API_KEY}`,
-    },
-    body: JSON.stringify({
-      model: "gpt-4o-mini",
-      messages: [
-        {
-          role: "system",
-          content: "You are a financial market analyst. Analyze signals and provide structured JSON responses.",
-        },
-        {
-          role: "user",
-          content: prompt,
-        },
-      ],
-      temperature: 0.3,
-      response_format: { type: "json_object" },
-    }),
-  });
-
-  if (!response.ok) {
-    const error = await response.text();
-    throw new Error(`OpenAI API error: ${error}`);
+  for (const signal of signals) {
+    if (describeSignal(signal).length > options.shortSignalChars) {
+      groups.push([signal]);
+      continue;
+    }
+    current.push(signal);
+    if (current.length >= options.signalsPerRequest) {
+      groups.push(current);
+      current = [];
+    }
   }
+  if (current.length > 0) {
+    groups.push(current);
+  }
+  return groups;
+}
 
-  const result = await response.json();
-  const content = JSON.parse(result.choices[0]?.message?.content || "{}");
+function estimateRequestTokens(group: PendingSignal[]): number {
+  return group.reduce(
+    (total, signal) => total + estimateTokens(describeSignal(signal)) + OUTPUT_TOKENS_PER_SIGNAL,
+    PROMPT_OVERHEAD_TOKENS
+  );
+}
 
-  return {
-    summary: content.summary || "",
-    importance_score: parseInt(content.importance_score || "5"),
-    tags: content.tags || [],
-    impact: content.impact || "",
-    priority: content.priority || "medium",
+/**
+ * Drainer les signaux 'pending' jusqu'à épuisement, du budget tokens ou du temps.
+ * Un lot : réservation (claim_pending_signals), requêtes modèle groupées au débit
+ * configuré, puis écriture groupée (complete_signal_enrichments) ; les signaux non
+ * traités faute de budget, ou d'un lot interrompu par une erreur, repassent en 'pending'.
+ * Un lot perdu avec l'invocation (timeout) est repris à l'expiration du bail.
+ */
+export async function drainPendingSignals(
+  model: EnrichmentModel,
+  options: BatchOptions,
+  deadline: number
+): Promise<DrainStats> {
+  const stats: DrainStats = {
+    claimed: 0,
+    enriched: 0,
+    failed: 0,
+    released: 0,
+    requests: 0,
+    tokens: 0,
+    cacheHits: 0,
+    tokensSaved: 0,
   };
+  const minIntervalMs = 60_000 / options.requestsPerMinute;
+  let lastRequestAt = 0;
+  // Débit maximal du fournisseur (partagé entre les lots)
+  const throttle = async () => {
+    const wait = lastRequestAt + minIntervalMs - Date.now();
+    if (wait > 0) {
+      await new Promise((resolve) => setTimeout(resolve, wait));
+    }
+    lastRequestAt = Date.now();
+  };
+
+  // Pas de réservation si le budget restant ne couvre même plus une requête d'un signal
+  while (Date.now() < deadline && options.tokenBudget - stats.tokens >= PROMPT_OVERHEAD_TOKENS + OUTPUT_TOKENS_PER_SIGNAL) {
+    const { data: claimed, error: claimError } = await supabase.rpc("claim_pending_signals", {
+      p_limit: options.batchSize,
+      p_lease_seconds: CLAIM_LEASE_SECONDS,
+    });
+
+    if (claimError) throw claimError;
+    const signals = (claimed || []) as PendingSignal[];
+    if (signals.length === 0) {
+      break;
+    }
+    stats.claimed += signals.length;
+
+    // Réservés et pas encore finalisés : relâchés si le lot s'interrompt sur une erreur
+    const unsettled = new Set(signals.map((signal) => signal.id));
+    let exhausted = false;
+    try {
+      exhausted = await processClaimedBatch(model, options, deadline, signals, stats, unsettled, throttle);
+    } finally {
+      if (unsettled.size > 0) {
+        await updateStatus(Array.from(unsettled), "pending");
+        stats.released += unsettled.size;
+      }
+    }
+    if (exhausted) {
+      // Budget ou temps épuisé : le reste attend la prochaine invocation
+      break;
+    }
+  }
+
+  return stats;
+}
+
+/**
+ * Un lot réservé : cache, requêtes modèle, écritures. Chaque signal finalisé
+ * (completed, failed ou relâché) est retiré de `unsettled`.
+ * Retourne true si le budget ou le temps est épuisé.
+ */
+async function processClaimedBatch(
+  model: EnrichmentModel,
+  options: BatchOptions,
+  deadline: number,
+  signals: PendingSignal[],
+  stats: DrainStats,
+  unsettled: Set<string>,
+  throttle: () => Promise<void>
+): Promise<boolean> {
+  // Hits de cache et doublons du lot : seuls les représentants partent au modèle
+  const resolution = await resolveFromCache(signals);
+  const enrichments: Enrichment[] = [...resolution.hits];
+  const failedIds: string[] = [];
+  const releasedIds: string[] = [];
+
+  for (const group of groupSignals(resolution.toEnrich, options)) {
+    const groupIds = group.map((signal) => signal.id);
+    if (estimateRequestTokens(group) > options.tokenBudget - stats.tokens || Date.now() >= deadline) {
+      releasedIds.push(...groupIds, ...followerIds(resolution, groupIds));
+      continue;
+    }
+
+    await throttle();
+    stats.requests++;
+
+    try {
+      const { results, tokens } = await model.enrich(group);
+      stats.tokens += tokens;
+      const enrichedIds = new Set(results.map((result) => result.id));
+      const missingIds = groupIds.filter((id) => !enrichedIds.has(id));
+      enrichments.push(...results, ...shareEnrichments(resolution, results, tokens / group.length));
+      failedIds.push(...missingIds, ...followerIds(resolution, missingIds));
+    } catch (error) {
+      console.error(`Enrichment request failed for ${group.length} signals:`, error);
+      failedIds.push(...groupIds, ...followerIds(resolution, groupIds));
+    }
+  }
+
+  if (enrichments.length > 0) {
+    const { data: updated, error: completeError } = await supabase.rpc("complete_signal_enrichments", {
+      p_results: enrichments,
+    });
+    if (completeError) throw completeError;
+    stats.enriched += updated ?? enrichments.length;
+    for (const enrichment of enrichments) {
+      unsettled.delete(enrichment.id);
+    }
+  }
+  await saveCache(resolution);
+  stats.cacheHits += Array.from(resolution.hitCounts.values()).reduce((total, hits) => total + hits, 0);
+  stats.tokensSaved += resolution.tokensSaved;
+  if (failedIds.length > 0) {
+    await updateStatus(failedIds, "failed");
+    stats.failed += failedIds.length;
+    for (const id of failedIds) {
+      unsettled.delete(id);
+    }
+  }
+  if (releasedIds.length > 0) {
+    await updateStatus(releasedIds, "pending");
+    stats.released += releasedIds.length;
+    for (const id of releasedIds) {
+      unsettled.delete(id);
+    }
+  }
+  return releasedIds.length > 0;
 }
 
+async function updateStatus(signalIds: string[], status: "pending" | "failed"): Promise<void> {
+  const { error } = await supabase
+    .from("signals")
+    .update({ processing_status: status })
+    .in("id", signalIds);
+
+  if (error) {
+    console.error(`Error setting ${signalIds.length} signals to ${status}:`, error);
+  }
+}